@@ -9,9 +9,23 @@ from coinwapi.exceptions import (
     InvalidCredentialsError,
     RateLimitError,
     InsufficientBalanceError,
-    InvalidParameterError
+    InvalidParameterError,
+    OrderStatusUnknownError
 )
 
+from coinwapi.rate_limiter import RateLimiter, RateLimitRule
+from coinwapi.orderbook import OrderBook
+from coinwapi.dispatcher import MessageDispatcher
+from coinwapi.kline_store import KlineStore
+from coinwapi.instruments import InstrumentCache
+from coinwapi.tickers import TickerCache
+from coinwapi.units import UnitConverter, convert_quantity, convert_quantities
+from coinwapi.signing import HMACSigner, MD5Signer
+from coinwapi.instrumentation import Instrumentation, RequestTiming, default_instrumentation
+from coinwapi.metrics import MetricsRegistry, LatencyHistogram
+from coinwapi.ws_metrics import WebSocketMetrics
+from coinwapi.simulator import ExchangeSimulator, SimulatorConfig
+
 # 現貨模塊導入
 from coinwapi.spot import (
     SpotClient,
@@ -28,6 +42,8 @@ from coinwapi.spot import (
 # 期貨模塊導入
 from coinwapi.future import (
     FutureClient,
+    AsyncFutureClient,
+    OrderGateway,
     CoinWFutureWebSocketClient,
     FutureWebSocketClient,
     FuturesWebsocketPublic,
@@ -55,6 +71,8 @@ __all__ = [
 
     # 期貨 API
     'FutureClient',
+    'AsyncFutureClient',
+    'OrderGateway',
     'CoinWFutureWebSocketClient',
     'FutureWebSocketClient',     # 向後兼容
    
@@ -63,12 +81,55 @@ __all__ = [
     'FuturesWebsocketPublic',
     'FuturesWebsocketPrivate',
     
+    # 客戶端限頻
+    'RateLimiter',
+    'RateLimitRule',
+    
+    # 本地訂單簿
+    'OrderBook',
+    
+    # WebSocket 消息分發
+    'MessageDispatcher',
+    
+    # K線本地存儲
+    'KlineStore',
+    
+    # 交易品種元數據緩存
+    'InstrumentCache',
+    
+    # ticker 緩存
+    'TickerCache',
+    
+    # 合約數量單位換算
+    'UnitConverter',
+    'convert_quantity',
+    'convert_quantities',
+    
+    # 請求簽名
+    'HMACSigner',
+    'MD5Signer',
+    
+    # 請求計時
+    'Instrumentation',
+    'RequestTiming',
+    'default_instrumentation',
+    
+    # 請求指標
+    'MetricsRegistry',
+    'LatencyHistogram',
+    'WebSocketMetrics',
+    
+    # 本地交易所模擬器
+    'ExchangeSimulator',
+    'SimulatorConfig',
+    
     # 異常類
     'CoinWAPIError',
     'InvalidCredentialsError',
     'RateLimitError',
     'InsufficientBalanceError',
-    'InvalidParameterError'
+    'InvalidParameterError',
+    'OrderStatusUnknownError'
 ]
 
 # 快速使用指南
@@ -0,0 +1,541 @@
+"""
+CoinW 基準測試
+
+用法:
+    python -m coinwapi.benchmark [--quick] [--output results.json] [--compare baseline.json]
+
+針對 REST 和 WebSocket 的熱點路徑計時：
+- 請求簽名（_generate_signature、generate_signature）
+- 請求構建（_prepare_request）與響應解析（_parse_response）
+- _submit_request 在 1、8、64 並發下對本地模擬器的吞吐量和延遲分佈
+- 各類 WebSocket 消息的解碼（codec.loads）與分發（客戶端 _on_message）
+- 訂單簿更新速率（期貨 depth 全量、現貨增量）
+
+所有請求都發往 ExchangeSimulator，不需要網絡。結果保存為 JSON，
+以 --compare 與之前版本的結果比較，吞吐量下降超過閾值時返回非零退出碼
+"""
+
+import gc
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from . import codec
+from .future.http_manager import ContractHTTPConfig, _ContractHTTPManager
+from .future.ws_client import CoinWFutureWebSocketClient
+from .metrics import LatencyHistogram
+from .orderbook import OrderBook
+from .simulator import ExchangeSimulator, SimulatorConfig
+from .spot.http_manager import SpotHTTPManager
+from .spot.orderbook import SpotOrderBookBuilder
+from .spot.ws_client import CoinWSpotWebSocketClient
+
+logger = logging.getLogger(__name__)
+
+# 結果格式版本，比較時只比較相同版本的結果
+SCHEMA_VERSION = 1
+
+DEFAULT_CONCURRENCY = (1, 8, 64)
+
+FUTURE_WS_TYPES = ("ticker_swap", "depth", "fills", "index_price", "mark_price", "funding_rate", "order")
+SPOT_WS_TYPES = ("ticker", "ticker_all", "depth_snapshot", "depth", "fills")
+
+
+# ==================== 計時 ====================
+
+def measure(func: Callable[[], Any], min_time: float = 0.2, rounds: int = 5) -> Dict[str, Any]:
+    """
+    重複調用 func 計時（與 timeit 一樣在計時期間關閉 GC）
+
+    先校準每輪的調用次數使一輪約為 min_time / rounds 秒，再運行 rounds 輪，取中位數
+
+    Args:
+        func: 無參數的被測函數
+        min_time: 總計時長（秒）
+        rounds: 輪數
+
+    Returns:
+        {'ops_per_sec', 'ns_per_op', 'min_ns', 'max_ns', 'iterations', 'rounds'}
+    """
+    target = min_time / rounds
+    iterations = 1
+    while True:
+        elapsed = _run(func, iterations)
+        if elapsed >= target / 10 or iterations >= 1 << 24:
+            break
+        iterations *= 10
+    iterations = max(1, int(iterations * target / max(elapsed, 1e-9)))
+
+    samples = sorted(_run(func, iterations) / iterations for _ in range(rounds))
+    median = samples[len(samples) // 2]
+    return {
+        "ops_per_sec": 1 / median if median else float("inf"),
+        "ns_per_op": median * 1e9,
+        "min_ns": samples[0] * 1e9,
+        "max_ns": samples[-1] * 1e9,
+        "iterations": iterations,
+        "rounds": rounds,
+    }
+
+
+def _run(func: Callable[[], Any], iterations: int) -> float:
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = perf_counter()
+        for _ in range(iterations):
+            func()
+        return perf_counter() - started
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _cycle(items: Sequence[Any], consume: Callable[[Any], Any]) -> Callable[[], Any]:
+    """依次把 items 交給 consume 的無參數函數（循環使用）"""
+    state = {"index": 0}
+    count = len(items)
+
+    def call():
+        index = state["index"]
+        state["index"] = index + 1 if index + 1 < count else 0
+        return consume(items[index])
+
+    return call
+
+
+# ==================== 各項測試 ====================
+
+def bench_signing(sim: ExchangeSimulator, min_time: float) -> Dict[str, Dict[str, Any]]:
+    """HMAC（合約）和 MD5（現貨）簽名"""
+    manager = _ContractHTTPManager(sim.config.api_key, sim.config.secret_key, ContractHTTPConfig(rate_limit=False))
+    spot = SpotHTTPManager(api_key=sim.config.api_key, secret_key=sim.config.secret_key, rate_limiter=None)
+    timestamp = str(int(time.time() * 1000))
+    query = {"instrument": "BTC", "positionType": "plan", "page": 1, "pageSize": 20}
+    order = {
+        "instrument": "BTC", "direction": "long", "leverage": 10, "quantityUnit": 0, "quantity": "100",
+        "positionModel": 1, "positionType": "plan", "openPrice": "90000", "thirdOrderId": "a" * 32,
+    }
+    spot_order = {"command": "doTrade", "symbol": "BTC_USDT", "type": "0", "isMarket": "false",
+                  "amount": "0.01", "rate": "90000"}
+    try:
+        return {
+            "signing.future.get": measure(
+                lambda: manager._generate_signature("GET", "/v1/perpum/orders/open", query, timestamp), min_time
+            ),
+            "signing.future.post": measure(
+                lambda: manager._generate_signature("POST", "/v1/perpum/order", order, timestamp), min_time
+            ),
+            "signing.spot.md5": measure(lambda: spot.generate_signature(spot_order), min_time),
+        }
+    finally:
+        manager.close()
+
+
+def bench_build_parse(sim: ExchangeSimulator, min_time: float) -> Dict[str, Dict[str, Any]]:
+    """請求構建（含簽名和序列化）與響應解析"""
+    manager = _ContractHTTPManager(sim.config.api_key, sim.config.secret_key, ContractHTTPConfig(rate_limit=False))
+    manager.logger.setLevel(logging.WARNING)
+    query = {"instrument": "BTC", "positionType": "plan"}
+    order = {
+        "instrument": "BTC", "direction": "long", "leverage": 10, "quantityUnit": 0, "quantity": "100",
+        "positionModel": 1, "positionType": "plan", "openPrice": "90000",
+    }
+    with sim.market.lock:
+        # 先推進幾步，使成交記錄不為空
+        for _ in range(20):
+            sim.market.future_book("BTC").step()
+    ticker = json.dumps({"code": 0, "data": sim._future_ticker({}), "msg": ""})
+    depth = json.dumps({"code": 0, "data": sim._future_depth({"base": "BTC"}), "msg": ""})
+    trades = json.dumps({"code": 0, "data": sim._future_trades({"base": "BTC"}), "msg": ""})
+    try:
+        return {
+            "build.future.get_public": measure(
+                lambda: manager._prepare_request("GET", "/v1/perpumPublic/ticker", {"instrument": "BTC"}, False),
+                min_time
+            ),
+            "build.future.get_signed": measure(
+                lambda: manager._prepare_request("GET", "/v1/perpum/orders/open", query, True), min_time
+            ),
+            "build.future.post_signed": measure(
+                lambda: manager._prepare_request("POST", "/v1/perpum/order", order, True), min_time
+            ),
+            "parse.future.ticker": _with_bytes(measure(lambda: manager._parse_response(200, ticker), min_time), ticker),
+            "parse.future.depth": _with_bytes(measure(lambda: manager._parse_response(200, depth), min_time), depth),
+            "parse.future.trades": _with_bytes(measure(lambda: manager._parse_response(200, trades), min_time), trades),
+        }
+    finally:
+        manager.close()
+
+
+def _with_bytes(result: Dict[str, Any], text: str) -> Dict[str, Any]:
+    result["bytes"] = len(text.encode("utf-8"))
+    return result
+
+
+def bench_submit(
+    sim: ExchangeSimulator,
+    concurrency: Sequence[int],
+    requests_per_level: int
+) -> Dict[str, Dict[str, Any]]:
+    """
+    _submit_request 的吞吐量和延遲（已簽名的 GET 請求，經本地模擬器往返）
+    """
+    results = {}
+    for workers in concurrency:
+        manager = _ContractHTTPManager(
+            sim.config.api_key,
+            sim.config.secret_key,
+            ContractHTTPConfig(base_url=sim.base_url, rate_limit=False, pool_size=max(workers, 10), max_retries=0)
+        )
+        manager.logger.setLevel(logging.WARNING)
+        query = {"instrument": "BTC", "positionType": "plan"}
+
+        def call():
+            return manager._submit_request("GET", "/v1/perpum/orders/open", query, True)
+
+        # 預熱：建立連接
+        for _ in range(min(workers, 10)):
+            call()
+
+        total = max(requests_per_level, workers * 4)
+        per_worker = [total // workers + (1 if index < total % workers else 0) for index in range(workers)]
+        histogram = LatencyHistogram()
+        lock = threading.Lock()
+        errors = []
+
+        def worker(count: int) -> None:
+            latencies = []
+            for _ in range(count):
+                started = perf_counter()
+                try:
+                    call()
+                except Exception as e:
+                    errors.append(type(e).__name__)
+                    continue
+                latencies.append(perf_counter() - started)
+            with lock:
+                for latency in latencies:
+                    histogram.record(latency)
+
+        started = perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(worker, per_worker))
+        elapsed = perf_counter() - started
+        manager.close()
+
+        results[f"submit.future.get_signed.c{workers}"] = {
+            "ops_per_sec": total / elapsed,
+            "concurrency": workers,
+            "requests": total,
+            "seconds": elapsed,
+            "errors": len(errors),
+            "latency": histogram.snapshot(),
+        }
+    return results
+
+
+def _future_messages(sim: ExchangeSimulator, steps: int) -> Dict[str, List[str]]:
+    """以模擬器生成各類型的期貨推送原始文本"""
+    messages: Dict[str, List[str]] = {message_type: [] for message_type in FUTURE_WS_TYPES}
+    for _ in range(steps):
+        with sim.market.lock:
+            changes = {name: book.step() for name, book in sim.market.futures.items()}
+            for message_type in FUTURE_WS_TYPES[:-1]:
+                message = sim._future_message((message_type, "BTC"), changes)
+                if message is not None:
+                    messages[message_type].append(json.dumps(message, separators=(",", ":")))
+    order = sim._new_future_order({
+        "instrument": "BTC", "direction": "long", "leverage": 10, "quantity": "100", "positionType": "plan",
+        "openPrice": "90000",
+    })
+    messages["order"].append(json.dumps({"biz": "futures", "pairCode": "BTC", "data": [order], "type": "order"}))
+    return messages
+
+
+def _spot_messages(sim: ExchangeSimulator, steps: int) -> Dict[str, List[str]]:
+    """以模擬器生成各類型的現貨推送原始文本（depth 為連續的增量）"""
+    messages: Dict[str, List[str]] = {message_type: [] for message_type in SPOT_WS_TYPES}
+    pair_code = sim.market.spot_ids["BTC_USDT"]
+    for _ in range(steps):
+        with sim.market.lock:
+            changes = {symbol: book.step() for symbol, book in sim.market.spot.items()}
+            for message_type in SPOT_WS_TYPES:
+                message = sim._spot_message(
+                    (message_type, None if message_type == "ticker_all" else pair_code), changes, {}
+                )
+                if message is not None:
+                    messages[message_type].append(json.dumps(message, separators=(",", ":")))
+    return messages
+
+
+def bench_websocket(sim: ExchangeSimulator, min_time: float, steps: int) -> Dict[str, Dict[str, Any]]:
+    """各類 WebSocket 消息的解碼與分發（不經過網絡，直接調用客戶端的消息處理）"""
+    results = {}
+
+    def noop(message):
+        pass
+
+    future_client = CoinWFutureWebSocketClient(on_message=noop)
+    for message_type, raws in _future_messages(sim, steps).items():
+        if not raws:
+            continue
+        size = sum(len(raw) for raw in raws) // len(raws)
+        results[f"ws.future.decode.{message_type}"] = _with_size(measure(_cycle(raws, codec.loads), min_time), size)
+        results[f"ws.future.dispatch.{message_type}"] = _with_size(
+            measure(_cycle(raws, lambda raw: future_client._on_message(None, raw)), min_time), size
+        )
+
+    spot_client = CoinWSpotWebSocketClient(method=2, on_message=noop, decode_data=True)
+    for message_type, raws in _spot_messages(sim, steps).items():
+        if not raws:
+            continue
+        size = sum(len(raw) for raw in raws) // len(raws)
+        results[f"ws.spot.decode.{message_type}"] = _with_size(measure(_cycle(raws, codec.loads), min_time), size)
+        results[f"ws.spot.dispatch.{message_type}"] = _with_size(
+            measure(_cycle(raws, lambda raw: spot_client._on_websocket_message(None, raw)), min_time), size
+        )
+    return results
+
+
+def _with_size(result: Dict[str, Any], size: int) -> Dict[str, Any]:
+    result["bytes"] = size
+    return result
+
+
+def bench_orderbook(sim: ExchangeSimulator, min_time: float, steps: int) -> Dict[str, Dict[str, Any]]:
+    """訂單簿更新速率：期貨 depth 全量替換、現貨快照加增量"""
+    results = {}
+
+    with sim.market.lock:
+        depths = []
+        for _ in range(steps):
+            changes = {name: book.step() for name, book in sim.market.futures.items()}
+            depths.append(sim._future_message(("depth", "BTC"), changes)["data"])
+    book = OrderBook("BTC")
+    results["orderbook.future.depth"] = measure(_cycle(depths, book.apply_futures_depth), min_time)
+    results["orderbook.future.depth"]["levels"] = len(depths[0]["bids"]) + len(depths[0]["asks"])
+
+    pair_code = sim.market.spot_ids["BTC_USDT"]
+    with sim.market.lock:
+        snapshot = json.loads(sim._spot_message(("depth_snapshot", pair_code), {}, {})["data"])
+        deltas = []
+        while len(deltas) < steps:
+            changes = {symbol: spot_book.step() for symbol, spot_book in sim.market.spot.items()}
+            message = sim._spot_message(("depth", pair_code), changes, {})
+            if message is not None:
+                deltas.append(json.loads(message["data"]))
+
+    builder = SpotOrderBookBuilder(pair_code)
+    state = {"index": len(deltas)}
+
+    def apply_delta():
+        # 用完一遍增量後以同一快照重新開始
+        if state["index"] == len(deltas):
+            builder.reset()
+            builder.on_snapshot(snapshot)
+            state["index"] = 0
+        builder.on_delta(deltas[state["index"]])
+        state["index"] += 1
+
+    results["orderbook.spot.delta"] = measure(apply_delta, min_time)
+    results["orderbook.spot.delta"]["levels"] = (
+        sum(len(delta["bids"]) + len(delta["asks"]) for delta in deltas) / len(deltas)
+    )
+    if builder.gaps:
+        logger.warning(f"現貨訂單簿出現 {builder.gaps} 次序列號缺口，結果可能無效")
+    return results
+
+
+# ==================== 運行與比較 ====================
+
+SUITES = ("signing", "build", "submit", "ws", "orderbook")
+
+
+def run_benchmarks(
+    quick: bool = False,
+    suites: Optional[Sequence[str]] = None,
+    concurrency: Sequence[int] = DEFAULT_CONCURRENCY,
+    requests_per_level: Optional[int] = None,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    運行基準測試
+
+    Args:
+        quick: 縮短計時（用於冒煙測試，結果波動較大）
+        suites: 要運行的測試組（預設全部）: signing, build, submit, ws, orderbook
+        concurrency: _submit_request 的並發數
+        requests_per_level: 每個並發級別的請求數
+        seed: 模擬器隨機數種子，保證各版本使用相同的消息
+
+    Returns:
+        {'meta': {...}, 'results': {測試名: {'ops_per_sec', ...}}}
+    """
+    suites = list(suites or SUITES)
+    unknown = [suite for suite in suites if suite not in SUITES]
+    if unknown:
+        raise ValueError(f"未知的測試組: {', '.join(unknown)}（可選: {', '.join(SUITES)}）")
+
+    min_time = 0.05 if quick else 0.5
+    steps = 50 if quick else 500
+    if requests_per_level is None:
+        requests_per_level = 200 if quick else 2000
+
+    results: Dict[str, Dict[str, Any]] = {}
+    started = time.time()
+    with ExchangeSimulator(SimulatorConfig(seed=seed, push_interval=3600)) as sim:
+        if "signing" in suites:
+            results.update(bench_signing(sim, min_time))
+        if "build" in suites:
+            results.update(bench_build_parse(sim, min_time))
+        if "submit" in suites:
+            results.update(bench_submit(sim, concurrency, requests_per_level))
+        if "ws" in suites:
+            results.update(bench_websocket(sim, min_time, steps))
+        if "orderbook" in suites:
+            results.update(bench_orderbook(sim, min_time, steps))
+
+    return {"meta": _meta(quick, suites, concurrency, seed, time.time() - started), "results": results}
+
+
+def _meta(quick: bool, suites: Sequence[str], concurrency: Sequence[int], seed: int, duration: float) -> Dict[str, Any]:
+    from . import __version__
+    try:
+        import requests
+        requests_version = requests.__version__
+    except ImportError:  # requests 為必需依賴，這裡只是防禦
+        requests_version = None
+    return {
+        "schema": SCHEMA_VERSION,
+        "version": __version__,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "duration": duration,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "json_backend": codec.backend,
+        "requests": requests_version,
+        "quick": quick,
+        "suites": list(suites),
+        "concurrency": list(concurrency),
+        "seed": seed,
+    }
+
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.1
+) -> List[Dict[str, Any]]:
+    """
+    按 ops_per_sec 比較兩次結果
+
+    Args:
+        baseline: 基準結果（run_benchmarks 的返回值或其 JSON）
+        current: 當前結果
+        threshold: 吞吐量下降超過該比例視為退化
+
+    Returns:
+        [{'name', 'baseline', 'current', 'change', 'regression'}]，只包含兩邊都有的測試
+    """
+    if baseline.get("meta", {}).get("schema") != current.get("meta", {}).get("schema"):
+        raise ValueError("結果格式版本不同，無法比較")
+    rows = []
+    old_results, new_results = baseline.get("results", {}), current.get("results", {})
+    for name in sorted(set(old_results) & set(new_results)):
+        old, new = old_results[name]["ops_per_sec"], new_results[name]["ops_per_sec"]
+        change = new / old - 1 if old else 0.0
+        rows.append({
+            "name": name,
+            "baseline": old,
+            "current": new,
+            "change": change,
+            "regression": change < -threshold,
+        })
+    return rows
+
+
+def format_results(results: Dict[str, Dict[str, Any]]) -> str:
+    """結果表格（每行一個測試）"""
+    lines = [f"{'benchmark':<40} {'ops/s':>14} {'ns/op':>12}  detail"]
+    for name, result in results.items():
+        ops = result["ops_per_sec"]
+        if "latency" in result:
+            latency = result["latency"]
+            detail = (
+                f"p50={latency['p50'] * 1000:.2f}ms p99={latency['p99'] * 1000:.2f}ms errors={result['errors']}"
+            )
+            lines.append(f"{name:<40} {ops:>14,.1f} {'':>12}  {detail}")
+        else:
+            detail = f"{result['bytes']}B" if "bytes" in result else (
+                f"{result['levels']:.0f} levels" if "levels" in result else ""
+            )
+            lines.append(f"{name:<40} {ops:>14,.1f} {result['ns_per_op']:>12,.0f}  {detail}")
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'benchmark':<40} {'baseline':>14} {'current':>14} {'change':>9}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(
+            f"{row['name']:<40} {row['baseline']:>14,.1f} {row['current']:>14,.1f} {row['change']:>+8.1%}{flag}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m coinwapi.benchmark", description="CoinW SDK 基準測試")
+    parser.add_argument("-o", "--output", help="結果 JSON 的保存路徑（預設為 benchmark-<時間>.json）")
+    parser.add_argument("--quick", action="store_true", help="縮短計時，用於冒煙測試")
+    parser.add_argument("--suite", action="append", choices=SUITES, help="只運行指定的測試組（可重複）")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=list(DEFAULT_CONCURRENCY),
+                        help="_submit_request 的並發數")
+    parser.add_argument("--requests", type=int, help="每個並發級別的請求數")
+    parser.add_argument("--json-backend", help="WebSocket 解碼使用的 JSON 後端（orjson/ujson/json）")
+    parser.add_argument("--seed", type=int, default=0, help="模擬器隨機數種子")
+    parser.add_argument("--compare", metavar="BASELINE", help="與之前保存的結果比較")
+    parser.add_argument("--threshold", type=float, default=0.1, help="視為退化的吞吐量下降比例（預設 0.1）")
+    args = parser.parse_args(argv)
+
+    if args.json_backend:
+        codec.set_backend(args.json_backend)
+
+    report = run_benchmarks(
+        quick=args.quick,
+        suites=args.suite,
+        concurrency=args.concurrency,
+        requests_per_level=args.requests,
+        seed=args.seed
+    )
+    print(format_results(report["results"]))
+
+    output = args.output or time.strftime("benchmark-%Y%m%d-%H%M%S.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n結果已保存: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare_results(baseline, report, args.threshold)
+        print()
+        print(format_comparison(rows))
+        regressions = [row["name"] for row in rows if row["regression"]]
+        if regressions:
+            print(f"\n{len(regressions)} 項吞吐量下降超過 {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+CoinW WebSocket 消息解碼
+
+可替換的 JSON 解碼後端：預設按 orjson > ujson > json 的順序選用已安裝的最快實現，
+並提供在完整解碼前按消息類型快速過濾的工具
+"""
+
+import json
+import re
+from typing import Any, Callable, Collection, Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # orjson 為可選依賴
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # ujson 為可選依賴
+    ujson = None
+
+
+_BACKENDS: Dict[str, Optional[Callable[[Any], Any]]] = {
+    "orjson": orjson.loads if orjson is not None else None,
+    "ujson": ujson.loads if ujson is not None else None,
+    "json": json.loads,
+}
+
+# 匹配消息中的 "type":"xxx" 字段；現貨嵌套的 data 字符串中引號已轉義，不會被匹配
+_TYPE_PATTERN = re.compile(r'"type"\s*:\s*"([^"\\]*)"')
+
+# 匹配毫秒時間戳字段，包括現貨嵌套 data 字符串中轉義了引號的形式
+_TIMESTAMP_PATTERN = re.compile(r'\\?"(?:time|ts|timestamp|createdDate)\\?"\s*:\s*\\?"?(\d{13})')
+
+# 當前使用的解碼函數及後端名稱（通過 set_backend 切換，調用方應以 codec.loads 的形式訪問）
+loads: Callable[[Any], Any] = json.loads
+backend: str = "json"
+
+
+def set_backend(name: Optional[str] = None) -> str:
+    """
+    切換 JSON 解碼後端
+
+    Args:
+        name: "orjson"、"ujson" 或 "json"；為空時自動選擇已安裝的最快後端
+
+    Returns:
+        實際使用的後端名稱
+
+    Raises:
+        ValueError: 指定的後端不存在或未安裝
+    """
+    global loads, backend
+
+    if name is None:
+        name = next(key for key, func in _BACKENDS.items() if func is not None)
+
+    func = _BACKENDS.get(name)
+    if func is None:
+        raise ValueError(f"JSON 後端不可用: {name}（可用: {', '.join(available_backends())}）")
+
+    loads = func
+    backend = name
+    return name
+
+
+def available_backends() -> list:
+    """已安裝的 JSON 後端"""
+    return [key for key, func in _BACKENDS.items() if func is not None]
+
+
+def peek_types(raw: str) -> set:
+    """
+    不解析完整 JSON，快速提取消息中出現的 type 字段值
+
+    Args:
+        raw: 原始消息文本
+
+    Returns:
+        type 值集合（可能包含嵌套對象中的 type）
+    """
+    return set(_TYPE_PATTERN.findall(raw))
+
+
+def should_skip(raw: str, wanted_types: Collection[str]) -> bool:
+    """
+    判斷消息是否可以跳過解碼
+
+    僅當消息帶有 type 字段且所有 type 值都不在 wanted_types 中時才跳過，
+    沒有 type 字段的消息（登錄回應等）總是需要解碼
+
+    Args:
+        raw: 原始消息文本
+        wanted_types: 已訂閱的消息類型
+
+    Returns:
+        是否可以跳過
+    """
+    types = _TYPE_PATTERN.findall(raw)
+    if not types:
+        return False
+    for message_type in types:
+        if message_type in wanted_types:
+            return False
+    return True
+
+
+def peek_timestamp(raw: str) -> Optional[int]:
+    """
+    不解析完整 JSON，提取消息中第一個毫秒時間戳（time/ts/timestamp/createdDate 字段）
+
+    Args:
+        raw: 原始消息文本
+
+    Returns:
+        毫秒時間戳，沒有時返回 None
+    """
+    match = _TIMESTAMP_PATTERN.search(raw)
+    return int(match.group(1)) if match else None
+
+
+def decode_nested(message: Dict[str, Any], key: str = "data") -> Dict[str, Any]:
+    """
+    就地解碼消息中以 JSON 字符串形式嵌套的字段（如現貨推送的 data）
+
+    Args:
+        message: 已解碼的外層消息
+        key: 嵌套字段名
+
+    Returns:
+        同一個消息對象
+    """
+    value = message.get(key)
+    if isinstance(value, str) and value[:1] in ("{", "["):
+        message[key] = loads(value)
+    return message
+
+
+set_backend()
@@ -0,0 +1,172 @@
+"""
+CoinW WebSocket 消息合併
+
+對只關心最新值的行情流（ticker、標記價格、指數價格、資金費率等），
+按 (type, pairCode) 只保留最新一條原始消息，在消費時才解碼，中間被覆蓋的消息不會被解碼
+"""
+
+import logging
+import re
+import threading
+from typing import Any, Callable, Collection, Dict, Optional, Tuple
+
+from . import codec
+
+logger = logging.getLogger(__name__)
+
+_PAIR_CODE_PATTERN = re.compile(r'"pairCode"\s*:\s*"([^"\\]*)"')
+
+Key = Tuple[str, Optional[str]]
+
+
+class Conflator:
+    """
+    按 (type, pairCode) 合併的最新值緩存
+
+    接收線程調用 offer() 存入原始消息（只做輕量的字段提取，不解碼），
+    消費方通過 latest()/pop_updates() 拉取，或通過 start() 以固定間隔回調
+    """
+
+    def __init__(self, types: Collection[str], decoder: Optional[Callable[[str], Any]] = None):
+        """
+        Args:
+            types: 需要合併的消息類型，如 ("ticker_swap", "mark_price")
+            decoder: 原始消息的解碼函數，預設使用 codec.loads
+        """
+        self.types = frozenset(types)
+        self._decoder = decoder
+        self._raw: Dict[Key, str] = {}
+        self._decoded: Dict[Key, Any] = {}
+        self._dirty: Dict[Key, None] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        # 統計
+        self._received = 0
+        self._conflated = 0
+        self._delivered = 0
+
+    def _decode(self, raw: str) -> Any:
+        return self._decoder(raw) if self._decoder is not None else codec.loads(raw)
+
+    def offer(self, raw: str) -> bool:
+        """
+        存入原始消息
+
+        Args:
+            raw: 原始消息文本
+
+        Returns:
+            消息是否已被合併緩存；False 表示不屬於合併類型（或為訂閱確認），應按正常流程處理
+        """
+        if '"channel"' in raw:
+            return False  # 訂閱/取消訂閱的確認消息
+
+        matched = codec.peek_types(raw) & self.types
+        if len(matched) != 1:
+            return False
+
+        match = _PAIR_CODE_PATTERN.search(raw)
+        key = (matched.pop(), match.group(1).upper() if match else None)
+
+        with self._lock:
+            self._received += 1
+            if key in self._dirty:
+                self._conflated += 1
+            self._raw[key] = raw
+            self._decoded.pop(key, None)
+            self._dirty[key] = None
+        return True
+
+    def _get(self, key: Key) -> Any:
+        """讀取（必要時解碼）指定鍵的最新消息，需在鎖內調用"""
+        message = self._decoded.get(key)
+        if message is None:
+            raw = self._raw.get(key)
+            if raw is None:
+                return None
+            message = self._decoded[key] = self._decode(raw)
+        return message
+
+    def latest(self, message_type: str, pair_code: Optional[str] = None) -> Optional[Any]:
+        """
+        獲取最新消息
+
+        Args:
+            message_type: 消息類型
+            pair_code: 交易對/合約代碼（不區分大小寫）
+
+        Returns:
+            解碼後的最新消息，尚未收到時返回 None
+        """
+        key = (message_type, pair_code.upper() if pair_code else None)
+        with self._lock:
+            self._dirty.pop(key, None)
+            return self._get(key)
+
+    def pop_updates(self) -> Dict[Key, Any]:
+        """
+        獲取自上次拉取以來有更新的所有消息
+
+        Returns:
+            {(type, pairCode): 解碼後的最新消息}
+        """
+        with self._lock:
+            if not self._dirty:
+                return {}
+            keys = list(self._dirty)
+            self._dirty.clear()
+            updates = {key: self._get(key) for key in keys}
+            self._delivered += len(updates)
+        return updates
+
+    def start(self, callback: Callable[[Any], None], interval: float) -> None:
+        """
+        啟動節流回調線程
+
+        Args:
+            callback: 回調函數，每個有更新的 (type, pairCode) 調用一次，參數為最新消息
+            interval: 回調間隔（秒）
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(callback, interval),
+            name="coinw-conflator",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 1) -> None:
+        """停止節流回調線程"""
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self, callback: Callable[[Any], None], interval: float) -> None:
+        while not self._stop_event.wait(interval):
+            for message in self.pop_updates().values():
+                try:
+                    callback(message)
+                except Exception as e:
+                    logger.error(f"處理合併消息時出錯: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        合併統計
+
+        Returns:
+            {'received': 收到的消息數, 'conflated': 未被消費即被覆蓋的消息數,
+             'delivered': 已交付的消息數, 'keys': 緩存的 (type, pairCode) 數}
+        """
+        with self._lock:
+            return {
+                'received': self._received,
+                'conflated': self._conflated,
+                'delivered': self._delivered,
+                'keys': len(self._raw),
+            }
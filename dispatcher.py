@@ -0,0 +1,233 @@
+"""
+CoinW WebSocket 消息分發
+
+在 WebSocket 接收線程和用戶回調之間加入有界隊列和工作線程池，
+避免慢速回調阻塞接收線程導致心跳超時斷線
+"""
+
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 隊列滿時的處理策略
+DROP_OLDEST = "drop_oldest"  # 丟棄最早的消息
+CONFLATE = "conflate"        # 隊列滿時以新消息覆蓋同主題排隊中的最新一條，沒有同主題消息時丟棄最早的消息
+BLOCK = "block"              # 阻塞接收線程直到隊列有空位
+
+OVERFLOW_POLICIES = (DROP_OLDEST, CONFLATE, BLOCK)
+
+
+class _Shard:
+    """單個工作線程的有界隊列"""
+
+    def __init__(self, maxsize: int, conflate: bool):
+        self.maxsize = maxsize
+        self.conflate = conflate
+        # 合併模式下以遞增序號為鍵存放 (主題, 消息)，並記錄每個主題排隊中最新一條的序號，
+        # 隊列滿時新消息覆蓋該條但保持排隊位置
+        self.queue = OrderedDict() if conflate else deque()
+        self.latest: Dict[Hashable, int] = {}
+        self.sequence = 0
+        self.condition = threading.Condition()
+        self.thread: Optional[threading.Thread] = None
+        # 僅由本分片的工作線程更新
+        self.dispatched = 0
+        self.errors = 0
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+
+class MessageDispatcher:
+    """
+    有界消息分發器
+
+    消息按主題分片到固定的工作線程，保證同一主題的消息按接收順序處理；
+    不同主題可以在多個工作線程上並行處理
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any], None],
+        workers: int = 1,
+        maxsize: int = 10000,
+        policy: str = DROP_OLDEST,
+        name: str = "coinw-dispatch"
+    ):
+        """
+        Args:
+            handler: 在工作線程中處理消息的函數
+            workers: 工作線程數
+            maxsize: 隊列容量（平均分配到各工作線程）
+            policy: 隊列滿時的處理策略: "drop_oldest"、"conflate" 或 "block"
+            name: 工作線程名稱前綴
+        """
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"無效的隊列策略: {policy}，可選: {', '.join(OVERFLOW_POLICIES)}")
+        if workers < 1:
+            raise ValueError("workers 必須大於 0")
+
+        self._handler = handler
+        self._policy = policy
+        self._name = name
+        shard_size = max(1, maxsize // workers)
+        self._shards: List[_Shard] = [_Shard(shard_size, policy == CONFLATE) for _ in range(workers)]
+        self._running = False
+
+        # 統計
+        self._submitted = 0
+        self._dropped = 0
+        self._conflated = 0
+        self._max_depth = 0
+
+    def start(self) -> None:
+        """啟動工作線程（重複調用無副作用）"""
+        if self._running:
+            return
+        self._running = True
+        for index, shard in enumerate(self._shards):
+            shard.thread = threading.Thread(
+                target=self._run,
+                args=(shard,),
+                name=f"{self._name}-{index}",
+                daemon=True
+            )
+            shard.thread.start()
+
+    def stop(self, drain: bool = True, timeout: Optional[float] = 1) -> None:
+        """
+        停止工作線程
+
+        Args:
+            drain: 是否先處理完隊列中剩餘的消息
+            timeout: 等待每個工作線程結束的秒數
+        """
+        if not self._running:
+            return
+        self._running = False
+        for shard in self._shards:
+            with shard.condition:
+                if not drain:
+                    shard.queue.clear()
+                    shard.latest.clear()
+                shard.condition.notify_all()
+        for shard in self._shards:
+            if shard.thread is not None and shard.thread is not threading.current_thread():
+                shard.thread.join(timeout)
+            shard.thread = None
+
+    def submit(self, topic: Hashable, message: Any) -> None:
+        """
+        提交消息
+
+        隊列未滿時總是排隊；已滿時按策略丟棄最早的消息、覆蓋同主題排隊中的最新消息或阻塞等待
+
+        Args:
+            topic: 消息主題，決定分片和合併
+            message: 消息
+
+        Raises:
+            RuntimeError: 分發器未啟動或已停止（包括阻塞等待期間被停止）
+        """
+        shards = self._shards
+        shard = shards[hash(topic) % len(shards)] if len(shards) > 1 else shards[0]
+        queue = shard.queue
+
+        with shard.condition:
+            if not self._running:
+                raise RuntimeError(f"{self._name} 分發器未啟動")
+
+            if shard.conflate:
+                if len(queue) >= shard.maxsize:
+                    pending = shard.latest.get(topic)
+                    if pending is not None:
+                        queue[pending] = (topic, message)
+                        self._submitted += 1
+                        self._conflated += 1
+                        return
+                    self._pop_conflated(shard)
+                    self._dropped += 1
+                shard.sequence += 1
+                queue[shard.sequence] = (topic, message)
+                shard.latest[topic] = shard.sequence
+            else:
+                if len(queue) >= shard.maxsize:
+                    if self._policy == BLOCK:
+                        while len(queue) >= shard.maxsize and self._running:
+                            shard.condition.wait()
+                        if not self._running:
+                            raise RuntimeError(f"{self._name} 分發器已停止")
+                    else:
+                        queue.popleft()
+                        self._dropped += 1
+                queue.append(message)
+
+            self._submitted += 1
+            depth = len(queue)
+            if depth > self._max_depth:
+                self._max_depth = depth
+            shard.condition.notify_all()
+
+    def _run(self, shard: _Shard) -> None:
+        """工作線程主循環"""
+        queue = shard.queue
+        condition = shard.condition
+
+        while True:
+            with condition:
+                while not queue and self._running:
+                    condition.wait()
+                if not queue:
+                    return
+                if shard.conflate:
+                    message = self._pop_conflated(shard)
+                else:
+                    message = queue.popleft()
+                if self._policy == BLOCK:
+                    condition.notify_all()
+
+            try:
+                self._handler(message)
+            except Exception as e:
+                shard.errors += 1
+                logger.error(f"處理消息時出錯: {e}")
+            shard.dispatched += 1
+
+    @staticmethod
+    def _pop_conflated(shard: _Shard) -> Any:
+        """取出合併模式隊列中最早的消息（需持有 shard.condition）"""
+        sequence, (topic, message) = shard.queue.popitem(last=False)
+        if shard.latest.get(topic) == sequence:
+            del shard.latest[topic]
+        return message
+
+    @property
+    def depth(self) -> int:
+        """當前排隊的消息數"""
+        return sum(len(shard) for shard in self._shards)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        分發統計
+
+        Returns:
+            {'depth': 當前排隊數, 'max_depth': 最大排隊數, 'submitted': 提交數, 'dispatched': 已處理數,
+             'dropped': 丟棄數, 'conflated': 被合併數, 'errors': 回調異常數, 'workers': 工作線程數, 'policy': 策略}
+        """
+        return {
+            'depth': self.depth,
+            'max_depth': self._max_depth,
+            'submitted': self._submitted,
+            'dispatched': sum(shard.dispatched for shard in self._shards),
+            'dropped': self._dropped,
+            'conflated': self._conflated,
+            'errors': sum(shard.errors for shard in self._shards),
+            'workers': len(self._shards),
+            'policy': self._policy,
+        }
+
+    def __repr__(self):
+        return f"MessageDispatcher(workers={len(self._shards)}, policy={self._policy}, depth={self.depth})"
@@ -60,6 +60,19 @@ class SignatureError(CoinWAPIError):
     pass
 
 
+class OrderStatusUnknownError(CoinWAPIError):
+    """
+    下單結果不確定：請求可能已被交易所接受，但在確認期限內查不到該訂單
+
+    SDK 不會重新提交，調用方應按 third_order_id 自行核對後再決定是否重新下單；
+    __cause__ 為原始的 NetworkError/ServerError
+    """
+    
+    def __init__(self, message, third_order_id=None, code=None, response=None):
+        self.third_order_id = third_order_id
+        super().__init__(message, code=code, response=response)
+
+
 def handle_api_error(response_data, status_code):
     """
     根據API響應處理錯誤
@@ -7,10 +7,12 @@ CoinW 期貨交易模組
 
 # REST API 客戶端
 from .client import FutureClient
+from .async_client import AsyncFutureClient
 from .market import FutureMarket
 from .order import FutureOrder
 from .account import FutureAccount
 from .position import FuturePosition
+from .gateway import OrderGateway
 
 # HTTP 管理器
 from .http_manager import _ContractHTTPManager as FutureHTTPManager, ContractHTTPConfig
@@ -21,10 +23,12 @@ from .ws_client import CoinWFutureWebSocketClient, FuturesWebsocketPublic, Futur
 __all__ = [
     # REST API 客戶端
     'FutureClient',
+    'AsyncFutureClient',
     'FutureMarket',
     'FutureOrder',
     'FutureAccount',
     'FuturePosition',
+    'OrderGateway',
     
     # HTTP 管理器
     'FutureHTTPManager',
@@ -54,13 +58,18 @@ __description__ = "CoinW 期貨交易 Python SDK - 支援完整的 REST 和 WebS
    from coinwapi.future import FutureClient
    client = FutureClient(api_key="your_key", secret_key="your_secret")
 
-2. WebSocket 使用：
+2. 異步 REST API 使用（需要 aiohttp）：
+   from coinwapi.future import AsyncFutureClient
+   async with AsyncFutureClient(api_key="your_key", secret_key="your_secret") as client:
+       ticker = await client.get_ticker("BTC")
+
+3. WebSocket 使用：
    from coinwapi.future import CoinWFutureWebSocketClient
    ws_client = CoinWFutureWebSocketClient()
    ws_client.connect()
    ws_client.subscribe_ticker("BTC")
 
-3. 簡單 WebSocket 使用：
+4. 簡單 WebSocket 使用：
    from coinwapi.future import FuturesWebsocketPublic
    FuturesWebsocketPublic(url, params)
 
@@ -9,6 +9,8 @@ CoinW 期貨帳戶模組
 from typing import Dict, Any, Optional
 from .http_manager import _ContractHTTPManager
 from ..exceptions import InvalidParameterError
+from ..units import convert_units_locally
+from ..pagination import page_number_parser
 
 
 class FutureAccount(_ContractHTTPManager):
@@ -131,6 +133,71 @@ class FutureAccount(_ContractHTTPManager):
             auth=True
         )
     
+    def iter_trade_details_3_days(
+        self,
+        instrument: str,
+        origin_type: Optional[str] = None,
+        position_model: Optional[int] = None,
+        page_size: int = 100,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        prefetch: bool = True
+    ):
+        """
+        逐條迭代交易詳情（3天），自動翻頁
+        
+        處理當前頁時於後台預取下一頁，按記錄ID去除跨頁重複，遇到早於 since 的記錄後停止翻頁
+        
+        Args:
+            instrument: 交易品種的基礎貨幣（例如，BTC或btc）
+            origin_type: 初始訂單類型（可選）
+            position_model: 持倉保證金模式（可選）
+            page_size: 每頁響應數量
+            since: 開始時間戳（毫秒，按 createdDate 過濾）
+            until: 結束時間戳（毫秒）
+            prefetch: 是否預取下一頁
+        
+        Yields:
+            交易詳情記錄
+        """
+        return self._iter_pages(
+            lambda page: self.get_trade_details_3_days(instrument, page, page_size, origin_type, position_model),
+            page_number_parser(page_size),
+            1,
+            id_field="id",
+            time_field="createdDate",
+            since=since,
+            until=until,
+            prefetch=prefetch
+        )
+    
+    def iter_trade_details_3_months(
+        self,
+        instrument: str,
+        origin_type: Optional[str] = None,
+        position_model: Optional[int] = None,
+        page_size: int = 100,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        prefetch: bool = True
+    ):
+        """
+        逐條迭代交易詳情（3個月），自動翻頁，參數同 iter_trade_details_3_days
+        
+        Yields:
+            交易詳情記錄
+        """
+        return self._iter_pages(
+            lambda page: self.get_trade_details_3_months(instrument, page, page_size, origin_type, position_model),
+            page_number_parser(page_size),
+            1,
+            id_field="id",
+            time_field="createdDate",
+            since=since,
+            until=until,
+            prefetch=prefetch
+        )
+    
     def get_user_assets(self) -> Dict[str, Any]:
         """
         獲取合約帳戶資產
@@ -407,34 +474,40 @@ class FutureAccount(_ContractHTTPManager):
         """
         return self.toggle_almighty_gold(status="0")
     
-    def convert_contracts_to_coins(self, deal_piece: float, face_value: float) -> Dict[str, Any]:
+    def convert_contracts_to_coins(self, deal_piece: float, face_value: float, local: bool = True) -> Dict[str, Any]:
         """
         將合約張數轉換為幣數量
         
         Args:
             deal_piece: 合約數量（張）
             face_value: 每張合約的面值
+            local: 是否在本地計算（預設），False 時調用 convert_units 接口
             
         Returns:
             轉換結果，包含幣的數量
         """
+        if local:
+            return convert_units_locally(1, face_value, deal_piece=deal_piece)
         return self.convert_units(
             convert_type=1,
             deal_piece=deal_piece,
             face_value=face_value
         )
     
-    def convert_coins_to_contracts(self, base_size: float, face_value: float) -> Dict[str, Any]:
+    def convert_coins_to_contracts(self, base_size: float, face_value: float, local: bool = True) -> Dict[str, Any]:
         """
         將幣數量轉換為合約張數
         
         Args:
             base_size: 幣的數量
             face_value: 每張合約的面值
+            local: 是否在本地計算（預設，結果向下取整到整張），False 時調用 convert_units 接口
             
         Returns:
             轉換結果，包含合約張數
         """
+        if local:
+            return convert_units_locally(2, face_value, base_size=base_size)
         return self.convert_units(
             convert_type=2,
             base_size=base_size,
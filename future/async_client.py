@@ -0,0 +1,256 @@
+"""
+CoinW 期貨異步統一客戶端
+
+與 FutureClient 相同的方法介面，所有請求方法返回可等待對象
+API 基礎: https://api.coinw.com/v1/perpum/
+認證方式: HMAC SHA256 簽名
+"""
+
+import time
+import asyncio
+from typing import Optional, Dict, Any, Sequence
+
+from .http_manager import ContractHTTPConfig
+from .async_http_manager import _AsyncContractHTTPManager
+from .client import FutureClient
+from .market import FutureMarket
+from .order import FutureOrder, _AMBIGUOUS_ORDER_ERRORS, _RETRYABLE_ORDER_ERRORS
+from .account import FutureAccount
+from .position import FuturePosition
+from ..exceptions import CoinWAPIError, OrderStatusUnknownError
+from ..klines import future_bars_to_fetch, future_klines_to_columns
+from ..units import convert_units_locally
+from ..snapshot import SNAPSHOT_FIELDS, fetch_snapshot_async
+
+
+class AsyncFutureMarket(FutureMarket, _AsyncContractHTTPManager):
+    """期貨市場數據接口（異步）"""
+
+    async def get_klines_history(
+        self,
+        currency_code: str,
+        granularity: str = "0",
+        start: Optional[int] = None,
+        end: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """獲取K線歷史（列式數組），參數同 FutureMarket.get_klines_history"""
+        limit = future_bars_to_fetch(granularity, start)
+        response = await self.get_klines(currency_code, str(granularity), limit)
+        return future_klines_to_columns(response, start, end)
+
+    async def snapshot(
+        self,
+        instruments: Sequence[str],
+        fields: Sequence[str] = SNAPSHOT_FIELDS,
+        max_workers: int = 16
+    ) -> Dict[str, Any]:
+        """並發獲取多個合約的行情快照，參數同 FutureMarket.snapshot（max_workers 為最大並發請求數）"""
+        return await fetch_snapshot_async(self, instruments, fields, max_workers)
+
+
+class AsyncFutureOrder(FutureOrder, _AsyncContractHTTPManager):
+    """期貨交易接口（異步）"""
+
+    async def _gather_batches(self, calls, combine, max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """並發執行各批次請求（max_workers 為最大並發數），邏輯同 FutureOrder"""
+        semaphore = asyncio.Semaphore(max_workers or max(1, len(calls)))
+
+        async def run(call):
+            async with semaphore:
+                return await call()
+
+        responses = await asyncio.gather(*(run(call) for call in calls), return_exceptions=True)
+        return combine(list(responses))
+
+    async def _place_order_request(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """提交下單請求（429 重新提交，結果不確定時按 thirdOrderId 確認），邏輯同 FutureOrder"""
+        retries = self.config.order_retries
+
+        for attempt in range(retries + 1):
+            try:
+                return await self._submit_request(
+                    method="POST",
+                    path="/v1/perpum/order",
+                    query=data,
+                    auth=True
+                )
+            except _RETRYABLE_ORDER_ERRORS as e:
+                if attempt >= retries:
+                    raise
+                self.logger.warning(f"下單被限頻拒絕，準備重新提交: {e}")
+                await asyncio.sleep(self._order_retry_delay(attempt))
+            except _AMBIGUOUS_ORDER_ERRORS as e:
+                if not data.get('thirdOrderId'):
+                    raise
+                return await self._confirm_order(data, e)
+
+    async def _confirm_order(self, data: Dict[str, Any], error: CoinWAPIError) -> Dict[str, Any]:
+        """按 thirdOrderId 輪詢確認訂單，邏輯同 FutureOrder._confirm_order"""
+        third_order_id = data['thirdOrderId']
+        self.logger.warning(f"下單結果不確定，按 thirdOrderId={third_order_id} 確認: {error}")
+        deadline = time.monotonic() + self.config.order_confirm_timeout
+
+        while True:
+            await asyncio.sleep(max(0.0, min(self.config.order_confirm_interval, deadline - time.monotonic())))
+            try:
+                existing = await self._find_order_by_third_order_id(
+                    data['instrument'], data['positionType'], third_order_id
+                )
+            except CoinWAPIError as e:
+                self.logger.warning(f"查詢訂單失敗 (thirdOrderId={third_order_id}): {e}")
+                existing = None
+            if existing is not None:
+                self.logger.info(f"訂單已提交 (thirdOrderId={third_order_id})")
+                return existing
+            if time.monotonic() >= deadline:
+                break
+
+        raise OrderStatusUnknownError(
+            f"無法在 {self.config.order_confirm_timeout} 秒內確認訂單是否已提交，未重新下單 "
+            f"(thirdOrderId={third_order_id}): {error}",
+            third_order_id=third_order_id
+        ) from error
+
+    async def _find_order_by_third_order_id(
+        self,
+        instrument: str,
+        position_type: str,
+        third_order_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """按 thirdOrderId 查詢訂單是否已提交"""
+        open_orders = await self.get_open_orders(instrument, position_type)
+        found = self._match_third_order_id(open_orders, third_order_id)
+        if found is None:
+            history = await self.get_order_history(instrument, page=1, page_size=50)
+            found = self._match_third_order_id(history, third_order_id)
+        return found
+
+
+class AsyncFuturePosition(FuturePosition, _AsyncContractHTTPManager):
+    """期貨倉位接口（異步）"""
+
+
+class AsyncFutureAccount(FutureAccount, _AsyncContractHTTPManager):
+    """期貨帳戶接口（異步）"""
+
+    async def convert_contracts_to_coins(
+        self, deal_piece: float, face_value: float, local: bool = True
+    ) -> Dict[str, Any]:
+        """將合約張數轉換為幣數量（預設在本地計算）"""
+        if local:
+            return convert_units_locally(1, face_value, deal_piece=deal_piece)
+        return await self.convert_units(convert_type=1, deal_piece=deal_piece, face_value=face_value)
+
+    async def convert_coins_to_contracts(
+        self, base_size: float, face_value: float, local: bool = True
+    ) -> Dict[str, Any]:
+        """將幣數量轉換為合約張數（預設在本地計算）"""
+        if local:
+            return convert_units_locally(2, face_value, base_size=base_size)
+        return await self.convert_units(convert_type=2, base_size=base_size, face_value=face_value)
+
+    async def get_account_summary(self) -> Dict[str, Any]:
+        """
+        獲取帳戶摘要信息
+
+        並發請求多個接口，提供帳戶的完整概覽
+
+        Returns:
+            帳戶摘要，包含資產、費率、保證金模式等信息
+        """
+        try:
+            assets, fees, margin_mode, max_transfer = await asyncio.gather(
+                self.get_user_assets(),
+                self.get_account_fees(),
+                self.get_margin_mode(),
+                self.get_max_transferable_balance()
+            )
+
+            summary = {}
+            if assets.get('code') == 0:
+                summary['assets'] = assets['data']
+            if fees.get('code') == 0:
+                summary['fees'] = fees['data']
+            if margin_mode.get('code') == 0:
+                summary['margin_mode'] = margin_mode['data']
+            if max_transfer.get('code') == 0:
+                summary['max_transferable'] = max_transfer['data']
+
+            return {
+                'code': 0,
+                'data': summary,
+                'msg': 'Account summary retrieved successfully'
+            }
+
+        except Exception as e:
+            return {
+                'code': -1,
+                'data': None,
+                'msg': f'Failed to get account summary: {str(e)}'
+            }
+
+
+class AsyncFutureClient(FutureClient, _AsyncContractHTTPManager):
+    """
+    CoinW 期貨異步統一客戶端
+
+    方法介面與 FutureClient 完全一致，調用時需 await：
+
+        async with AsyncFutureClient(api_key, secret_key) as client:
+            ticker = await client.get_ticker("BTC")
+
+    所有功能模組共用同一個 aiohttp keep-alive 連接池
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        secret_key: str,
+        config: Optional[ContractHTTPConfig] = None,
+        **kwargs
+    ):
+        """
+        初始化期貨異步客戶端
+
+        Args:
+            api_key: API密鑰
+            secret_key: Secret密鑰
+            config: HTTP配置
+            **kwargs: 其他參數 (timeout, max_retries, pool_size等)
+        """
+        if config is None:
+            config = ContractHTTPConfig(
+                base_url="https://api.coinw.com",
+                timeout=kwargs.get('timeout', 30),
+                max_retries=kwargs.get('max_retries', 3),
+                pool_size=kwargs.get('pool_size', 20)
+            )
+
+        _AsyncContractHTTPManager.__init__(
+            self,
+            api_key=api_key,
+            secret_key=secret_key,
+            config=config
+        )
+
+        # 初始化功能模組（共用連接池）
+        self._market = AsyncFutureMarket(api_key, secret_key, config, owner=self)
+        self._order = AsyncFutureOrder(api_key, secret_key, config, owner=self)
+        self._account = AsyncFutureAccount(api_key, secret_key, config, owner=self)
+        self._position = AsyncFuturePosition(api_key, secret_key, config, owner=self)
+
+    def create_order_gateway(self, window: float = 0.002, **kwargs):
+        """
+        微批量下單網關基於工作線程，不能包裝異步交易模組
+
+        Raises:
+            NotImplementedError: 總是拋出；異步客戶端請用 asyncio.gather 並發調用
+                place_order/cancel_order，或使用 place_orders_batched/cancel_orders_batched
+        """
+        raise NotImplementedError(
+            "AsyncFutureClient 不支持 create_order_gateway，"
+            "請使用 asyncio.gather 或 place_orders_batched/cancel_orders_batched"
+        )
+
+    def __repr__(self):
+        return "CoinW Future Async API Client"
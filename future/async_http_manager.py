@@ -0,0 +1,237 @@
+"""
+CoinW 合約 API 異步 HTTP 管理器
+
+基於 aiohttp 的異步請求路徑，簽名與錯誤映射與 _ContractHTTPManager 完全一致
+"""
+
+import asyncio
+from typing import Dict, Any, Optional
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp 為可選依賴，僅異步客戶端需要
+    aiohttp = None
+
+from .http_manager import _ContractHTTPManager, ContractHTTPConfig, IDEMPOTENT_METHODS
+from ..exceptions import NetworkError
+from ..pagination import aiter_pages
+from ..instrumentation import default_instrumentation
+
+
+# 與同步客戶端 urllib3 Retry 相同的可重試狀態碼（僅對冪等方法重試）
+_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class _AsyncContractHTTPManager(_ContractHTTPManager):
+    """
+    CoinW 合約 API 異步HTTP管理器
+
+    請求構建（HMAC SHA256簽名）與響應解析沿用 _ContractHTTPManager，
+    僅將阻塞的 requests.Session 替換為 aiohttp 的 keep-alive 連接池
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        secret_key: str,
+        config: Optional[ContractHTTPConfig] = None,
+        owner: Optional["_AsyncContractHTTPManager"] = None
+    ):
+        """
+        初始化異步HTTP管理器
+
+        Args:
+            api_key: API密鑰
+            secret_key: Secret密鑰
+            config: HTTP配置
+            owner: 共用連接池和限頻器的管理器（為空則由自身持有）
+        """
+        if aiohttp is None:
+            raise ImportError("異步客戶端需要安裝 aiohttp: pip install aiohttp")
+
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.config = config or ContractHTTPConfig()
+
+        # 設定日誌
+        self._init_logger()
+
+        self.base_url = self.config.base_url.rstrip('/')
+
+        # aiohttp.ClientSession 必須在事件循環內創建，因此延遲初始化
+        self._owner = owner or self
+        self._session: Optional["aiohttp.ClientSession"] = None
+
+        # 客戶端限頻（與連接池的持有者共用）
+        self.rate_limiter = owner.rate_limiter if owner is not None else self._create_rate_limiter()
+
+        # 請求計時（未配置時使用全局收集點）
+        self.instrumentation = self.config.instrumentation or default_instrumentation
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """獲取（必要時創建）共用的 aiohttp 會話"""
+        owner = self._owner
+        if owner._session is None or owner._session.closed:
+            self.logger.debug("初始化合約異步HTTP會話")
+            owner._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.config.pool_size, keepalive_timeout=30),
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout),
+                headers={
+                    'Accept': 'application/json',
+                    'User-Agent': 'CoinW-Contract-Python-API/0.2.0'
+                }
+            )
+        return owner._session
+
+    async def _submit_request(
+        self,
+        method: str = "GET",
+        path: str = "",
+        query: Optional[Dict[str, Any]] = None,
+        auth: bool = False
+    ) -> Dict[str, Any]:
+        """
+        異步提交請求到合約API
+
+        Args:
+            method: HTTP方法
+            path: API路徑
+            query: 查詢參數
+            auth: 是否需要認證
+
+        Returns:
+            API響應數據
+
+        Raises:
+            相應的異常類型
+        """
+        timing = self.instrumentation.start(method, path)
+
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async(path)
+
+        if timing is None:
+            return await self._send_async(method, path, query, auth, None)
+
+        timing.throttle = timing.lap()
+        try:
+            return await self._send_async(method, path, query, auth, timing)
+        except Exception as e:
+            timing.error = type(e).__name__
+            raise
+        finally:
+            remaining = timing.lap()
+            if timing.status is None:
+                timing.send += remaining
+            else:
+                timing.parse = remaining
+            self.instrumentation.record(timing)
+
+    async def _send_async(
+        self,
+        method: str,
+        path: str,
+        query: Optional[Dict[str, Any]],
+        auth: bool,
+        timing
+    ) -> Dict[str, Any]:
+        """構建並發送請求，按冪等性重試；timing 不為空時記錄各階段耗時"""
+        method, url, headers, params, data = self._prepare_request(method, path, query, auth)
+        if timing is not None:
+            timing.sign = timing.lap()
+            timing.bytes_out = len(data) if data else 0
+
+        if params is not None:
+            # 與 requests 一致：忽略 None 值，其他值轉為字符串
+            params = {key: str(value) for key, value in params.items() if value is not None}
+
+        session = self._get_session()
+        attempt = 0
+        max_retries = self.config.max_retries if method in IDEMPOTENT_METHODS else 0
+
+        while True:
+            try:
+                async with session.request(
+                    method,
+                    url,
+                    params=params,
+                    data=data,
+                    headers=headers
+                ) as response:
+                    if timing is not None:
+                        timing.wait += timing.lap()
+                    status_code = response.status
+                    text = await response.text()
+                    if timing is not None:
+                        timing.send += timing.lap()
+                        timing.bytes_in = response.content_length or len(text)
+            except asyncio.TimeoutError:
+                self.logger.error("請求超時")
+                error = NetworkError("請求超時")
+            except aiohttp.ClientConnectionError:
+                self.logger.error("網路連接錯誤")
+                error = NetworkError("網路連接錯誤")
+            except aiohttp.ClientError as e:
+                self.logger.error(f"HTTP請求錯誤: {e}")
+                error = NetworkError(f"HTTP請求錯誤: {e}")
+            else:
+                if status_code not in _RETRY_STATUS_CODES or attempt >= max_retries:
+                    if timing is not None:
+                        timing.status = status_code
+                        timing.retries = attempt
+                    return self._parse_response(status_code, text)
+                error = None
+
+            if attempt >= max_retries:
+                if timing is not None:
+                    timing.retries = attempt
+                raise error
+
+            attempt += 1
+            # 與 urllib3 Retry 相同：首次立即重試，之後按 backoff_factor 指數退避
+            if attempt > 1:
+                await asyncio.sleep(self.config.backoff_factor * 2 ** (attempt - 1))
+
+    def _iter_pages(self, fetch, parse, first, **options):
+        """逐條產出分頁查詢的記錄（異步生成器，使用 async for 迭代）"""
+        return aiter_pages(fetch, parse, first, **options)
+
+    async def warmup(self, connections: Optional[int] = None) -> int:
+        """
+        預熱連接池
+
+        並發發送輕量HEAD請求，提前完成TCP/TLS握手
+
+        Args:
+            connections: 預熱的連接數，預設為配置的 pool_size
+
+        Returns:
+            成功完成的預熱請求數
+        """
+        connections = min(connections or self.config.pool_size, self.config.pool_size)
+        session = self._get_session()
+
+        async def _open():
+            try:
+                async with session.head(self.base_url) as response:
+                    await response.read()
+                return True
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.logger.warning(f"預熱連接失敗: {e}")
+                return False
+
+        opened = sum(await asyncio.gather(*(_open() for _ in range(connections))))
+        self.logger.debug(f"已預熱 {opened}/{connections} 個連接")
+        return opened
+
+    async def close(self):
+        """關閉HTTP會話"""
+        if self._owner is self and self._session is not None and not self._session.closed:
+            self.logger.debug("關閉合約異步HTTP會話")
+            await self._session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
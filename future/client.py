@@ -6,12 +6,15 @@ API 基礎: https://api.coinw.com/v1/perpum/
 認證方式: HMAC SHA256 簽名
 """
 
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Sequence, Union
 from .http_manager import _ContractHTTPManager, ContractHTTPConfig
 from .market import FutureMarket
 from .order import FutureOrder
 from .account import FutureAccount
 from .position import FuturePosition
+from .gateway import OrderGateway
+from ..snapshot import SNAPSHOT_FIELDS
+from ..instrumentation import Instrumentation
 
 
 class FutureClient(_ContractHTTPManager):
@@ -35,13 +38,14 @@ class FutureClient(_ContractHTTPManager):
             api_key: API密鑰
             secret_key: Secret密鑰
             config: HTTP配置
-            **kwargs: 其他參數 (timeout, max_retries等)
+            **kwargs: 其他參數 (timeout, max_retries, pool_size等)
         """
         if config is None:
             config = ContractHTTPConfig(
                 base_url="https://api.coinw.com",
                 timeout=kwargs.get('timeout', 30),
-                max_retries=kwargs.get('max_retries', 3)
+                max_retries=kwargs.get('max_retries', 3),
+                pool_size=kwargs.get('pool_size', 20)
             )
         
         super().__init__(
@@ -50,11 +54,25 @@ class FutureClient(_ContractHTTPManager):
             config=config
         )
         
-        # 初始化功能模組
-        self._market = FutureMarket(api_key, secret_key, config)
-        self._order = FutureOrder(api_key, secret_key, config)
-        self._account = FutureAccount(api_key, secret_key, config)
-        self._position = FuturePosition(api_key, secret_key, config)
+        # 初始化功能模組（共用同一個HTTP會話、連接池和限頻器）
+        self._market = FutureMarket(
+            api_key, secret_key, config, session=self.client, rate_limiter=self.rate_limiter
+        )
+        self._order = FutureOrder(
+            api_key, secret_key, config, session=self.client, rate_limiter=self.rate_limiter
+        )
+        self._account = FutureAccount(
+            api_key, secret_key, config, session=self.client, rate_limiter=self.rate_limiter
+        )
+        self._position = FuturePosition(
+            api_key, secret_key, config, session=self.client, rate_limiter=self.rate_limiter
+        )
+    
+    def _set_instrumentation(self, instrumentation: Instrumentation) -> None:
+        """更換請求計時收集點（所有功能模組共用）"""
+        self.instrumentation = instrumentation
+        for module in (self._market, self._order, self._account, self._position):
+            module.instrumentation = instrumentation
     
     # ==================== 公開市場數據代理 ====================
     
@@ -73,6 +91,16 @@ class FutureClient(_ContractHTTPManager):
     def get_klines(self, currency_code: str, granularity: str = "2", limit: Optional[int] = 100):
         """獲取合約K線數據"""
         return self._market.get_klines(currency_code, granularity, limit)
+    
+    def get_klines_history(
+        self,
+        currency_code: str,
+        granularity: str = "0",
+        start: Optional[int] = None,
+        end: Optional[int] = None
+    ):
+        """獲取合約K線歷史（列式數組）"""
+        return self._market.get_klines_history(currency_code, granularity, start, end)
 
     def get_last_funding_rate(self, instrument: str):
         """獲取合約最新資金費率"""
@@ -90,6 +118,10 @@ class FutureClient(_ContractHTTPManager):
         """獲取合約成交記錄"""
         return self._market.get_trades(base)
     
+    def snapshot(self, instruments: List[str], fields: Sequence[str] = SNAPSHOT_FIELDS, max_workers: int = 16):
+        """並行獲取多個合約的行情快照（列式表）"""
+        return self._market.snapshot(instruments, fields, max_workers)
+    
     # ==================== 私有市場數據代理 ====================
     
     def get_ladders(self):
@@ -100,6 +132,10 @@ class FutureClient(_ContractHTTPManager):
         """獲取合約交易者歷史"""
         return self._market.get_traders_history(instrument, page, pageSize)
     
+    def iter_traders_history(self, instrument: str, **kwargs):
+        """逐條迭代歷史公開交易（自動翻頁）"""
+        return self._market.iter_traders_history(instrument, **kwargs)
+    
 
     # ==================== 交易代理 ====================
     
@@ -115,6 +151,20 @@ class FutureClient(_ContractHTTPManager):
         """批量下單"""
         return self._order.place_batch_orders(orders)
     
+    def place_orders_batched(self, orders: List[Dict[str, Any]], **kwargs):
+        """分批並行下單（合併結果）"""
+        return self._order.place_orders_batched(orders, **kwargs)
+    
+    def create_order_gateway(self, window: float = 0.002, **kwargs) -> OrderGateway:
+        """
+        創建微批量下單網關，將窗口內的逐筆下單/撤單合併為批量請求
+        
+        Args:
+            window: 合併窗口（秒）
+            **kwargs: 其他參數（max_batch, max_inflight）
+        """
+        return OrderGateway(self._order, window=window, **kwargs)
+    
     def cancel_order(self, order_id: str):
         """取消合約訂單"""
         return self._order.cancel_order(order_id)
@@ -123,6 +173,10 @@ class FutureClient(_ContractHTTPManager):
         """批量取消訂單"""
         return self._order.cancel_batch_orders(order_ids, pos_type)
     
+    def cancel_orders_batched(self, order_ids: List[str], pos_type: Optional[str] = None, **kwargs):
+        """分批並行撤單（合併結果）"""
+        return self._order.cancel_orders_batched(order_ids, pos_type, **kwargs)
+    
     def get_order(self, position_type: str, **kwargs):
         """獲取訂單信息"""
         return self._order.get_order(position_type, **kwargs)
@@ -161,6 +215,14 @@ class FutureClient(_ContractHTTPManager):
         """獲取歷史訂單（3個月）"""
         return self._order.get_order_archive(instrument, page, page_size, origin_type)
     
+    def iter_order_history(self, instrument: Optional[str] = None, **kwargs):
+        """逐條迭代歷史訂單（7天，自動翻頁）"""
+        return self._order.iter_order_history(instrument, **kwargs)
+    
+    def iter_order_archive(self, instrument: Optional[str] = None, **kwargs):
+        """逐條迭代歷史訂單（3個月，自動翻頁）"""
+        return self._order.iter_order_archive(instrument, **kwargs)
+    
     # ==================== 平倉代理 ====================
     
     def close_position(self, position_id: str, **kwargs):
@@ -175,6 +237,10 @@ class FutureClient(_ContractHTTPManager):
         """批量平倉"""
         return self._order.close_batch_positions(third_order_ids)
     
+    def close_positions_batched(self, third_order_ids: List[str], **kwargs):
+        """分批並行平倉（合併結果）"""
+        return self._order.close_positions_batched(third_order_ids, **kwargs)
+    
     def reverse_position(self, position_id: str):
         """反向持倉"""
         return self._order.reverse_position(position_id)
@@ -365,6 +431,14 @@ class FutureClient(_ContractHTTPManager):
         """獲取交易詳情（3個月）"""
         return self._account.get_trade_details_3_months(instrument, page, page_size, origin_type, position_model)
     
+    def iter_trade_details_3_days(self, instrument: str, **kwargs):
+        """逐條迭代交易詳情（3天，自動翻頁）"""
+        return self._account.iter_trade_details_3_days(instrument, **kwargs)
+    
+    def iter_trade_details_3_months(self, instrument: str, **kwargs):
+        """逐條迭代交易詳情（3個月，自動翻頁）"""
+        return self._account.iter_trade_details_3_months(instrument, **kwargs)
+    
     def get_user_assets(self):
         """獲取合約帳戶資產"""
         return self._account.get_user_assets()
@@ -421,13 +495,13 @@ class FutureClient(_ContractHTTPManager):
         """禁用萬能金"""
         return self._account.disable_almighty_gold()
     
-    def convert_contracts_to_coins(self, deal_piece: float, face_value: float):
+    def convert_contracts_to_coins(self, deal_piece: float, face_value: float, local: bool = True):
         """將合約張數轉換為幣數量"""
-        return self._account.convert_contracts_to_coins(deal_piece, face_value)
+        return self._account.convert_contracts_to_coins(deal_piece, face_value, local)
     
-    def convert_coins_to_contracts(self, base_size: float, face_value: float):
+    def convert_coins_to_contracts(self, base_size: float, face_value: float, local: bool = True):
         """將幣數量轉換為合約張數"""
-        return self._account.convert_coins_to_contracts(base_size, face_value)
+        return self._account.convert_coins_to_contracts(base_size, face_value, local)
     
     def set_cross_margin_mode(self, merge_positions: bool = True):
         """設置全倉保證金模式"""
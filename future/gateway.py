@@ -0,0 +1,321 @@
+"""
+CoinW 期貨下單網關
+
+將多個線程逐筆發起的下單/撤單請求，在一個很短的時間窗口內合併為批量請求
+（/v1/perpum/batchOrders），減少請求數和限頻令牌消耗；每個調用方拿到自己那一筆的 Future
+"""
+
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .async_http_manager import _AsyncContractHTTPManager
+from .order import BATCH_ORDER_LIMIT, FutureOrder, _combine_batches
+from ..exceptions import CoinWAPIError
+
+logger = logging.getLogger(__name__)
+
+_Item = Tuple[Any, Future]
+
+
+class OrderGateway:
+    """
+    微批量下單網關
+
+    第一筆請求到達後等待 window 秒收集後續請求，批次滿 max_batch 時立即發送；
+    窗口內只有一筆時使用單筆接口（保留 place_order 結果不確定時基於 thirdOrderId 的確認），
+    多筆時使用批量接口（批量請求結果不確定時不自動重試，調用方可按 thirdOrderId 核對）
+    """
+
+    def __init__(
+        self,
+        order: FutureOrder,
+        window: float = 0.002,
+        max_batch: int = BATCH_ORDER_LIMIT,
+        max_inflight: int = 4
+    ):
+        """
+        Args:
+            order: FutureOrder 或 FutureClient（同步接口）
+            window: 合併窗口（秒），如 0.001 ~ 0.005
+            max_batch: 每個批量請求的最大筆數
+            max_inflight: 同時在途的請求數
+
+        Raises:
+            TypeError: order 是異步接口（工作線程無法等待協程）
+        """
+        if isinstance(order, _AsyncContractHTTPManager):
+            raise TypeError("OrderGateway 只支持同步的 FutureOrder/FutureClient")
+        if max_batch < 1 or max_inflight < 1:
+            raise ValueError("max_batch 和 max_inflight 必須大於 0")
+
+        self._order = order
+        self.window = window
+        self.max_batch = max_batch
+
+        self._condition = threading.Condition()
+        self._places: List[_Item] = []
+        self._cancels: Dict[Optional[str], List[_Item]] = {}
+        self._first_at: Optional[float] = None
+        self._running = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="coinw-gateway")
+
+        # 統計
+        self._submitted = 0
+        self._requests = 0
+        self._batches = 0
+
+    # ==================== 生命週期 ====================
+
+    def start(self) -> None:
+        """
+        啟動合併線程（首次提交時自動啟動）
+
+        Raises:
+            RuntimeError: 網關已關閉
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("下單網關已關閉")
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="coinw-gateway-flush", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: Optional[float] = 5) -> None:
+        """發送剩餘的請求並停止網關（關閉後不能再提交）"""
+        with self._condition:
+            self._closed = True
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # ==================== 提交 ====================
+
+    def submit_order(self, data: Dict[str, Any]) -> Future:
+        """
+        提交已構建的下單參數
+
+        Args:
+            data: 下單參數（可通過 FutureOrder.build_order_params 構建），沒有 thirdOrderId 時自動生成
+
+        Returns:
+            Future，結果為與 place_order 相同結構的響應
+
+        Raises:
+            RuntimeError: 網關已關閉
+        """
+        if not data.get('thirdOrderId'):
+            data = {**data, 'thirdOrderId': uuid.uuid4().hex}
+        return self._enqueue(self._places, data)
+
+    def place_order(self, **kwargs) -> Future:
+        """
+        下單，參數同 FutureOrder.place_order
+
+        Returns:
+            Future
+        """
+        return self.submit_order(self._order_module().build_order_params(**kwargs))
+
+    def buy_limit(
+        self,
+        instrument: str,
+        quantity: Union[float, str],
+        price: float,
+        leverage: int,
+        quantity_unit: int = 0,
+        position_model: int = 1,
+        **kwargs
+    ) -> Future:
+        """期貨限價做多"""
+        return self.place_order(
+            instrument=instrument,
+            direction="long",
+            leverage=leverage,
+            quantity_unit=quantity_unit,
+            quantity=quantity,
+            position_model=position_model,
+            position_type="plan",
+            open_price=price,
+            **kwargs
+        )
+
+    def sell_limit(
+        self,
+        instrument: str,
+        quantity: Union[float, str],
+        price: float,
+        leverage: int,
+        quantity_unit: int = 0,
+        position_model: int = 1,
+        **kwargs
+    ) -> Future:
+        """期貨限價做空"""
+        return self.place_order(
+            instrument=instrument,
+            direction="short",
+            leverage=leverage,
+            quantity_unit=quantity_unit,
+            quantity=quantity,
+            position_model=position_model,
+            position_type="plan",
+            open_price=price,
+            **kwargs
+        )
+
+    def cancel_order(self, order_id: str, pos_type: Optional[str] = None) -> Future:
+        """
+        撤單；同一 pos_type 的撤單合併為一個批量撤單請求
+
+        Returns:
+            Future
+        """
+        with self._condition:
+            queue = self._cancels.setdefault(pos_type, [])
+        return self._enqueue(queue, str(order_id))
+
+    def _order_module(self) -> FutureOrder:
+        # FutureClient 將交易接口委託給內部的 FutureOrder
+        return getattr(self._order, '_order', self._order)
+
+    def _enqueue(self, queue: List[_Item], payload: Any) -> Future:
+        if not self._running:
+            self.start()
+        future: Future = Future()
+        with self._condition:
+            # 與 close() 互斥：關閉後合併線程不再取出新請求
+            if self._closed:
+                raise RuntimeError("下單網關已關閉")
+            queue.append((payload, future))
+            self._submitted += 1
+            if self._first_at is None:
+                self._first_at = time.monotonic()
+            self._condition.notify_all()
+        return future
+
+    # ==================== 合併與發送 ====================
+
+    def _pending(self) -> bool:
+        return bool(self._places) or any(self._cancels.values())
+
+    def _full(self) -> bool:
+        return len(self._places) >= self.max_batch or any(
+            len(queue) >= self.max_batch for queue in self._cancels.values()
+        )
+
+    def _run(self) -> None:
+        condition = self._condition
+        while True:
+            with condition:
+                while self._running and not self._pending():
+                    condition.wait()
+                if not self._pending():
+                    return
+
+                # 等待窗口結束或批次已滿
+                deadline = self._first_at + self.window
+                while self._running and not self._full():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    condition.wait(remaining)
+
+                places = self._places[:self.max_batch]
+                del self._places[:self.max_batch]
+                cancels = {}
+                for pos_type, queue in self._cancels.items():
+                    if queue:
+                        cancels[pos_type] = queue[:self.max_batch]
+                        del queue[:self.max_batch]
+                self._first_at = time.monotonic() if self._pending() else None
+
+            if places:
+                self._send(self._send_places, places)
+            for pos_type, items in cancels.items():
+                self._send(self._send_cancels, items, pos_type)
+
+    def _send(self, send, items: List[_Item], *args) -> None:
+        self._requests += 1
+        if len(items) > 1:
+            self._batches += 1
+        try:
+            self._executor.submit(send, items, *args)
+        except RuntimeError as e:  # 網關已關閉
+            for _, future in items:
+                future.set_exception(e)
+
+    def _send_places(self, items: List[_Item]) -> None:
+        order = self._order_module()
+        if len(items) == 1:
+            data, future = items[0]
+            _resolve(future, order._place_order_request, data)
+            return
+
+        try:
+            response = order.place_batch_orders([data for data, _ in items])
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        _resolve_batch(items, response, [data['thirdOrderId'] for data, _ in items], 'thirdOrderId')
+
+    def _send_cancels(self, items: List[_Item], pos_type: Optional[str]) -> None:
+        order = self._order_module()
+        if len(items) == 1:
+            order_id, future = items[0]
+            _resolve(future, order.cancel_order, order_id)
+            return
+
+        try:
+            response = order.cancel_batch_orders([order_id for order_id, _ in items], pos_type)
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        _resolve_batch(items, response, [order_id for order_id, _ in items], 'id')
+
+    def stats(self) -> Dict[str, int]:
+        """
+        網關統計
+
+        Returns:
+            {'submitted': 提交筆數, 'requests': 發出的請求數, 'batches': 其中的批量請求數}
+        """
+        return {'submitted': self._submitted, 'requests': self._requests, 'batches': self._batches}
+
+    def __repr__(self):
+        return f"OrderGateway(window={self.window}, max_batch={self.max_batch})"
+
+
+def _resolve(future: Future, call, *args) -> None:
+    try:
+        future.set_result(call(*args))
+    except Exception as e:
+        future.set_exception(e)
+
+
+def _resolve_batch(items: List[_Item], response: Any, keys: List[Any], key_field: str) -> None:
+    """將批量響應中的逐筆結果交給各自的 Future"""
+    results = _combine_batches([keys], [response], key_field)['data']['results']
+    for (_, future), result in zip(items, results):
+        if result['success']:
+            future.set_result({'code': 0, 'data': result['result'], 'msg': ''})
+        else:
+            future.set_exception(CoinWAPIError(result['error'], response=response))
@@ -4,28 +4,33 @@ CoinW 合約 API HTTP 管理器
 專門處理合約API的HMAC SHA256簽名認證
 """
 
-import time
 import json
-import hmac
-import hashlib
-import base64
 import logging
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from ..rate_limiter import RateLimiter, RateLimitRule, FUTURES_RATE_LIMITS
+from ..pagination import iter_pages
+from ..signing import HMACSigner
+from ..instrumentation import Instrumentation, Truncated, default_instrumentation, retry_count
+from ..metrics import MetricsRegistry
 from ..exceptions import (
     CoinWAPIError,
     NetworkError,
-    InvalidCredentialsError,
     RateLimitError,
     handle_api_error
 )
 
 
+# 可安全自動重試的HTTP方法
+IDEMPOTENT_METHODS = ("HEAD", "GET")
+
+
 @dataclass
 class ContractHTTPConfig:
     """合約HTTP配置"""
@@ -33,6 +38,16 @@ class ContractHTTPConfig:
     timeout: int = 30
     max_retries: int = 3
     logging_level: int = logging.INFO
+    pool_size: int = 20
+    backoff_factor: float = 0.1
+    order_retries: int = 2
+    auto_third_order_id: bool = False
+    order_confirm_timeout: float = 5.0
+    order_confirm_interval: float = 0.5
+    rate_limit: bool = True
+    rate_limit_rules: Optional[List[RateLimitRule]] = None
+    rate_limit_max_wait: Optional[float] = None
+    instrumentation: Optional[Instrumentation] = None
 
 
 class _ContractHTTPManager:
@@ -46,47 +61,104 @@ class _ContractHTTPManager:
         self,
         api_key: str,
         secret_key: str,
-        config: Optional[ContractHTTPConfig] = None
+        config: Optional[ContractHTTPConfig] = None,
+        session: Optional[requests.Session] = None,
+        rate_limiter: Optional[RateLimiter] = None
     ):
+        """
+        初始化合約HTTP管理器
+        
+        Args:
+            api_key: API密鑰
+            secret_key: Secret密鑰
+            config: HTTP配置
+            session: 共用的HTTP會話（為空則創建並持有自己的會話）
+            rate_limiter: 共用的限頻器（為空則按配置創建）
+        """
         self.api_key = api_key
         self.secret_key = secret_key
         self.config = config or ContractHTTPConfig()
         
         # 設定日誌
-        self.logger = logging.getLogger(__name__)
-        if not self.logger.handlers:
-            handler = logging.StreamHandler()
-            handler.setFormatter(
-                logging.Formatter(
-                    fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-                    datefmt="%Y-%m-%d %H:%M:%S",
-                )
-            )
-            handler.setLevel(self.config.logging_level)
-            self.logger.addHandler(handler)
+        self._init_logger()
         
+        # 初始化HTTP會話
+        self._owns_session = session is None
+        self.client = session if session is not None else self._create_session()
+        
+        # 客戶端限頻
+        self.rate_limiter = rate_limiter if rate_limiter is not None else self._create_rate_limiter()
+        
+        # 請求計時（未配置時使用全局收集點）
+        self.instrumentation = self.config.instrumentation or default_instrumentation
+        
+        self.base_url = self.config.base_url.rstrip('/')
+    
+    def _create_session(self) -> requests.Session:
+        """創建帶連接池和重試策略的HTTP會話"""
         self.logger.debug("初始化合約HTTP會話")
         
-        # 初始化HTTP會話
-        self.client = requests.Session()
-        self.client.headers.update({
+        session = requests.Session()
+        session.headers.update({
             'Accept': 'application/json',
             'User-Agent': 'CoinW-Contract-Python-API/0.2.0'
         })
         
-        # 設定重試策略
+        # 設定重試策略：只自動重試冪等的讀請求；
+        # 下單等寫請求由 FutureOrder 通過 thirdOrderId 確認後再決定是否重新提交
         retry_strategy = Retry(
             total=self.config.max_retries,
-            backoff_factor=1,
+            backoff_factor=self.config.backoff_factor,
             status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "POST", "DELETE", "PUT"]
+            allowed_methods=list(IDEMPOTENT_METHODS),
+            # 重試耗盡後返回最後的響應，交由 handle_api_error 映射為 RateLimitError/ServerError
+            raise_on_status=False
         )
         
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        self.client.mount("http://", adapter)
-        self.client.mount("https://", adapter)
+        adapter = HTTPAdapter(
+            pool_connections=self.config.pool_size,
+            pool_maxsize=self.config.pool_size,
+            max_retries=retry_strategy
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
+    def _create_rate_limiter(self) -> Optional[RateLimiter]:
+        """按配置創建限頻器"""
+        if not self.config.rate_limit:
+            return None
+        return RateLimiter(
+            self.config.rate_limit_rules or FUTURES_RATE_LIMITS,
+            max_wait=self.config.rate_limit_max_wait
+        )
+    
+    def _init_logger(self) -> None:
+        """設定日誌"""
+        self.logger = logging.getLogger(__name__)
+        if not self.logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(
+                logging.Formatter(
+                    fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+                    datefmt="%Y-%m-%d %H:%M:%S",
+                )
+            )
+            handler.setLevel(self.config.logging_level)
+            self.logger.addHandler(handler)
+    
+    @property
+    def signer(self) -> HMACSigner:
+        """
+        預先以密鑰初始化的HMAC簽名器（密鑰變更後自動重建）
         
-        self.base_url = self.config.base_url.rstrip('/')
+        Raises:
+            InvalidCredentialsError: 缺少API密鑰或secret密鑰
+        """
+        signer = getattr(self, '_signer', None)
+        if signer is None or not signer.matches(self.api_key, self.secret_key):
+            signer = self._signer = HMACSigner(self.api_key, self.secret_key)
+        return signer
     
     def _generate_signature(self, method: str, api_url: str, params: Dict[str, Any], timestamp: str) -> str:
         """
@@ -101,35 +173,95 @@ class _ContractHTTPManager:
         Returns:
             Base64編碼的簽名
         """
-        if not self.api_key or not self.secret_key:
-            raise InvalidCredentialsError("合約API需要API密鑰和secret密鑰")
-        
-        # 根據不同請求方法構建簽名字符串
-        if method.upper() == "GET":
-            # GET請求：將參數轉換為查詢字符串
-            query_params = "&".join(f"{key}={value}" for key, value in params.items() if value is not None)
-            if query_params:
-                encoded_params = f'{timestamp}{method}{api_url}?{query_params}'
-            else:
-                encoded_params = f'{timestamp}{method}{api_url}'
-        else:
-            # POST/PUT/DELETE請求：使用JSON body
-            json_body = json.dumps(params) if params else ""
-            encoded_params = f'{timestamp}{method}{api_url}{json_body}'
-        
-        # 生成HMAC SHA256簽名
-        signature = base64.b64encode(
-            hmac.new(
-                bytes(self.secret_key, 'utf-8'),
-                msg=bytes(encoded_params, 'utf-8'),
-                digestmod=hashlib.sha256
-            ).digest()
-        ).decode("US-ASCII")
-        
-        self.logger.debug(f"簽名字符串: {encoded_params}")
-        self.logger.debug(f"生成簽名: {signature[:20]}...")
-        
-        return signature
+        message, _ = self.signer.payload(method.upper(), api_url, params, timestamp)
+        return self.signer.sign(message)
+    
+    def _prepare_request(
+        self,
+        method: str,
+        path: str,
+        query: Optional[Dict[str, Any]],
+        auth: bool
+    ) -> Tuple[str, str, Dict[str, str], Optional[Dict[str, Any]], Optional[bytes]]:
+        """
+        構建請求（同步與異步客戶端共用）
+        
+        Args:
+            method: HTTP方法
+            path: API路徑
+            query: 查詢參數
+            auth: 是否需要認證
+            
+        Returns:
+            (HTTP方法, URL, 請求頭, GET查詢參數, 請求體)
+        """
+        if query is None:
+            query = {}
+        
+        method = method.upper()
+        if method not in ("GET", "POST", "DELETE", "PUT"):
+            raise ValueError(f"不支援的HTTP方法: {method}")
+        
+        url = f"{self.base_url}{path}"
+        
+        # 記錄請求信息（延遲格式化，DEBUG 關閉時不構建字符串）
+        self.logger.debug("提交合約請求: %s %s 參數: %s", method, url, query)
+        
+        if auth:
+            # 請求體只序列化一次，簽名與發送使用同一份字節
+            signed = self.signer.sign_request(method, path, query)
+            return method, url, signed.headers, signed.params, signed.body
+        
+        if method == "GET":
+            return method, url, {}, query, None
+        
+        # POST/PUT/DELETE請求
+        data = json.dumps(query).encode("utf-8") if query else b"{}"
+        return method, url, {}, None, data
+    
+    def _parse_response(self, status_code: int, text: str) -> Dict[str, Any]:
+        """
+        解析響應並映射錯誤（同步與異步客戶端共用）
+        
+        Args:
+            status_code: HTTP狀態碼
+            text: 響應文本
+            
+        Returns:
+            API響應數據
+            
+        Raises:
+            相應的異常類型
+        """
+        # 檢查HTTP狀態碼
+        if status_code != 200:
+            try:
+                error_data = json.loads(text)
+            except ValueError:
+                error_data = {"message": text}
+            
+            self.logger.error(f"HTTP錯誤: {status_code}, {error_data}")
+            handle_api_error(error_data, status_code)
+        
+        # 解析響應
+        try:
+            response_data = json.loads(text)
+            self.logger.debug("響應狀態碼: %s 響應數據: %s", status_code, Truncated(response_data, 200))
+        except ValueError as e:
+            self.logger.error(f"JSON解析錯誤: {e}")
+            raise NetworkError(f"無法解析API響應: {e}")
+        
+        # 檢查業務邏輯錯誤 (合約API的錯誤格式可能不同)
+        if isinstance(response_data, dict):
+            # 常見的錯誤字段
+            if 'code' in response_data and response_data['code'] != 0:
+                self.logger.error(f"API業務錯誤: {response_data}")
+                handle_api_error(response_data, 200)
+            elif 'success' in response_data and not response_data['success']:
+                self.logger.error(f"API業務錯誤: {response_data}")
+                handle_api_error(response_data, 200)
+        
+        return response_data
     
     def _submit_request(
         self,
@@ -153,104 +285,62 @@ class _ContractHTTPManager:
         Raises:
             相應的異常類型
         """
-        if query is None:
-            query = {}
+        timing = self.instrumentation.start(method, path)
         
-        url = f"{self.base_url}{path}"
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(path)
         
-        # 記錄請求信息
-        self.logger.debug(f"提交合約請求: {method} {url}")
-        self.logger.debug(f"參數: {query}")
+        if timing is None:
+            method, url, headers, params, data = self._prepare_request(method, path, query, auth)
+            response = self._send(method, url, headers, params, data)
+            return self._parse_response(response.status_code, response.text)
         
+        # 計時路徑：限頻等待 / 簽名 / 發送 / 等待響應 / 解析
+        timing.throttle = timing.lap()
         try:
-            headers = {}
-            
-            if auth:
-                # 生成時間戳
-                timestamp = str(int(time.time() * 1000))
-                
-                # 生成簽名
-                signature = self._generate_signature(method, path, query, timestamp)
-                
-                # 設置認證頭
-                headers.update({
-                    "sign": signature,
-                    "api_key": self.api_key,
-                    "timestamp": timestamp,
-                })
-            
-            if method.upper() == "GET":
-                # GET請求
-                response = self.client.get(
-                    url,
-                    params=query,
-                    headers=headers,
-                    timeout=self.config.timeout
-                )
+            method, url, headers, params, data = self._prepare_request(method, path, query, auth)
+            timing.sign = timing.lap()
+            response = self._send(method, url, headers, params, data)
+            timing.status = response.status_code
+            timing.split_round_trip(timing.lap(), response.elapsed.total_seconds())
+            timing.retries = retry_count(response)
+            timing.bytes_out = len(data) if data else 0
+            timing.bytes_in = len(response.content)
+            return self._parse_response(response.status_code, response.text)
+        except Exception as e:
+            timing.error = type(e).__name__
+            raise
+        finally:
+            remaining = timing.lap()
+            if timing.status is None:
+                timing.send += remaining
             else:
-                # POST/PUT/DELETE請求
-                if auth:
-                    headers["Content-type"] = "application/json"
-                
-                data = json.dumps(query) if query else "{}"
-                
-                if method.upper() == "POST":
-                    response = self.client.post(
-                        url,
-                        data=data,
-                        headers=headers,
-                        timeout=self.config.timeout
-                    )
-                elif method.upper() == "DELETE":
-                    response = self.client.delete(
-                        url,
-                        data=data,
-                        headers=headers,
-                        timeout=self.config.timeout
-                    )
-                elif method.upper() == "PUT":
-                    response = self.client.put(
-                        url,
-                        data=data,
-                        headers=headers,
-                        timeout=self.config.timeout
-                    )
-                else:
-                    raise ValueError(f"不支援的HTTP方法: {method}")
-            
-            # 記錄響應信息
-            self.logger.debug(f"響應狀態碼: {response.status_code}")
-            
-            # 檢查HTTP狀態碼
-            if response.status_code != 200:
-                try:
-                    error_data = response.json()
-                except ValueError:
-                    error_data = {"message": response.text}
-                
-                self.logger.error(f"HTTP錯誤: {response.status_code}, {error_data}")
-                handle_api_error(error_data, response.status_code)
-            
-            # 解析響應
-            try:
-                response_data = response.json()
-                self.logger.debug(f"響應數據: {str(response_data)[:200]}...")
-            except ValueError as e:
-                self.logger.error(f"JSON解析錯誤: {e}")
-                raise NetworkError(f"無法解析API響應: {e}")
-            
-            # 檢查業務邏輯錯誤 (合約API的錯誤格式可能不同)
-            if isinstance(response_data, dict):
-                # 常見的錯誤字段
-                if 'code' in response_data and response_data['code'] != 0:
-                    self.logger.error(f"API業務錯誤: {response_data}")
-                    handle_api_error(response_data, 200)
-                elif 'success' in response_data and not response_data['success']:
-                    self.logger.error(f"API業務錯誤: {response_data}")
-                    handle_api_error(response_data, 200)
-            
-            return response_data
-            
+                timing.parse = remaining
+            self.instrumentation.record(timing)
+    
+    def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        params: Optional[Dict[str, Any]],
+        data: Optional[bytes]
+    ) -> requests.Response:
+        """
+        發送已構建的請求，將網絡異常映射為 NetworkError
+        
+        Returns:
+            HTTP響應
+        """
+        try:
+            return self.client.request(
+                method,
+                url,
+                params=params,
+                data=data,
+                headers=headers,
+                timeout=self.config.timeout
+            )
         except requests.exceptions.Timeout:
             self.logger.error("請求超時")
             raise NetworkError("請求超時")
@@ -261,10 +351,79 @@ class _ContractHTTPManager:
             self.logger.error(f"HTTP請求錯誤: {e}")
             raise NetworkError(f"HTTP請求錯誤: {e}")
     
+    def _iter_pages(self, fetch, parse, first, **options):
+        """逐條產出分頁查詢的記錄（見 pagination.iter_pages），異步管理器返回異步生成器"""
+        return iter_pages(fetch, parse, first, **options)
+    
+    def rate_limit_usage(self) -> Dict[str, Dict[str, float]]:
+        """
+        獲取客戶端限頻桶的使用情況
+        
+        Returns:
+            {桶名稱: {"tokens": 可用令牌, "capacity": 容量, "utilization": 使用率(0-1)}}
+        """
+        if self.rate_limiter is None:
+            return {}
+        return self.rate_limiter.usage()
+    
+    def enable_metrics(self, registry: Optional[MetricsRegistry] = None) -> MetricsRegistry:
+        """
+        啟用請求指標收集
+        
+        Args:
+            registry: 共用的指標註冊表（為空則創建）
+            
+        Returns:
+            訂閱了本管理器請求計時的 MetricsRegistry（未配置 instrumentation 時
+            切換到本管理器專用的收集點，只記錄本管理器的請求）
+        """
+        registry = registry or MetricsRegistry()
+        # 全局收集點會匯集進程內所有客戶端的請求，改用本客戶端專用的收集點
+        if self.instrumentation is default_instrumentation:
+            self._set_instrumentation(Instrumentation())
+        registry.attach(self.instrumentation)
+        session = getattr(self, 'client', None)
+        if isinstance(session, requests.Session):
+            registry.track_session(session, "futures")
+        return registry
+    
+    def _set_instrumentation(self, instrumentation: Instrumentation) -> None:
+        """更換請求計時收集點"""
+        self.instrumentation = instrumentation
+    
+    def warmup(self, connections: Optional[int] = None) -> int:
+        """
+        預熱連接池
+        
+        並發發送輕量HEAD請求，提前完成TCP/TLS握手，避免交易開始後的冷連接延遲
+        
+        Args:
+            connections: 預熱的連接數，預設為配置的 pool_size
+            
+        Returns:
+            成功完成的預熱請求數
+        """
+        connections = min(connections or self.config.pool_size, self.config.pool_size)
+        
+        def _open(_):
+            try:
+                self.client.head(self.base_url, timeout=self.config.timeout)
+                return True
+            except requests.exceptions.RequestException as e:
+                self.logger.warning(f"預熱連接失敗: {e}")
+                return False
+        
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            opened = sum(executor.map(_open, range(connections)))
+        
+        self.logger.debug(f"已預熱 {opened}/{connections} 個連接")
+        return opened
+    
     def close(self):
-        """關閉HTTP會話"""
-        self.logger.debug("關閉合約HTTP會話")
-        self.client.close()
+        """關閉HTTP會話（共用的會話由創建者負責關閉）"""
+        if self._owns_session:
+            self.logger.debug("關閉合約HTTP會話")
+            self.client.close()
     
     def __enter__(self):
         return self
@@ -5,8 +5,11 @@ CoinW 期貨市場數據模組
 端點格式: /v1/perpum/... 和 /v1/perpumPublic/...
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Sequence
 from .http_manager import _ContractHTTPManager
+from ..klines import load_future_klines
+from ..snapshot import SNAPSHOT_FIELDS, fetch_snapshot
+from ..pagination import page_number_parser
 
 
 class FutureMarket(_ContractHTTPManager):
@@ -154,6 +157,31 @@ class FutureMarket(_ContractHTTPManager):
             auth=False
         ) 
     
+    def get_klines_history(
+        self,
+        currency_code: str,
+        granularity: str = "0",
+        start: Optional[int] = None,
+        end: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        獲取K線歷史（列式數組）
+        
+        K線接口不支持時間範圍參數，最多只能獲取最近1500根K線，
+        早於此範圍的 start 會被截斷並記錄警告
+        
+        Args:
+            currency_code: 交易品種的基礎貨幣，如 "BTC"，不區分大小寫
+            granularity: K線時間間隔，可選值同 get_klines
+            start: 開始時間戳（毫秒），為空時返回最近1500根
+            end: 結束時間戳（毫秒）
+            
+        Returns:
+            {'ts', 'open', 'high', 'low', 'close', 'volume'} 列式數組，按時間升序
+            （安裝 numpy 時為 numpy.ndarray，否則為 array.array）
+        """
+        return load_future_klines(self, currency_code, granularity, start, end)
+    
     def get_last_funding_rate(self, instrument: str) -> Dict[str, Any]:
         """
         獲取最近一次結算資金費率
@@ -328,3 +356,60 @@ class FutureMarket(_ContractHTTPManager):
             },
             auth=True
         )
+
+    def iter_traders_history(
+        self,
+        instrument: str,
+        page_size: int = 100,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        prefetch: bool = True
+    ):
+        """
+        逐條迭代歷史公開交易，自動翻頁
+        
+        處理當前頁時於後台預取下一頁，按交易ID去除跨頁重複，遇到早於 since 的記錄後停止翻頁
+        
+        Args:
+            instrument: 交易品種的基礎貨幣，如 "BTC"
+            page_size: 每頁數量
+            since: 開始時間戳（毫秒，按 createdDate 過濾）
+            until: 結束時間戳（毫秒）
+            prefetch: 是否預取下一頁
+            
+        Yields:
+            交易記錄
+        """
+        return self._iter_pages(
+            lambda page: self.get_traders_history(instrument, page, page_size),
+            page_number_parser(page_size),
+            1,
+            id_field="id",
+            time_field="createdDate",
+            since=since,
+            until=until,
+            prefetch=prefetch
+        )
+
+    def snapshot(
+        self,
+        instruments: Sequence[str],
+        fields: Sequence[str] = SNAPSHOT_FIELDS,
+        max_workers: int = 16
+    ) -> Dict[str, Any]:
+        """
+        並行獲取多個合約的行情快照
+        
+        ticker 通過一次 get_tickers 批量獲取，深度、資金費率和成交按品種並行請求，
+        共用同一個連接池和限頻器
+        
+        Args:
+            instruments: 合約基礎貨幣列表，如 ["BTC", "ETH"]
+            fields: 需要的數據: "ticker"、"depth"、"funding_rate"、"trades"
+            max_workers: 最大並行請求數
+            
+        Returns:
+            {'instrument': [...], 'last_price': ..., 'bid': ..., ..., 'errors': [...]} 列式表，
+            數值列缺失時為 NaN，errors 為每行 {數據類型: 錯誤信息} 或 None
+        """
+        return fetch_snapshot(self, instruments, fields, max_workers)
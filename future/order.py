@@ -6,9 +6,107 @@ CoinW 期貨交易模組
 認證方式: HMAC SHA256 簽名
 """
 
-from typing import Dict, Any, Optional, List, Union
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
 from .http_manager import _ContractHTTPManager
-from ..exceptions import InvalidParameterError
+from ..pagination import page_number_parser
+from ..exceptions import (
+    CoinWAPIError,
+    InvalidParameterError,
+    NetworkError,
+    OrderStatusUnknownError,
+    RateLimitError,
+    ServerError
+)
+
+
+# 結果不確定的下單錯誤：請求可能已到達交易所，只能按 thirdOrderId 確認，不能重新提交
+_AMBIGUOUS_ORDER_ERRORS = (NetworkError, ServerError)
+
+# 可重新提交的下單錯誤（429 表示請求被拒絕）
+_RETRYABLE_ORDER_ERRORS = (RateLimitError,)
+
+# 批量接口單次請求的最大條數
+BATCH_ORDER_LIMIT = 20
+
+
+def _chunk(items: Sequence[Any], size: int) -> List[Sequence[Any]]:
+    if size < 1:
+        raise InvalidParameterError("chunk_size 必須大於 0")
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+# 批量響應中找不到對應結果時的錯誤信息
+_UNKNOWN_OUTCOME = '批量響應中沒有該條的結果，狀態未知'
+
+
+def _item_failed(item: Any) -> Optional[str]:
+    """批量響應中單條結果的錯誤信息，成功時返回 None"""
+    if isinstance(item, dict):
+        if item.get('success') is False or item.get('code') not in (None, 0, '0'):
+            return str(item.get('msg') or item.get('message') or item.get('code'))
+    return None
+
+
+def _combine_batches(
+    keys: List[List[Any]],
+    responses: List[Any],
+    key_field: str
+) -> Dict[str, Any]:
+    """
+    將各批次的響應按輸入順序展開為逐條結果
+
+    批次響應的 data 為與請求等長的列表時按位置對應，列表項帶有 key_field 時按該字段對應；
+    整個批次失敗（拋出異常或返回不含逐條結果的錯誤響應）時，該批次的每一條都記錄為失敗；
+    列表中缺少某條的結果或長度與請求不符（如空列表）時，無法對應的條目同樣記錄為失敗（結果未知）
+
+    Args:
+        keys: 每個批次中各條的標識（thirdOrderId 或訂單ID）
+        responses: 每個批次的響應或異常
+        key_field: 批次響應中標識字段名
+
+    Returns:
+        {'code': 0 全部成功 / -1 存在失敗, 'data': {'results': [...], 'succeeded': 成功數, 'failed': 失敗數}, 'msg': ''}
+    """
+    results = []
+    for batch_keys, response in zip(keys, responses):
+        if isinstance(response, Exception):
+            items = [None] * len(batch_keys)
+            errors = [str(response)] * len(batch_keys)
+        else:
+            data = response.get('data') if isinstance(response, dict) else None
+            if isinstance(data, list) and data and all(isinstance(item, dict) and key_field in item for item in data):
+                by_key = {str(item[key_field]): item for item in data}
+                items = [by_key.get(str(key)) for key in batch_keys]
+                errors = [_item_failed(item) if item is not None else _UNKNOWN_OUTCOME for item in items]
+            elif isinstance(data, list) and len(data) == len(batch_keys):
+                items = data
+                errors = [_item_failed(item) for item in items]
+            elif isinstance(data, list):
+                # 逐條結果無法與請求對應，無法確認每一條是否成功
+                items = [None] * len(batch_keys)
+                errors = [_item_failed(response) or _UNKNOWN_OUTCOME] * len(batch_keys)
+            else:
+                items = [data] * len(batch_keys)
+                errors = [_item_failed(response)] * len(batch_keys)
+
+        for key, item, error in zip(batch_keys, items, errors):
+            results.append({
+                key_field: key,
+                'index': len(results),
+                'success': error is None,
+                'result': item,
+                'error': error,
+            })
+
+    failed = sum(1 for result in results if not result['success'])
+    return {
+        'code': 0 if not failed else -1,
+        'data': {'results': results, 'succeeded': len(results) - failed, 'failed': failed},
+        'msg': '' if not failed else f'{failed} of {len(results)} failed',
+    }
 
 
 class FutureOrder(_ContractHTTPManager):
@@ -55,13 +153,62 @@ class FutureOrder(_ContractHTTPManager):
             stop_profit_price: 止盈價格（止盈訂單必填）
             trigger_price: 計劃訂單的觸發價格
             trigger_type: 觸發價格滿足時的訂單類型：0：限價單，1：市價單
-            third_order_id: 用戶分配的自定義訂單ID
+            third_order_id: 用戶分配的自定義訂單ID（未指定且 config.auto_third_order_id 為 True 時自動生成）。
+                遇到網路錯誤或5xx時按此ID確認訂單是否已提交，見 _place_order_request
             use_almighty_gold: 是否使用萬能金
             gold_id: 黃金ID
             **kwargs: 其他參數
             
         Returns:
             訂單信息
+            
+        Raises:
+            OrderStatusUnknownError: 結果不確定且在 config.order_confirm_timeout 內查不到該訂單
+        """
+        data = self.build_order_params(
+            instrument, direction, leverage, quantity_unit, quantity, position_model, position_type,
+            open_price=open_price,
+            stop_loss_price=stop_loss_price,
+            stop_profit_price=stop_profit_price,
+            trigger_price=trigger_price,
+            trigger_type=trigger_type,
+            third_order_id=third_order_id,
+            use_almighty_gold=use_almighty_gold,
+            gold_id=gold_id,
+            **kwargs
+        )
+        return self._place_order_request(data)
+    
+    def build_order_params(
+        self,
+        instrument: str,
+        direction: str,
+        leverage: int,
+        quantity_unit: int,
+        quantity: Union[float, str],
+        position_model: int,
+        position_type: str,
+        open_price: Optional[float] = None,
+        stop_loss_price: Optional[float] = None,
+        stop_profit_price: Optional[float] = None,
+        trigger_price: Optional[float] = None,
+        trigger_type: Optional[int] = None,
+        third_order_id: Optional[str] = None,
+        use_almighty_gold: Optional[bool] = None,
+        gold_id: Optional[int] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        構建並校驗下單請求參數（place_order 和 OrderGateway 共用）
+        
+        只有 config.auto_third_order_id 為 True 時才會為未指定 third_order_id 的訂單
+        自動生成 uuid4 十六進制字符串，否則不添加 thirdOrderId
+        
+        Args:
+            參數同 place_order
+            
+        Returns:
+            下單請求參數
         """
         # 參數驗證
         if direction not in ["long", "short"]:
@@ -104,6 +251,9 @@ class FutureOrder(_ContractHTTPManager):
         if trigger_type is not None:
             data['triggerType'] = trigger_type
             
+        if not third_order_id and self.config.auto_third_order_id:
+            third_order_id = uuid.uuid4().hex
+        
         if third_order_id:
             data['thirdOrderId'] = third_order_id
             
@@ -116,12 +266,117 @@ class FutureOrder(_ContractHTTPManager):
         # 添加其他參數
         data.update(kwargs)
         
-        return self._submit_request(
-            method="POST",
-            path="/v1/perpum/order",
-            query=data,
-            auth=True
-        )
+        return data
+    
+    def _place_order_request(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        提交下單請求
+        
+        - 429（請求被拒絕）：按 config.order_retries 重新提交
+        - 網路錯誤或5xx（結果不確定）：絕不重新提交。沒有 thirdOrderId 時直接拋出原始錯誤；
+          有 thirdOrderId 時在 config.order_confirm_timeout 秒內輪詢確認，查到則返回該訂單
+        
+        Args:
+            data: 下單參數
+            
+        Returns:
+            訂單信息
+            
+        Raises:
+            OrderStatusUnknownError: 結果不確定且在確認期限內查不到該訂單
+        """
+        retries = self.config.order_retries
+        
+        for attempt in range(retries + 1):
+            try:
+                return self._submit_request(
+                    method="POST",
+                    path="/v1/perpum/order",
+                    query=data,
+                    auth=True
+                )
+            except _RETRYABLE_ORDER_ERRORS as e:
+                if attempt >= retries:
+                    raise
+                self.logger.warning(f"下單被限頻拒絕，準備重新提交: {e}")
+                time.sleep(self._order_retry_delay(attempt))
+            except _AMBIGUOUS_ORDER_ERRORS as e:
+                if not data.get('thirdOrderId'):
+                    raise
+                return self._confirm_order(data, e)
+    
+    def _confirm_order(self, data: Dict[str, Any], error: CoinWAPIError) -> Dict[str, Any]:
+        """
+        結果不確定時按 thirdOrderId 輪詢，直到查到訂單或超過 config.order_confirm_timeout
+        
+        Args:
+            data: 下單參數（包含 thirdOrderId）
+            error: 下單請求的原始錯誤
+            
+        Returns:
+            與下單接口相同格式的結果
+            
+        Raises:
+            OrderStatusUnknownError: 期限內查不到該訂單（不代表訂單不存在）
+        """
+        third_order_id = data['thirdOrderId']
+        self.logger.warning(f"下單結果不確定，按 thirdOrderId={third_order_id} 確認: {error}")
+        deadline = time.monotonic() + self.config.order_confirm_timeout
+        
+        while True:
+            time.sleep(max(0.0, min(self.config.order_confirm_interval, deadline - time.monotonic())))
+            try:
+                existing = self._find_order_by_third_order_id(
+                    data['instrument'], data['positionType'], third_order_id
+                )
+            except CoinWAPIError as e:
+                self.logger.warning(f"查詢訂單失敗 (thirdOrderId={third_order_id}): {e}")
+                existing = None
+            if existing is not None:
+                self.logger.info(f"訂單已提交 (thirdOrderId={third_order_id})")
+                return existing
+            if time.monotonic() >= deadline:
+                break
+        
+        raise OrderStatusUnknownError(
+            f"無法在 {self.config.order_confirm_timeout} 秒內確認訂單是否已提交，未重新下單 "
+            f"(thirdOrderId={third_order_id}): {error}",
+            third_order_id=third_order_id
+        ) from error
+    
+    def _order_retry_delay(self, attempt: int) -> float:
+        """下單重試前的等待時間"""
+        return self.config.backoff_factor * (2 ** attempt)
+    
+    def _find_order_by_third_order_id(
+        self,
+        instrument: str,
+        position_type: str,
+        third_order_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        按 thirdOrderId 查詢訂單是否已提交（依次查詢當前訂單和最近歷史訂單）
+        
+        Returns:
+            已提交時返回與下單接口相同格式的結果，否則返回 None
+        """
+        open_orders = self.get_open_orders(instrument, position_type)
+        found = self._match_third_order_id(open_orders, third_order_id)
+        if found is None:
+            history = self.get_order_history(instrument, page=1, page_size=50)
+            found = self._match_third_order_id(history, third_order_id)
+        return found
+    
+    @staticmethod
+    def _match_third_order_id(response: Dict[str, Any], third_order_id: str) -> Optional[Dict[str, Any]]:
+        """在訂單列表響應中查找指定 thirdOrderId 的訂單"""
+        data = response.get('data') if isinstance(response, dict) else None
+        rows = data.get('rows', []) if isinstance(data, dict) else (data or [])
+        
+        for row in rows:
+            if isinstance(row, dict) and str(row.get('thirdOrderId')) == third_order_id:
+                return {'code': 0, 'data': {'value': row.get('id')}, 'msg': ''}
+        return None
     
     def modify_order(
         self,
@@ -277,6 +532,83 @@ class FutureOrder(_ContractHTTPManager):
             auth=True
         )
     
+    def place_orders_batched(
+        self,
+        orders: List[Dict[str, Any]],
+        chunk_size: int = BATCH_ORDER_LIMIT,
+        max_workers: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        分批並行下單
+        
+        將訂單按批量接口的上限切分，各批次並行提交（共用連接池和限頻器），
+        沒有 thirdOrderId 的訂單自動生成，用於將每條結果對應回輸入訂單
+        
+        Args:
+            orders: 訂單列表，格式同 place_batch_orders
+            chunk_size: 每個批次的訂單數
+            max_workers: 最大並行批次數，預設為批次數
+            
+        Returns:
+            {'code': 0 全部成功 / -1 部分失敗, 'data': {'results': [...], 'succeeded', 'failed'}, 'msg'}；
+            results 與 orders 一一對應，每項包含 thirdOrderId、index、success、result、error
+        """
+        orders = [
+            order if order.get('thirdOrderId') else {**order, 'thirdOrderId': uuid.uuid4().hex}
+            for order in orders
+        ]
+        chunks = _chunk(orders, chunk_size)
+        keys = [[order['thirdOrderId'] for order in chunk] for chunk in chunks]
+        return self._gather_batches(
+            [lambda chunk=chunk: self.place_batch_orders(list(chunk)) for chunk in chunks],
+            lambda responses: _combine_batches(keys, responses, 'thirdOrderId'),
+            max_workers
+        )
+    
+    def cancel_orders_batched(
+        self,
+        order_ids: List[str],
+        pos_type: Optional[str] = None,
+        chunk_size: int = BATCH_ORDER_LIMIT,
+        max_workers: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        分批並行撤單
+        
+        Args:
+            order_ids: 訂單ID列表
+            pos_type: 持倉類型（可選），同 cancel_batch_orders
+            chunk_size: 每個批次的訂單數
+            max_workers: 最大並行批次數，預設為批次數
+            
+        Returns:
+            合併結果，格式同 place_orders_batched，每項以 id 標識訂單
+        """
+        chunks = _chunk(list(order_ids), chunk_size)
+        return self._gather_batches(
+            [lambda chunk=chunk: self.cancel_batch_orders(list(chunk), pos_type) for chunk in chunks],
+            lambda responses: _combine_batches([list(chunk) for chunk in chunks], responses, 'id'),
+            max_workers
+        )
+    
+    def _gather_batches(
+        self,
+        calls: List[Callable[[], Any]],
+        combine: Callable[[List[Any]], Dict[str, Any]],
+        max_workers: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """並行執行各批次請求，異常作為該批次的結果交給 combine"""
+        def run(call):
+            try:
+                return call()
+            except Exception as e:
+                return e
+        
+        if len(calls) <= 1:
+            return combine([run(call) for call in calls])
+        with ThreadPoolExecutor(max_workers=max_workers or len(calls)) as executor:
+            return combine(list(executor.map(run, calls)))
+    
     def get_order(
         self, 
         position_type: str,
@@ -470,6 +802,68 @@ class FutureOrder(_ContractHTTPManager):
             auth=True
         )
     
+    def iter_order_history(
+        self,
+        instrument: Optional[str] = None,
+        origin_type: Optional[str] = None,
+        page_size: int = 100,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        prefetch: bool = True
+    ):
+        """
+        逐條迭代歷史訂單（7天），自動翻頁
+        
+        處理當前頁時於後台預取下一頁，按訂單ID去除跨頁重複，遇到早於 since 的訂單後停止翻頁
+        
+        Args:
+            instrument: 合約代碼（可選）
+            origin_type: 初始訂單類型（可選）
+            page_size: 每頁結果數
+            since: 開始時間戳（毫秒，按 createdDate 過濾）
+            until: 結束時間戳（毫秒）
+            prefetch: 是否預取下一頁
+            
+        Yields:
+            訂單記錄
+        """
+        return self._iter_pages(
+            lambda page: self.get_order_history(instrument, page, page_size, origin_type),
+            page_number_parser(page_size),
+            1,
+            id_field="id",
+            time_field="createdDate",
+            since=since,
+            until=until,
+            prefetch=prefetch
+        )
+    
+    def iter_order_archive(
+        self,
+        instrument: Optional[str] = None,
+        origin_type: Optional[str] = None,
+        page_size: int = 100,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        prefetch: bool = True
+    ):
+        """
+        逐條迭代歷史訂單（3個月），自動翻頁，參數同 iter_order_history
+        
+        Yields:
+            訂單記錄
+        """
+        return self._iter_pages(
+            lambda page: self.get_order_archive(instrument, page, page_size, origin_type),
+            page_number_parser(page_size),
+            1,
+            id_field="id",
+            time_field="createdDate",
+            since=since,
+            until=until,
+            prefetch=prefetch
+        )
+    
     def close_position(
         self,
         position_id: str,
@@ -560,6 +954,30 @@ class FutureOrder(_ContractHTTPManager):
             auth=True
         )
     
+    def close_positions_batched(
+        self,
+        third_order_ids: List[str],
+        chunk_size: int = BATCH_ORDER_LIMIT,
+        max_workers: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        分批並行平倉
+        
+        Args:
+            third_order_ids: 自定義訂單ID列表
+            chunk_size: 每個批次的條數
+            max_workers: 最大並行批次數，預設為批次數
+            
+        Returns:
+            合併結果，格式同 place_orders_batched，每項以 thirdOrderId 標識
+        """
+        chunks = _chunk(list(third_order_ids), chunk_size)
+        return self._gather_batches(
+            [lambda chunk=chunk: self.close_batch_positions(list(chunk)) for chunk in chunks],
+            lambda responses: _combine_batches([list(chunk) for chunk in chunks], responses, 'thirdOrderId'),
+            max_workers
+        )
+    
     def reverse_position(self, position_id: str) -> Dict[str, Any]:
         """
         反向持倉
@@ -8,8 +8,15 @@ import time
 import websocket
 import threading
 import logging
+from time import perf_counter
 from typing import Dict, List, Callable, Optional, Union, Any
 
+from .. import codec
+from ..dispatcher import MessageDispatcher
+from ..conflation import Conflator
+from ..orderbook import OrderBook
+from ..ws_metrics import WebSocketMetrics, topic_of
+
 # 設置日誌
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,6 +38,15 @@ class CoinWFutureWebSocketClient:
         on_error: Optional[Callable] = None,
         on_close: Optional[Callable] = None,
         on_open: Optional[Callable] = None,
+        order_book: bool = False,
+        skip_unsubscribed: bool = False,
+        dispatch_workers: int = 0,
+        dispatch_queue_size: int = 10000,
+        dispatch_policy: str = "drop_oldest",
+        conflate_types: Optional[List[str]] = None,
+        conflate_interval: Optional[float] = None,
+        metrics: bool = False,
+        ws_url: str = "wss://ws.futurescw.com/perpum",
     ):
         """
         初始化 WebSocket 客戶端
@@ -42,12 +58,25 @@ class CoinWFutureWebSocketClient:
             on_error: 錯誤處理的回調函數
             on_close: 連接關閉的回調函數
             on_open: 連接打開的回調函數
+            order_book: 是否根據 depth 推送在本地維護訂單簿（通過 get_order_book 讀取）
+            skip_unsubscribed: 是否在完整解碼前丟棄未訂閱類型的消息
+            dispatch_workers: 回調工作線程數，0 表示在接收線程中直接調用回調
+            dispatch_queue_size: 分發隊列容量
+            dispatch_policy: 隊列滿時的策略: "drop_oldest"（丟棄最早的消息）、
+                "conflate"（以新消息覆蓋同一 (type, pairCode) 排隊中的消息；隊列未滿時所有消息照常排隊，
+                只在溢出時合併，因此 order、fills、depth 增量等消息與 drop_oldest 一樣只在溢出時丟失）
+                或 "block"（阻塞接收線程）
+            conflate_types: 只保留最新值的消息類型，如 ["ticker_swap", "mark_price", "index_price", "funding_rate"]；
+                這些消息在接收時不解碼，通過 get_latest/pop_updates 拉取
+            conflate_interval: 設置後每隔指定秒數將有更新的合併消息按路由交給回調
+            metrics: 是否記錄按主題的消息速率、解碼/回調耗時、延遲、ping 往返時間和重連歷史
+            ws_url: WebSocket URL（可指向本地模擬器，如 ExchangeSimulator.futures_ws_url）
         """
         self._api_key = api_key
         self._secret_key = secret_key
         
         # WebSocket URL - 根據文檔使用正確的端點
-        self._ws_url = "wss://ws.futurescw.com/perpum"
+        self._ws_url = ws_url
         
         # 回調函數
         self._user_on_message = on_message
@@ -65,10 +94,36 @@ class CoinWFutureWebSocketClient:
         
         # 訂閱管理
         self._subscriptions: Dict[str, Dict] = {}
+        self._subscribed_types: set = set()
+        
+        # 回調路由 {(type, pairCode 或 None): callback}
+        self._routes: Dict[tuple, Callable] = {}
+        self._skip_unsubscribed = skip_unsubscribed
+        
+        # 消息分發：dispatch_workers > 0 時回調在獨立的工作線程中執行，不阻塞接收線程
+        self._dispatcher: Optional[MessageDispatcher] = None
+        if dispatch_workers > 0:
+            self._dispatcher = MessageDispatcher(
+                self._invoke,
+                workers=dispatch_workers,
+                maxsize=dispatch_queue_size,
+                policy=dispatch_policy,
+                name="coinw-future-ws"
+            )
+        
+        # 消息合併：指定類型只保留每個 (type, pairCode) 的最新原始消息，消費時才解碼
+        self._conflator: Optional[Conflator] = Conflator(conflate_types) if conflate_types else None
+        self._conflate_interval = conflate_interval
         
         # 心跳管理
         self._last_ping_time = 0
         self._ping_interval = 30
+        
+        # 本地訂單簿 {pairCode: OrderBook}
+        self._order_books: Optional[Dict[str, OrderBook]] = {} if order_book else None
+        
+        # 指標
+        self._metrics: Optional[WebSocketMetrics] = WebSocketMetrics() if metrics else None
     
     def connect(self) -> bool:
         """
@@ -77,6 +132,12 @@ class CoinWFutureWebSocketClient:
         Returns:
             bool: 連接是否成功
         """
+        if self._dispatcher is not None:
+            self._dispatcher.start()
+        
+        if self._conflator is not None and self._conflate_interval:
+            self._conflator.start(self._route, self._conflate_interval)
+        
         try:
             logger.info("正在連接到 CoinW 期貨 WebSocket...")
             
@@ -85,7 +146,8 @@ class CoinWFutureWebSocketClient:
                 on_message=self._on_message,
                 on_error=self._on_error,
                 on_close=self._on_close,
-                on_open=self._on_open
+                on_open=self._on_open,
+                on_pong=self._on_pong
             )
             
             self._ws_thread = threading.Thread(
@@ -109,9 +171,26 @@ class CoinWFutureWebSocketClient:
     
     def _on_message(self, ws, message) -> None:
         """WebSocket消息處理"""
+        metrics = self._metrics
         try:
-            data = json.loads(message)
-            logger.debug(f"收到消息: {data}")
+            if self._skip_unsubscribed and codec.should_skip(message, self._subscribed_types):
+                if metrics is not None:
+                    metrics.on_raw(len(message))
+                return
+            
+            if self._conflator is not None and self._conflator.offer(message):
+                if metrics is not None:
+                    metrics.on_raw(len(message))
+                return
+            
+            if metrics is None:
+                data = codec.loads(message)
+            else:
+                started = perf_counter()
+                data = codec.loads(message)
+                metrics.on_message(topic_of(data), len(message), perf_counter() - started, codec.peek_timestamp(message))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("收到消息: %s", data)
             
             # 處理認證回應
             if "event" in data and data["event"] == "login":
@@ -122,13 +201,152 @@ class CoinWFutureWebSocketClient:
                     logger.error("私有頻道認證失敗")
                 return
             
-            # 調用用戶的回調函數
-            if self._user_on_message:
-                self._user_on_message(data)
+            # 更新本地訂單簿
+            if self._order_books is not None and data.get("type") == "depth":
+                self._update_order_book(data)
+            
+            self._route(data)
         
         except Exception as e:
             logger.error(f"處理消息時出錯: {e}")
     
+    def _route(self, data: Dict) -> None:
+        """按 (type, pairCode) 路由到回調，沒有回調的消息直接丟棄"""
+        message_type = data.get("type")
+        pair_code = data.get("pairCode")
+        if pair_code:
+            pair_code = pair_code.upper()
+        
+        routes = self._routes
+        handler = (
+            routes.get((message_type, pair_code)) or routes.get((message_type, None))
+            if routes else None
+        ) or self._user_on_message
+        if handler is None:
+            return
+        
+        if self._dispatcher is not None:
+            self._dispatcher.submit((message_type, pair_code), (handler, data))
+        elif self._metrics is not None:
+            self._metrics.timed_callback(handler, data)
+        else:
+            handler(data)
+    
+    def get_latest(self, message_type: str, pair_code: Optional[str] = None) -> Optional[Dict]:
+        """
+        獲取合併類型的最新消息（需設置 conflate_types）
+        
+        Args:
+            message_type: 消息類型，如 "ticker_swap"
+            pair_code: 合約基礎貨幣，如 "BTC"（不區分大小寫）
+            
+        Returns:
+            最新消息，尚未收到時返回 None
+        """
+        if self._conflator is None:
+            return None
+        return self._conflator.latest(message_type, pair_code)
+    
+    def pop_updates(self) -> Dict[tuple, Dict]:
+        """
+        獲取自上次拉取以來有更新的合併消息（需設置 conflate_types）
+        
+        Returns:
+            {(type, pairCode): 最新消息}
+        """
+        if self._conflator is None:
+            return {}
+        return self._conflator.pop_updates()
+    
+    def conflation_stats(self) -> Optional[Dict[str, int]]:
+        """
+        消息合併統計
+        
+        Returns:
+            統計信息；未設置 conflate_types 時返回 None
+        """
+        return self._conflator.stats() if self._conflator is not None else None
+    
+    def _invoke(self, item) -> None:
+        """在分發線程中調用回調"""
+        handler, data = item
+        if self._metrics is not None:
+            self._metrics.timed_callback(handler, data)
+        else:
+            handler(data)
+    
+    def add_handler(self, message_type: str, callback: Callable, pair_code: Optional[str] = None) -> None:
+        """
+        註冊消息回調（不發送訂閱請求）
+        
+        路由優先級：(type, pairCode) 精確匹配 > (type, 任意pairCode) > 全局 on_message
+        
+        Args:
+            message_type: 消息類型，如 "depth"、"ticker_swap"、"order"
+            callback: 回調函數
+            pair_code: 合約基礎貨幣，如 "BTC"（不區分大小寫）；為空時匹配該類型的所有消息
+        """
+        self._routes[(message_type, pair_code.upper() if pair_code else None)] = callback
+    
+    def remove_handler(self, message_type: str, pair_code: Optional[str] = None) -> None:
+        """
+        移除消息回調
+        
+        Args:
+            message_type: 消息類型
+            pair_code: 合約基礎貨幣；為空時移除該類型的通配回調
+        """
+        self._routes.pop((message_type, pair_code.upper() if pair_code else None), None)
+    
+    def dispatch_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        消息分發統計（隊列深度、丟棄數等）
+        
+        Returns:
+            統計信息；未啟用 dispatch_workers 時返回 None
+        """
+        return self._dispatcher.stats() if self._dispatcher is not None else None
+    
+    @property
+    def metrics(self) -> Optional[WebSocketMetrics]:
+        """指標對象（可用於 stale_topics/lagging_topics 告警）；未啟用 metrics 時為 None"""
+        return self._metrics
+    
+    def stream_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        WebSocket 指標快照（按主題的速率、延遲、ping 往返時間、重連歷史）
+        
+        Returns:
+            統計信息；未啟用 metrics 時返回 None
+        """
+        return self._metrics.snapshot() if self._metrics is not None else None
+    
+    def _update_order_book(self, message: Dict) -> None:
+        """以 depth 推送更新對應合約的本地訂單簿"""
+        depth = message.get("data")
+        if not isinstance(depth, dict) or ("asks" not in depth and "bids" not in depth):
+            return  # 訂閱確認等非深度消息
+        
+        pair_code = str(message.get("pairCode", "")).upper()
+        book = self._order_books.get(pair_code)
+        if book is None:
+            book = self._order_books[pair_code] = OrderBook(pair_code)
+        book.apply_futures_depth(depth)
+    
+    def get_order_book(self, pair_code: str) -> Optional[OrderBook]:
+        """
+        獲取本地維護的訂單簿
+        
+        Args:
+            pair_code: 合約基礎貨幣，如 "BTC"（不區分大小寫）
+            
+        Returns:
+            訂單簿；未啟用 order_book 或尚未收到該合約的深度推送時返回 None
+        """
+        if self._order_books is None:
+            return None
+        return self._order_books.get(pair_code.upper())
+    
     def _on_error(self, ws, error) -> None:
         """WebSocket錯誤處理"""
         logger.error(f"WebSocket錯誤: {error}")
@@ -141,6 +359,8 @@ class CoinWFutureWebSocketClient:
         logger.info(f"WebSocket連接關閉: {close_status_code} - {close_msg}")
         self._is_connected = False
         self._is_authenticated = False
+        if self._metrics is not None:
+            self._metrics.on_close(close_status_code, close_msg)
         
         # 嘗試重新連接
         if self._reconnect_attempts < self._max_reconnects:
@@ -157,6 +377,8 @@ class CoinWFutureWebSocketClient:
         logger.info("WebSocket連接已建立")
         self._is_connected = True
         self._reconnect_attempts = 0
+        if self._metrics is not None:
+            self._metrics.on_open()
         
         # 重新訂閱
         for topic, params in self._subscriptions.items():
@@ -165,6 +387,11 @@ class CoinWFutureWebSocketClient:
         if self._user_on_open:
             self._user_on_open()
     
+    def _on_pong(self, ws, data) -> None:
+        """記錄 ping 往返時間"""
+        if self._metrics is not None:
+            self._metrics.on_pong(ws)
+    
     def _authenticate(self) -> bool:
         """私有頻道身份驗證"""
         if not self._api_key or not self._secret_key:
@@ -225,19 +452,21 @@ class CoinWFutureWebSocketClient:
         
         Args:
             subscription_params: 訂閱參數，格式與文檔一致
-            callback: 可選的回調函數
+            callback: 可選的回調函數，只接收本訂閱 (type, pairCode) 的消息；
+                為空時消息交給全局 on_message
             
         Returns:
             bool: 訂閱是否成功
         """
-        if callback:
-            self._user_on_message = callback
-        
         # 生成唯一的訂閱key
         params = subscription_params.get("params", {})
+        
+        if callback:
+            self.add_handler(params.get("type"), callback, params.get("pairCode"))
         topic = f"{params.get('type', 'unknown')}_{params.get('pairCode', 'all')}"
         
         self._subscriptions[topic] = subscription_params
+        self._update_subscribed_types()
         
         if self._is_connected:
             return self._send_subscription(subscription_params)
@@ -268,6 +497,8 @@ class CoinWFutureWebSocketClient:
             topic = f"{params.get('type', 'unknown')}_{params.get('pairCode', 'all')}"
             if topic in self._subscriptions:
                 del self._subscriptions[topic]
+                self._update_subscribed_types()
+            self.remove_handler(params.get("type"), params.get("pairCode"))
             
             return True
             
@@ -275,6 +506,12 @@ class CoinWFutureWebSocketClient:
             logger.error(f"取消訂閱時出錯: {e}")
             return False
     
+    def _update_subscribed_types(self) -> None:
+        """更新已訂閱的消息類型（用於解碼前過濾）"""
+        self._subscribed_types = {
+            params.get("params", {}).get("type") for params in self._subscriptions.values()
+        }
+    
     def close(self) -> None:
         """關閉WebSocket連接"""
         self._is_connected = False
@@ -285,6 +522,12 @@ class CoinWFutureWebSocketClient:
         if self._ws_thread and self._ws_thread.is_alive():
             self._ws_thread.join(timeout=1)
         
+        if self._dispatcher is not None:
+            self._dispatcher.stop()
+        
+        if self._conflator is not None:
+            self._conflator.stop()
+        
         logger.info("WebSocket連接已關閉")
     
     def is_connected(self) -> bool:
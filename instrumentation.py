@@ -0,0 +1,197 @@
+"""
+CoinW 請求計時
+
+記錄每個 REST 請求各階段的耗時：限頻等待、構建與簽名、發送、等待響應、解析；
+只有在註冊了監聽器或 coinwapi.timing 日誌開啟 DEBUG 時才計時，
+否則每個請求只多一次布爾判斷，也不會格式化任何日誌字符串
+"""
+
+import logging
+import threading
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+from .exceptions import CoinWAPIError, InvalidCredentialsError, RateLimitError, ServerError
+
+logger = logging.getLogger("coinwapi.timing")
+
+
+class RequestTiming:
+    """
+    單個請求的計時（秒）
+
+    Attributes:
+        throttle: 客戶端限頻等待
+        sign: 構建請求、序列化與簽名
+        send: 發送請求及讀取響應體（總往返時間減去 wait）
+        wait: 請求發出到收到響應頭（requests 的 response.elapsed）
+        parse: 解析響應
+        retries: 重試次數
+        bytes_out: 請求體字節數
+        bytes_in: 響應體字節數
+    """
+
+    __slots__ = (
+        "method", "path", "status", "error", "throttle", "sign", "send", "wait", "parse",
+        "retries", "bytes_out", "bytes_in", "_mark"
+    )
+
+    def __init__(self, method: str, path: str):
+        self.method = method.upper()
+        self.path = path
+        self.status: Optional[int] = None
+        self.error: Optional[str] = None
+        self.throttle = 0.0
+        self.sign = 0.0
+        self.send = 0.0
+        self.wait = 0.0
+        self.parse = 0.0
+        self.retries = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self._mark = perf_counter()
+
+    def lap(self) -> float:
+        """距離上一次 lap（或創建）的秒數"""
+        now = perf_counter()
+        elapsed, self._mark = now - self._mark, now
+        return elapsed
+
+    def split_round_trip(self, round_trip: float, wait: Optional[float]) -> None:
+        """將往返時間拆分為 wait 和 send；沒有 wait 數據時全部計入 wait"""
+        self.wait = round_trip if wait is None else min(wait, round_trip)
+        self.send = round_trip - self.wait
+
+    @property
+    def total(self) -> float:
+        """總耗時"""
+        return self.throttle + self.sign + self.send + self.wait + self.parse
+
+    def as_dict(self) -> Dict[str, Any]:
+        """轉換為字典（耗時單位為秒）"""
+        return {
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "error": self.error,
+            "throttle": self.throttle,
+            "sign": self.sign,
+            "send": self.send,
+            "wait": self.wait,
+            "parse": self.parse,
+            "total": self.total,
+            "retries": self.retries,
+            "bytes_out": self.bytes_out,
+            "bytes_in": self.bytes_in,
+        }
+
+    def __repr__(self):
+        return (
+            f"RequestTiming({self.method} {self.path} status={self.status} "
+            f"total={self.total * 1000:.3f}ms)"
+        )
+
+
+class Instrumentation:
+    """
+    請求計時的收集點
+
+    監聽器在發出請求的線程中同步調用，應盡快返回
+    """
+
+    def __init__(self):
+        self._listeners: List[Callable[[RequestTiming], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[RequestTiming], None]) -> None:
+        """
+        註冊計時監聽器
+
+        Args:
+            listener: 接收 RequestTiming 的函數
+        """
+        with self._lock:
+            self._listeners = self._listeners + [listener]
+
+    def remove_listener(self, listener: Callable[[RequestTiming], None]) -> None:
+        """移除計時監聽器"""
+        with self._lock:
+            self._listeners = [item for item in self._listeners if item is not listener]
+
+    @property
+    def active(self) -> bool:
+        """是否需要計時"""
+        return bool(self._listeners) or logger.isEnabledFor(logging.DEBUG)
+
+    def start(self, method: str, path: str) -> Optional[RequestTiming]:
+        """
+        開始計時
+
+        Returns:
+            RequestTiming；不需要計時時返回 None
+        """
+        if not self._listeners and not logger.isEnabledFor(logging.DEBUG):
+            return None
+        return RequestTiming(method, path)
+
+    def record(self, timing: RequestTiming) -> None:
+        """發佈一個請求的計時"""
+        for listener in self._listeners:
+            try:
+                listener(timing)
+            except Exception as e:
+                logger.warning(f"計時監聽器出錯: {e}")
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "%s %s status=%s error=%s throttle=%.3fms sign=%.3fms send=%.3fms wait=%.3fms parse=%.3fms "
+                "total=%.3fms retries=%d out=%dB in=%dB",
+                timing.method, timing.path, timing.status, timing.error,
+                timing.throttle * 1000, timing.sign * 1000, timing.send * 1000,
+                timing.wait * 1000, timing.parse * 1000, timing.total * 1000,
+                timing.retries, timing.bytes_out, timing.bytes_in
+            )
+
+
+def retry_count(response: Any) -> int:
+    """requests 響應在 urllib3 層的自動重試次數"""
+    retries = getattr(getattr(response, "raw", None), "retries", None)
+    history = getattr(retries, "history", None)
+    return len(history) if history else 0
+
+
+def status_error_name(status_code: int) -> Optional[str]:
+    """
+    HTTP狀態碼對應的異常類名稱（與 exceptions.handle_api_error 的映射一致），200 時返回 None
+    """
+    if status_code == 200:
+        return None
+    if status_code == 401:
+        return InvalidCredentialsError.__name__
+    if status_code == 429:
+        return RateLimitError.__name__
+    if status_code >= 500:
+        return ServerError.__name__
+    return CoinWAPIError.__name__
+
+
+# 預設的全局收集點，HTTP 管理器未指定時使用
+default_instrumentation = Instrumentation()
+
+
+class Truncated:
+    """
+    延遲格式化的截斷字符串：只有日誌真正輸出時才調用 str()
+
+    用法: logger.debug("響應數據: %s", Truncated(response, 200))
+    """
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: int = 200):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self):
+        text = str(self.value)
+        return text if len(text) <= self.limit else f"{text[:self.limit]}..."
@@ -0,0 +1,467 @@
+"""
+CoinW 交易品種元數據緩存
+
+一次性加載期貨合約信息、保證金階梯、現貨交易對和幣種信息，建立字典索引，
+使價格精度、合約面值、槓桿階梯、現貨 pairCode 與交易對互查等熱路徑查詢都是 O(1) 的字典命中；
+數據按 TTL 在後台刷新，刷新期間查詢繼續使用舊數據
+"""
+
+import time
+import logging
+import threading
+from bisect import bisect_left
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from .exceptions import CoinWAPIError, InvalidParameterError
+
+logger = logging.getLogger(__name__)
+
+# 數據來源
+FUTURE_INSTRUMENTS = "future_instruments"
+FUTURE_LADDERS = "future_ladders"
+SPOT_SYMBOLS = "spot_symbols"
+SPOT_CURRENCIES = "spot_currencies"
+SPOT_PAIR_CODES = "spot_pair_codes"
+
+# 合約面值字段（不同版本的接口字段名不同）
+_FACE_VALUE_FIELDS = ("oneLotSize", "faceValue", "contractSize")
+
+
+def _upper(value: Any) -> str:
+    return str(value).strip().upper()
+
+
+def _spot_key(symbol: str) -> str:
+    return _upper(symbol).replace("-", "_").replace("/", "_")
+
+
+def _resolve_spot(index: "_Index", symbol: Any) -> str:
+    """將交易對或 pairCode 統一為交易對鍵"""
+    key = _spot_key(symbol)
+    return index.pair_symbols.get(key, key)
+
+
+def _response_data(response: Any, source: str) -> Any:
+    """提取響應的 data 字段；現貨接口出錯時返回錯誤字典而非拋出異常"""
+    if not isinstance(response, dict):
+        raise CoinWAPIError(f"加載{source}失敗: 無效的響應 {response!r}")
+    if response.get("success") is False:
+        raise CoinWAPIError(f"加載{source}失敗: {response.get('message') or response.get('msg')}", response=response)
+    return response.get("data")
+
+
+class _Index:
+    """一次加載得到的全部索引；刷新時整體替換，讀取無需加鎖"""
+
+    def __init__(self):
+        self.instruments: Dict[str, Dict[str, Any]] = {}
+        self.instrument_list: List[Dict[str, Any]] = []
+        self.face_values: Dict[str, Decimal] = {}
+        self.tick_sizes: Dict[str, Decimal] = {}
+        self.ladders: Dict[str, List[Dict[str, Any]]] = {}
+        self.ladder_limits: Dict[str, List[float]] = {}
+        self.spot_symbols: Dict[str, Dict[str, Any]] = {}
+        self.spot_tick_sizes: Dict[str, Decimal] = {}
+        self.spot_lot_sizes: Dict[str, Decimal] = {}
+        self.currencies: Dict[str, Dict[str, Any]] = {}
+        self.pair_codes: Dict[str, str] = {}
+        self.pair_symbols: Dict[str, str] = {}
+
+    def copy(self) -> "_Index":
+        index = _Index()
+        index.__dict__.update(self.__dict__)
+        return index
+
+
+class InstrumentCache:
+    """
+    交易品種元數據緩存
+
+    期貨合約按 name/base（如 "BTC"，也接受 "BTCUSDT"、"BTC_USDT"）索引，
+    現貨交易對按 currencyPair（如 "BTC_USDT"）及 WebSocket 使用的 pairCode/tmId（如 "78"）索引，
+    幣種按 symbol 和 symbolId 索引
+    """
+
+    def __init__(
+        self,
+        future=None,
+        spot=None,
+        ttl: float = 3600,
+        load_ladders: bool = True
+    ):
+        """
+        Args:
+            future: FutureMarket 或 FutureClient，為空時不加載期貨數據
+            spot: SpotMarket 或 SpotClient，為空時不加載現貨數據
+            ttl: 數據有效期（秒），過期後的首次查詢觸發後台刷新
+            load_ladders: 是否加載保證金階梯（私有接口，需要 API 密鑰）
+        """
+        if future is None and spot is None:
+            raise InvalidParameterError("future 和 spot 至少需要提供一個")
+
+        self._future = future
+        self._spot = spot
+        self.ttl = ttl
+        self.load_ladders = load_ladders
+
+        self._index = _Index()
+        self._loaded_at: Optional[float] = None
+        self._errors: Dict[str, str] = {}
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self._refreshing_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # ==================== 加載與刷新 ====================
+
+    def refresh(self) -> Dict[str, str]:
+        """
+        立即重新加載全部元數據
+
+        各數據來源獨立加載，某個來源失敗時保留該來源上一次的數據
+
+        Returns:
+            {數據來源: 錯誤信息}，全部成功時為空字典
+        """
+        with self._refresh_lock:
+            index = self._index.copy()
+            errors: Dict[str, str] = {}
+
+            loaders = []
+            if self._future is not None:
+                loaders.append((FUTURE_INSTRUMENTS, self._load_future_instruments))
+                if self.load_ladders:
+                    loaders.append((FUTURE_LADDERS, self._load_future_ladders))
+            if self._spot is not None:
+                loaders.append((SPOT_SYMBOLS, self._load_spot_symbols))
+                loaders.append((SPOT_CURRENCIES, self._load_spot_currencies))
+                loaders.append((SPOT_PAIR_CODES, self._load_spot_pair_codes))
+
+            for source, loader in loaders:
+                try:
+                    loader(index)
+                except Exception as e:
+                    errors[source] = str(e)
+                    logger.warning(f"加載交易品種元數據失敗 {source}: {e}")
+
+            self._index = index
+            self._errors = errors
+            self._loaded_at = time.monotonic()
+            return errors
+
+    def _ensure_fresh(self) -> _Index:
+        """首次查詢時同步加載；數據過期時觸發一次後台刷新並繼續返回舊數據"""
+        loaded_at = self._loaded_at
+        if loaded_at is None:
+            self.refresh()
+        elif time.monotonic() - loaded_at > self.ttl and not self._refreshing:
+            self._refresh_in_background()
+        return self._index
+
+    def _refresh_in_background(self) -> None:
+        with self._refreshing_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="coinw-instruments-refresh", daemon=True).start()
+
+    def start(self, interval: Optional[float] = None) -> None:
+        """
+        啟動定時刷新線程
+
+        Args:
+            interval: 刷新間隔（秒），預設為 ttl
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if self._loaded_at is None:
+            self.refresh()
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(interval or self.ttl,),
+            name="coinw-instruments",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 1) -> None:
+        """停止定時刷新線程"""
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self, interval: float) -> None:
+        while not self._stop_event.wait(interval):
+            self.refresh()
+
+    @property
+    def age(self) -> Optional[float]:
+        """距上次加載的秒數，尚未加載時為 None"""
+        return None if self._loaded_at is None else time.monotonic() - self._loaded_at
+
+    @property
+    def errors(self) -> Dict[str, str]:
+        """上次刷新時各數據來源的錯誤信息"""
+        return dict(self._errors)
+
+    # ==================== 各數據來源 ====================
+
+    def _load_future_instruments(self, index: _Index) -> None:
+        rows = _response_data(self._future.get_instruments(), "合約信息") or []
+        instruments: Dict[str, Dict[str, Any]] = {}
+        face_values: Dict[str, Decimal] = {}
+        tick_sizes: Dict[str, Decimal] = {}
+
+        for row in rows:
+            base = _upper(row.get("base") or row.get("name"))
+            quote = _upper(row.get("quote") or "USDT")
+            face_value = next((row[field] for field in _FACE_VALUE_FIELDS if row.get(field) is not None), None)
+            precision = row.get("pricePrecision")
+
+            for key in {base, _upper(row.get("name") or base), base + quote, f"{base}_{quote}"}:
+                instruments[key] = row
+                if face_value is not None:
+                    face_values[key] = Decimal(str(face_value))
+                if precision is not None:
+                    tick_sizes[key] = Decimal(1).scaleb(-int(precision))
+
+        index.instruments = instruments
+        index.instrument_list = list(rows)
+        index.face_values = face_values
+        index.tick_sizes = tick_sizes
+
+    def _load_future_ladders(self, index: _Index) -> None:
+        data = _response_data(self._future.get_ladders(), "保證金階梯") or {}
+        configs = data.get("ladderConfig", []) if isinstance(data, dict) else data
+        ladders: Dict[str, List[Dict[str, Any]]] = {}
+        limits: Dict[str, List[float]] = {}
+
+        for config in configs:
+            tiers = sorted(config.get("ladderList") or [], key=lambda tier: int(tier.get("ladder", 0)))
+            name = _upper(config.get("name"))
+            ladders[name] = tiers
+            limits[name] = [float(tier.get("maxPiece") or 0) for tier in tiers]
+
+        index.ladders = ladders
+        index.ladder_limits = limits
+
+    def _load_spot_symbols(self, index: _Index) -> None:
+        rows = _response_data(self._spot.get_symbols(), "現貨交易對") or []
+        symbols: Dict[str, Dict[str, Any]] = {}
+        tick_sizes: Dict[str, Decimal] = {}
+        lot_sizes: Dict[str, Decimal] = {}
+
+        for row in rows:
+            key = _spot_key(row.get("currencyPair"))
+            symbols[key] = row
+            if row.get("pricePrecision") is not None:
+                tick_sizes[key] = Decimal(1).scaleb(-int(row["pricePrecision"]))
+            if row.get("countPrecision") is not None:
+                lot_sizes[key] = Decimal(1).scaleb(-int(row["countPrecision"]))
+
+        index.spot_symbols = symbols
+        index.spot_tick_sizes = tick_sizes
+        index.spot_lot_sizes = lot_sizes
+
+    def _load_spot_currencies(self, index: _Index) -> None:
+        data = _response_data(self._spot.get_currencies(), "現貨幣種") or {}
+        rows = data.values() if isinstance(data, dict) else data
+        currencies: Dict[str, Dict[str, Any]] = {}
+
+        for row in rows:
+            currencies[_upper(row.get("symbol"))] = row
+            if row.get("symbolId") is not None:
+                currencies[str(row["symbolId"])] = row
+
+        index.currencies = currencies
+
+    def _load_spot_pair_codes(self, index: _Index) -> None:
+        # 交易對的數字ID（即 WebSocket 的 pairCode/tmId）只在 returnTicker 中返回
+        data = _response_data(self._spot.get_ticker(), "現貨交易對ID") or {}
+        pair_codes: Dict[str, str] = {}
+        pair_symbols: Dict[str, str] = {}
+
+        for symbol, row in data.items():
+            if not isinstance(row, dict) or row.get("id") is None:
+                continue
+            key = _spot_key(symbol)
+            pair_code = str(row["id"])
+            pair_codes[key] = pair_code
+            pair_symbols[pair_code] = key
+
+        index.pair_codes = pair_codes
+        index.pair_symbols = pair_symbols
+
+    # ==================== 期貨查詢 ====================
+
+    def instrument(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        獲取合約信息
+
+        Args:
+            name: 合約基礎貨幣，如 "BTC"（不區分大小寫，也接受 "BTCUSDT"、"BTC_USDT"）
+
+        Returns:
+            get_instruments 返回的合約信息，不存在時返回 None
+        """
+        return self._ensure_fresh().instruments.get(_upper(name))
+
+    def instruments(self) -> List[Dict[str, Any]]:
+        """全部合約信息"""
+        return list(self._ensure_fresh().instrument_list)
+
+    def face_value(self, name: str) -> Decimal:
+        """
+        獲取合約面值（每張合約對應的基礎貨幣數量）
+
+        Raises:
+            InvalidParameterError: 合約不存在或沒有面值信息
+        """
+        value = self._ensure_fresh().face_values.get(_upper(name))
+        if value is None:
+            raise InvalidParameterError(f"未知合約或缺少面值信息: {name}")
+        return value
+
+    def tick_size(self, name: str) -> Decimal:
+        """
+        獲取合約最小價格變動單位
+
+        Raises:
+            InvalidParameterError: 合約不存在
+        """
+        value = self._ensure_fresh().tick_sizes.get(_upper(name))
+        if value is None:
+            raise InvalidParameterError(f"未知合約: {name}")
+        return value
+
+    def ladders(self, name: str) -> List[Dict[str, Any]]:
+        """
+        獲取合約的保證金階梯
+
+        Returns:
+            按 ladder 升序的階梯列表，沒有數據時為空列表
+        """
+        return list(self._ensure_fresh().ladders.get(_upper(name), ()))
+
+    def leverage_tier(self, name: str, pieces: float) -> Optional[Dict[str, Any]]:
+        """
+        查找持倉張數對應的保證金階梯
+
+        Args:
+            name: 合約基礎貨幣，如 "BTC"
+            pieces: 持倉張數
+
+        Returns:
+            包含 maxLeverage、marginStartRate、marginKeepRate 等字段的階梯，
+            超出最高階梯時返回最高階梯，沒有階梯數據時返回 None
+        """
+        index = self._ensure_fresh()
+        key = _upper(name)
+        tiers = index.ladders.get(key)
+        if not tiers:
+            return None
+        position = bisect_left(index.ladder_limits[key], pieces)
+        return tiers[min(position, len(tiers) - 1)]
+
+    def max_leverage(self, name: str, pieces: float = 0) -> Optional[int]:
+        """持倉張數對應的最大槓桿率；沒有階梯數據時使用合約信息中的 maxLeverage"""
+        tier = self.leverage_tier(name, pieces)
+        if tier is not None:
+            return int(tier["maxLeverage"])
+        row = self.instrument(name)
+        return int(row["maxLeverage"]) if row and row.get("maxLeverage") is not None else None
+
+    # ==================== 現貨查詢 ====================
+
+    def spot_symbol(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        獲取現貨交易對信息
+
+        Args:
+            symbol: 交易對，如 "BTC_USDT"（也接受 pairCode，如 "78"）
+
+        Returns:
+            get_symbols 返回的交易對信息，不存在時返回 None
+        """
+        index = self._ensure_fresh()
+        return index.spot_symbols.get(_resolve_spot(index, symbol))
+
+    def spot_tick_size(self, symbol: str) -> Decimal:
+        """
+        獲取現貨交易對最小價格變動單位
+
+        Raises:
+            InvalidParameterError: 交易對不存在
+        """
+        index = self._ensure_fresh()
+        value = index.spot_tick_sizes.get(_resolve_spot(index, symbol))
+        if value is None:
+            raise InvalidParameterError(f"未知交易對: {symbol}")
+        return value
+
+    def spot_lot_size(self, symbol: str) -> Decimal:
+        """
+        獲取現貨交易對最小數量變動單位
+
+        Raises:
+            InvalidParameterError: 交易對不存在
+        """
+        index = self._ensure_fresh()
+        value = index.spot_lot_sizes.get(_resolve_spot(index, symbol))
+        if value is None:
+            raise InvalidParameterError(f"未知交易對: {symbol}")
+        return value
+
+    def pair_code(self, symbol: str) -> Optional[str]:
+        """
+        交易對對應的 WebSocket pairCode
+
+        Args:
+            symbol: 交易對，如 "BTC_USDT"
+
+        Returns:
+            pairCode，如 "78"；不存在時返回 None
+        """
+        return self._ensure_fresh().pair_codes.get(_spot_key(symbol))
+
+    def symbol_for_pair_code(self, pair_code: Any) -> Optional[str]:
+        """
+        pairCode/tmId 對應的交易對
+
+        Args:
+            pair_code: pairCode 或 tmId，如 "78" 或 78
+
+        Returns:
+            交易對，如 "BTC_USDT"；不存在時返回 None
+        """
+        return self._ensure_fresh().pair_symbols.get(str(pair_code))
+
+    def currency(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        獲取幣種信息
+
+        Args:
+            symbol: 幣種符號（如 "BTC"）或幣種ID（如 "50"）
+
+        Returns:
+            get_currencies 返回的幣種信息，不存在時返回 None
+        """
+        return self._ensure_fresh().currencies.get(_upper(symbol))
+
+    def __repr__(self):
+        index = self._index
+        return (
+            f"InstrumentCache(instruments={len(index.instrument_list)}, "
+            f"spot_symbols={len(index.spot_symbols)}, ttl={self.ttl})"
+        )
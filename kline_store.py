@@ -0,0 +1,377 @@
+"""
+CoinW K線本地存儲
+
+按 (市場, 交易品種, 週期) 將已收盤的K線以列式、只追加的二進制文件保存在本地：
+每列一個文件（ts 為 int64，其餘為 float64），讀取時直接載入為數組，無需解析。
+重啟後只需從 REST 補齊最後一根K線之後的數據，再由 WebSocket K線推送接續
+"""
+
+import os
+import time
+import logging
+import threading
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy 為可選依賴
+    np = None
+
+from .exceptions import InvalidParameterError
+from .klines import (
+    COLUMNS,
+    FUTURES_GRANULARITY_SECONDS,
+    Bar,
+    fetch_future_bars,
+    fetch_spot_bars,
+)
+
+logger = logging.getLogger(__name__)
+
+SPOT = "spot"
+FUTURES = "futures"
+
+# 每列的數組類型代碼及文件名
+_COLUMN_TYPES = {name: ("q" if name == "ts" else "d") for name in COLUMNS}
+
+Key = Tuple[str, str, str]
+
+
+class KlineStore:
+    """
+    K線本地存儲
+
+    只保存已收盤的K線；同一個 key 的寫入線程安全，且只接受時間戳晚於已存儲最後一根的K線
+    """
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: 存儲根目錄
+        """
+        self.root = root
+        self._locks: Dict[Key, threading.Lock] = {}
+        self._last_ts: Dict[Key, Optional[int]] = {}
+        self._guard = threading.Lock()
+
+    @staticmethod
+    def key(market: str, instrument: str, granularity: Any) -> Key:
+        """
+        構建存儲鍵
+
+        Args:
+            market: "spot" 或 "futures"
+            instrument: 交易品種，如 "BTC_USDT"、"BTC"
+            granularity: 週期（現貨為秒數，期貨為 granularity 代碼）
+        """
+        if market not in (SPOT, FUTURES):
+            raise InvalidParameterError(f"無效的市場: {market}")
+        return market, str(instrument).upper(), str(granularity)
+
+    def _path(self, key: Key) -> str:
+        market, instrument, granularity = key
+        safe_instrument = instrument.replace(os.sep, "_").replace("/", "_")
+        return os.path.join(self.root, market, safe_instrument, granularity)
+
+    def _lock(self, key: Key) -> threading.Lock:
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def _count(self, path: str) -> int:
+        """各列文件中完整記錄數的最小值（寫入中斷時以最短的列為準）"""
+        counts = []
+        for name, typecode in _COLUMN_TYPES.items():
+            file_path = os.path.join(path, name)
+            size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+            counts.append(size // array(typecode).itemsize)
+        return min(counts)
+
+    def load(self, market: str, instrument: str, granularity: Any) -> Dict[str, Any]:
+        """
+        讀取已存儲的K線
+
+        Returns:
+            {'ts', 'open', 'high', 'low', 'close', 'volume'} 列式數組，按時間升序
+            （安裝 numpy 時為 numpy.ndarray，否則為 array.array）
+        """
+        key = self.key(market, instrument, granularity)
+        path = self._path(key)
+
+        with self._lock(key):
+            count = self._count(path) if os.path.isdir(path) else 0
+            columns = {}
+            for name, typecode in _COLUMN_TYPES.items():
+                file_path = os.path.join(path, name)
+                if np is not None:
+                    dtype = np.int64 if typecode == "q" else np.float64
+                    columns[name] = (
+                        np.fromfile(file_path, dtype=dtype, count=count) if count else np.empty(0, dtype=dtype)
+                    )
+                else:
+                    values = array(typecode)
+                    if count:
+                        with open(file_path, "rb") as f:
+                            values.fromfile(f, count)
+                    columns[name] = values
+            return columns
+
+    def last_ts(self, market: str, instrument: str, granularity: Any) -> Optional[int]:
+        """已存儲的最後一根K線的時間戳，沒有數據時返回 None"""
+        key = self.key(market, instrument, granularity)
+        with self._lock(key):
+            return self._read_last_ts(key)
+
+    def _read_last_ts(self, key: Key) -> Optional[int]:
+        if key in self._last_ts:
+            return self._last_ts[key]
+
+        path = self._path(key)
+        last = None
+        count = self._count(path) if os.path.isdir(path) else 0
+        if count:
+            values = array("q")
+            with open(os.path.join(path, "ts"), "rb") as f:
+                f.seek((count - 1) * values.itemsize)
+                values.fromfile(f, 1)
+            last = values[0]
+        self._last_ts[key] = last
+        return last
+
+    def append(self, market: str, instrument: str, granularity: Any, bars: Sequence[Bar]) -> int:
+        """
+        追加已收盤的K線
+
+        Args:
+            market: "spot" 或 "futures"
+            instrument: 交易品種
+            granularity: 週期
+            bars: 按時間升序的 (ts, open, high, low, close, volume)
+
+        Returns:
+            實際追加的根數（時間戳不晚於已存儲最後一根的K線會被忽略）
+        """
+        key = self.key(market, instrument, granularity)
+        path = self._path(key)
+
+        with self._lock(key):
+            last = self._read_last_ts(key)
+            new_bars = [bar for bar in bars if last is None or bar[0] > last]
+            if not new_bars:
+                return 0
+
+            os.makedirs(path, exist_ok=True)
+            count = self._count(path)
+            for index, (name, typecode) in enumerate(_COLUMN_TYPES.items()):
+                values = array(typecode, (bar[index] for bar in new_bars))
+                with open(os.path.join(path, name), "r+b" if os.path.exists(os.path.join(path, name)) else "wb") as f:
+                    # 截斷上次中斷寫入留下的不完整記錄
+                    f.truncate(count * values.itemsize)
+                    f.seek(0, os.SEEK_END)
+                    values.tofile(f)
+
+            self._last_ts[key] = new_bars[-1][0]
+            return len(new_bars)
+
+    def top_up_spot(
+        self,
+        market,
+        symbol: str,
+        period: int,
+        start: Optional[int] = None,
+        **kwargs
+    ) -> int:
+        """
+        從 REST 補齊現貨K線到最新的已收盤K線
+
+        Args:
+            market: SpotMarket 或 SpotClient
+            symbol: 交易對，如 "BTC_USDT"
+            period: K線週期（秒）
+            start: 本地沒有數據時的起始時間戳（毫秒）
+            **kwargs: 傳給 fetch_spot_bars 的參數（window_bars, max_workers）
+
+        Returns:
+            追加的根數
+        """
+        step = period * 1000
+        begin = self._top_up_start(SPOT, symbol, period, step, start)
+        now = int(time.time() * 1000)
+        if begin > now:
+            return 0
+        bars = fetch_spot_bars(market, symbol, period, begin, now, **kwargs)
+        return self.append(SPOT, symbol, period, _closed(bars, step, now))
+
+    def top_up_future(
+        self,
+        market,
+        currency_code: str,
+        granularity: str,
+        start: Optional[int] = None
+    ) -> int:
+        """
+        從 REST 補齊期貨K線到最新的已收盤K線
+
+        期貨K線接口只提供最近1500根，本地數據早於該範圍時中間的缺口無法補齊
+
+        Args:
+            market: FutureMarket 或 FutureClient
+            currency_code: 交易品種的基礎貨幣，如 "BTC"
+            granularity: K線時間間隔代碼 "0".."9"
+            start: 本地沒有數據時的起始時間戳（毫秒），為空時取接口可提供的全部K線
+
+        Returns:
+            追加的根數
+        """
+        step = FUTURES_GRANULARITY_SECONDS[str(granularity)] * 1000
+        last = self.last_ts(FUTURES, currency_code, granularity)
+        begin = last + step if last is not None else start
+        now = int(time.time() * 1000)
+        bars = fetch_future_bars(market, currency_code, granularity, begin, now)
+        if last is not None and bars and bars[0][0] > begin:
+            logger.warning(f"期貨K線存在無法補齊的缺口 {currency_code}/{granularity}: {begin} - {bars[0][0]}")
+        return self.append(FUTURES, currency_code, granularity, _closed(bars, step, now))
+
+    def _top_up_start(self, market: str, instrument: str, granularity: Any, step: int, start: Optional[int]) -> int:
+        last = self.last_ts(market, instrument, granularity)
+        if last is not None:
+            return last + step
+        if start is None:
+            raise InvalidParameterError("本地沒有數據時必須指定 start")
+        return start
+
+    def recorder(
+        self,
+        market: str,
+        instrument: str,
+        granularity: Any,
+        step_ms: int,
+        top_up: Optional[Callable[[], Any]] = None
+    ) -> "KlineRecorder":
+        """
+        創建將 WebSocket K線推送寫入本地存儲的記錄器
+
+        Args:
+            market: "spot" 或 "futures"
+            instrument: 交易品種
+            granularity: 週期
+            step_ms: K線週期（毫秒）
+            top_up: 發現推送缺口時調用的補齊函數，如 lambda: store.top_up_spot(client, "BTC_USDT", 60)；
+                存儲為空時記錄器從第一根已收盤的推送K線開始寫入，需要更早的歷史時
+                應在訂閱前先調用 top_up_spot/top_up_future 並指定 start
+        """
+        return KlineRecorder(self, self.key(market, instrument, granularity), step_ms, top_up)
+
+
+def _closed(bars: List[Bar], step: int, now: int) -> List[Bar]:
+    """只保留已收盤的K線"""
+    return [bar for bar in bars if bar[0] + step <= now]
+
+
+class KlineRecorder:
+    """
+    WebSocket K線推送記錄器
+
+    K線推送會持續更新當前未收盤的K線；收到更晚的K線時，上一根即已收盤。
+    已收盤的K線與存儲連續（或存儲為空）時直接追加；否則（推送中斷後）在後台線程調用 top_up
+    從 REST 補齊，不阻塞 WebSocket 接收線程。補齊期間收盤的K線由補齊結束後的再一次補齊寫入，
+    存儲按時間戳去重，因此不會產生缺口或重複
+    """
+
+    def __init__(self, store: KlineStore, key: Key, step_ms: int, top_up: Optional[Callable[[], Any]] = None):
+        self._store = store
+        self._key = key
+        self._step = step_ms
+        self._top_up = top_up
+        self._current: Optional[Bar] = None
+        self._lock = threading.Lock()
+
+        # 後台補齊
+        self._top_up_thread: Optional[threading.Thread] = None
+        self._top_up_again = False
+        self._top_up_idle = threading.Event()
+        self._top_up_idle.set()
+
+    @property
+    def current(self) -> Optional[Bar]:
+        """當前未收盤的K線"""
+        return self._current
+
+    def on_candle(self, bar: Bar) -> None:
+        """
+        處理一條K線推送
+
+        Args:
+            bar: 已解析的 (ts, open, high, low, close, volume)，
+                可使用 klines.parse_future_ws_candle / parse_spot_ws_candle 解析
+        """
+        with self._lock:
+            current = self._current
+            if current is not None and bar[0] < current[0]:
+                return  # 過期推送
+            self._current = bar
+            if current is None or bar[0] == current[0]:
+                return
+
+            # 上一根K線已收盤
+            last = self._store.last_ts(*self._key)
+            if last is not None and current[0] <= last:
+                return  # 已由補齊寫入
+            if last is None or current[0] - last == self._step or self._top_up is None:
+                self._store.append(*self._key, [current])
+                return
+
+            logger.info(f"K線存儲與推送不連續 {self._key}: {last} -> {current[0]}，從 REST 補齊")
+            self._schedule_top_up()
+
+    def _schedule_top_up(self) -> None:
+        """在後台線程補齊；已有補齊在進行時，結束後再補齊一次（需持有 self._lock）"""
+        if self._top_up_thread is not None:
+            self._top_up_again = True
+            return
+        self._top_up_idle.clear()
+        self._top_up_thread = threading.Thread(
+            target=self._run_top_up,
+            name=f"coinw-kline-top-up-{'-'.join(self._key)}",
+            daemon=True
+        )
+        self._top_up_thread.start()
+
+    def _run_top_up(self) -> None:
+        while True:
+            self.top_up()
+            with self._lock:
+                if not self._top_up_again:
+                    self._top_up_thread = None
+                    self._top_up_idle.set()
+                    return
+                self._top_up_again = False
+
+    def wait_top_up(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待後台補齊結束
+
+        Args:
+            timeout: 最長等待秒數，None 表示一直等待
+
+        Returns:
+            是否已沒有進行中的補齊
+        """
+        return self._top_up_idle.wait(timeout)
+
+    def top_up(self) -> Any:
+        """通過 REST 補齊已收盤的K線（在調用線程中同步執行）"""
+        if self._top_up is None:
+            return None
+        try:
+            return self._top_up()
+        except Exception as e:
+            logger.error(f"K線補齊失敗 {self._key}: {e}")
+            return None
+
+    def load(self) -> Dict[str, Any]:
+        """讀取已存儲的K線（不含當前未收盤的K線）"""
+        return self._store.load(*self._key)
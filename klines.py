@@ -0,0 +1,339 @@
+"""
+CoinW K線歷史數據加載
+
+將長時間範圍的K線請求切分為多個窗口並行獲取，去重後以列式數組返回：
+{'ts': ..., 'open': ..., 'high': ..., 'low': ..., 'close': ..., 'volume': ...}
+安裝 numpy 時返回 numpy.ndarray，否則返回標準庫 array.array
+"""
+
+import time
+import logging
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy 為可選依賴
+    np = None
+
+from .exceptions import CoinWAPIError, InvalidParameterError
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("ts", "open", "high", "low", "close", "volume")
+
+# 期貨 granularity 代碼對應的K線週期（秒）；"9"（1個月）按30天估算
+FUTURES_GRANULARITY_SECONDS = {
+    "0": 60,
+    "1": 300,
+    "2": 900,
+    "3": 3600,
+    "4": 14400,
+    "5": 86400,
+    "6": 604800,
+    "7": 180,
+    "8": 1800,
+    "9": 2592000,
+}
+
+# 期貨K線接口單次最多返回的根數
+FUTURES_MAX_BARS = 1500
+
+Bar = Tuple[int, float, float, float, float, float]
+
+
+def parse_future_bar(row: Any) -> Bar:
+    """
+    解析期貨K線
+
+    Args:
+        row: [時間戳, 最高價, 開盤價, 最低價, 收盤價, 交易量] 或包含同名字段的字典
+
+    Returns:
+        (ts, open, high, low, close, volume)
+    """
+    if isinstance(row, dict):
+        return _parse_bar_dict(row)
+    return int(row[0]), float(row[2]), float(row[1]), float(row[3]), float(row[4]), float(row[5])
+
+
+def parse_spot_bar(row: Any) -> Bar:
+    """
+    解析現貨K線
+
+    Args:
+        row: {'date': 時間戳, 'open', 'high', 'low', 'close', 'volume'}
+
+    Returns:
+        (ts, open, high, low, close, volume)
+    """
+    return _parse_bar_dict(row)
+
+
+def _parse_bar_dict(row: Dict[str, Any]) -> Bar:
+    ts = row.get("date", row.get("time", row.get("ts")))
+    return (
+        int(ts),
+        float(row["open"]),
+        float(row["high"]),
+        float(row["low"]),
+        float(row["close"]),
+        float(row.get("volume", row.get("vol", 0))),
+    )
+
+
+def merge_bars(batches: Iterable[Iterable[Bar]]) -> List[Bar]:
+    """
+    合併多批K線，按時間戳去重（後出現的覆蓋先出現的）並升序排列
+    """
+    merged: Dict[int, Bar] = {}
+    for batch in batches:
+        for bar in batch:
+            merged[bar[0]] = bar
+    return [merged[ts] for ts in sorted(merged)]
+
+
+def to_columns(bars: Sequence[Bar]) -> Dict[str, Any]:
+    """
+    將K線轉換為列式數組
+
+    Args:
+        bars: 已排序的 (ts, open, high, low, close, volume) 序列
+
+    Returns:
+        {列名: 數組}；ts 為 int64，其餘為 float64
+    """
+    if np is not None:
+        count = len(bars)
+        columns = {"ts": np.fromiter((bar[0] for bar in bars), dtype=np.int64, count=count)}
+        for index, name in enumerate(COLUMNS[1:], start=1):
+            columns[name] = np.fromiter((bar[index] for bar in bars), dtype=np.float64, count=count)
+        return columns
+
+    columns = {"ts": array("q", (bar[0] for bar in bars))}
+    for index, name in enumerate(COLUMNS[1:], start=1):
+        columns[name] = array("d", (bar[index] for bar in bars))
+    return columns
+
+
+def _filter_range(bars: List[Bar], start: Optional[int], end: Optional[int]) -> List[Bar]:
+    if start is None and end is None:
+        return bars
+    return [
+        bar for bar in bars
+        if (start is None or bar[0] >= start) and (end is None or bar[0] <= end)
+    ]
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def future_bars_to_fetch(granularity: str, start: Optional[int]) -> int:
+    """
+    計算覆蓋 [start, 現在] 所需的期貨K線根數（不超過接口上限）
+
+    Args:
+        granularity: K線時間間隔代碼 "0".."9"
+        start: 開始時間戳（毫秒），為空時取接口上限
+
+    Returns:
+        請求的 limit
+    """
+    seconds = FUTURES_GRANULARITY_SECONDS.get(str(granularity))
+    if seconds is None:
+        raise InvalidParameterError(f"無效的K線時間間隔: {granularity}")
+    if start is None:
+        return FUTURES_MAX_BARS
+
+    # 期貨K線接口只能返回最近的K線，需要覆蓋 start 到現在的全部區間
+    needed = (_now_ms() - start) // (seconds * 1000) + 1
+    if needed > FUTURES_MAX_BARS:
+        logger.warning(
+            f"期貨K線接口只提供最近 {FUTURES_MAX_BARS} 根K線，"
+            f"早於約 {FUTURES_MAX_BARS * seconds // 86400} 天的數據無法獲取"
+        )
+    return int(max(1, min(needed, FUTURES_MAX_BARS)))
+
+
+def future_klines_to_columns(
+    response: Dict[str, Any],
+    start: Optional[int] = None,
+    end: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    將期貨K線接口的響應轉換為列式數組
+
+    Args:
+        response: get_klines 的響應
+        start: 開始時間戳（毫秒，包含）
+        end: 結束時間戳（毫秒，包含）
+
+    Returns:
+        {列名: 數組}
+    """
+    bars = merge_bars([(parse_future_bar(row) for row in response.get("data") or ())])
+    return to_columns(_filter_range(bars, start, end))
+
+
+def fetch_future_bars(
+    market,
+    currency_code: str,
+    granularity: str = "0",
+    start: Optional[int] = None,
+    end: Optional[int] = None
+) -> List[Bar]:
+    """
+    獲取期貨K線（已去重並按時間升序），參數同 load_future_klines
+    """
+    limit = future_bars_to_fetch(granularity, start)
+    response = market.get_klines(currency_code, str(granularity), limit)
+    bars = merge_bars([(parse_future_bar(row) for row in response.get("data") or ())])
+    return _filter_range(bars, start, end)
+
+
+def load_future_klines(
+    market,
+    currency_code: str,
+    granularity: str = "0",
+    start: Optional[int] = None,
+    end: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    加載期貨K線歷史
+
+    期貨K線接口不支持時間範圍參數，只能返回最近的最多1500根，
+    因此按 start 計算所需根數後單次請求，並在本地按 [start, end] 截取
+
+    Args:
+        market: FutureMarket 或 FutureClient
+        currency_code: 交易品種的基礎貨幣，如 "BTC"
+        granularity: K線時間間隔代碼 "0".."9"
+        start: 開始時間戳（毫秒），為空時返回接口可提供的全部K線
+        end: 結束時間戳（毫秒）
+
+    Returns:
+        {列名: 數組}
+    """
+    return to_columns(fetch_future_bars(market, currency_code, granularity, start, end))
+
+
+def _fetch_spot_window(market, symbol: str, period: int, start: int, end: int) -> List[Bar]:
+    """
+    獲取單個時間窗口的現貨K線
+
+    接口返回的根數少於窗口根數時（單次返回上限小於窗口大小），繼續向前補齊
+    """
+    bars: List[Bar] = []
+    window_end = end
+    step = period * 1000
+
+    while window_end >= start:
+        response = market.get_kline(symbol, period, str(start), str(window_end))
+        if not isinstance(response, dict) or response.get("success") is False:
+            message = response.get("message") if isinstance(response, dict) else response
+            raise CoinWAPIError(f"獲取K線失敗 {symbol} [{start}, {window_end}]: {message}", response=response)
+
+        batch = [parse_spot_bar(row) for row in response.get("data") or ()]
+        batch = [bar for bar in batch if start <= bar[0] <= window_end]
+        if not batch:
+            break
+        bars.extend(batch)
+
+        earliest = min(bar[0] for bar in batch)
+        if earliest - step < start:
+            break
+        window_end = earliest - 1
+
+    return bars
+
+
+def fetch_spot_bars(
+    market,
+    symbol: str,
+    period: int,
+    start: int,
+    end: Optional[int] = None,
+    window_bars: int = 1500,
+    max_workers: int = 4
+) -> List[Bar]:
+    """
+    獲取現貨K線（已去重並按時間升序），參數同 load_spot_klines
+    """
+    if period <= 0 or window_bars <= 0:
+        raise InvalidParameterError("period 和 window_bars 必須大於 0")
+
+    end = _now_ms() if end is None else end
+    if start > end:
+        raise InvalidParameterError("start 不能晚於 end")
+
+    span = period * 1000 * window_bars
+    windows = [(begin, min(begin + span - 1, end)) for begin in range(start, end + 1, span)]
+
+    if len(windows) == 1 or max_workers <= 1:
+        batches = [_fetch_spot_window(market, symbol, period, begin, finish) for begin, finish in windows]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(windows))) as executor:
+            batches = list(executor.map(
+                lambda window: _fetch_spot_window(market, symbol, period, *window),
+                windows
+            ))
+
+    return merge_bars(batches)
+
+
+def load_spot_klines(
+    market,
+    symbol: str,
+    period: int,
+    start: int,
+    end: Optional[int] = None,
+    window_bars: int = 1500,
+    max_workers: int = 4
+) -> Dict[str, Any]:
+    """
+    加載現貨K線歷史
+
+    將 [start, end] 按每窗口最多 window_bars 根切分，並行獲取後去重合併；
+    請求頻率由 HTTP 管理器的限頻器控制
+
+    Args:
+        market: SpotMarket 或 SpotClient
+        symbol: 交易對，如 "BTC_USDT"
+        period: K線週期（秒）
+        start: 開始時間戳（毫秒）
+        end: 結束時間戳（毫秒），預設為當前時間
+        window_bars: 每個請求窗口的最大K線根數
+        max_workers: 並行請求數
+
+    Returns:
+        {列名: 數組}
+    """
+    return to_columns(fetch_spot_bars(market, symbol, period, start, end, window_bars, max_workers))
+
+
+def parse_future_ws_candle(data: Sequence[Any]) -> Bar:
+    """
+    解析期貨 candles_swap / candles_swap_utc 推送的 data 字段
+
+    Args:
+        data: [時間戳, 開盤價, 最高價, 最低價, 收盤價, 交易量]
+
+    Returns:
+        (ts, open, high, low, close, volume)
+    """
+    return int(data[0]), float(data[1]), float(data[2]), float(data[3]), float(data[4]), float(data[5])
+
+
+def parse_spot_ws_candle(data: Sequence[Any]) -> Bar:
+    """
+    解析現貨 candles 推送的 data 字段（需先解碼嵌套的 JSON 字符串）
+
+    Args:
+        data: [時間戳, 開盤價, 收盤價, 最高價, 最低價, 交易量, 成交額]
+
+    Returns:
+        (ts, open, high, low, close, volume)
+    """
+    return int(data[0]), float(data[1]), float(data[3]), float(data[4]), float(data[2]), float(data[5])
@@ -0,0 +1,389 @@
+"""
+CoinW 請求指標
+
+按端點彙總 Instrumentation 發佈的請求計時：HDR 風格的延遲直方圖、按狀態碼和異常類型的計數、
+重試次數、收發字節數、各階段累計耗時，以及 urllib3 連接池的連接復用率；
+可以讀取為字典快照，或導出為 Prometheus 文本格式，不依賴任何外部服務
+"""
+
+import math
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .instrumentation import Instrumentation, RequestTiming, default_instrumentation
+
+# Prometheus 直方圖的預設桶邊界（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PHASES = ("throttle", "sign", "send", "wait", "parse")
+
+# 直方圖的記錄單位：微秒
+_UNIT = 1e-6
+
+
+class LatencyHistogram:
+    """
+    HDR 風格的對數-線性延遲直方圖
+
+    以微秒為單位記錄，每個 2 的冪區間再線性細分，保證 significant_digits 位有效數字的相對精度；
+    只保存出現過的桶，內存與記錄數無關。本身不加鎖，由調用方保證同步
+    """
+
+    def __init__(self, significant_digits: int = 2):
+        """
+        Args:
+            significant_digits: 有效數字位數（1-4）
+        """
+        if not 1 <= significant_digits <= 4:
+            raise ValueError("significant_digits 必須在 1 到 4 之間")
+        sub_bucket_count = 2 ** math.ceil(math.log2(2 * 10 ** significant_digits))
+        self._sub_bits = sub_bucket_count.bit_length() - 1
+        self._sub_count = sub_bucket_count
+        self._half = sub_bucket_count // 2
+        self._counts: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, value: int) -> int:
+        if value < self._sub_count:
+            return value
+        shift = value.bit_length() - self._sub_bits
+        return self._sub_count + (shift - 1) * self._half + ((value >> shift) - self._half)
+
+    def _bounds(self, index: int) -> Tuple[int, int]:
+        """桶的取值範圍 [下限, 上限)，單位微秒"""
+        if index < self._sub_count:
+            return index, index + 1
+        offset = index - self._sub_count
+        shift = offset // self._half + 1
+        top = offset % self._half + self._half
+        return top << shift, (top + 1) << shift
+
+    def record(self, seconds: float) -> None:
+        """記錄一個延遲（秒）"""
+        seconds = max(seconds, 0.0)
+        index = self._index(int(seconds / _UNIT))
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self.count += 1
+        self.sum += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent: float) -> float:
+        """
+        百分位延遲（秒），返回所在桶的上限（不超過實際最大值）
+
+        Args:
+            percent: 0-100
+        """
+        if self.count == 0:
+            return math.nan
+        target = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= target:
+                return min((self._bounds(index)[1] - 1) * _UNIT, self.max)
+        return self.max
+
+    def cumulative(self, bounds: Iterable[float]) -> List[int]:
+        """
+        不超過各邊界（秒）的記錄數，用於導出 Prometheus 桶
+
+        跨越邊界的桶按其上限歸類，誤差在直方圖精度之內
+        """
+        items = sorted(self._counts.items())
+        counts = []
+        for bound in bounds:
+            limit = bound / _UNIT + 1
+            counts.append(sum(count for index, count in items if self._bounds(index)[1] <= limit))
+        return counts
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Returns:
+            {'count', 'sum', 'mean', 'min', 'max', 'p50', 'p90', 'p99', 'p999'}（秒）
+        """
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else math.nan,
+            "min": self.min if self.count else math.nan,
+            "max": self.max if self.count else math.nan,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+        }
+
+
+class EndpointMetrics:
+    """單個端點（HTTP方法 + 路徑）的指標"""
+
+    def __init__(self, significant_digits: int = 2):
+        self.latency = LatencyHistogram(significant_digits)
+        self.wait = LatencyHistogram(significant_digits)
+        self.requests = 0
+        self.statuses: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.retries = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.phases: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+
+    def observe(self, timing: RequestTiming) -> None:
+        self.requests += 1
+        self.latency.record(timing.total)
+        if timing.status is not None:
+            self.wait.record(timing.wait)
+        status = str(timing.status) if timing.status is not None else "none"
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if timing.error is not None:
+            self.errors[timing.error] = self.errors.get(timing.error, 0) + 1
+        self.retries += timing.retries
+        self.bytes_out += timing.bytes_out
+        self.bytes_in += timing.bytes_in
+        phases = self.phases
+        phases["throttle"] += timing.throttle
+        phases["sign"] += timing.sign
+        phases["send"] += timing.send
+        phases["wait"] += timing.wait
+        phases["parse"] += timing.parse
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "latency": self.latency.snapshot(),
+            "wait": self.wait.snapshot(),
+            "statuses": dict(self.statuses),
+            "errors": dict(self.errors),
+            "retries": self.retries,
+            "bytes_out": self.bytes_out,
+            "bytes_in": self.bytes_in,
+            "phases": dict(self.phases),
+        }
+
+
+def pool_stats(session) -> Dict[str, int]:
+    """
+    讀取 requests 會話中 urllib3 連接池的計數
+
+    Returns:
+        {'connections': 新建的連接數, 'requests': 發出的請求數}
+    """
+    connections = requests = 0
+    # http:// 和 https:// 通常掛載同一個適配器
+    adapters = {id(adapter): adapter for adapter in getattr(session, "adapters", {}).values()}
+    for adapter in adapters.values():
+        manager = getattr(adapter, "poolmanager", None)
+        pools = getattr(manager, "pools", None)
+        if pools is None:
+            continue
+        for key in list(pools.keys()):
+            try:
+                pool = pools[key]
+            except KeyError:  # 併發淘汰
+                continue
+            connections += getattr(pool, "num_connections", 0)
+            requests += getattr(pool, "num_requests", 0)
+    return {"connections": connections, "requests": requests}
+
+
+class MetricsRegistry:
+    """
+    請求指標註冊表
+
+    用法:
+        registry = client.enable_metrics()
+        ...
+        registry.snapshot()
+        registry.to_prometheus()
+    """
+
+    def __init__(self, significant_digits: int = 2, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        """
+        Args:
+            significant_digits: 延遲直方圖的有效數字位數
+            buckets: 導出 Prometheus 直方圖時使用的桶邊界（秒）
+        """
+        self.significant_digits = significant_digits
+        self.buckets = tuple(sorted(buckets))
+        self._endpoints: Dict[Tuple[str, str], EndpointMetrics] = {}
+        self._sessions: Dict[str, List[Any]] = {}
+        self._attached: List[Instrumentation] = []
+        self._lock = threading.Lock()
+
+    # ==================== 數據來源 ====================
+
+    def attach(self, instrumentation: Optional[Instrumentation] = None) -> "MetricsRegistry":
+        """
+        訂閱請求計時（重複訂閱同一收集點時忽略）
+
+        Args:
+            instrumentation: 計時收集點，預設為全局收集點
+        """
+        instrumentation = instrumentation or default_instrumentation
+        with self._lock:
+            if any(item is instrumentation for item in self._attached):
+                return self
+            self._attached.append(instrumentation)
+        instrumentation.add_listener(self.observe)
+        return self
+
+    def detach(self) -> None:
+        """取消所有訂閱"""
+        with self._lock:
+            attached, self._attached = self._attached, []
+        for instrumentation in attached:
+            instrumentation.remove_listener(self.observe)
+
+    def track_session(self, session, name: str = "default") -> None:
+        """
+        統計 requests 會話的連接復用率
+
+        Args:
+            session: requests.Session
+            name: 連接池名稱，同名的多個會話合併統計
+        """
+        with self._lock:
+            sessions = self._sessions.setdefault(name, [])
+            if not any(item is session for item in sessions):
+                sessions.append(session)
+
+    def observe(self, timing: RequestTiming) -> None:
+        """記錄一個請求（作為 Instrumentation 監聽器調用）"""
+        key = (timing.method, timing.path)
+        with self._lock:
+            endpoint = self._endpoints.get(key)
+            if endpoint is None:
+                endpoint = self._endpoints[key] = EndpointMetrics(self.significant_digits)
+            endpoint.observe(timing)
+
+    def reset(self) -> None:
+        """清空端點指標（連接池計數由 urllib3 維護，不受影響）"""
+        with self._lock:
+            self._endpoints.clear()
+
+    # ==================== 讀取 ====================
+
+    def connection_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        連接復用情況
+
+        Returns:
+            {名稱: {'connections': 新建連接數, 'requests': 請求數, 'reuse_ratio': 復用率(0-1)}}
+        """
+        with self._lock:
+            sessions = {name: list(items) for name, items in self._sessions.items()}
+        stats = {}
+        for name, items in sessions.items():
+            connections = requests = 0
+            for session in items:
+                counts = pool_stats(session)
+                connections += counts["connections"]
+                requests += counts["requests"]
+            stats[name] = {
+                "connections": connections,
+                "requests": requests,
+                "reuse_ratio": 1 - connections / requests if requests else math.nan,
+            }
+        return stats
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        指標快照
+
+        Returns:
+            {'endpoints': {"GET /v1/...": 端點指標}, 'connections': connection_stats()}
+        """
+        with self._lock:
+            endpoints = {f"{method} {path}": metrics.snapshot() for (method, path), metrics in self._endpoints.items()}
+        return {"endpoints": endpoints, "connections": self.connection_stats()}
+
+    def to_prometheus(self, prefix: str = "coinwapi") -> str:
+        """
+        導出為 Prometheus 文本格式（0.0.4）
+
+        Args:
+            prefix: 指標名稱前綴
+
+        Returns:
+            指標文本
+        """
+        with self._lock:
+            rows = []
+            for (method, path), metrics in sorted(self._endpoints.items()):
+                labels = f'method="{_escape(method)}",path="{_escape(path)}"'
+                rows.append((
+                    labels,
+                    metrics.latency.cumulative(self.buckets),
+                    metrics.latency.count,
+                    metrics.latency.sum,
+                    metrics.snapshot(),
+                ))
+
+        lines: List[str] = []
+
+        def header(name: str, kind: str, text: str) -> str:
+            lines.append(f"# HELP {prefix}_{name} {text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            return f"{prefix}_{name}"
+
+        name = header("request_duration_seconds", "histogram", "Request latency including throttling, signing and parsing")
+        for labels, cumulative, count, total, _ in rows:
+            for bound, value in zip(self.buckets, cumulative):
+                lines.append(f'{name}_bucket{{{labels},le="{_number(bound)}"}} {value}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {_number(total)}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+
+        name = header("requests_total", "counter", "Requests by HTTP status")
+        for labels, _, _, _, snapshot in rows:
+            for status, value in sorted(snapshot["statuses"].items()):
+                lines.append(f'{name}{{{labels},status="{_escape(status)}"}} {value}')
+
+        name = header("request_errors_total", "counter", "Failed requests by exception class")
+        for labels, _, _, _, snapshot in rows:
+            for error, value in sorted(snapshot["errors"].items()):
+                lines.append(f'{name}{{{labels},error="{_escape(error)}"}} {value}')
+
+        counters = (
+            ("request_retries_total", "retries", "Automatic retries"),
+            ("request_bytes_sent_total", "bytes_out", "Request body bytes sent"),
+            ("response_bytes_received_total", "bytes_in", "Response body bytes received"),
+        )
+        for metric, field, text in counters:
+            name = header(metric, "counter", text)
+            for labels, _, _, _, snapshot in rows:
+                lines.append(f"{name}{{{labels}}} {snapshot[field]}")
+
+        name = header("request_phase_seconds_total", "counter", "Cumulative time spent in each request phase")
+        for labels, _, _, _, snapshot in rows:
+            for phase in PHASES:
+                lines.append(f'{name}{{{labels},phase="{phase}"}} {_number(snapshot["phases"][phase])}')
+
+        connections = self.connection_stats()
+        if connections:
+            name = header("connections_opened_total", "counter", "Connections opened by the HTTP pool")
+            for pool, stats in sorted(connections.items()):
+                lines.append(f'{name}{{pool="{_escape(pool)}"}} {stats["connections"]}')
+            name = header("connection_requests_total", "counter", "Requests sent through the HTTP pool")
+            for pool, stats in sorted(connections.items()):
+                lines.append(f'{name}{{pool="{_escape(pool)}"}} {stats["requests"]}')
+
+        return "\n".join(lines) + "\n"
+
+    def __repr__(self):
+        return f"MetricsRegistry(endpoints={len(self._endpoints)})"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value))
@@ -0,0 +1,267 @@
+"""
+CoinW 本地訂單簿
+
+基於有序數組的訂單簿，用於在本地維護 WebSocket 深度數據：
+最優買賣價 O(1)；單檔位更新以 O(log n) 的二分查找定位，修改已有檔位的數量為 O(1)，
+新增或刪除檔位需要移動數組元素，為 O(n)（檔位數通常只有數十至數百，移動是連續內存拷貝，實際開銷很小）；
+前 N 檔快照只需切片
+"""
+
+import threading
+from bisect import bisect_left
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+Number = Union[float, Decimal]
+Level = Tuple[Number, Number]
+
+BID = "bids"
+ASK = "asks"
+
+
+class _BookSide:
+    """
+    訂單簿單邊
+
+    價格以升序鍵存放，最優價始終位於數組末尾：
+    買盤鍵為價格本身，賣盤鍵為價格的相反數，使兩邊的最優價都是最大鍵
+    """
+
+    __slots__ = ("_sign", "_keys", "_sizes")
+
+    def __init__(self, is_bid: bool):
+        self._sign = 1 if is_bid else -1
+        self._keys: List[Number] = []
+        self._sizes: List[Number] = []
+
+    def set(self, price: Number, size: Number) -> None:
+        """設置檔位數量，數量為 0 時刪除該檔位（新增或刪除檔位為 O(n)）"""
+        key = price if self._sign == 1 else -price
+        keys = self._keys
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            if size:
+                self._sizes[i] = size
+            else:
+                del keys[i]
+                del self._sizes[i]
+        elif size:
+            keys.insert(i, key)
+            self._sizes.insert(i, size)
+
+    def replace(self, levels: Iterable[Level]) -> None:
+        """以完整檔位列表替換當前數據"""
+        sign = self._sign
+        pairs = sorted((price * sign, size) for price, size in levels if size)
+        self._keys = [key for key, _ in pairs]
+        self._sizes = [size for _, size in pairs]
+
+    def best(self) -> Optional[Level]:
+        if not self._keys:
+            return None
+        return self._keys[-1] * self._sign, self._sizes[-1]
+
+    def top(self, depth: Optional[int] = None) -> List[Level]:
+        """由優到劣的前 depth 檔"""
+        if depth is None or depth >= len(self._keys):
+            keys, sizes = self._keys, self._sizes
+        elif depth <= 0:
+            return []
+        else:
+            keys, sizes = self._keys[-depth:], self._sizes[-depth:]
+        sign = self._sign
+        return [(key * sign, size) for key, size in zip(reversed(keys), reversed(sizes))]
+
+    def size_at(self, price: Number) -> Number:
+        key = price if self._sign == 1 else -price
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self._sizes[i]
+        return 0
+
+    def clear(self) -> None:
+        self._keys = []
+        self._sizes = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class OrderBook:
+    """
+    本地訂單簿
+
+    價格和數量在寫入時轉換為 number_type（預設 float，需要精確比較時可使用 Decimal），
+    所有讀寫操作線程安全，可在 WebSocket 線程更新、策略線程讀取
+    """
+
+    def __init__(self, symbol: Optional[str] = None, number_type: Callable[[Any], Number] = float):
+        """
+        Args:
+            symbol: 交易品種標識
+            number_type: 價格和數量的數值類型，float 或 Decimal
+        """
+        self.symbol = symbol
+        self.number_type = number_type
+        self.timestamp: Optional[int] = None
+        self.sequence: Optional[int] = None
+        self._bids = _BookSide(is_bid=True)
+        self._asks = _BookSide(is_bid=False)
+        self._lock = threading.Lock()
+
+    def _side(self, side: str) -> _BookSide:
+        if side in (BID, "bid", "buy"):
+            return self._bids
+        if side in (ASK, "ask", "sell"):
+            return self._asks
+        raise ValueError(f"無效的訂單簿方向: {side}")
+
+    def update(self, side: str, price: Any, size: Any) -> None:
+        """
+        更新單個檔位
+
+        Args:
+            side: "bids" 或 "asks"
+            price: 價格
+            size: 數量，為 0 時刪除該檔位
+        """
+        convert = self.number_type
+        book_side = self._side(side)
+        with self._lock:
+            book_side.set(convert(price), convert(size))
+
+    def update_levels(
+        self,
+        bids: Iterable[Sequence] = (),
+        asks: Iterable[Sequence] = (),
+        sequence: Optional[int] = None
+    ) -> None:
+        """
+        批量更新檔位
+
+        Args:
+            bids: 買盤更新，每項前兩個元素為 (價格, 數量)
+            asks: 賣盤更新，格式同上
+            sequence: 更新後的序列號（與檔位更新原子地生效）
+        """
+        convert = self.number_type
+        with self._lock:
+            for level in bids:
+                self._bids.set(convert(level[0]), convert(level[1]))
+            for level in asks:
+                self._asks.set(convert(level[0]), convert(level[1]))
+            if sequence is not None:
+                self.sequence = sequence
+
+    def apply_snapshot(
+        self,
+        bids: Iterable[Sequence],
+        asks: Iterable[Sequence],
+        timestamp: Optional[int] = None,
+        sequence: Optional[int] = None
+    ) -> None:
+        """
+        以完整快照替換訂單簿
+
+        Args:
+            bids: 買盤檔位，每項前兩個元素為 (價格, 數量)
+            asks: 賣盤檔位，格式同上
+            timestamp: 快照時間戳
+            sequence: 快照序列號
+        """
+        convert = self.number_type
+        bid_levels = [(convert(level[0]), convert(level[1])) for level in bids]
+        ask_levels = [(convert(level[0]), convert(level[1])) for level in asks]
+        with self._lock:
+            self._bids.replace(bid_levels)
+            self._asks.replace(ask_levels)
+            self.timestamp = timestamp
+            self.sequence = sequence
+
+    def apply_futures_depth(self, data: Dict[str, Any]) -> None:
+        """
+        應用期貨 depth 推送（每次推送為完整的前100檔）
+
+        Args:
+            data: 推送中的 data 字段，格式為 {'asks': [{'p': 價格, 'm': 數量}], 'bids': [...]}
+        """
+        self.apply_snapshot(
+            ((level['p'], level['m']) for level in data.get('bids') or ()),
+            ((level['p'], level['m']) for level in data.get('asks') or ())
+        )
+
+    def best_bid(self) -> Optional[Level]:
+        """最優買價及數量，無數據時返回 None"""
+        with self._lock:
+            return self._bids.best()
+
+    def best_ask(self) -> Optional[Level]:
+        """最優賣價及數量，無數據時返回 None"""
+        with self._lock:
+            return self._asks.best()
+
+    def spread(self) -> Optional[Number]:
+        """買賣價差"""
+        with self._lock:
+            bid, ask = self._bids.best(), self._asks.best()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def mid_price(self) -> Optional[Number]:
+        """中間價"""
+        with self._lock:
+            bid, ask = self._bids.best(), self._asks.best()
+        if bid is None or ask is None:
+            return None
+        return (ask[0] + bid[0]) / 2
+
+    def size_at(self, side: str, price: Any) -> Number:
+        """指定價格檔位的數量，不存在時返回 0"""
+        book_side = self._side(side)
+        with self._lock:
+            return book_side.size_at(self.number_type(price))
+
+    def top(self, depth: Optional[int] = 10) -> Dict[str, Any]:
+        """
+        前 N 檔快照
+
+        Args:
+            depth: 檔位數，None 表示全部
+
+        Returns:
+            {'bids': [(價格, 數量), ...], 'asks': [...], 'timestamp': ..., 'sequence': ...}，
+            兩邊均由最優價開始排列
+        """
+        with self._lock:
+            return {
+                BID: self._bids.top(depth),
+                ASK: self._asks.top(depth),
+                'timestamp': self.timestamp,
+                'sequence': self.sequence
+            }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """完整訂單簿快照"""
+        return self.top(None)
+
+    def clear(self) -> None:
+        """清空訂單簿"""
+        with self._lock:
+            self._bids.clear()
+            self._asks.clear()
+            self.timestamp = None
+            self.sequence = None
+
+    @property
+    def bid_depth(self) -> int:
+        """買盤檔位數"""
+        return len(self._bids)
+
+    @property
+    def ask_depth(self) -> int:
+        """賣盤檔位數"""
+        return len(self._asks)
+
+    def __repr__(self):
+        return f"OrderBook({self.symbol}, bids={self.bid_depth}, asks={self.ask_depth})"
@@ -0,0 +1,234 @@
+"""
+CoinW 分頁查詢迭代器
+
+將按頁碼（page/pageSize）或游標（before/after）分頁的歷史查詢封裝為逐條產出記錄的生成器：
+在調用方處理當前頁時於後台預取下一頁，按時間範圍提前停止，
+並按記錄ID去除相鄰頁之間的重複記錄；只保留當前頁和上一頁，內存佔用不隨記錄總數增長
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .exceptions import CoinWAPIError, InvalidParameterError
+
+logger = logging.getLogger(__name__)
+
+# (本頁記錄, 下一頁的頁碼或游標；None 表示沒有下一頁)
+Page = Tuple[List[Dict[str, Any]], Any]
+
+
+def extract_rows(response: Any) -> List[Dict[str, Any]]:
+    """
+    提取分頁響應中的記錄列表
+
+    支持 data 為列表，或 data 中包含 rows（期貨）、list（現貨）字段的格式；
+    現貨接口出錯時返回錯誤字典而非拋出異常，此處統一拋出 CoinWAPIError
+    """
+    if not isinstance(response, dict):
+        raise CoinWAPIError(f"無效的分頁響應: {response!r}")
+    if response.get("success") is False:
+        raise CoinWAPIError(f"分頁查詢失敗: {response.get('message') or response.get('msg')}", response=response)
+
+    data = response.get("data")
+    if isinstance(data, dict):
+        data = data.get("rows", data.get("list"))
+    return [row for row in data or () if isinstance(row, dict)]
+
+
+def page_number_parser(page_size: int) -> Callable[[Any, int], Page]:
+    """
+    頁碼分頁的解析函數：本頁記錄數少於 page_size，或已達到響應中的 total 時沒有下一頁
+    """
+    def parse(response: Any, page: int) -> Page:
+        rows = extract_rows(response)
+        data = response.get("data")
+        total = data.get("total") if isinstance(data, dict) else None
+        if len(rows) < page_size or (isinstance(total, int) and page * page_size >= total):
+            return rows, None
+        return rows, page + 1
+    return parse
+
+
+def cursor_parser(limit: int, id_field: str) -> Callable[[Any, Any], Page]:
+    """
+    游標分頁的解析函數：使用響應中的 after 游標，沒有時以本頁最後一條記錄的ID作為游標
+    """
+    def parse(response: Any, cursor: Any) -> Page:
+        rows = extract_rows(response)
+        if len(rows) < limit:
+            return rows, None
+        data = response.get("data")
+        next_cursor = data.get("after") if isinstance(data, dict) else None
+        if next_cursor is None:
+            next_cursor = rows[-1].get(id_field)
+        if next_cursor is None or str(next_cursor) == str(cursor):
+            return rows, None
+        return rows, str(next_cursor)
+    return parse
+
+
+class _RowFilter:
+    """按時間範圍過濾並去除相鄰頁之間的重複記錄"""
+
+    def __init__(
+        self,
+        id_field: Optional[str],
+        time_field: Optional[str],
+        since: Optional[int],
+        until: Optional[int]
+    ):
+        if (since is not None or until is not None) and not time_field:
+            raise InvalidParameterError("按時間範圍過濾需要指定 time_field")
+        self.id_field = id_field
+        self.time_field = time_field
+        self.since = since
+        self.until = until
+        self._previous_ids: set = set()
+        self.duplicates = 0
+
+    def apply(self, rows: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Returns:
+            (需要產出的記錄, 是否已越過 since，不需要再取下一頁)
+        """
+        current_ids = set()
+        output = []
+        reached_since = False
+
+        for row in rows:
+            if self.id_field is not None:
+                row_id = row.get(self.id_field)
+                if row_id is not None:
+                    if row_id in self._previous_ids or row_id in current_ids:
+                        self.duplicates += 1
+                        continue
+                    current_ids.add(row_id)
+
+            if self.time_field is not None and (self.since is not None or self.until is not None):
+                try:
+                    timestamp = int(row.get(self.time_field))
+                except (TypeError, ValueError):
+                    timestamp = None
+                if timestamp is not None:
+                    # 記錄按時間倒序返回，早於 since 說明後續頁都更早
+                    if self.since is not None and timestamp < self.since:
+                        reached_since = True
+                        continue
+                    if self.until is not None and timestamp > self.until:
+                        continue
+
+            output.append(row)
+
+        self._previous_ids = current_ids
+        return output, reached_since
+
+
+def iter_pages(
+    fetch: Callable[[Any], Any],
+    parse: Callable[[Any, Any], Page],
+    first: Any,
+    id_field: Optional[str] = "id",
+    time_field: Optional[str] = None,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    prefetch: bool = True
+) -> Iterator[Dict[str, Any]]:
+    """
+    逐條產出分頁查詢的記錄
+
+    Args:
+        fetch: 請求一頁的函數，參數為頁碼或游標
+        parse: 解析函數，返回 (本頁記錄, 下一頁的頁碼或游標)
+        first: 第一頁的頁碼或游標
+        id_field: 用於去重的記錄ID字段，None 表示不去重
+        time_field: 記錄的時間戳字段（毫秒）
+        since: 只產出不早於該時間的記錄，遇到更早的記錄後停止翻頁
+        until: 只產出不晚於該時間的記錄
+        max_pages: 最多請求的頁數
+        prefetch: 是否在處理當前頁時於後台預取下一頁
+
+    Yields:
+        記錄
+    """
+    row_filter = _RowFilter(id_field, time_field, since, until)
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="coinw-prefetch") if prefetch else None
+    pending = None
+    cursor = first
+    pages = 0
+
+    try:
+        response = fetch(cursor)
+        while True:
+            pages += 1
+            rows, next_cursor = parse(response, cursor)
+            output, reached_since = row_filter.apply(rows)
+
+            has_next = next_cursor is not None and not reached_since and (max_pages is None or pages < max_pages)
+            if has_next and executor is not None:
+                pending = executor.submit(fetch, next_cursor)
+
+            for row in output:
+                yield row
+
+            if not has_next:
+                return
+            cursor = next_cursor
+            if pending is not None:
+                response, pending = pending.result(), None
+            else:
+                response = fetch(cursor)
+    finally:
+        if pending is not None:
+            pending.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False)
+        if row_filter.duplicates and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"分頁查詢去除了 {row_filter.duplicates} 條跨頁重複記錄")
+
+
+async def aiter_pages(
+    fetch: Callable[[Any], Any],
+    parse: Callable[[Any, Any], Page],
+    first: Any,
+    id_field: Optional[str] = "id",
+    time_field: Optional[str] = None,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    prefetch: bool = True
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    逐條產出分頁查詢的記錄（異步），參數同 iter_pages，fetch 返回協程
+    """
+    row_filter = _RowFilter(id_field, time_field, since, until)
+    pending = None
+    cursor = first
+    pages = 0
+
+    try:
+        response = await fetch(cursor)
+        while True:
+            pages += 1
+            rows, next_cursor = parse(response, cursor)
+            output, reached_since = row_filter.apply(rows)
+
+            has_next = next_cursor is not None and not reached_since and (max_pages is None or pages < max_pages)
+            if has_next and prefetch:
+                pending = asyncio.ensure_future(fetch(next_cursor))
+
+            for row in output:
+                yield row
+
+            if not has_next:
+                return
+            cursor = next_cursor
+            if pending is not None:
+                response, pending = await pending, None
+            else:
+                response = await fetch(cursor)
+    finally:
+        if pending is not None:
+            pending.cancel()
@@ -0,0 +1,251 @@
+"""
+CoinW API 客戶端限頻
+
+基於令牌桶的主動限頻器，在請求發出前排隊或拒絕，避免觸發交易所的 429
+"""
+
+import time
+import asyncio
+import threading
+from fnmatch import fnmatchcase
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .exceptions import RateLimitError
+
+
+@dataclass
+class RateLimitRule:
+    """
+    限頻規則
+
+    Attributes:
+        pattern: 端點匹配模式（fnmatch 語法），如 "/v1/perpumPublic/*"
+        rate: 每秒補充的令牌數
+        capacity: 桶容量（允許的突發請求數）
+        bucket: 桶名稱，相同名稱的規則共用一個桶；為空時使用 pattern
+        weight: 每次請求消耗的令牌數
+        per_path: 是否為每個匹配的端點分別建立獨立的桶
+    """
+    pattern: str
+    rate: float
+    capacity: float
+    bucket: Optional[str] = None
+    weight: float = 1
+    per_path: bool = False
+
+    def __post_init__(self):
+        if self.rate <= 0 or self.capacity <= 0:
+            raise ValueError(f"限頻規則 {self.pattern}: rate 和 capacity 必須大於 0")
+        if self.weight > self.capacity:
+            raise ValueError(f"限頻規則 {self.pattern}: weight ({self.weight}) 不能大於 capacity ({self.capacity})")
+
+    @classmethod
+    def window(cls, pattern: str, limit: int, seconds: float, **kwargs) -> "RateLimitRule":
+        """
+        由文檔中「每 seconds 秒最多 limit 次」構建規則
+
+        令牌桶在任意 seconds 秒內最多放行 capacity + rate * seconds - 1 次，
+        因此取 capacity = 1、rate = limit / seconds：任何滑動窗口內都不超過 limit 次，
+        且長期速率與文檔一致（代價是沒有突發，請求被均勻攤開）
+
+        Args:
+            pattern: 端點匹配模式
+            limit: 窗口內允許的請求數
+            seconds: 窗口長度（秒）
+            **kwargs: 其他 RateLimitRule 字段（bucket、weight、per_path）
+        """
+        if limit < 1 or seconds <= 0:
+            raise ValueError(f"限頻規則 {pattern}: limit 必須大於 0 且 seconds 必須為正數")
+        return cls(pattern, rate=limit / seconds, capacity=1, **kwargs)
+
+
+# 期貨預設規則（依據官方文檔的接口頻率限制，按順序匹配）
+FUTURES_RATE_LIMITS: List[RateLimitRule] = [
+    RateLimitRule("/v1/perpum/order", rate=10, capacity=20, bucket="/v1/perpum/order"),
+    RateLimitRule("/v1/perpum/batchOrders", rate=10, capacity=20, bucket="/v1/perpum/order", weight=5),
+    # future/MARKET.MD：深度、成交等公共行情接口每2秒10次
+    RateLimitRule.window("/v1/perpumPublic/*", 10, 2, per_path=True),
+    RateLimitRule.window("/v1/perpum/fundingRate", 8, 1),
+    RateLimitRule.window("/v1/perpum/ladders", 10, 2),
+    # future/ACCOUNT.MD 中單獨列出的接口
+    RateLimitRule.window("/v1/perpum/account/getUserAssets", 5, 2),
+    RateLimitRule.window("/v1/perpum/account/fees", 2, 2),
+    RateLimitRule.window("/v1/perpum/account/almightyGoldInfo", 1, 2),
+    RateLimitRule.window("/v1/perpum/pieceConvert", 10, 2),
+    # GET 為每2秒5次、POST 為每2秒2次，限頻器按路徑分桶，取較嚴格的一個
+    RateLimitRule.window("/v1/perpum/positions/type", 2, 2),
+    RateLimitRule.window("/v1/perpum/orders/availSize", 10, 2),
+    RateLimitRule.window("/v1/perpum/orders/deals", 10, 1),
+    # 其餘私有接口：每秒5次
+    RateLimitRule.window("/v1/perpum/*", 5, 1, per_path=True),
+]
+
+# 現貨私有接口的逐 command 限制，未列出的 command 使用 /api/v1/private* 的通用限制
+_SPOT_PRIVATE_WINDOWS: List[Tuple[Sequence[str], int, float]] = [
+    # 查詢類接口：每秒3次
+    (("returnOpenOrders", "returnOrderStatus", "returnOrderTrades", "returnUTradeHistory", "getUserTrades",
+      "returnBalances", "returnCompleteBalances", "returnDepositAddresses", "returnDepositsWithdrawals"), 3, 1),
+    # 下單、撤單：每2秒10次
+    (("doTrade", "cancelOrder"), 10, 2),
+    # 全部撤單、提幣及劃轉：每2秒5次
+    (("cancelAllOrder", "doWithdraw", "cancelWithdraw", "spotWealthTransfer"), 5, 2),
+]
+
+# 現貨預設規則（按 command 分桶，逐 command 的規則須排在通配規則之前）
+SPOT_RATE_LIMITS: List[RateLimitRule] = [
+    RateLimitRule.window("/api/v1/public?command=returnTicker", 80, 1),
+    RateLimitRule.window("/api/v1/public?command=returnSymbol", 80, 1),
+    RateLimitRule.window("/api/v1/public?command=returnCurrencies", 80, 1),
+    RateLimitRule.window("/api/v1/public*", 10, 1, per_path=True),
+    *(
+        RateLimitRule.window(f"/api/v1/private?command={command}", limit, seconds)
+        for commands, limit, seconds in _SPOT_PRIVATE_WINDOWS
+        for command in commands
+    ),
+    RateLimitRule.window("/api/v1/private*", 30, 2, per_path=True),
+]
+
+
+class TokenBucket:
+    """令牌桶"""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: 每秒補充的令牌數
+            capacity: 桶容量
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def reserve(self, weight: float) -> float:
+        """
+        嘗試扣除令牌
+
+        Returns:
+            0 表示已扣除；否則為需要等待的秒數（未扣除）
+
+        Raises:
+            ValueError: weight 大於桶容量
+        """
+        if weight > self.capacity:
+            raise ValueError(f"請求權重 {weight} 超過桶容量 {self.capacity}，永遠無法獲取")
+        self._refill(time.monotonic())
+        if self._tokens >= weight:
+            self._tokens -= weight
+            return 0.0
+        return (weight - self._tokens) / self.rate
+
+    @property
+    def tokens(self) -> float:
+        """當前可用令牌數"""
+        self._refill(time.monotonic())
+        return self._tokens
+
+
+class RateLimiter:
+    """
+    按端點族分桶的令牌桶限頻器
+
+    同一個限頻器應在共享相同配額（IP/用戶）的所有客戶端之間共用，線程安全
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[RateLimitRule],
+        max_wait: Optional[float] = None
+    ):
+        """
+        Args:
+            rules: 限頻規則，按順序匹配，第一條匹配的規則生效
+            max_wait: 最長排隊時間（秒）；None 表示一直等待，0 表示超出限制立即拒絕
+        """
+        self._rules = list(rules)
+        self._max_wait = max_wait
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._routes: Dict[str, Optional[Tuple[TokenBucket, float]]] = {}
+        self._lock = threading.Lock()
+
+    def _route(self, key: str) -> Optional[Tuple[TokenBucket, float]]:
+        """查找端點對應的桶和權重（結果會緩存）"""
+        route = self._routes.get(key, False)
+        if route is not False:
+            return route
+
+        route = None
+        for rule in self._rules:
+            if fnmatchcase(key, rule.pattern):
+                name = key if rule.per_path else (rule.bucket or rule.pattern)
+                bucket = self._buckets.get(name)
+                if bucket is None:
+                    bucket = self._buckets[name] = TokenBucket(rule.rate, rule.capacity)
+                route = (bucket, rule.weight)
+                break
+
+        self._routes[key] = route
+        return route
+
+    def _reserve(self, key: str, weight: Optional[float]) -> float:
+        with self._lock:
+            route = self._route(key)
+            if route is None:
+                return 0.0
+            bucket, default_weight = route
+            wait = bucket.reserve(default_weight if weight is None else weight)
+
+        if wait and self._max_wait is not None and wait > self._max_wait:
+            raise RateLimitError(f"客戶端限頻: {key} 需等待 {wait:.3f} 秒")
+        return wait
+
+    def acquire(self, key: str, weight: Optional[float] = None) -> None:
+        """
+        獲取令牌，必要時阻塞等待
+
+        Args:
+            key: 端點路徑
+            weight: 本次請求消耗的令牌數，為空時使用規則的權重
+
+        Raises:
+            RateLimitError: 需要等待的時間超過 max_wait
+            ValueError: weight 大於桶容量
+        """
+        while True:
+            wait = self._reserve(key, weight)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, key: str, weight: Optional[float] = None) -> None:
+        """獲取令牌的異步版本，等待時不阻塞事件循環"""
+        while True:
+            wait = self._reserve(key, weight)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def usage(self) -> Dict[str, Dict[str, float]]:
+        """
+        各個桶的使用情況
+
+        Returns:
+            {桶名稱: {"tokens": 可用令牌, "capacity": 容量, "utilization": 使用率(0-1)}}
+        """
+        with self._lock:
+            result = {}
+            for name, bucket in self._buckets.items():
+                tokens = bucket.tokens
+                result[name] = {
+                    "tokens": tokens,
+                    "capacity": bucket.capacity,
+                    "utilization": 1 - tokens / bucket.capacity,
+                }
+            return result
@@ -0,0 +1,225 @@
+"""
+CoinW 請求簽名
+
+預先計算簽名所需的固定部分：合約 API 的 HMAC SHA256 以密鑰初始化一次，
+每次簽名只 copy() 已初始化的狀態；請求體只序列化一次，簽名和發送使用同一份字節，
+保證兩者完全一致。現貨 API 的 MD5 簽名預先編碼 api_key 和密鑰部分
+"""
+
+import time
+import json
+import hmac
+import base64
+import hashlib
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .exceptions import InvalidCredentialsError
+
+
+class SignedRequest(NamedTuple):
+    """已簽名的合約請求"""
+    headers: Dict[str, str]
+    params: Optional[Dict[str, Any]]  # GET 查詢參數
+    body: Optional[bytes]             # POST/PUT/DELETE 請求體
+
+
+def encode_body(params: Optional[Dict[str, Any]]) -> bytes:
+    """
+    序列化請求體；參數為空時返回空字節（簽名使用空字符串，發送時為 "{}"）
+    """
+    return json.dumps(params).encode("utf-8") if params else b""
+
+
+def canonical_query(params: Optional[Dict[str, Any]]) -> str:
+    """GET 請求參與簽名的查詢字符串（按參數順序，忽略 None 值）"""
+    if not params:
+        return ""
+    return "&".join(f"{key}={value}" for key, value in params.items() if value is not None)
+
+
+class HMACSigner:
+    """
+    合約 API 的 HMAC SHA256 簽名器
+
+    簽名字符串為 timestamp + method + path + (?查詢字符串 | JSON 請求體)，結果為 Base64 編碼
+    """
+
+    def __init__(self, api_key: str, secret_key: str):
+        """
+        Args:
+            api_key: API密鑰
+            secret_key: Secret密鑰
+
+        Raises:
+            InvalidCredentialsError: 缺少密鑰
+        """
+        if not api_key or not secret_key:
+            raise InvalidCredentialsError("合約API需要API密鑰和secret密鑰")
+        self.api_key = api_key
+        self._secret_key = secret_key
+        self._mac = hmac.new(secret_key.encode("utf-8"), digestmod=hashlib.sha256)
+
+    def matches(self, api_key: str, secret_key: str) -> bool:
+        """是否使用相同的密鑰（密鑰變更後需要重新創建簽名器）"""
+        return self.api_key == api_key and self._secret_key == secret_key
+
+    def sign(self, message: bytes) -> str:
+        """
+        簽名已構建的簽名字符串
+
+        Args:
+            message: 簽名字符串（UTF-8 字節）
+
+        Returns:
+            Base64編碼的簽名
+        """
+        mac = self._mac.copy()
+        mac.update(message)
+        return base64.b64encode(mac.digest()).decode("ascii")
+
+    def payload(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        timestamp: str
+    ) -> Tuple[bytes, Optional[bytes]]:
+        """
+        構建簽名字符串和請求體
+
+        Args:
+            method: HTTP方法（大寫）
+            path: API路徑
+            params: 請求參數
+            timestamp: 毫秒時間戳
+
+        Returns:
+            (簽名字符串, 請求體；GET 請求為 None)
+        """
+        prefix = f"{timestamp}{method}{path}"
+        if method == "GET":
+            query = canonical_query(params)
+            return (f"{prefix}?{query}" if query else prefix).encode("utf-8"), None
+        body = encode_body(params)
+        return prefix.encode("utf-8") + body, body or b"{}"
+
+    def sign_request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        timestamp: Optional[str] = None
+    ) -> SignedRequest:
+        """
+        簽名一個請求
+
+        Args:
+            method: HTTP方法
+            path: API路徑
+            params: 請求參數
+            timestamp: 毫秒時間戳，預設為當前時間
+
+        Returns:
+            SignedRequest(認證頭, GET查詢參數, 請求體)
+        """
+        method = method.upper()
+        if timestamp is None:
+            timestamp = str(int(time.time() * 1000))
+        message, body = self.payload(method, path, params, timestamp)
+        headers = {
+            "sign": self.sign(message),
+            "api_key": self.api_key,
+            "timestamp": timestamp,
+        }
+        if body is not None:
+            headers["Content-type"] = "application/json"
+            return SignedRequest(headers, None, body)
+        return SignedRequest(headers, params or {}, None)
+
+    def sign_batch(
+        self,
+        requests: Iterable[Tuple[str, str, Optional[Dict[str, Any]]]],
+        timestamp: Optional[str] = None
+    ) -> List[SignedRequest]:
+        """
+        批量簽名多個請求，共用同一個時間戳
+
+        Args:
+            requests: [(HTTP方法, API路徑, 請求參數), ...]
+            timestamp: 毫秒時間戳，預設為當前時間
+
+        Returns:
+            與 requests 順序相同的 SignedRequest 列表
+        """
+        if timestamp is None:
+            timestamp = str(int(time.time() * 1000))
+        return [self.sign_request(method, path, params, timestamp) for method, path, params in requests]
+
+    def __repr__(self):
+        return f"HMACSigner(api_key={self.api_key[:6]}...)"
+
+
+class MD5Signer:
+    """
+    現貨 API 的 MD5 簽名器
+
+    簽名字符串為按鍵排序的 key=value&...（包含 api_key）加上 secret_key=密鑰，結果為大寫十六進制
+    """
+
+    def __init__(self, api_key: Optional[str], secret_key: str):
+        """
+        Args:
+            api_key: API金鑰（為空時不參與簽名）
+            secret_key: 密鑰
+
+        Raises:
+            ValueError: 缺少密鑰
+        """
+        if not secret_key:
+            raise ValueError("secret_key 必須設置才能生成簽名")
+        self.api_key = api_key
+        self._secret_key = secret_key
+        self._suffix = f"secret_key={secret_key}".encode("utf-8")
+
+    def matches(self, api_key: Optional[str], secret_key: str) -> bool:
+        """是否使用相同的密鑰"""
+        return self.api_key == api_key and self._secret_key == secret_key
+
+    def sign(self, params: Dict[str, Any]) -> str:
+        """
+        生成MD5簽名（不修改 params）
+
+        Args:
+            params: 請求參數
+
+        Returns:
+            MD5簽名字符串
+        """
+        items = params.items()
+        if self.api_key:
+            items = {**params, "api_key": self.api_key}.items()
+        # 沒有任何參數時原實現的簽名字符串為 "&secret_key=..."，保持一致
+        query = "".join(f"{key}={value}&" for key, value in sorted(items)) or "&"
+        digest = hashlib.md5(query.encode("utf-8"))
+        digest.update(self._suffix)
+        return digest.hexdigest().upper()
+
+    def sign_params(self, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        返回附加了 sign 字段的請求參數副本
+        """
+        signed = dict(params) if params else {}
+        signed["sign"] = self.sign(signed)
+        return signed
+
+    def sign_batch(self, params_list: Iterable[Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        批量簽名多組請求參數
+
+        Returns:
+            與 params_list 順序相同的已簽名參數列表
+        """
+        return [self.sign_params(params) for params in params_list]
+
+    def __repr__(self):
+        return f"MD5Signer(api_key={(self.api_key or '')[:6]}...)"
@@ -0,0 +1,1620 @@
+"""
+CoinW 本地交易所模擬器
+
+在本機啟動一個 HTTP 服務，模擬合約 /v1/perpum*、現貨 /api/v1/public|private 接口，
+並在同一端口上提供合約（/perpum）和現貨（/）WebSocket 協議：登錄、sub/unsub、
+ticker/depth/fills/order 等推送格式與 future/ws.md、spot/ws.md 一致。
+合約請求校驗 HMAC SHA256 簽名，現貨私有請求校驗 MD5 簽名；可注入延遲、5xx 錯誤和 429，
+用於在沒有網絡的環境下進行基準測試和壓力測試。
+
+行情為隨機遊走生成；訂單不撮合：市價單立即成交，限價單一直掛單直到撤銷
+"""
+
+import json
+import hmac
+import time
+import uuid
+import base64
+import random
+import socket
+import struct
+import hashlib
+import logging
+import itertools
+import threading
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Set, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from .exceptions import RateLimitError
+from .rate_limiter import RateLimiter, RateLimitRule
+
+logger = logging.getLogger(__name__)
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# WebSocket 操作碼
+_OP_CONTINUATION = 0x0
+_OP_TEXT = 0x1
+_OP_CLOSE = 0x8
+_OP_PING = 0x9
+_OP_PONG = 0xA
+
+# 合約公共接口（不需要簽名）
+_FUTURE_PUBLIC_PATHS = {
+    "/v1/perpum/instruments",
+    "/v1/perpum/fundingRate",
+    "/v1/perpumPublic/ticker",
+    "/v1/perpumPublic/depth",
+    "/v1/perpumPublic/trades",
+    "/v1/perpumPublic/klines",
+}
+
+# 合約私有推送類型
+_FUTURE_PRIVATE_TYPES = {"order", "position", "position_change", "assets", "assets_ag", "user_setting"}
+
+# 現貨私有推送類型
+_SPOT_PRIVATE_TYPES = {"order", "assets"}
+
+# 現貨方法1的主題 -> 方法2的消息類型
+_SPOT_SUBJECTS = {
+    "spot/market-api-ticker": "ticker",
+    "spot/level2_20": "depth_snapshot",
+    "spot/match": "fills",
+}
+
+
+@dataclass
+class SimulatorConfig:
+    """
+    模擬器配置
+
+    延遲、錯誤率等故障注入字段在運行中修改立即生效
+
+    Attributes:
+        api_key: 接受的API密鑰
+        secret_key: 校驗簽名使用的密鑰
+        host: 監聽地址
+        port: 監聽端口，0 表示自動分配
+        latency: 每個 REST 請求的固定延遲（秒）
+        latency_jitter: 額外的隨機延遲上限（秒）
+        error_rate: 返回 HTTP 500 的概率
+        rate_limit_rate: 返回 HTTP 429 的概率
+        rate_limit_rules: 服務端限頻規則（如 FUTURES_RATE_LIMITS），超出時返回 429
+        verify_signatures: 是否校驗簽名
+        max_clock_skew: 合約請求時間戳允許的偏差（秒），None 表示不檢查
+        push_interval: WebSocket 行情推送間隔（秒）
+        depth_levels: 訂單簿每側檔數
+        futures: 合約品種及初始價格
+        spot: 現貨交易對及 (pairCode, 初始價格)
+        seed: 隨機數種子，設置後行情和故障注入可重現
+    """
+    api_key: str = "simulator-api-key"
+    secret_key: str = "simulator-secret-key"
+    host: str = "127.0.0.1"
+    port: int = 0
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    rate_limit_rules: Optional[Sequence[RateLimitRule]] = None
+    verify_signatures: bool = True
+    max_clock_skew: Optional[float] = None
+    push_interval: float = 0.1
+    depth_levels: int = 20
+    futures: Dict[str, float] = field(default_factory=lambda: {
+        "BTC": 95000.0, "ETH": 2700.0, "SOL": 170.0, "XRP": 2.5
+    })
+    spot: Dict[str, Tuple[int, float]] = field(default_factory=lambda: {
+        "BTC_USDT": (78, 95000.0), "ETH_USDT": (79, 2700.0), "SOL_USDT": (1481, 170.0)
+    })
+    seed: Optional[int] = None
+
+
+# ==================== 行情 ====================
+
+def _precision(price: float) -> int:
+    """按價格量級選擇價格精度：BTC 1 位小數、ETH 2 位……"""
+    return max(1, 6 - len(str(int(price))))
+
+
+class _Book:
+    """
+    單個品種的模擬訂單簿
+
+    價格以最小變動單位的整數索引保存，中間價隨機遊走；每次變動分配遞增的序列號，
+    增量與快照來自同一份數據，客戶端以快照加增量重建的訂單簿與這裡完全一致
+    """
+
+    def __init__(self, name: str, price: float, levels: int, rng: random.Random):
+        self.name = name
+        self.precision = _precision(price)
+        self.tick = 10 ** -self.precision
+        self.levels = levels
+        self.sequence = rng.randint(10 ** 8, 10 ** 9)
+        self._rng = rng
+
+        self.mid = int(round(price / self.tick))
+        self.open = self.high = self.low = self.last = price
+        self.volume = 0.0
+        self.bids: Dict[int, float] = {}
+        self.asks: Dict[int, float] = {}
+        for offset in range(levels):
+            self.bids[self.mid - offset] = self._size()
+            self.asks[self.mid + 1 + offset] = self._size()
+        self.trades: Deque[Dict[str, Any]] = deque(maxlen=50)
+        self._trade_ids = itertools.count(rng.randint(10 ** 7, 10 ** 8))
+
+    def _size(self) -> float:
+        return round(self._rng.uniform(0.001, 2.0), 4)
+
+    def price(self, index: int) -> str:
+        return f"{index * self.tick:.{self.precision}f}"
+
+    @property
+    def best_bid(self) -> float:
+        return max(self.bids) * self.tick
+
+    @property
+    def best_ask(self) -> float:
+        return min(self.asks) * self.tick
+
+    def step(self) -> Tuple[List[list], List[list], List[Dict[str, Any]]]:
+        """
+        推進一步
+
+        Returns:
+            (買盤變動, 賣盤變動, 新成交)；變動為 [價格, 數量, 序列號]，數量為 0 表示刪除
+        """
+        rng = self._rng
+        bid_changes: List[list] = []
+        ask_changes: List[list] = []
+
+        def change(side: Dict[int, float], changes: List[list], index: int, size: float) -> None:
+            self.sequence += 1
+            if size:
+                side[index] = size
+            else:
+                side.pop(index, None)
+            changes.append([self.price(index), f"{size:.4f}", str(self.sequence)])
+
+        # 中間價移動後保持每側 levels 個連續價位
+        self.mid += rng.choice((-2, -1, -1, 0, 0, 0, 1, 1, 2))
+        bid_range = range(self.mid - self.levels + 1, self.mid + 1)
+        ask_range = range(self.mid + 1, self.mid + 1 + self.levels)
+        for index in [index for index in self.bids if index not in bid_range]:
+            change(self.bids, bid_changes, index, 0)
+        for index in [index for index in self.asks if index not in ask_range]:
+            change(self.asks, ask_changes, index, 0)
+        for index in bid_range:
+            if index not in self.bids:
+                change(self.bids, bid_changes, index, self._size())
+        for index in ask_range:
+            if index not in self.asks:
+                change(self.asks, ask_changes, index, self._size())
+
+        # 隨機修改幾個價位的數量
+        for _ in range(rng.randint(1, 3)):
+            if rng.random() < 0.5:
+                change(self.bids, bid_changes, rng.choice(bid_range), self._size())
+            else:
+                change(self.asks, ask_changes, rng.choice(ask_range), self._size())
+
+        trades = []
+        for _ in range(rng.choice((0, 0, 1, 1, 2))):
+            buy = rng.random() < 0.5
+            price = self.best_ask if buy else self.best_bid
+            quantity = round(rng.uniform(0.001, 0.5), 4)
+            trade = {
+                "id": next(self._trade_ids),
+                "price": float(f"{price:.{self.precision}f}"),
+                "quantity": quantity,
+                "buy": buy,
+                "time": int(time.time() * 1000),
+            }
+            trades.append(trade)
+            self.trades.append(trade)
+            self.last = trade["price"]
+            self.high = max(self.high, self.last)
+            self.low = min(self.low, self.last)
+            self.volume += quantity
+
+        return bid_changes, ask_changes, trades
+
+    def levels_desc(self) -> Tuple[List[int], List[int]]:
+        """(買盤價位從高到低, 賣盤價位從低到高)"""
+        return sorted(self.bids, reverse=True), sorted(self.asks)
+
+    def change_rate(self) -> str:
+        return f"{(self.last - self.open) / self.open:.6f}"
+
+
+class _Market:
+    """全部品種的行情數據"""
+
+    def __init__(self, config: SimulatorConfig, rng: random.Random):
+        self.lock = threading.Lock()
+        self.futures = {
+            name.upper(): _Book(name.upper(), price, config.depth_levels, rng)
+            for name, price in config.futures.items()
+        }
+        self.spot = {
+            symbol.upper(): _Book(symbol.upper(), price, config.depth_levels, rng)
+            for symbol, (_, price) in config.spot.items()
+        }
+        self.spot_ids = {symbol.upper(): str(pair_code) for symbol, (pair_code, _) in config.spot.items()}
+        self.spot_symbols = {pair_code: symbol for symbol, pair_code in self.spot_ids.items()}
+        self.funding_rate = {name: round(rng.uniform(-0.0001, 0.0001), 8) for name in self.futures}
+
+    def future_book(self, name: Any) -> Optional[_Book]:
+        return self.futures.get(str(name or "").upper())
+
+    def spot_book(self, symbol: Any) -> Optional[_Book]:
+        """按 BTC_USDT、BTC-USDT、btc_usdt 或 pairCode 查找"""
+        key = str(symbol or "").upper().replace("-", "_")
+        return self.spot.get(self.spot_symbols.get(key, key))
+
+
+# ==================== WebSocket 幀 ====================
+
+def _frame(payload: bytes, opcode: int = _OP_TEXT) -> bytes:
+    """構建服務端幀（不加掩碼）"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def _unmask(payload: bytes, mask: bytes) -> bytes:
+    length = len(payload)
+    key = (mask * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, "little") ^ int.from_bytes(key, "little")).to_bytes(length, "little")
+
+
+def _read_exact(rfile, size: int) -> bytes:
+    data = rfile.read(size)
+    if data is None or len(data) < size:
+        raise ConnectionError("連接已關閉")
+    return data
+
+
+def _read_frame(rfile) -> Tuple[bool, int, bytes]:
+    """讀取一個客戶端幀，返回 (FIN, 操作碼, 負載)"""
+    first, second = _read_exact(rfile, 2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", _read_exact(rfile, 2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", _read_exact(rfile, 8))[0]
+    mask = _read_exact(rfile, 4) if second & 0x80 else None
+    payload = _read_exact(rfile, length) if length else b""
+    if mask is not None and payload:
+        payload = _unmask(payload, mask)
+    return bool(first & 0x80), first & 0x0F, payload
+
+
+class _Session:
+    """一個 WebSocket 連接"""
+
+    def __init__(self, sock: socket.socket, protocol: str):
+        self.sock = sock
+        self.protocol = protocol  # "futures" 或 "spot"
+        self.topics: Set[Tuple[str, Optional[str]]] = set()
+        self.authenticated = False
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def send_frame(self, frame: bytes) -> bool:
+        if self.closed:
+            return False
+        try:
+            with self._lock:
+                self.sock.sendall(frame)
+            return True
+        except OSError:
+            self.closed = True
+            return False
+
+    def close(self) -> None:
+        if not self.closed:
+            self.send_frame(_frame(struct.pack("!H", 1000), _OP_CLOSE))
+        self.closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+# ==================== HTTP 處理 ====================
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "CoinWSimulator/1.0"
+    # 響應頭和響應體分開寫入，不關閉 Nagle 時每個 keep-alive 請求會多等一次延遲 ACK（約 40ms）
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.simulator._dispatch(self, "GET")
+
+    def do_POST(self):
+        self.server.simulator._dispatch(self, "POST")
+
+    def do_PUT(self):
+        self.server.simulator._dispatch(self, "PUT")
+
+    def do_DELETE(self):
+        self.server.simulator._dispatch(self, "DELETE")
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, simulator: "ExchangeSimulator"):
+        self.simulator = simulator
+        super().__init__(address, _Handler)
+
+
+class _Reply(Exception):
+    """在處理過程中直接返回指定的響應"""
+
+    def __init__(self, status: int, payload: Dict[str, Any]):
+        super().__init__(payload.get("msg"))
+        self.status = status
+        self.payload = payload
+
+
+def _future_ok(data: Any = None) -> Dict[str, Any]:
+    return {"code": 0, "data": data, "msg": ""}
+
+
+def _future_error(code: Any, message: str) -> Dict[str, Any]:
+    return {"code": code, "msg": message, "message": message}
+
+
+def _spot_ok(data: Any = None) -> Dict[str, Any]:
+    return {"code": "200", "data": data, "msg": "SUCCESS", "success": True, "failed": False}
+
+
+def _spot_error(code: Any, message: str) -> Dict[str, Any]:
+    return {"code": str(code), "data": None, "msg": message, "success": False, "failed": True}
+
+
+class ExchangeSimulator:
+    """
+    本地交易所模擬器
+
+    用法:
+        with ExchangeSimulator() as sim:
+            client = sim.future_client()
+            client.get_ticker("BTC")
+            ws = CoinWFutureWebSocketClient(ws_url=sim.futures_ws_url)
+    """
+
+    def __init__(self, config: Optional[SimulatorConfig] = None, **kwargs):
+        """
+        Args:
+            config: 模擬器配置
+            **kwargs: 未提供 config 時用於創建 SimulatorConfig 的字段
+        """
+        self.config = config or SimulatorConfig(**kwargs)
+        self._rng = random.Random(self.config.seed)
+        self._fault_rng = random.Random(self.config.seed)
+        self.market = _Market(self.config, self._rng)
+
+        self._server: Optional[_Server] = None
+        self._server_thread: Optional[threading.Thread] = None
+        self._pusher_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        self._sessions: List[_Session] = []
+        self._sessions_lock = threading.Lock()
+
+        # 訂單
+        self._orders_lock = threading.Lock()
+        self._future_orders: Dict[str, Dict[str, Any]] = {}
+        self._spot_orders: Dict[str, Dict[str, Any]] = {}
+        self._future_order_ids = itertools.count(33308740320587027)
+        self._spot_order_ids = itertools.count(4624530513294751114)
+        self._tokens: Set[str] = set()
+
+        # 服務端限頻
+        self._rate_limiter = (
+            RateLimiter(self.config.rate_limit_rules, max_wait=0) if self.config.rate_limit_rules else None
+        )
+
+        # 統計
+        self._stats: Counter = Counter()
+        self._endpoints: Counter = Counter()
+        self._stats_lock = threading.Lock()
+
+        self._future_routes: Dict[Tuple[str, str], Callable] = {
+            ("GET", "/v1/perpum/instruments"): self._future_instruments,
+            ("GET", "/v1/perpumPublic/ticker"): self._future_ticker,
+            ("GET", "/v1/perpumPublic/depth"): self._future_depth,
+            ("GET", "/v1/perpumPublic/trades"): self._future_trades,
+            ("GET", "/v1/perpumPublic/klines"): self._future_klines,
+            ("GET", "/v1/perpum/fundingRate"): self._future_funding_rate,
+            ("GET", "/v1/perpum/ladders"): self._future_ladders,
+            ("POST", "/v1/perpum/order"): self._future_place_order,
+            ("PUT", "/v1/perpum/order"): self._future_modify_order,
+            ("DELETE", "/v1/perpum/order"): self._future_cancel_order,
+            ("GET", "/v1/perpum/order"): self._future_get_orders,
+            ("POST", "/v1/perpum/batchOrders"): self._future_place_batch,
+            ("DELETE", "/v1/perpum/batchOrders"): self._future_cancel_batch,
+            ("GET", "/v1/perpum/orders/open"): self._future_open_orders,
+            ("GET", "/v1/perpum/orders/history"): self._future_order_history,
+            ("GET", "/v1/perpum/orders/archive"): self._future_order_history,
+            ("GET", "/v1/perpum/orders/openQuantity"): self._future_open_quantity,
+            ("GET", "/v1/perpum/account/available"): lambda params: {"value": "10000"},
+            ("GET", "/v1/perpum/account/getUserAssets"): self._future_assets,
+            ("GET", "/v1/perpum/account/fees"): lambda params: {"makerFee": "0.0002", "takerFee": "0.0006"},
+        }
+        # 其他已知接口返回固定的成功響應
+        for method, path in (
+            ("GET", "/v1/perpum/orders/deals"), ("GET", "/v1/perpum/orders/deals/history"),
+            ("GET", "/v1/perpum/orders/trades"), ("GET", "/v1/perpum/positions"),
+            ("GET", "/v1/perpum/positions/history"), ("GET", "/v1/perpum/positions/all"),
+        ):
+            self._future_routes[(method, path)] = lambda params: []
+        for method, path in (
+            ("GET", "/v1/perpum/account/almightyGoldInfo"), ("POST", "/v1/perpum/account/almightyGoldInfo"),
+            ("POST", "/v1/perpum/pieceConvert"), ("GET", "/v1/perpum/positions/type"),
+            ("POST", "/v1/perpum/positions/type"), ("GET", "/v1/perpum/orders/availSize"),
+            ("GET", "/v1/perpum/orders/maxSize"), ("GET", "/v1/perpum/positions/marginRate"),
+            ("GET", "/v1/perpum/positions/leverage"), ("DELETE", "/v1/perpum/positions"),
+            ("DELETE", "/v1/perpum/allpositions"), ("DELETE", "/v1/perpum/batchClose"),
+            ("POST", "/v1/perpum/positions/reverse"), ("POST", "/v1/perpum/positions/margin"),
+            ("POST", "/v1/perpum/TPSL"), ("GET", "/v1/perpum/TPSL"), ("POST", "/v1/perpum/moveTPSL"),
+            ("GET", "/v1/perpum/moveTPSL"), ("POST", "/v1/perpum/addTpsl"), ("POST", "/v1/perpum/updateTpsl"),
+        ):
+            self._future_routes.setdefault((method, path), lambda params: {})
+
+        self._spot_public: Dict[str, Callable] = {
+            "returnTicker": self._spot_ticker,
+            "returnOrderBook": self._spot_order_book,
+            "returnTradeHistory": self._spot_trades,
+            "returnSymbol": self._spot_symbols,
+            "returnCurrencies": self._spot_currencies,
+            "returnChartData": self._spot_klines,
+            "return24hVolume": lambda params: {},
+            "returnServerTime": lambda params: int(time.time() * 1000),
+        }
+        self._spot_private: Dict[str, Callable] = {
+            "doTrade": self._spot_place_order,
+            "cancelOrder": self._spot_cancel_order,
+            "cancelAllOrder": self._spot_cancel_all,
+            "returnOpenOrders": self._spot_open_orders,
+            "returnOrderTrades": self._spot_order_detail,
+            "returnOrderStatus": self._spot_order_detail,
+            "returnUTradeHistory": self._spot_order_history,
+            "getUserTrades": self._spot_order_history,
+            "returnBalances": lambda params: {"USDT": "10000.00000000", "BTC": "1.00000000"},
+            "returnCompleteBalances": lambda params: {
+                "USDT": {"available": "10000.00000000", "onOrders": "0"},
+                "BTC": {"available": "1.00000000", "onOrders": "0"},
+            },
+            "returnDepositAddresses": lambda params: {},
+            "returnDepositsWithdrawals": lambda params: [],
+            "doWithdraw": lambda params: {},
+            "cancelWithdraw": lambda params: {},
+            "spotWealthTransfer": lambda params: {},
+        }
+
+    # ==================== 生命週期 ====================
+
+    def start(self) -> "ExchangeSimulator":
+        """啟動 HTTP/WebSocket 服務和行情推送線程"""
+        if self._server is not None:
+            return self
+        self._stop_event.clear()
+        self._server = _Server((self.config.host, self.config.port), self)
+        self._server_thread = threading.Thread(
+            target=self._server.serve_forever, name="coinw-simulator-http", daemon=True
+        )
+        self._server_thread.start()
+        self._pusher_thread = threading.Thread(target=self._push_loop, name="coinw-simulator-push", daemon=True)
+        self._pusher_thread.start()
+        logger.info("模擬器已啟動: %s", self.base_url)
+        return self
+
+    def stop(self) -> None:
+        """停止服務並關閉所有 WebSocket 連接"""
+        if self._server is None:
+            return
+        self._stop_event.set()
+        self.disconnect_websockets()
+        self._server.shutdown()
+        self._server.server_close()
+        if self._pusher_thread is not None:
+            self._pusher_thread.join(timeout=1)
+        self._server = None
+        logger.info("模擬器已停止")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """(監聽地址, 端口)"""
+        if self._server is None:
+            raise RuntimeError("模擬器尚未啟動")
+        host, port = self._server.server_address[:2]
+        return host, port
+
+    @property
+    def base_url(self) -> str:
+        """REST 基礎URL（用於 ContractHTTPConfig.base_url 和 SpotClient 的 base_url）"""
+        host, port = self.address
+        return f"http://{host}:{port}"
+
+    @property
+    def futures_ws_url(self) -> str:
+        """合約 WebSocket URL"""
+        host, port = self.address
+        return f"ws://{host}:{port}/perpum"
+
+    @property
+    def spot_ws_url(self) -> str:
+        """現貨 WebSocket URL（方法1和方法2共用）"""
+        host, port = self.address
+        return f"ws://{host}:{port}"
+
+    @property
+    def public_token_url(self) -> str:
+        """現貨方法1的公共令牌URL"""
+        return f"{self.base_url}/pusher/public-token"
+
+    def future_client(self, **kwargs):
+        """
+        創建連接到模擬器的 FutureClient
+
+        Args:
+            **kwargs: ContractHTTPConfig 的字段（預設關閉客戶端限頻）
+        """
+        from .future import ContractHTTPConfig, FutureClient
+        kwargs.setdefault("rate_limit", False)
+        config = ContractHTTPConfig(base_url=self.base_url, **kwargs)
+        return FutureClient(self.config.api_key, self.config.secret_key, config=config)
+
+    def spot_client(self, **kwargs):
+        """
+        創建連接到模擬器的 SpotClient
+
+        Args:
+            **kwargs: SpotClient 的其他參數
+        """
+        from .spot import SpotClient
+        return SpotClient(self.config.api_key, self.config.secret_key, base_url=self.base_url, **kwargs)
+
+    # ==================== 統計 ====================
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        服務端統計
+
+        Returns:
+            {'requests', 'injected_errors', 'rate_limited', 'signature_errors', 'auth_errors',
+             'ws_connections', 'ws_messages_in', 'ws_messages_out', 'ws_bytes_out', 'endpoints': {端點: 請求數}}
+        """
+        with self._stats_lock:
+            stats = {name: self._stats[name] for name in (
+                "requests", "injected_errors", "rate_limited", "signature_errors", "auth_errors",
+                "ws_connections", "ws_messages_in", "ws_messages_out", "ws_bytes_out"
+            )}
+            stats["endpoints"] = dict(self._endpoints)
+        with self._sessions_lock:
+            stats["ws_open"] = sum(1 for session in self._sessions if not session.closed)
+        return stats
+
+    def reset_stats(self) -> None:
+        """清空統計"""
+        with self._stats_lock:
+            self._stats.clear()
+            self._endpoints.clear()
+
+    # ==================== REST 分發 ====================
+
+    def _dispatch(self, handler: _Handler, method: str) -> None:
+        split = urlsplit(handler.path)
+        path = split.path.rstrip("/") or "/"
+        query = parse_qsl(split.query, keep_blank_values=True)
+
+        if method == "GET" and handler.headers.get("Upgrade", "").lower() == "websocket":
+            self._serve_websocket(handler, path, dict(query))
+            return
+
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+
+        try:
+            if path.startswith("/v1/perpum"):
+                status, payload = self._handle_future(handler, method, path, query, body)
+            elif path.startswith("/api/v1/"):
+                status, payload = self._handle_spot(handler, method, path, query, body)
+            elif path == "/pusher/public-token":
+                token = uuid.uuid4().hex
+                self._tokens.add(token)
+                status, payload = 200, _spot_ok({"token": token})
+            else:
+                status, payload = 404, {"code": 404, "msg": f"Not Found: {path}"}
+        except _Reply as reply:
+            status, payload = reply.status, reply.payload
+        except Exception as e:
+            logger.exception("模擬器處理請求出錯")
+            status, payload = 500, {"code": 500, "msg": str(e)}
+
+        self._respond(handler, status, payload)
+
+    @staticmethod
+    def _respond(handler: _Handler, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _inject_faults(self, endpoint: str, spot: bool) -> None:
+        """記錄請求並按配置注入延遲、限頻和錯誤"""
+        config = self.config
+        with self._stats_lock:
+            self._stats["requests"] += 1
+            self._endpoints[endpoint] += 1
+
+        delay = config.latency
+        if config.latency_jitter:
+            delay += self._fault_rng.uniform(0, config.latency_jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        limited = config.rate_limit_rate and self._fault_rng.random() < config.rate_limit_rate
+        if not limited and self._rate_limiter is not None:
+            try:
+                self._rate_limiter.acquire(endpoint)
+            except RateLimitError:
+                limited = True
+        if limited:
+            self._count("rate_limited")
+            payload = _spot_error(429, "Too Many Requests") if spot else _future_error(429, "Too Many Requests")
+            raise _Reply(429, payload)
+
+        if config.error_rate and self._fault_rng.random() < config.error_rate:
+            self._count("injected_errors")
+            payload = _spot_error(500, "Internal Server Error") if spot else _future_error(500, "Internal Server Error")
+            raise _Reply(500, payload)
+
+    # ==================== 合約 REST ====================
+
+    def _handle_future(
+        self,
+        handler: _Handler,
+        method: str,
+        path: str,
+        query: List[Tuple[str, str]],
+        body: bytes
+    ) -> Tuple[int, Dict[str, Any]]:
+        self._inject_faults(path, spot=False)
+
+        route = self._future_routes.get((method, path))
+        if route is None:
+            return 404, _future_error(404, f"Not Found: {method} {path}")
+
+        if path not in _FUTURE_PUBLIC_PATHS:
+            self._verify_hmac(handler, method, path, query, body)
+
+        if method == "GET":
+            params: Any = dict(query)
+        else:
+            try:
+                params = json.loads(body) if body else {}
+            except ValueError:
+                return 200, _future_error("INVALID_PARAMETER", "請求體不是有效的JSON")
+
+        return 200, _future_ok(route(params))
+
+    def _verify_hmac(
+        self,
+        handler: _Handler,
+        method: str,
+        path: str,
+        query: List[Tuple[str, str]],
+        body: bytes
+    ) -> None:
+        """
+        校驗合約簽名
+
+        簽名字符串為 timestamp + method + path + (?k=v&... | 請求體)；空參數的請求體發送 "{}" 但以空字符串簽名
+        """
+        headers = handler.headers
+        api_key, sign, timestamp = headers.get("api_key"), headers.get("sign"), headers.get("timestamp")
+        if not api_key or not sign or not timestamp:
+            self._count("auth_errors")
+            raise _Reply(401, _future_error(401, "缺少 api_key/sign/timestamp 請求頭"))
+        if api_key != self.config.api_key:
+            self._count("auth_errors")
+            raise _Reply(401, _future_error(401, "API密鑰無效"))
+
+        skew = self.config.max_clock_skew
+        if skew is not None:
+            try:
+                stale = abs(time.time() - int(timestamp) / 1000) > skew
+            except ValueError:
+                stale = True
+            if stale:
+                self._count("signature_errors")
+                raise _Reply(200, _future_error("SIGNATURE_ERROR", "時間戳超出允許範圍"))
+
+        if not self.config.verify_signatures:
+            return
+
+        message = f"{timestamp}{method}{path}".encode("utf-8")
+        if method == "GET":
+            canonical = "&".join(f"{key}={value}" for key, value in query)
+            if canonical:
+                message += b"?" + canonical.encode("utf-8")
+        elif body.strip() not in (b"", b"{}"):
+            message += body
+
+        digest = hmac.new(self.config.secret_key.encode("utf-8"), message, hashlib.sha256).digest()
+        expected = base64.b64encode(digest).decode("ascii")
+        if not hmac.compare_digest(expected, sign):
+            self._count("signature_errors")
+            raise _Reply(200, _future_error("SIGNATURE_ERROR", "簽名錯誤"))
+
+    def _future_book(self, name: Any) -> _Book:
+        book = self.market.future_book(name)
+        if book is None:
+            raise _Reply(200, _future_error("INVALID_PARAMETER", f"未知的合約: {name}"))
+        return book
+
+    def _future_instruments(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        name = params.get("name")
+        rows = []
+        for index, book in enumerate(self.market.futures.values(), start=1):
+            if name and book.name != str(name).upper():
+                continue
+            rows.append({
+                "id": index,
+                "name": book.name,
+                "base": book.name.lower(),
+                "quote": "usdt",
+                "pricePrecision": book.precision,
+                "oneLotSize": 0.001,
+                "minSize": 1,
+                "maxLeverage": 200,
+                "defaultLeverage": 20,
+                "makerFee": "0.0002",
+                "takerFee": "0.0006",
+                "status": "online",
+            })
+        return rows
+
+    def _future_ticker_row(self, book: _Book) -> Dict[str, Any]:
+        return {
+            "contract_id": 1,
+            "name": f"{book.name}USDT",
+            "base_coin": book.name.lower(),
+            "quote_coin": "usdt",
+            "price_coin": book.name.lower(),
+            "max_leverage": 200,
+            "contract_size": 0.001,
+            "last_price": book.last,
+            "high": book.high,
+            "low": book.low,
+            "rise_fall_rate": float(book.change_rate()),
+            "total_volume": round(book.volume, 4),
+            "fair_price": round((book.best_bid + book.best_ask) / 2, book.precision),
+        }
+
+    def _future_ticker(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with self.market.lock:
+            if params.get("instrument"):
+                return [self._future_ticker_row(self._future_book(params["instrument"]))]
+            return [self._future_ticker_row(book) for book in self.market.futures.values()]
+
+    def _future_depth_data(self, book: _Book) -> Dict[str, Any]:
+        bids, asks = book.levels_desc()
+        return {
+            "asks": [{"p": book.price(index), "m": f"{book.asks[index]:.4f}"} for index in asks],
+            "bids": [{"p": book.price(index), "m": f"{book.bids[index]:.4f}"} for index in bids],
+            "n": book.name.lower(),
+        }
+
+    def _future_depth(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        with self.market.lock:
+            return self._future_depth_data(self._future_book(params.get("base")))
+
+    @staticmethod
+    def _future_fill(trade: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "createdDate": trade["time"],
+            "quantity": trade["quantity"],
+            "piece": max(1, int(trade["quantity"] * 1000)),
+            "price": trade["price"],
+            "id": trade["id"],
+            "direction": "long" if trade["buy"] else "short",
+        }
+
+    def _future_trades(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with self.market.lock:
+            book = self._future_book(params.get("base"))
+            return [self._future_fill(trade) for trade in reversed(book.trades)]
+
+    def _future_klines(self, params: Dict[str, Any]) -> List[List[str]]:
+        """[時間戳, 最高價, 開盤價, 最低價, 收盤價, 交易量]，最新的在前"""
+        book = self._future_book(params.get("currencyCode"))
+        limit = min(int(params.get("limit") or 100), 1500)
+        return [[str(ts), high, open_, low, close, volume] for ts, open_, high, low, close, volume in self._bars(book, 60, limit)]
+
+    def _bars(self, book: _Book, period: int, limit: int) -> List[Tuple[int, str, str, str, str, str]]:
+        """以當前價格為終點生成 limit 根隨機K線，最新的在前"""
+        rng = random.Random(f"{book.name}:{period}")
+        now = int(time.time()) // period * period
+        close = book.last
+        bars = []
+        for index in range(limit):
+            open_ = close * (1 + rng.uniform(-0.002, 0.002))
+            high = max(open_, close) * (1 + rng.uniform(0, 0.001))
+            low = min(open_, close) * (1 - rng.uniform(0, 0.001))
+            bars.append((
+                (now - index * period) * 1000,
+                f"{open_:.{book.precision}f}", f"{high:.{book.precision}f}",
+                f"{low:.{book.precision}f}", f"{close:.{book.precision}f}",
+                f"{rng.uniform(1, 100):.4f}",
+            ))
+            close = open_
+        return bars
+
+    def _future_funding_rate(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        book = self._future_book(params.get("instrument"))
+        return {"value": self.market.funding_rate[book.name]}
+
+    def _future_ladders(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"ladderConfig": [
+            {"name": name, "ladderList": [
+                {"ladder": 1, "maxPiece": 500000, "maxLeverage": 200, "maintenanceMarginRate": "0.004"},
+                {"ladder": 2, "maxPiece": 2000000, "maxLeverage": 100, "maintenanceMarginRate": "0.008"},
+            ]}
+            for name in self.market.futures
+        ]}
+
+    def _new_future_order(self, data: Any) -> Dict[str, Any]:
+        """驗證下單參數並創建訂單，參數無效時拋出 _Reply"""
+        if not isinstance(data, dict):
+            raise _Reply(200, _future_error("INVALID_PARAMETER", "訂單參數必須是對象"))
+        for key in ("instrument", "direction", "leverage", "quantity", "positionType"):
+            if data.get(key) in (None, ""):
+                raise _Reply(200, _future_error("INVALID_PARAMETER", f"缺少參數: {key}"))
+        if data["direction"] not in ("long", "short"):
+            raise _Reply(200, _future_error("INVALID_PARAMETER", f"無效的 direction: {data['direction']}"))
+
+        with self.market.lock:
+            book = self._future_book(data["instrument"])
+            market_price = book.best_ask if data["direction"] == "long" else book.best_bid
+
+        execute = data["positionType"] == "execute"
+        price = market_price if execute or data.get("openPrice") is None else float(data["openPrice"])
+        now = int(time.time() * 1000)
+        order_id = str(next(self._future_order_ids))
+        order = {
+            "id": order_id,
+            "thirdOrderId": data.get("thirdOrderId"),
+            "instrument": book.name,
+            "direction": data["direction"],
+            "leverage": str(data["leverage"]),
+            "quantity": str(data["quantity"]),
+            "quantityUnit": data.get("quantityUnit", 0),
+            "positionModel": data.get("positionModel", 0),
+            "posType": data["positionType"],
+            "originalType": data["positionType"],
+            "orderPrice": f"{price:.{book.precision}f}",
+            "indexPrice": f"{market_price:.{book.precision}f}",
+            "contractType": 1,
+            "source": "api",
+            "liquidateBy": "manual",
+            "makerFee": "0.0002",
+            "takerFee": "0.0006",
+            "fee": "0",
+            "totalPiece": str(data["quantity"]),
+            "currentPiece": str(data["quantity"]),
+            "orderStatus": "finish" if execute else "unFinish",
+            "status": "close" if execute else "open",
+            "userId": "1000001",
+            "createdDate": now,
+            "updatedDate": now,
+        }
+        with self._orders_lock:
+            self._future_orders[order_id] = order
+        self._push_private("futures", "order", book.name, [dict(order)])
+        return order
+
+    def _future_place_order(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"value": self._new_future_order(params)["id"]}
+
+    def _future_place_batch(self, params: Any) -> List[Dict[str, Any]]:
+        if not isinstance(params, list):
+            raise _Reply(200, _future_error("INVALID_PARAMETER", "批量下單參數必須是列表"))
+        results = []
+        for data in params:
+            third_order_id = data.get("thirdOrderId") if isinstance(data, dict) else None
+            try:
+                order = self._new_future_order(data)
+                results.append({"code": 0, "thirdOrderId": third_order_id, "value": order["id"]})
+            except _Reply as reply:
+                results.append({"code": reply.payload["code"], "thirdOrderId": third_order_id, "msg": reply.payload["msg"]})
+        return results
+
+    def _cancel_future_order(self, order_id: Any) -> Optional[Dict[str, Any]]:
+        with self._orders_lock:
+            order = self._future_orders.get(str(order_id))
+            if order is None or order["status"] != "open":
+                return None
+            order["status"] = "cancel"
+            order["orderStatus"] = "cancel"
+            order["updatedDate"] = int(time.time() * 1000)
+            snapshot = dict(order)
+        self._push_private("futures", "order", snapshot["instrument"], [snapshot])
+        return snapshot
+
+    def _future_cancel_order(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        order = self._cancel_future_order(params.get("id"))
+        if order is None:
+            raise _Reply(200, _future_error("ORDER_NOT_FOUND", f"訂單不存在或已完成: {params.get('id')}"))
+        return {"value": order["id"]}
+
+    def _future_cancel_batch(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        results = []
+        for order_id in params.get("sourceIds") or []:
+            if self._cancel_future_order(order_id) is None:
+                results.append({"id": str(order_id), "code": "ORDER_NOT_FOUND", "msg": "訂單不存在或已完成"})
+            else:
+                results.append({"id": str(order_id), "code": 0})
+        return results
+
+    def _future_modify_order(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        with self._orders_lock:
+            order = self._future_orders.get(str(params.get("id")))
+            if order is None or order["status"] != "open":
+                raise _Reply(200, _future_error("ORDER_NOT_FOUND", f"訂單不存在或已完成: {params.get('id')}"))
+            if params.get("openPrice") is not None:
+                order["orderPrice"] = str(params["openPrice"])
+            if params.get("quantity") is not None:
+                order["quantity"] = order["totalPiece"] = order["currentPiece"] = str(params["quantity"])
+            order["updatedDate"] = int(time.time() * 1000)
+            snapshot = dict(order)
+        self._push_private("futures", "order", snapshot["instrument"], [snapshot])
+        return {"value": snapshot["id"]}
+
+    def _select_future_orders(self, params: Dict[str, Any], open_only: Optional[bool]) -> List[Dict[str, Any]]:
+        instrument = str(params.get("instrument") or "").upper()
+        position_type = params.get("positionType")
+        source_ids = set(str(params.get("sourceIds") or "").replace(" ", "").split(",")) - {""}
+        with self._orders_lock:
+            orders = [dict(order) for order in self._future_orders.values()]
+        return [
+            order for order in reversed(orders)
+            if (not instrument or order["instrument"] == instrument)
+            and (not position_type or order["posType"] == position_type)
+            and (not source_ids or order["id"] in source_ids)
+            and (open_only is None or (order["status"] == "open") == open_only)
+        ]
+
+    @staticmethod
+    def _page(rows: List[Dict[str, Any]], params: Dict[str, Any]) -> Dict[str, Any]:
+        page = max(1, int(params.get("page") or 1))
+        size = max(1, int(params.get("pageSize") or 20))
+        return {"rows": rows[(page - 1) * size:page * size], "total": len(rows), "current": page, "size": size}
+
+    def _future_get_orders(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return self._select_future_orders(params, None)
+
+    def _future_open_orders(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self._page(self._select_future_orders(params, True), params)
+
+    def _future_order_history(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self._page(self._select_future_orders(params, False), params)
+
+    def _future_open_quantity(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"value": len(self._select_future_orders({}, True))}
+
+    def _future_assets(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "availableMargin": 10000, "available": 10000, "freeze": 0, "margin": 0,
+            "profitUnreal": 0, "almightyGold": 0, "currency": "usdt", "userId": 1000001,
+        }
+
+    # ==================== 現貨 REST ====================
+
+    def _handle_spot(
+        self,
+        handler: _Handler,
+        method: str,
+        path: str,
+        query: List[Tuple[str, str]],
+        body: bytes
+    ) -> Tuple[int, Dict[str, Any]]:
+        params = dict(query)
+        if body:
+            content_type = handler.headers.get("Content-Type", "")
+            try:
+                if "json" in content_type:
+                    params.update(json.loads(body))
+                else:
+                    params.update(parse_qsl(body.decode("utf-8"), keep_blank_values=True))
+            except ValueError:
+                return 200, _spot_error(400, "無效的請求體")
+
+        command = params.get("command")
+        self._inject_faults(f"{path}?command={command}" if command else path, spot=True)
+
+        if path == "/api/v1/public":
+            route = self._spot_public.get(command)
+        elif path == "/api/v1/private":
+            route = self._spot_private.get(command)
+            if route is not None:
+                self._verify_md5(params)
+        else:
+            return 404, _spot_error(404, f"Not Found: {path}")
+
+        if route is None:
+            return 200, _spot_error(404, f"未知的 command: {command}")
+        params.pop("sign", None)
+        return 200, _spot_ok(route(params))
+
+    def _verify_md5(self, params: Dict[str, Any]) -> None:
+        """
+        校驗現貨簽名
+
+        簽名字符串為按鍵排序的 key=value&...（包含 api_key，未隨請求發送時使用配置的密鑰）+ secret_key=密鑰
+        """
+        if params.get("api_key", self.config.api_key) != self.config.api_key:
+            self._count("auth_errors")
+            raise _Reply(200, _spot_error(401, "API密鑰無效"))
+        if not self.config.verify_signatures:
+            return
+
+        signed = {key: value for key, value in params.items() if key != "sign"}
+        signed.setdefault("api_key", self.config.api_key)
+        text = "".join(f"{key}={value}&" for key, value in sorted(signed.items()))
+        expected = hashlib.md5(f"{text}secret_key={self.config.secret_key}".encode("utf-8")).hexdigest().upper()
+        if not hmac.compare_digest(expected, str(params.get("sign", ""))):
+            self._count("signature_errors")
+            raise _Reply(200, _spot_error(401, "簽名錯誤"))
+
+    def _spot_book(self, symbol: Any) -> _Book:
+        book = self.market.spot_book(symbol)
+        if book is None:
+            raise _Reply(200, _spot_error(400, f"未知的交易對: {symbol}"))
+        return book
+
+    def _spot_ticker_row(self, book: _Book) -> Dict[str, Any]:
+        return {
+            "percentChange": f"{float(book.change_rate()):.4f}",
+            "high24hr": str(book.high),
+            "last": str(book.last),
+            "highestBid": f"{book.best_bid:.4f}",
+            "id": int(self.market.spot_ids[book.name]),
+            "isFrozen": 0,
+            "baseVolume": f"{book.volume * book.last:.2f}",
+            "lowestAsk": f"{book.best_ask:.4f}",
+            "low24hr": str(book.low),
+        }
+
+    def _spot_ticker(self, params: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        with self.market.lock:
+            books = [self._spot_book(params["symbol"])] if params.get("symbol") else self.market.spot.values()
+            return {book.name: self._spot_ticker_row(book) for book in books}
+
+    def _spot_order_book(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        size = int(params.get("size") or 20)
+        with self.market.lock:
+            book = self._spot_book(params.get("symbol"))
+            bids, asks = book.levels_desc()
+            return {
+                "asks": [[book.price(index), f"{book.asks[index]:.4f}"] for index in asks[:size]],
+                "bids": [[book.price(index), f"{book.bids[index]:.4f}"] for index in bids[:size]],
+            }
+
+    def _spot_trades(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with self.market.lock:
+            book = self._spot_book(params.get("symbol"))
+            return [{
+                "id": trade["id"],
+                "type": "BUY" if trade["buy"] else "SELL",
+                "price": str(trade["price"]),
+                "amount": f"{trade['quantity']:.4f}",
+                "total": f"{trade['price'] * trade['quantity']:.6f}",
+                "time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(trade["time"] / 1000)),
+            } for trade in reversed(book.trades)]
+
+    def _spot_symbols(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        rows = []
+        for book in self.market.spot.values():
+            base, quote = book.name.split("_", 1)
+            rows.append({
+                "currencyBase": base,
+                "currencyQuote": quote,
+                "currencyPair": book.name,
+                "pricePrecision": book.precision,
+                "countPrecision": 4,
+                "minBuyCount": "0.0001",
+                "maxBuyCount": "9999999",
+                "minBuyPrice": "0.001",
+                "maxBuyPrice": "99999999",
+                "minBuyAmount": "5",
+                "maxBuyAmount": "99999999",
+                "state": 1,
+            })
+        return rows
+
+    def _spot_currencies(self, params: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        currencies = {}
+        for book in self.market.spot.values():
+            for symbol in book.name.split("_", 1):
+                currencies.setdefault(symbol, {
+                    "symbolId": str(len(currencies) + 1),
+                    "symbol": symbol,
+                    "withDraw": "1",
+                    "recharge": "1",
+                    "maxQty": "1000000",
+                    "minQty": "0.001",
+                    "txFee": "0.0",
+                    "chain": symbol,
+                })
+        return currencies
+
+    def _spot_klines(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        book = self._spot_book(params.get("currencyPair"))
+        period = int(params.get("period") or 60)
+        return [
+            {"date": ts, "open": open_, "high": high, "low": low, "close": close, "volume": volume}
+            for ts, open_, high, low, close, volume in self._bars(book, period, 100)
+        ]
+
+    def _spot_place_order(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        book = self._spot_book(params.get("symbol"))
+        side = "buy" if str(params.get("type")) == "0" else "sell"
+        market_order = str(params.get("isMarket")).lower() == "true"
+        with self.market.lock:
+            market_price = book.best_ask if side == "buy" else book.best_bid
+        price = market_price if market_order or not params.get("rate") else float(params["rate"])
+        amount = params.get("amount") or f"{float(params.get('funds') or 0) / price:.4f}"
+        now = int(time.time() * 1000)
+        order_id = str(next(self._spot_order_ids))
+        order = {
+            "orderNumber": order_id,
+            "currencyPair": book.name,
+            "date": now,
+            "type": side,
+            "prize": f"{price:.{book.precision}f}",
+            "total": str(amount),
+            "startingAmount": f"{price * float(amount):.2f}",
+            "success_count": str(amount) if market_order else "0.0000",
+            "success_amount": f"{price * float(amount):.2f}" if market_order else "0.00",
+            "status": 3 if market_order else 1,
+            "out_trade_no": params.get("out_trade_no"),
+            "order_type": "MARKET" if market_order else "LIMIT",
+        }
+        with self._orders_lock:
+            self._spot_orders[order_id] = order
+        self._push_private("spot", "order", None, self._spot_order_push(order, "DONE" if market_order else "RECEIVED"))
+        return {"orderNumber": int(order_id)}
+
+    def _spot_order_push(self, order: Dict[str, Any], event: str) -> Dict[str, Any]:
+        filled = order["status"] == 3
+        return {
+            "side": order["type"].upper(),
+            "fee": "0",
+            "dealFunds": order["success_amount"],
+            "type": event,
+            "client_id": order["out_trade_no"] or "",
+            "remaining_size": "0" if order["status"] != 1 else order["total"],
+            "size": order["total"],
+            "price": order["prize"],
+            "product_id": order["currencyPair"].replace("_", "-"),
+            "time": int(time.time() * 1000),
+            "order_id": int(order["orderNumber"]),
+            "order_type": order["order_type"],
+            **({"reason": "Filled" if filled else "Cancelled"} if event == "DONE" else {}),
+        }
+
+    def _cancel_spot_order(self, order_id: Any) -> Optional[Dict[str, Any]]:
+        with self._orders_lock:
+            order = self._spot_orders.get(str(order_id))
+            if order is None or order["status"] != 1:
+                return None
+            order["status"] = 4
+            snapshot = dict(order)
+        self._push_private("spot", "order", None, self._spot_order_push(snapshot, "DONE"))
+        return snapshot
+
+    def _spot_cancel_order(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        order = self._cancel_spot_order(params.get("orderNumber"))
+        if order is None:
+            raise _Reply(200, _spot_error(400, f"訂單不存在或已完成: {params.get('orderNumber')}"))
+        return {"clientOrderId": int(order["orderNumber"])}
+
+    def _spot_cancel_all(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        with self._orders_lock:
+            open_ids = [order_id for order_id, order in self._spot_orders.items() if order["status"] == 1]
+        for order_id in open_ids:
+            self._cancel_spot_order(order_id)
+        return {}
+
+    def _select_spot_orders(self, params: Dict[str, Any], open_only: Optional[bool]) -> List[Dict[str, Any]]:
+        pair = str(params.get("currencyPair") or "").upper().replace("-", "_")
+        with self._orders_lock:
+            orders = [dict(order) for order in self._spot_orders.values()]
+        return [
+            order for order in reversed(orders)
+            if (not pair or order["currencyPair"] == pair)
+            and (open_only is None or (order["status"] == 1) == open_only)
+        ]
+
+    def _spot_open_orders(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return self._select_spot_orders(params, True)
+
+    def _spot_order_history(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return self._select_spot_orders(params, False)
+
+    def _spot_order_detail(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        with self._orders_lock:
+            order = self._spot_orders.get(str(params.get("orderNumber")))
+        if order is None:
+            raise _Reply(200, _spot_error(400, f"訂單不存在: {params.get('orderNumber')}"))
+        return {"tradeID": int(order["orderNumber"]), **order}
+
+    # ==================== WebSocket ====================
+
+    def _serve_websocket(self, handler: _Handler, path: str, query: Dict[str, str]) -> None:
+        key = handler.headers.get("Sec-WebSocket-Key")
+        if not key:
+            self._respond(handler, 400, {"code": 400, "msg": "缺少 Sec-WebSocket-Key"})
+            return
+        if path not in ("/", "/perpum"):
+            self._respond(handler, 404, {"code": 404, "msg": f"Not Found: {path}"})
+            return
+
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode("ascii")).digest()).decode("ascii")
+        handler.send_response(101, "Switching Protocols")
+        handler.send_header("Upgrade", "websocket")
+        handler.send_header("Connection", "Upgrade")
+        handler.send_header("Sec-WebSocket-Accept", accept)
+        handler.end_headers()
+        handler.wfile.flush()
+        handler.close_connection = True
+
+        session = _Session(handler.connection, "futures" if path == "/perpum" else "spot")
+        with self._sessions_lock:
+            self._sessions.append(session)
+        self._count("ws_connections")
+
+        fragments: List[bytes] = []
+        try:
+            while not session.closed and not self._stop_event.is_set():
+                fin, opcode, payload = _read_frame(handler.rfile)
+                if opcode == _OP_CLOSE:
+                    session.send_frame(_frame(payload[:2], _OP_CLOSE))
+                    break
+                if opcode == _OP_PING:
+                    session.send_frame(_frame(payload, _OP_PONG))
+                    continue
+                if opcode == _OP_PONG:
+                    continue
+                fragments.append(payload)
+                if not fin:
+                    continue
+                text, fragments = b"".join(fragments).decode("utf-8"), []
+                self._count("ws_messages_in")
+                self._on_ws_message(session, text)
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            session.closed = True
+            with self._sessions_lock:
+                if session in self._sessions:
+                    self._sessions.remove(session)
+
+    def disconnect_websockets(self) -> int:
+        """
+        斷開所有 WebSocket 連接（用於測試客戶端重連）
+
+        Returns:
+            斷開的連接數
+        """
+        with self._sessions_lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            session.close()
+        return len(sessions)
+
+    def _send_json(self, session: _Session, message: Dict[str, Any]) -> None:
+        frame = _frame(json.dumps(message, separators=(",", ":")).encode("utf-8"))
+        if session.send_frame(frame):
+            self._count("ws_messages_out")
+            self._count("ws_bytes_out", len(frame))
+
+    def _on_ws_message(self, session: _Session, text: str) -> None:
+        try:
+            message = json.loads(text)
+        except ValueError:
+            self._send_json(session, {"event": "error", "msg": "無效的JSON"})
+            return
+        if not isinstance(message, dict):
+            return
+
+        event = message.get("event")
+        params = message.get("params") or {}
+        if event == "login":
+            session.authenticated = (
+                params.get("api_key") == self.config.api_key and params.get("passphrase") == self.config.secret_key
+            )
+            if session.protocol == "futures":
+                self._send_json(session, {"event": "login", "success": session.authenticated})
+            else:
+                self._send_json(session, {"channel": "login", "data": {"result": session.authenticated}})
+        elif event in ("sub", "unsub"):
+            self._on_subscribe(session, event == "sub", params)
+        elif event in ("subscribe", "unsubscribe") and session.protocol == "spot":
+            # 現貨方法1: {"event": "subscribe", "args": ["spot/market-api-ticker:BTC-USDT", ...]}
+            args = message.get("args") or []
+            for channel in [args] if isinstance(args, str) else args:
+                topic = ("channel", channel)
+                if event == "subscribe":
+                    session.topics.add(topic)
+                else:
+                    session.topics.discard(topic)
+        else:
+            self._send_json(session, {"event": "error", "msg": f"未知的事件: {event}"})
+
+    def _on_subscribe(self, session: _Session, subscribe: bool, params: Dict[str, Any]) -> None:
+        message_type = params.get("type")
+        pair_code = params.get("pairCode")
+        private = _FUTURE_PRIVATE_TYPES if session.protocol == "futures" else _SPOT_PRIVATE_TYPES
+        ack: Dict[str, Any] = {"biz": params.get("biz")}
+        if pair_code is not None:
+            ack["pairCode"] = pair_code
+
+        if subscribe and message_type in private and not session.authenticated:
+            self._send_json(session, {**ack, "data": {"result": False}, "channel": "subscribe",
+                                      "type": message_type, "msg": "未登錄"})
+            return
+
+        topic = (message_type, self._topic_pair(session.protocol, pair_code))
+        if subscribe:
+            session.topics.add(topic)
+        else:
+            session.topics.discard(topic)
+        if "interval" in params:
+            ack["interval"] = params["interval"]
+        self._send_json(session, {**ack, "data": {"result": True},
+                                  "channel": "subscribe" if subscribe else "unsubscribe", "type": message_type})
+
+        # 訂閱深度快照（合約 depth 即為快照）時立即推送一次，客戶端可據此初始化本地訂單簿
+        snapshot_type = "depth" if session.protocol == "futures" else "depth_snapshot"
+        if subscribe and message_type == snapshot_type and topic[1] is not None:
+            with self.market.lock:
+                if session.protocol == "futures":
+                    message = self._future_message(topic)
+                else:
+                    message = self._spot_message(topic, {}, {})
+            if message is not None:
+                self._send_json(session, message)
+
+    def _topic_pair(self, protocol: str, pair_code: Any) -> Optional[str]:
+        if pair_code is None:
+            return None
+        if protocol == "futures":
+            return str(pair_code).upper()
+        # 現貨方法2使用數字 pairCode，也接受交易對名稱
+        book = self.market.spot_book(pair_code)
+        return self.market.spot_ids[book.name] if book is not None else str(pair_code)
+
+    # ==================== 推送 ====================
+
+    def _push_private(self, protocol: str, message_type: str, pair_code: Optional[str], data: Any) -> None:
+        """向已登錄並訂閱了該類型的連接推送私有消息"""
+        if protocol == "futures":
+            message = {"biz": "futures", "pairCode": pair_code, "data": data, "type": message_type}
+        else:
+            message = {"biz": "exchange", "data": data, "type": message_type}
+        frame = None
+        with self._sessions_lock:
+            sessions = [
+                session for session in self._sessions
+                if session.protocol == protocol and session.authenticated and (message_type, None) in session.topics
+            ]
+        for session in sessions:
+            if frame is None:
+                frame = _frame(json.dumps(message, separators=(",", ":")).encode("utf-8"))
+            if session.send_frame(frame):
+                self._count("ws_messages_out")
+                self._count("ws_bytes_out", len(frame))
+
+    def _push_loop(self) -> None:
+        while not self._stop_event.wait(self.config.push_interval):
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"模擬器推送出錯: {e}")
+
+    def tick(self) -> int:
+        """
+        推進一步行情並向訂閱者推送（推送線程按 push_interval 自動調用，也可手動調用）
+
+        Returns:
+            本次發送的消息數
+        """
+        with self._sessions_lock:
+            sessions = [session for session in self._sessions if not session.closed]
+
+        with self.market.lock:
+            future_changes = {name: book.step() for name, book in self.market.futures.items()}
+            spot_changes = {symbol: book.step() for symbol, book in self.market.spot.items()}
+
+            # 每個主題的消息只構建一次
+            frames: Dict[Tuple[str, Tuple[str, Optional[str]]], Optional[bytes]] = {}
+            for session in sessions:
+                for topic in list(session.topics):
+                    key = (session.protocol, topic)
+                    if key in frames:
+                        continue
+                    if topic[0] in _FUTURE_PRIVATE_TYPES or (session.protocol == "spot" and topic[0] in _SPOT_PRIVATE_TYPES):
+                        frames[key] = None
+                        continue
+                    if session.protocol == "futures":
+                        message = self._future_message(topic, future_changes)
+                    else:
+                        message = self._spot_message(topic, spot_changes, future_changes)
+                    frames[key] = (
+                        _frame(json.dumps(message, separators=(",", ":")).encode("utf-8")) if message else None
+                    )
+
+        sent = 0
+        sent_bytes = 0
+        for session in sessions:
+            for topic in list(session.topics):
+                frame = frames.get((session.protocol, topic))
+                if frame is not None and session.send_frame(frame):
+                    sent += 1
+                    sent_bytes += len(frame)
+        if sent:
+            self._count("ws_messages_out", sent)
+            self._count("ws_bytes_out", sent_bytes)
+        return sent
+
+    def _future_message(
+        self,
+        topic: Tuple[str, Optional[str]],
+        changes: Optional[Dict[str, tuple]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """構建合約行情推送（需持有 market.lock）"""
+        message_type, pair_code = topic
+        book = self.market.future_book(pair_code)
+        if book is None:
+            return None
+        name = book.name.lower()
+
+        if message_type == "ticker_swap":
+            data: Any = {
+                "high": str(book.high), "low": str(book.low), "open": str(book.open), "last": str(book.last),
+                "vol": f"{book.volume:.3f}", "volUsdt": f"{book.volume * book.last:.2f}",
+                "changeRate": book.change_rate(), "currencyCode": name,
+            }
+        elif message_type == "depth":
+            data = self._future_depth_data(book)
+        elif message_type == "fills":
+            trades = changes[book.name][2] if changes else []
+            if not trades:
+                return None
+            data = [self._future_fill(trade) for trade in trades]
+        elif message_type in ("index_price", "mark_price"):
+            data = {"p": round((book.best_bid + book.best_ask) / 2, book.precision), "n": name}
+        elif message_type == "funding_rate":
+            next_settle = (int(time.time()) // 28800 + 1) * 28800 * 1000
+            data = {"r": self.market.funding_rate[book.name], "nt": next_settle, "n": name}
+        else:
+            return None
+        return {"biz": "futures", "pairCode": pair_code, "data": data, "type": message_type}
+
+    def _spot_message(
+        self,
+        topic: Tuple[str, Optional[str]],
+        changes: Dict[str, tuple],
+        future_changes: Dict[str, tuple]
+    ) -> Optional[Dict[str, Any]]:
+        """構建現貨行情推送（需持有 market.lock）；data 與真實接口一樣是 JSON 字符串"""
+        message_type, pair_code = topic
+
+        if message_type == "channel":
+            # 方法1: "spot/level2_20:BTC-USDT" -> {'channel', 'subject', 'data'}
+            subject, _, symbol = str(pair_code).partition(":")
+            mapped = _SPOT_SUBJECTS.get(subject)
+            book = self.market.spot_book(symbol)
+            if mapped is None or book is None:
+                return None
+            data = self._spot_data(mapped, book, changes)
+            if data is None:
+                return None
+            return {"channel": pair_code, "subject": subject, "data": json.dumps(data, separators=(",", ":"))}
+
+        if message_type == "ticker_all":
+            rows = []
+            for symbol, book in self.market.spot.items():
+                base, quote = symbol.split("_", 1)
+                rows.append({
+                    "tmId": int(self.market.spot_ids[symbol]), "leftCoinName": base, "rightCoinName": quote,
+                    "price": str(book.last), "rose": f"{float(book.change_rate()):.4f}",
+                    "oneDayHighest": str(book.high), "oneDayLowest": str(book.low),
+                    "oneDayTotal": f"{book.volume:.10f}", "currencyVol": f"{book.volume * book.last:.4f}",
+                })
+            return {"biz": "exchange", "data": json.dumps(rows, separators=(",", ":")), "type": "ticker_all"}
+
+        book = self.market.spot_book(pair_code)
+        if book is None:
+            return None
+        data = self._spot_data(message_type, book, changes)
+        if data is None:
+            return None
+        return {"biz": "exchange", "pairCode": pair_code, "data": json.dumps(data, separators=(",", ":")),
+                "type": message_type}
+
+    def _spot_data(self, message_type: str, book: _Book, changes: Dict[str, tuple]) -> Any:
+        pair_code = self.market.spot_ids[book.name]
+        if message_type == "ticker":
+            return {
+                "changePrice": f"{book.last - book.open:.{book.precision}f}", "changeRate": book.change_rate(),
+                "high": str(book.high), "low": str(book.low), "open": str(book.open), "last": str(book.last),
+                "buy": f"{book.best_bid:.{book.precision}f}", "sell": f"{book.best_ask:.{book.precision}f}",
+                "symbol": pair_code, "vol": f"{book.volume:.4f}", "volValue": f"{book.volume * book.last:.2f}",
+            }
+        if message_type == "depth_snapshot":
+            bids, asks = book.levels_desc()
+            return {
+                "asks": [[book.price(index), f"{book.asks[index]:.4f}"] for index in asks],
+                "bids": [[book.price(index), f"{book.bids[index]:.4f}"] for index in bids],
+                "time": int(time.time() * 1000),
+                "seq": book.sequence,
+            }
+        if message_type == "depth":
+            bid_changes, ask_changes, _ = changes.get(book.name, ((), (), ()))
+            if not bid_changes and not ask_changes:
+                return None
+            sequences = [int(level[2]) for level in (*bid_changes, *ask_changes)]
+            return {"startSeq": min(sequences), "endSeq": max(sequences), "asks": ask_changes, "bids": bid_changes}
+        if message_type == "fills":
+            trades = changes.get(book.name, ((), (), ()))[2]
+            if not trades:
+                return None
+            return [{
+                "price": f"{trade['price']:.{book.precision}f}", "seq": str(trade["id"]),
+                "side": "BUY" if trade["buy"] else "SELL", "size": f"{trade['quantity']:.4f}",
+                "symbol": pair_code, "time": str(trade["time"]),
+            } for trade in trades]
+        return None
+
+    def __repr__(self):
+        state = self.base_url if self._server is not None else "stopped"
+        return f"ExchangeSimulator({state})"
@@ -0,0 +1,293 @@
+"""
+CoinW 期貨多品種行情快照
+
+並行獲取多個合約的 ticker、深度、資金費率和最新成交，合併為一張列式表：
+{'instrument': [...], 'last_price': ..., 'bid': ..., ..., 'errors': [...]}
+數值列在安裝 numpy 時為 numpy.ndarray，否則為 array.array，缺失值為 NaN；
+單個品種的請求失敗只記錄在該行的 errors 中，不影響其他品種
+"""
+
+import asyncio
+import logging
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy 為可選依賴
+    np = None
+
+from .exceptions import CoinWAPIError, InvalidParameterError
+
+logger = logging.getLogger(__name__)
+
+TICKER = "ticker"
+DEPTH = "depth"
+FUNDING_RATE = "funding_rate"
+TRADES = "trades"
+
+SNAPSHOT_FIELDS = (TICKER, DEPTH, FUNDING_RATE, TRADES)
+
+# 每類數據對應的列
+FIELD_COLUMNS = {
+    TICKER: ("last_price", "high", "low", "rise_fall_rate", "total_volume", "fair_price"),
+    DEPTH: ("bid", "bid_size", "ask", "ask_size"),
+    FUNDING_RATE: ("funding_rate",),
+    TRADES: ("trade_price", "trade_quantity", "trade_time"),
+}
+
+_NAN = float("nan")
+
+Row = Dict[str, float]
+
+
+def _float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return _NAN
+
+
+def _data(response: Any) -> Any:
+    """提取響應的 data 字段；code 非 0 時拋出異常"""
+    if not isinstance(response, dict):
+        raise CoinWAPIError(f"無效的響應: {response!r}")
+    if response.get("code") not in (None, 0, "0"):
+        raise CoinWAPIError(f"[{response.get('code')}] {response.get('msg')}", response=response)
+    return response.get("data")
+
+
+def ticker_key(row: Dict[str, Any]) -> str:
+    """ticker 數據對應的合約基礎貨幣（大寫），如 "BTC" """
+    base = row.get("base_coin") or row.get("base") or row.get("name") or ""
+    return str(base).upper()
+
+
+def index_tickers(response: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    將 get_tickers 的響應按合約基礎貨幣索引
+
+    Returns:
+        {"BTC": ticker, ...}
+    """
+    data = _data(response) or []
+    rows = data if isinstance(data, list) else [data]
+    return {ticker_key(row): row for row in rows if isinstance(row, dict)}
+
+
+def parse_ticker(row: Dict[str, Any]) -> Row:
+    """解析 ticker 數據"""
+    return {column: _float(row.get(column)) for column in FIELD_COLUMNS[TICKER]}
+
+
+def parse_depth(response: Dict[str, Any]) -> Row:
+    """解析 get_orderbook 的響應為最優買賣價及數量"""
+    data = _data(response) or {}
+    bids = [(_float(level.get("p")), _float(level.get("m"))) for level in data.get("bids") or ()]
+    asks = [(_float(level.get("p")), _float(level.get("m"))) for level in data.get("asks") or ()]
+    bid = max(bids) if bids else (_NAN, _NAN)
+    ask = min(asks) if asks else (_NAN, _NAN)
+    return {"bid": bid[0], "bid_size": bid[1], "ask": ask[0], "ask_size": ask[1]}
+
+
+def parse_funding_rate(response: Dict[str, Any]) -> Row:
+    """解析 get_last_funding_rate 的響應"""
+    data = _data(response)
+    if isinstance(data, dict):
+        data = data.get("value", data.get("fundingRate"))
+    return {"funding_rate": _float(data)}
+
+
+def parse_trades(response: Dict[str, Any]) -> Row:
+    """解析 get_trades 的響應為最新一筆成交"""
+    trades = [trade for trade in _data(response) or () if isinstance(trade, dict)]
+    if not trades:
+        return {column: _NAN for column in FIELD_COLUMNS[TRADES]}
+    latest = max(trades, key=lambda trade: _float(trade.get("createdDate")))
+    return {
+        "trade_price": _float(latest.get("price")),
+        "trade_quantity": _float(latest.get("quantity")),
+        "trade_time": _float(latest.get("createdDate")),
+    }
+
+
+def _validate(instruments: Sequence[str], fields: Sequence[str]) -> Tuple[List[str], Tuple[str, ...]]:
+    unknown = [field for field in fields if field not in FIELD_COLUMNS]
+    if unknown:
+        raise InvalidParameterError(f"無效的快照字段: {', '.join(unknown)}（可選: {', '.join(SNAPSHOT_FIELDS)}）")
+    # 去重並保持順序
+    names = list(dict.fromkeys(str(name).upper() for name in instruments))
+    return names, tuple(dict.fromkeys(fields))
+
+
+def _requests(market, instruments: List[str], fields: Tuple[str, ...]) -> List[Tuple[str, str, Callable[[], Any], Callable]]:
+    """每個品種需要單獨請求的 (品種, 字段, 請求函數, 解析函數)"""
+    endpoints = {
+        DEPTH: (market.get_orderbook, parse_depth),
+        FUNDING_RATE: (market.get_last_funding_rate, parse_funding_rate),
+        TRADES: (market.get_trades, parse_trades),
+    }
+    requests = []
+    for field in fields:
+        if field == TICKER:
+            continue
+        method, parser = endpoints[field]
+        for name in instruments:
+            requests.append((name, field, lambda method=method, name=name: method(name), parser))
+    return requests
+
+
+def build_table(
+    instruments: List[str],
+    fields: Tuple[str, ...],
+    rows: Dict[str, Row],
+    errors: Dict[str, Dict[str, str]]
+) -> Dict[str, Any]:
+    """
+    將各品種的解析結果合併為列式表
+
+    Args:
+        instruments: 品種列表（表的行順序）
+        fields: 已請求的數據類型
+        rows: {品種: {列名: 數值}}
+        errors: {品種: {數據類型: 錯誤信息}}
+
+    Returns:
+        {'instrument': 品種列表, 列名: 數值數組, ..., 'errors': 每行的錯誤字典或 None}
+    """
+    table: Dict[str, Any] = {"instrument": list(instruments)}
+    for field in fields:
+        for column in FIELD_COLUMNS[field]:
+            values = (rows.get(name, {}).get(column, _NAN) for name in instruments)
+            if np is not None:
+                table[column] = np.fromiter(values, dtype=np.float64, count=len(instruments))
+            else:
+                table[column] = array("d", values)
+    table["errors"] = [errors.get(name) or None for name in instruments]
+    return table
+
+
+def _apply_tickers(
+    response: Any,
+    error: Optional[Exception],
+    instruments: List[str],
+    rows: Dict[str, Row],
+    errors: Dict[str, Dict[str, str]]
+) -> None:
+    """將一次批量 ticker 請求的結果分配到各品種"""
+    tickers = {}
+    if error is None:
+        try:
+            tickers = index_tickers(response)
+        except Exception as e:
+            error = e
+
+    for name in instruments:
+        ticker = tickers.get(name)
+        if ticker is not None:
+            rows.setdefault(name, {}).update(parse_ticker(ticker))
+        else:
+            errors.setdefault(name, {})[TICKER] = str(error) if error is not None else "ticker 數據中沒有該品種"
+
+
+def fetch_snapshot(
+    market,
+    instruments: Sequence[str],
+    fields: Sequence[str] = SNAPSHOT_FIELDS,
+    max_workers: int = 16
+) -> Dict[str, Any]:
+    """
+    並行獲取多個合約的行情快照
+
+    ticker 通過一次 get_tickers 批量獲取，深度、資金費率和成交按品種並行請求；
+    實際吞吐量同時受 HTTP 管理器的限頻器和連接池大小限制
+
+    Args:
+        market: FutureMarket 或 FutureClient
+        instruments: 合約基礎貨幣列表，如 ["BTC", "ETH"]
+        fields: 需要的數據: "ticker"、"depth"、"funding_rate"、"trades"
+        max_workers: 最大並行請求數
+
+    Returns:
+        列式表，見 build_table
+    """
+    if max_workers < 1:
+        raise InvalidParameterError("max_workers 必須大於 0")
+    names, fields = _validate(instruments, fields)
+    rows: Dict[str, Row] = {}
+    errors: Dict[str, Dict[str, str]] = {}
+
+    def run(request):
+        name, field, call, parser = request
+        try:
+            return name, field, parser(call()), None
+        except Exception as e:
+            return name, field, None, e
+
+    requests = _requests(market, names, fields)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        ticker_future = executor.submit(market.get_tickers) if TICKER in fields else None
+        results = list(executor.map(run, requests))
+
+        if ticker_future is not None:
+            error = ticker_future.exception()
+            _apply_tickers(None if error else ticker_future.result(), error, names, rows, errors)
+
+    for name, field, values, error in results:
+        if error is not None:
+            errors.setdefault(name, {})[field] = str(error)
+        else:
+            rows.setdefault(name, {}).update(values)
+
+    if errors:
+        logger.warning(f"行情快照中 {len(errors)}/{len(names)} 個品種的請求失敗")
+    return build_table(names, fields, rows, errors)
+
+
+async def fetch_snapshot_async(
+    market,
+    instruments: Sequence[str],
+    fields: Sequence[str] = SNAPSHOT_FIELDS,
+    max_concurrency: int = 16
+) -> Dict[str, Any]:
+    """
+    並發獲取多個合約的行情快照（異步），參數及返回值同 fetch_snapshot
+
+    Args:
+        market: AsyncFutureMarket 或 AsyncFutureClient
+        max_concurrency: 最大並發請求數
+    """
+    if max_concurrency < 1:
+        raise InvalidParameterError("max_concurrency 必須大於 0")
+    names, fields = _validate(instruments, fields)
+    rows: Dict[str, Row] = {}
+    errors: Dict[str, Dict[str, str]] = {}
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(call):
+        async with semaphore:
+            return await call()
+
+    requests = _requests(market, names, fields)
+    calls = [run(call) for _, _, call, _ in requests]
+    if TICKER in fields:
+        calls.append(run(market.get_tickers))
+    results = await asyncio.gather(*calls, return_exceptions=True)
+
+    if TICKER in fields:
+        response = results.pop()
+        error = response if isinstance(response, Exception) else None
+        _apply_tickers(None if error else response, error, names, rows, errors)
+
+    for (name, field, _, parser), response in zip(requests, results):
+        try:
+            if isinstance(response, Exception):
+                raise response
+            rows.setdefault(name, {}).update(parser(response))
+        except Exception as e:
+            errors.setdefault(name, {})[field] = str(e)
+
+    if errors:
+        logger.warning(f"行情快照中 {len(errors)}/{len(names)} 個品種的請求失敗")
+    return build_table(names, fields, rows, errors)
@@ -9,6 +9,7 @@ from .market import SpotMarket
 from .order import SpotOrder
 from .account import SpotAccount
 from .client import SpotClient
+from .orderbook import SpotOrderBookBuilder
 from .ws_client import CoinWSpotWebSocketClient, SpotWebSocketClient, SpotWebsocketPublic, SpotWebsocketPrivate
 from .http_manager import SpotHTTPManager, SpotRestfulPublic, SpotRestfulPrivate
 
@@ -25,6 +26,7 @@ __all__ = [
     # WebSocket 客戶端
     'CoinWSpotWebSocketClient',  # 完整實現
     'SpotWebSocketClient',       # 向後兼容別名
+    'SpotOrderBookBuilder',      # 增量訂單簿
     
     # 簡單函數接口
     'SpotRestfulPublic',         # REST 公共接口函數
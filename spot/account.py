@@ -8,6 +8,7 @@ CoinW 現貨帳戶模組
 
 from typing import Dict, Any, Optional
 from .http_manager import SpotHTTPManager
+from ..rate_limiter import RateLimiter
 
 
 class SpotAccount:
@@ -19,7 +20,8 @@ class SpotAccount:
         secret_key: str,
         base_url: str = "https://api.coinw.com",
         timeout: int = 30,
-        max_retries: int = 3
+        max_retries: int = 3,
+        rate_limiter: Optional[RateLimiter] = None
     ):
         """
         初始化現貨帳戶接口
@@ -30,13 +32,15 @@ class SpotAccount:
             base_url: API基礎URL
             timeout: 請求超時時間
             max_retries: 最大重試次數
+            rate_limiter: 共用的限頻器（為空則創建獨立的限頻器）
         """
         self._http_manager = SpotHTTPManager(
             api_key=api_key,
             secret_key=secret_key,
             base_url=base_url,
             timeout=timeout,
-            max_retries=max_retries
+            max_retries=max_retries,
+            rate_limiter=rate_limiter
         )
     
     def get_balance(self) -> Dict[str, Any]:
@@ -10,6 +10,9 @@ from typing import Optional
 from .market import SpotMarket
 from .order import SpotOrder
 from .account import SpotAccount
+from ..rate_limiter import RateLimiter, SPOT_RATE_LIMITS
+from ..metrics import MetricsRegistry
+from ..instrumentation import Instrumentation, default_instrumentation
 
 
 class SpotClient:
@@ -37,15 +40,19 @@ class SpotClient:
             base_url: API基礎URL
             timeout: 請求超時時間
             max_retries: 最大重試次數
-            **kwargs: 其他參數
+            **kwargs: 其他參數（如 rate_limiter 自定義限頻器）
         """
+        # 所有功能模組共用同一個限頻器
+        self._rate_limiter = kwargs.get('rate_limiter') or RateLimiter(SPOT_RATE_LIMITS)
+        
         # 初始化功能模組
         self._market = SpotMarket(
             api_key=api_key,
             secret_key=secret_key,
             base_url=base_url,
             timeout=timeout,
-            max_retries=max_retries
+            max_retries=max_retries,
+            rate_limiter=self._rate_limiter
         )
         
         # 交易和帳戶模組需要認證
@@ -55,19 +62,42 @@ class SpotClient:
                 secret_key=secret_key,
                 base_url=base_url,
                 timeout=timeout,
-                max_retries=max_retries
+                max_retries=max_retries,
+                rate_limiter=self._rate_limiter
             )
             self._account = SpotAccount(
                 api_key=api_key,
                 secret_key=secret_key,
                 base_url=base_url,
                 timeout=timeout,
-                max_retries=max_retries
+                max_retries=max_retries,
+                rate_limiter=self._rate_limiter
             )
         else:
             self._order = None
             self._account = None
     
+    def rate_limit_usage(self):
+        """獲取客戶端限頻桶的使用情況"""
+        return self._rate_limiter.usage()
+    
+    def enable_metrics(self, registry: Optional[MetricsRegistry] = None) -> MetricsRegistry:
+        """
+        啟用所有功能模組的請求指標收集
+        
+        Args:
+            registry: 共用的指標註冊表（為空則創建）
+        """
+        registry = registry or MetricsRegistry()
+        managers = [module._http_manager for module in (self._market, self._order, self._account) if module is not None]
+        # 各功能模組共用本客戶端專用的收集點，不記錄其他客戶端的請求
+        instrumentation = Instrumentation()
+        for manager in managers:
+            if manager._instrumentation is default_instrumentation:
+                manager._instrumentation = instrumentation
+            manager.enable_metrics(registry)
+        return registry
+    
     # ==================== 市場數據代理 ====================
     
     def get_ticker(self, symbol: Optional[str] = None):
@@ -119,6 +149,28 @@ class SpotClient:
         """
         return self._market.get_kline(symbol, period, start, end)
     
+    def get_kline_history(
+        self,
+        symbol: str,
+        period: int,
+        start: int,
+        end: Optional[int] = None,
+        window_bars: int = 1500,
+        max_workers: int = 4
+    ):
+        """
+        獲取K線歷史（列式數組）
+        
+        Args:
+            symbol: 交易對，如 "BTC_USDT"
+            period: 時間週期（秒）
+            start: 開始時間戳（毫秒）
+            end: 結束時間戳（毫秒），預設為當前時間
+            window_bars: 每個請求窗口的最大K線根數
+            max_workers: 並行請求數
+        """
+        return self._market.get_kline_history(symbol, period, start, end, window_bars, max_workers)
+    
     def get_server_time(self):
         """獲取服務器時間"""
         return self._market.get_server_time()
@@ -190,6 +242,17 @@ class SpotClient:
             raise ValueError("交易功能需要設置 api_key 和 secret_key")
         return self._order.get_order_history(**kwargs)
     
+    def iter_order_history(self, **kwargs):
+        """
+        逐條迭代現貨歷史成交（自動翻頁）
+        
+        Args:
+            **kwargs: 參數如 symbol, start_at, end_at, limit, prefetch
+        """
+        if not self._order:
+            raise ValueError("交易功能需要設置 api_key 和 secret_key")
+        return self._order.iter_order_history(**kwargs)
+    
     def buy_limit(self, symbol: str, amount: float, price: float, **kwargs):
         """現貨限價買入"""
         if not self._order:
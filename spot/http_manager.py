@@ -6,7 +6,6 @@ CoinW 現貨 API HTTP 管理器
 
 import time
 import json
-import hashlib
 import urllib.parse
 import logging
 from typing import Dict, Any, Optional, Union
@@ -15,6 +14,12 @@ import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from ..exceptions import RateLimitError
+from ..rate_limiter import RateLimiter, SPOT_RATE_LIMITS
+from ..signing import MD5Signer
+from ..instrumentation import Instrumentation, default_instrumentation, retry_count, status_error_name
+from ..metrics import MetricsRegistry
+
 # 設置日誌
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -33,7 +38,10 @@ class SpotHTTPManager:
         secret_key: Optional[str] = None,
         base_url: str = "https://api.coinw.com",
         timeout: int = 30,
-        max_retries: int = 3
+        max_retries: int = 3,
+        rate_limiter: Optional[RateLimiter] = None,
+        rate_limit: bool = True,
+        instrumentation: Optional[Instrumentation] = None
     ):
         """
         初始化HTTP管理器
@@ -44,12 +52,23 @@ class SpotHTTPManager:
             base_url: API基礎URL
             timeout: 請求超時時間
             max_retries: 最大重試次數
+            rate_limiter: 共用的限頻器（為空則使用預設現貨規則創建）
+            rate_limit: 是否啟用客戶端限頻
+            instrumentation: 請求計時收集點（為空則使用全局收集點）
         """
         self._api_key = api_key
         self._secret_key = secret_key
         self._base_url = base_url
         self._timeout = timeout
         
+        # 客戶端限頻
+        if rate_limiter is None and rate_limit:
+            rate_limiter = RateLimiter(SPOT_RATE_LIMITS)
+        self._rate_limiter = rate_limiter
+        
+        # 請求計時
+        self._instrumentation = instrumentation or default_instrumentation
+        
         # 創建session
         self._session = requests.Session()
         
@@ -70,6 +89,101 @@ class SpotHTTPManager:
             'User-Agent': 'CoinW-Python-SDK/1.0'
         })
     
+    @staticmethod
+    def _endpoint_key(api_url: str, params: Optional[Dict]) -> str:
+        """端點鍵：現貨接口共用路徑，以 command 區分"""
+        command = params.get('command') if params else None
+        return f"{api_url}?command={command}" if command else api_url
+    
+    def _acquire_rate_limit(self, api_url: str, params: Optional[Dict]) -> Optional[Dict[str, Any]]:
+        """
+        發送請求前獲取限頻令牌（按端點和 command 分桶）
+        
+        Returns:
+            None 表示可以發送；超過 max_wait 時返回與其他請求失敗相同格式的錯誤字典
+        """
+        if self._rate_limiter is None:
+            return None
+        try:
+            self._rate_limiter.acquire(self._endpoint_key(api_url, params))
+        except RateLimitError as e:
+            logger.warning(f"客戶端限頻: {e}")
+            return {
+                "success": False,
+                "error": "RateLimitError",
+                "message": str(e)
+            }
+        return None
+    
+    def _request(
+        self,
+        method: str,
+        api_url: str,
+        endpoint_params: Optional[Dict],
+        url: str,
+        **kwargs
+    ) -> requests.Response:
+        """
+        發送請求；啟用計時時記錄發送、等待、重試次數和字節數
+        
+        Args:
+            method: HTTP方法
+            api_url: API路徑
+            endpoint_params: 用於確定端點鍵的請求參數
+            url: 完整URL
+            **kwargs: 傳給 requests 的參數
+        """
+        timing = self._instrumentation.start(method, self._endpoint_key(api_url, endpoint_params))
+        if timing is None:
+            return self._session.request(method, url, timeout=self._timeout, **kwargs)
+        
+        try:
+            response = self._session.request(method, url, timeout=self._timeout, **kwargs)
+            timing.status = response.status_code
+            timing.split_round_trip(timing.lap(), response.elapsed.total_seconds())
+            timing.retries = retry_count(response)
+            body = response.request.body
+            timing.bytes_out = len(body) if body else 0
+            timing.bytes_in = len(response.content)
+            timing.error = status_error_name(response.status_code)
+            return response
+        except requests.exceptions.RequestException:
+            timing.send = timing.lap()
+            timing.error = "NetworkError"
+            raise
+        finally:
+            self._instrumentation.record(timing)
+    
+    def rate_limit_usage(self) -> Dict[str, Dict[str, float]]:
+        """
+        獲取客戶端限頻桶的使用情況
+        
+        Returns:
+            {桶名稱: {"tokens": 可用令牌, "capacity": 容量, "utilization": 使用率(0-1)}}
+        """
+        if self._rate_limiter is None:
+            return {}
+        return self._rate_limiter.usage()
+    
+    def enable_metrics(self, registry: Optional[MetricsRegistry] = None) -> MetricsRegistry:
+        """
+        啟用請求指標收集
+        
+        Args:
+            registry: 共用的指標註冊表（為空則創建）
+            
+        Returns:
+            訂閱了本管理器請求計時的 MetricsRegistry（未指定 instrumentation 時
+            切換到本管理器專用的收集點，只記錄本管理器的請求）
+        """
+        registry = registry or MetricsRegistry()
+        # 全局收集點會匯集進程內所有客戶端的請求，改用本管理器專用的收集點
+        if self._instrumentation is default_instrumentation:
+            self._instrumentation = Instrumentation()
+        registry.attach(self._instrumentation)
+        registry.track_session(self._session, "spot")
+        return registry
+    
     def generate_signature(self, params: Dict[str, Any]) -> str:
         """
         生成MD5簽名
@@ -80,26 +194,20 @@ class SpotHTTPManager:
         Returns:
             MD5簽名字符串
         """
-        if not self._secret_key:
-            raise ValueError("secret_key 必須設置才能生成簽名")
-        
-        # 添加API金鑰
-        if self._api_key:
-            params["api_key"] = self._api_key
-        
-        # 按key排序參數
-        sorted_params = sorted(params.items())
-        
-        # 構建查詢字符串
-        query_string = "&".join([f"{k}={v}" for k, v in sorted_params]) + "&"
-        
-        # 添加密鑰
-        sign_string = query_string + f"secret_key={self._secret_key}"
-        
-        # MD5加密並轉為大寫
-        signature = hashlib.md5(sign_string.encode("utf-8")).hexdigest().upper()
+        return self.signer.sign(params)
+    
+    @property
+    def signer(self) -> MD5Signer:
+        """
+        預先編碼密鑰的MD5簽名器（密鑰變更後自動重建）
         
-        return signature
+        Raises:
+            ValueError: 未設置 secret_key
+        """
+        signer = getattr(self, '_signer', None)
+        if signer is None or not signer.matches(self._api_key, self._secret_key):
+            signer = self._signer = MD5Signer(self._api_key, self._secret_key)
+        return signer
     
     def spot_restful_public(self, api_url: str, params: Optional[Dict] = None) -> Dict[str, Any]:
         """
@@ -114,14 +222,14 @@ class SpotHTTPManager:
         """
         url = f"{self._base_url}{api_url}"
         
+        limited = self._acquire_rate_limit(api_url, params)
+        if limited is not None:
+            return limited
+        
         try:
-            logger.debug(f"發送公共請求: {url}, 參數: {params}")
+            logger.debug("發送公共請求: %s, 參數: %s", url, params)
             
-            response = self._session.get(
-                url, 
-                params=params or {},
-                timeout=self._timeout
-            )
+            response = self._request("GET", api_url, params, url, params=params or {})
             
             if response.status_code == 200:
                 return response.json()
@@ -163,27 +271,22 @@ class SpotHTTPManager:
         
         request_params = params.copy() if params else {}
         
+        limited = self._acquire_rate_limit(api_url, request_params)
+        if limited is not None:
+            return limited
+        
         try:
             # 生成簽名
-            signature = self.generate_signature(request_params.copy())
-            request_params["sign"] = signature
+            request_params["sign"] = self.signer.sign(request_params)
             
             url = f"{self._base_url}{api_url}"
             
-            logger.debug(f"發送私有請求: {url}, 方法: {method}, 參數: {request_params}")
+            logger.debug("發送私有請求: %s, 方法: %s, 參數: %s", url, method, request_params)
             
             if method.upper() == "GET":
-                response = self._session.get(
-                    url,
-                    params=request_params,
-                    timeout=self._timeout
-                )
+                response = self._request("GET", api_url, request_params, url, params=request_params)
             else:
-                response = self._session.post(
-                    url,
-                    data=request_params,
-                    timeout=self._timeout
-                )
+                response = self._request("POST", api_url, request_params, url, data=request_params)
             
             if response.status_code == 200:
                 return response.json()
@@ -237,12 +340,11 @@ class SpotHTTPManager:
         else:
             # 公共POST請求（如果需要）
             url = f"{self._base_url}{endpoint}"
+            limited = self._acquire_rate_limit(endpoint, params)
+            if limited is not None:
+                return limited
             try:
-                response = self._session.post(
-                    url,
-                    json=params or {},
-                    timeout=self._timeout
-                )
+                response = self._request("POST", endpoint, params, url, json=params or {})
                 
                 if response.status_code == 200:
                     return response.json()
@@ -7,6 +7,8 @@ CoinW 現貨市場數據模組
 
 from typing import Dict, Any, Optional
 from .http_manager import SpotHTTPManager
+from ..rate_limiter import RateLimiter
+from ..klines import load_spot_klines
 
 
 class SpotMarket:
@@ -18,7 +20,8 @@ class SpotMarket:
         secret_key: Optional[str] = None,
         base_url: str = "https://api.coinw.com",
         timeout: int = 30,
-        max_retries: int = 3
+        max_retries: int = 3,
+        rate_limiter: Optional[RateLimiter] = None
     ):
         """
         初始化現貨市場數據接口
@@ -29,13 +32,15 @@ class SpotMarket:
             base_url: API基礎URL
             timeout: 請求超時時間
             max_retries: 最大重試次數
+            rate_limiter: 共用的限頻器（為空則創建獨立的限頻器）
         """
         self._http_manager = SpotHTTPManager(
             api_key=api_key,
             secret_key=secret_key,
             base_url=base_url,
             timeout=timeout,
-            max_retries=max_retries
+            max_retries=max_retries,
+            rate_limiter=rate_limiter
         )
     
     def get_ticker(self, symbol: Optional[str] = None) -> Dict[str, Any]:
@@ -155,6 +160,37 @@ class SpotMarket:
         
         return self._http_manager.spot_restful_public("/api/v1/public", params)
     
+    def get_kline_history(
+        self,
+        symbol: str,
+        period: int,
+        start: int,
+        end: Optional[int] = None,
+        window_bars: int = 1500,
+        max_workers: int = 4
+    ) -> Dict[str, Any]:
+        """
+        獲取K線歷史（列式數組）
+        
+        將時間範圍切分為多個窗口並行獲取，去重後按時間升序合併
+        
+        Args:
+            symbol: 交易對，如 "BTC_USDT"
+            period: 時間週期（秒），同 get_kline
+            start: 開始時間戳（Unix 毫秒級）
+            end: 結束時間戳（Unix 毫秒級），預設為當前時間
+            window_bars: 每個請求窗口的最大K線根數
+            max_workers: 並行請求數（受限頻器約束）
+            
+        Returns:
+            {'ts', 'open', 'high', 'low', 'close', 'volume'} 列式數組
+            （安裝 numpy 時為 numpy.ndarray，否則為 array.array）
+            
+        Raises:
+            CoinWAPIError: 任一窗口請求失敗
+        """
+        return load_spot_klines(self, symbol, period, start, end, window_bars, max_workers)
+    
     def get_server_time(self) -> Dict[str, Any]:
         """
         獲取服務器時間
@@ -8,7 +8,9 @@ CoinW 現貨交易模組
 
 from typing import Dict, Any, Optional
 from .http_manager import SpotHTTPManager
+from ..rate_limiter import RateLimiter
 from ..exceptions import InvalidParameterError
+from ..pagination import cursor_parser, iter_pages
 
 
 class SpotOrder:
@@ -20,7 +22,8 @@ class SpotOrder:
         secret_key: str,
         base_url: str = "https://api.coinw.com",
         timeout: int = 30,
-        max_retries: int = 3
+        max_retries: int = 3,
+        rate_limiter: Optional[RateLimiter] = None
     ):
         """
         初始化現貨交易接口
@@ -31,13 +34,15 @@ class SpotOrder:
             base_url: API基礎URL
             timeout: 請求超時時間
             max_retries: 最大重試次數
+            rate_limiter: 共用的限頻器（為空則創建獨立的限頻器）
         """
         self._http_manager = SpotHTTPManager(
             api_key=api_key,
             secret_key=secret_key,
             base_url=base_url,
             timeout=timeout,
-            max_retries=max_retries
+            max_retries=max_retries,
+            rate_limiter=rate_limiter
         )
     
     def place_order(
@@ -255,6 +260,43 @@ class SpotOrder:
         
         return self._http_manager.spot_restful_private("/api/v1/private", "POST", data)
     
+    def iter_order_history(
+        self,
+        symbol: Optional[str] = None,
+        start_at: Optional[int] = None,
+        end_at: Optional[int] = None,
+        limit: int = 100,
+        prefetch: bool = True
+    ):
+        """
+        逐條迭代歷史成交，自動按 after 游標翻頁
+        
+        處理當前頁時於後台預取下一頁，按 tradeId 去除跨頁重複，遇到早於 start_at 的記錄後停止翻頁
+        
+        Args:
+            symbol: 交易對（可選）
+            start_at: 開始時間戳（毫秒，可選）
+            end_at: 結束時間戳（毫秒，可選）
+            limit: 每頁數量，0 < limit <= 100
+            prefetch: 是否預取下一頁
+            
+        Yields:
+            成交記錄
+        """
+        if not 0 < limit <= 100:
+            raise InvalidParameterError("limit 必須在 1 到 100 之間")
+        
+        return iter_pages(
+            lambda cursor: self.get_order_history(symbol, start_at, end_at, limit, after=cursor),
+            cursor_parser(limit, "tradeId"),
+            None,
+            id_field="tradeId",
+            time_field="time",
+            since=start_at,
+            until=end_at,
+            prefetch=prefetch
+        )
+    
     # 簡化下單方法
     def buy_limit(self, symbol: str, amount: float, price: float, **kwargs) -> Dict[str, Any]:
         """限價買入"""
@@ -0,0 +1,172 @@
+"""
+CoinW 現貨增量訂單簿
+
+以 depth_snapshot 推送建立訂單簿，再按序列號應用 depth 增量推送；
+發現序列號缺口時暫停應用增量並請求新的快照重新同步。
+depth_snapshot 是持續推送的20檔頻道，同步期間收到的快照一律忽略，
+以免由增量維護的完整訂單簿被截斷為20檔
+"""
+
+import logging
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from .. import codec
+from ..orderbook import OrderBook, Number
+
+logger = logging.getLogger(__name__)
+
+
+class SpotOrderBookBuilder:
+    """
+    現貨增量訂單簿構建器
+
+    每個交易對一個實例。未同步時增量推送會被緩存，收到快照後丟棄已包含在快照內的增量，
+    並依次回放剩餘的增量
+    """
+
+    def __init__(
+        self,
+        pair_code: str,
+        number_type: Callable[[Any], Number] = float,
+        on_resync: Optional[Callable[[str], None]] = None,
+        max_buffer: int = 1000
+    ):
+        """
+        Args:
+            pair_code: 交易對代碼，如 "78" (BTC-USDT)
+            number_type: 價格和數量的數值類型，float 或 Decimal
+            on_resync: 需要重新獲取快照時調用，參數為 pair_code
+            max_buffer: 等待快照期間最多緩存的增量推送數
+        """
+        self.pair_code = pair_code
+        self.book = OrderBook(pair_code, number_type)
+        self._on_resync = on_resync
+        self._buffer: deque = deque(maxlen=max_buffer)
+        self._synced = False
+        self._resync_pending = False
+
+        # 統計
+        self.gaps = 0
+        self.resyncs = 0
+
+    @property
+    def is_synced(self) -> bool:
+        """訂單簿是否與交易所同步"""
+        return self._synced
+
+    def handle_message(self, message: Dict[str, Any]) -> bool:
+        """
+        處理 WebSocket 推送
+
+        Args:
+            message: depth_snapshot 或 depth 類型的推送消息
+
+        Returns:
+            處理後訂單簿是否處於同步狀態
+        """
+        data = message.get("data")
+        if isinstance(data, str):
+            data = codec.loads(data)
+        if not isinstance(data, dict) or "result" in data:
+            return self._synced  # 訂閱確認
+
+        if message.get("type") == "depth_snapshot":
+            return self.on_snapshot(data)
+        return self.on_delta(data)
+
+    def on_snapshot(self, data: Dict[str, Any]) -> bool:
+        """
+        應用訂單簿快照
+
+        Args:
+            data: 快照數據 {'asks': [[價格, 數量]], 'bids': [...], 'time': ..., 'seq': ...}
+
+        Returns:
+            應用後訂單簿是否處於同步狀態
+        """
+        if self._synced:
+            return True  # 已由增量維護，快照只有20檔，不能覆蓋
+        seq = int(data["seq"])
+
+        self.book.apply_snapshot(
+            data.get("bids") or (),
+            data.get("asks") or (),
+            timestamp=data.get("time"),
+            sequence=seq
+        )
+        self._synced = True
+        self._resync_pending = False
+
+        # 回放等待快照期間緩存的增量
+        pending = list(self._buffer)
+        self._buffer.clear()
+        for index, delta in enumerate(pending):
+            if not self.on_delta(delta):
+                # 快照早於緩存的增量，保留其餘增量等待下一個快照
+                self._buffer.extend(pending[index + 1:])
+                break
+
+        return self._synced
+
+    def on_delta(self, data: Dict[str, Any]) -> bool:
+        """
+        應用增量更新
+
+        Args:
+            data: 增量數據 {'startSeq': ..., 'endSeq': ..., 'asks': [[價格, 數量, 序列號]], 'bids': [...]}
+
+        Returns:
+            應用後訂單簿是否處於同步狀態
+        """
+        if not self._synced:
+            self._buffer.append(data)
+            self._request_resync()
+            return False
+
+        start_seq = int(data["startSeq"])
+        end_seq = int(data["endSeq"])
+        last_seq = self.book.sequence
+
+        if end_seq <= last_seq:
+            return True  # 已包含在當前訂單簿中
+
+        if start_seq > last_seq + 1:
+            self.gaps += 1
+            logger.warning(f"訂單簿序列號缺口 {self.pair_code}: 期望 {last_seq + 1}，收到 {start_seq}")
+            self._synced = False
+            self._buffer.append(data)
+            self._request_resync()
+            return False
+
+        bids = data.get("bids") or ()
+        asks = data.get("asks") or ()
+        if start_seq <= last_seq:
+            # 與當前訂單簿部分重疊，只應用序列號更新的檔位
+            bids = [level for level in bids if int(level[2]) > last_seq]
+            asks = [level for level in asks if int(level[2]) > last_seq]
+
+        self.book.update_levels(bids, asks, sequence=end_seq)
+        return True
+
+    def _request_resync(self) -> None:
+        """請求新的快照"""
+        if self._resync_pending:
+            return
+        self._resync_pending = True
+        self.resyncs += 1
+        if self._on_resync is not None:
+            try:
+                self._on_resync(self.pair_code)
+            except Exception as e:
+                logger.error(f"請求訂單簿快照失敗 {self.pair_code}: {e}")
+
+    def reset(self) -> None:
+        """清空訂單簿，等待新的快照（如斷線重連後）"""
+        self.book.clear()
+        self._buffer.clear()
+        self._synced = False
+        self._resync_pending = False
+
+    def __repr__(self):
+        return f"SpotOrderBookBuilder({self.pair_code}, synced={self._synced})"
@@ -7,11 +7,19 @@ import json
 import time
 import threading
 import logging
+from time import perf_counter
 from typing import Dict, List, Callable, Optional, Union, Any
 
 import requests
 import websocket
 
+from .orderbook import SpotOrderBookBuilder
+from .. import codec
+from ..dispatcher import MessageDispatcher
+from ..orderbook import OrderBook
+from ..tickers import TickerCache
+from ..ws_metrics import WebSocketMetrics, topic_of
+
 # 設置日誌
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -36,6 +44,15 @@ class CoinWSpotWebSocketClient:
         on_error: Optional[Callable] = None,
         on_close: Optional[Callable] = None,
         on_open: Optional[Callable] = None,
+        order_book: bool = False,
+        ticker_cache: Optional[TickerCache] = None,
+        decode_data: bool = False,
+        skip_unsubscribed: bool = False,
+        dispatch_workers: int = 0,
+        dispatch_queue_size: int = 10000,
+        dispatch_policy: str = "drop_oldest",
+        metrics: bool = False,
+        ws_url: Optional[str] = None,
     ):
         """
         初始化 WebSocket 客戶端
@@ -49,6 +66,18 @@ class CoinWSpotWebSocketClient:
             on_error: 錯誤處理的回調函數
             on_close: 連接關閉的回調函數
             on_open: 連接打開的回調函數
+            order_book: 是否根據 depth_snapshot/depth 推送在本地維護訂單簿（僅方法2，通過 get_order_book 讀取）
+            ticker_cache: 以 ticker_all 推送更新的 ticker 緩存（需通過方法2訂閱 ticker_all）
+            decode_data: 是否在客戶端內解碼以 JSON 字符串形式嵌套的 data 字段，回調直接收到對象
+            skip_unsubscribed: 是否在完整解碼前丟棄未通過方法2訂閱的消息類型
+            dispatch_workers: 回調工作線程數，0 表示在接收線程中直接調用回調
+            dispatch_queue_size: 分發隊列容量
+            dispatch_policy: 隊列滿時的策略: "drop_oldest"（丟棄最早的消息）、
+                "conflate"（以新消息覆蓋同一 (type, pairCode) 排隊中的消息；隊列未滿時所有消息照常排隊，
+                只在溢出時合併，因此 order、fills、depth 增量等消息與 drop_oldest 一樣只在溢出時丟失）
+                或 "block"（阻塞接收線程）
+            metrics: 是否記錄按主題的消息速率、解碼/回調耗時、延遲、ping 往返時間和重連歷史
+            ws_url: 覆蓋所選方法及私有連接的 WebSocket URL（可指向本地模擬器，如 ExchangeSimulator.spot_ws_url）
         """
         self._api_key = api_key
         self._secret_key = secret_key
@@ -57,11 +86,12 @@ class CoinWSpotWebSocketClient:
         
         # 根據方法設置正確的 WebSocket URL
         if method == 1:
-            self._ws_url = "wss://ws.futurescw.info"
+            self._ws_url = ws_url or "wss://ws.futurescw.info"
         elif method == 2:
-            self._ws_url = "wss://ws.futurescw.com"
+            self._ws_url = ws_url or "wss://ws.futurescw.com"
         else:
             raise ValueError("method 必須是 1 或 2")
+        self._private_ws_url = ws_url or "wss://ws.futurescw.com"
         
         # 回調函數
         self._user_on_message = on_message
@@ -80,6 +110,34 @@ class CoinWSpotWebSocketClient:
         
         # 訂閱管理
         self._subscriptions = []
+        self._method2_topics: set = set()
+        self._subscribed_types: set = set()
+        # 用戶通過 subscribe_method2 訂閱的 depth_snapshot 交易對，其餘快照只供本地訂單簿使用
+        self._user_snapshot_pairs: set = set()
+        # 訂單簿重新同步時內部訂閱的 depth_snapshot 交易對，同步後取消訂閱
+        self._internal_snapshot_pairs: set = set()
+        self._decode_data = decode_data
+        self._skip_unsubscribed = skip_unsubscribed
+        
+        # 消息分發：dispatch_workers > 0 時回調在獨立的工作線程中執行，不阻塞接收線程
+        self._dispatcher: Optional[MessageDispatcher] = None
+        if dispatch_workers > 0:
+            self._dispatcher = MessageDispatcher(
+                self._deliver,
+                workers=dispatch_workers,
+                maxsize=dispatch_queue_size,
+                policy=dispatch_policy,
+                name="coinw-spot-ws"
+            )
+        
+        # 本地訂單簿 {pairCode: SpotOrderBookBuilder}
+        self._order_books: Optional[Dict[str, SpotOrderBookBuilder]] = {} if order_book else None
+        
+        # 全市場 ticker 緩存
+        self._ticker_cache = ticker_cache
+        
+        # 指標
+        self._metrics: Optional[WebSocketMetrics] = WebSocketMetrics() if metrics else None
     
     def _get_public_token(self) -> Optional[str]:
         """獲取公共令牌（方法1需要）"""
@@ -104,6 +162,9 @@ class CoinWSpotWebSocketClient:
         Returns:
             是否連接成功
         """
+        if self._dispatcher is not None:
+            self._dispatcher.start()
+        
         try:
             # 根據方法決定連接URL
             if self._method == 1:
@@ -116,7 +177,7 @@ class CoinWSpotWebSocketClient:
                     url = f"{self._ws_url}?token={self._public_token}"
                 else:
                     # 私有接口不需要令牌（直接使用 method 2 的邏輯）
-                    url = "wss://ws.futurescw.com"
+                    url = self._private_ws_url
             else:
                 # 方法2: 直接連接，不需要令牌
                 url = self._ws_url
@@ -126,7 +187,8 @@ class CoinWSpotWebSocketClient:
                 on_message=self._on_websocket_message,
                 on_error=self._on_websocket_error,
                 on_close=self._on_websocket_close,
-                on_open=self._on_websocket_open
+                on_open=self._on_websocket_open,
+                on_pong=self._on_websocket_pong
             )
             
             self._ws_thread = threading.Thread(
@@ -146,9 +208,21 @@ class CoinWSpotWebSocketClient:
     
     def _on_websocket_message(self, ws, message):
         """WebSocket消息處理"""
+        metrics = self._metrics
         try:
-            data = json.loads(message)
-            logger.debug(f"收到WebSocket消息: {data}")
+            if self._skip_unsubscribed and codec.should_skip(message, self._subscribed_types):
+                if metrics is not None:
+                    metrics.on_raw(len(message))
+                return
+            
+            if metrics is None:
+                data = codec.loads(message)
+            else:
+                started = perf_counter()
+                data = codec.loads(message)
+                metrics.on_message(topic_of(data), len(message), perf_counter() - started, codec.peek_timestamp(message))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("收到WebSocket消息: %s", data)
             
             # 處理認證回應
             if "channel" in data and data["channel"] == "login":
@@ -159,11 +233,118 @@ class CoinWSpotWebSocketClient:
                     logger.error("私有頻道認證失敗")
                 return
             
-            if self._user_on_message:
-                self._user_on_message(data)
+            # 嵌套的 data 字段只解碼一次，訂單簿和用戶回調共用
+            if self._decode_data:
+                codec.decode_nested(data)
+            
+            # 更新本地訂單簿；內部訂閱的快照不交給用戶回調
+            if self._order_books is not None and data.get("type") in ("depth", "depth_snapshot"):
+                self._update_order_book(data)
+                if (data.get("type") == "depth_snapshot"
+                        and str(data.get("pairCode")) not in self._user_snapshot_pairs):
+                    return
+            
+            # 更新 ticker 緩存
+            if self._ticker_cache is not None and data.get("type") == "ticker_all":
+                self._ticker_cache.on_ticker_all(data)
+            
+            if self._dispatcher is not None:
+                self._dispatcher.submit((data.get("type"), data.get("pairCode")), data)
+            else:
+                self._deliver(data)
         except Exception as e:
             logger.error(f"處理WebSocket消息錯誤: {e}")
     
+    def _deliver(self, data: Dict):
+        """將消息交給用戶回調"""
+        if self._user_on_message:
+            if self._metrics is not None:
+                self._metrics.timed_callback(self._user_on_message, data)
+            else:
+                self._user_on_message(data)
+    
+    def dispatch_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        消息分發統計（隊列深度、丟棄數等）
+        
+        Returns:
+            統計信息；未啟用 dispatch_workers 時返回 None
+        """
+        return self._dispatcher.stats() if self._dispatcher is not None else None
+    
+    @property
+    def metrics(self) -> Optional[WebSocketMetrics]:
+        """指標對象（可用於 stale_topics/lagging_topics 告警）；未啟用 metrics 時為 None"""
+        return self._metrics
+    
+    def stream_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        WebSocket 指標快照（按主題的速率、延遲、ping 往返時間、重連歷史）
+        
+        Returns:
+            統計信息；未啟用 metrics 時返回 None
+        """
+        return self._metrics.snapshot() if self._metrics is not None else None
+    
+    def _update_order_book(self, message: Dict):
+        """以深度推送更新對應交易對的本地訂單簿"""
+        pair_code = str(message.get("pairCode", ""))
+        builder = self._order_books.get(pair_code)
+        if builder is None:
+            builder = self._order_books[pair_code] = SpotOrderBookBuilder(
+                pair_code,
+                on_resync=self._request_depth_snapshot
+            )
+        if builder.handle_message(message) and pair_code in self._internal_snapshot_pairs:
+            # 已同步，不再需要快照
+            self._internal_snapshot_pairs.discard(pair_code)
+            self._send_message({
+                "event": "unsub",
+                "params": {
+                    "biz": "exchange",
+                    "type": "depth_snapshot",
+                    "pairCode": pair_code
+                }
+            })
+            self._remove_method2_topic("depth_snapshot", pair_code)
+    
+    def _request_depth_snapshot(self, pair_code: str):
+        """
+        訂閱深度快照，用於訂單簿初始化和序列號缺口後的重新同步
+        
+        用戶已訂閱該交易對的 depth_snapshot 時直接等待下一個快照；
+        否則內部訂閱，訂單簿同步後自動取消
+        """
+        if pair_code in self._user_snapshot_pairs or pair_code in self._internal_snapshot_pairs:
+            return
+        self._internal_snapshot_pairs.add(pair_code)
+        self._add_method2_topic("depth_snapshot", pair_code)
+        self._send_message({
+            "event": "sub",
+            "params": {
+                "biz": "exchange",
+                "type": "depth_snapshot",
+                "pairCode": pair_code
+            }
+        })
+    
+    def get_order_book(self, pair_code: str) -> Optional[OrderBook]:
+        """
+        獲取本地維護的訂單簿
+        
+        Args:
+            pair_code: 交易對代碼，如 "78" (BTC-USDT)
+            
+        Returns:
+            訂單簿；未啟用 order_book、尚未收到快照或正在重新同步時返回 None
+        """
+        if self._order_books is None:
+            return None
+        builder = self._order_books.get(str(pair_code))
+        if builder is None or not builder.is_synced:
+            return None
+        return builder.book
+    
     def _on_websocket_error(self, ws, error):
         """WebSocket錯誤處理"""
         logger.error(f"WebSocket錯誤: {error}")
@@ -174,6 +355,16 @@ class CoinWSpotWebSocketClient:
         """WebSocket連接關閉處理"""
         logger.info(f"WebSocket連接關閉: {close_status_code} - {close_msg}")
         self._is_connected = False
+        if self._metrics is not None:
+            self._metrics.on_close(close_status_code, close_msg)
+        
+        # 斷線期間的增量已丟失，等待新的快照（連接上的內部訂閱也隨之失效）
+        if self._order_books:
+            for builder in self._order_books.values():
+                builder.reset()
+            for pair_code in list(self._internal_snapshot_pairs):
+                self._remove_method2_topic("depth_snapshot", pair_code)
+            self._internal_snapshot_pairs.clear()
         if self._user_on_close:
             self._user_on_close(close_status_code, close_msg)
     
@@ -181,6 +372,8 @@ class CoinWSpotWebSocketClient:
         """WebSocket連接打開處理"""
         logger.info("WebSocket連接已建立")
         self._is_connected = True
+        if self._metrics is not None:
+            self._metrics.on_open()
         
         # 如果是私有連接，先進行認證
         if self._api_key and self._secret_key:
@@ -189,6 +382,11 @@ class CoinWSpotWebSocketClient:
         if self._user_on_open:
             self._user_on_open()
     
+    def _on_websocket_pong(self, ws, data):
+        """記錄 ping 往返時間"""
+        if self._metrics is not None:
+            self._metrics.on_pong(ws)
+    
     def _authenticate_websocket(self):
         """WebSocket私有頻道認證"""
         if not self._api_key or not self._secret_key:
@@ -211,7 +409,7 @@ class CoinWSpotWebSocketClient:
         try:
             if self._ws and self._is_connected:
                 self._ws.send(json.dumps(data))
-                logger.debug(f"發送消息: {data}")
+                logger.debug("發送消息: %s", data)
             else:
                 logger.error("WebSocket未連接，無法發送消息")
         except Exception as e:
@@ -274,6 +472,10 @@ class CoinWSpotWebSocketClient:
         
         self._send_message(subscription_data)
         self._subscriptions.append(f"{biz}:{message_type}:{pair_code or 'all'}")
+        self._add_method2_topic(message_type, pair_code)
+        if message_type == "depth_snapshot" and pair_code:
+            self._user_snapshot_pairs.add(str(pair_code))
+            self._internal_snapshot_pairs.discard(str(pair_code))
         logger.info(f"方法2 訂閱: {subscription_data}")
     
     def subscribe(self, *args, **kwargs):
@@ -324,8 +526,21 @@ class CoinWSpotWebSocketClient:
         }
         
         self._send_message(unsubscribe_data)
+        self._remove_method2_topic(message_type, pair_code)
+        if message_type == "depth_snapshot" and pair_code:
+            self._user_snapshot_pairs.discard(str(pair_code))
         logger.info(f"方法2 取消訂閱: {unsubscribe_data}")
     
+    def _add_method2_topic(self, message_type: str, pair_code: Optional[str]):
+        """記錄方法2訂閱的消息類型（用於解碼前過濾）"""
+        self._method2_topics.add((message_type, pair_code))
+        self._subscribed_types.add(message_type)
+    
+    def _remove_method2_topic(self, message_type: str, pair_code: Optional[str]):
+        """移除方法2訂閱記錄"""
+        self._method2_topics.discard((message_type, pair_code))
+        self._subscribed_types = {topic_type for topic_type, _ in self._method2_topics}
+    
     def close(self):
         """關閉WebSocket連接"""
         self._is_connected = False
@@ -336,6 +551,9 @@ class CoinWSpotWebSocketClient:
         if self._ws_thread and self._ws_thread.is_alive():
             self._ws_thread.join(timeout=1)
         
+        if self._dispatcher is not None:
+            self._dispatcher.stop()
+        
         logger.info("WebSocket連接已關閉")
     
     def wait(self):
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from coinwapi.exceptions import CoinWAPIError, OrderNotFoundError, RateLimitError, ServerError, SignatureError
+from coinwapi.future import ContractHTTPConfig, FutureClient
+from coinwapi.future.async_client import AsyncFutureClient
+from coinwapi.future.gateway import OrderGateway
+from coinwapi.simulator import ExchangeSimulator, SimulatorConfig
+
+
+def test_async_client_has_no_thread_gateway():
+    client = AsyncFutureClient("key", "secret")
+    with pytest.raises(NotImplementedError):
+        client.create_order_gateway()
+
+
+def test_gateway_rejects_async_order_module():
+    client = AsyncFutureClient("key", "secret")
+    with pytest.raises(TypeError):
+        OrderGateway(client._order)
+    with pytest.raises(TypeError):
+        OrderGateway(client)
+
+
+def _async_client(sim, secret_key=None, **kwargs):
+    config = ContractHTTPConfig(base_url=sim.base_url, rate_limit=False, **kwargs)
+    return AsyncFutureClient(sim.config.api_key, secret_key or sim.config.secret_key, config=config)
+
+
+def _run(sim, body, **kwargs):
+    async def main():
+        async with _async_client(sim, **kwargs) as client:
+            return await body(client)
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def sim():
+    with ExchangeSimulator(SimulatorConfig(push_interval=3600, seed=10)) as simulator:
+        yield simulator
+
+
+def test_signed_private_calls(sim):
+    async def body(client):
+        return await client.get_user_assets(), await client.get_account_summary()
+
+    assets, summary = _run(sim, body)
+    assert assets["code"] == 0 and "availableMargin" in assets["data"]
+    assert summary["code"] == 0 and summary["data"]["assets"] == assets["data"]
+    assert sim.stats()["signature_errors"] == 0 and sim.stats()["auth_errors"] == 0
+
+
+def test_buy_limit_and_batched_place(sim):
+    async def body(client):
+        single = await client.buy_limit("BTC", 1, 1000, 10)
+        batched = await client.place_orders_batched([
+            {"instrument": "ETH", "direction": "short", "leverage": 5, "quantityUnit": 0, "quantity": 2,
+             "positionModel": 1, "positionType": "plan", "openPrice": 5000 + index, "thirdOrderId": f"a{index}"}
+            for index in range(3)
+        ])
+        open_orders = await client.get_open_orders("ETH", "plan")
+        return single, batched, open_orders
+
+    single, batched, open_orders = _run(sim, body)
+    assert single["code"] == 0 and single["data"]["value"]
+    assert batched["code"] == 0 and batched["data"]["succeeded"] == 3
+    third_order_ids = {row["thirdOrderId"] for row in open_orders["data"]["rows"]}
+    assert third_order_ids == {"a0", "a1", "a2"}
+
+
+def _sync_error(sim, call, secret_key=None, **kwargs):
+    config = ContractHTTPConfig(base_url=sim.base_url, rate_limit=False, **kwargs)
+    client = FutureClient(sim.config.api_key, secret_key or sim.config.secret_key, config=config)
+    with pytest.raises(CoinWAPIError) as info:
+        call(client)
+    return type(info.value)
+
+
+def _async_error(sim, call, secret_key=None, **kwargs):
+    async def body(client):
+        with pytest.raises(CoinWAPIError) as info:
+            await call(client)
+        return type(info.value)
+    return _run(sim, body, secret_key=secret_key, **kwargs)
+
+
+@pytest.mark.parametrize("scenario,expected", [
+    ("bad_secret", SignatureError),
+    ("server_error", ServerError),
+    ("rate_limited", RateLimitError),
+    ("order_not_found", OrderNotFoundError),
+])
+def test_errors_map_to_the_same_exceptions_as_sync(sim, scenario, expected):
+    options = {"max_retries": 0}
+    call = lambda client: client.get_user_assets()
+    if scenario == "bad_secret":
+        options["secret_key"] = "wrong-secret"
+    elif scenario == "server_error":
+        sim.config.error_rate = 1.0
+    elif scenario == "rate_limited":
+        sim.config.rate_limit_rate = 1.0
+    else:
+        call = lambda client: client.cancel_order("404")
+
+    assert _sync_error(sim, call, **options) is expected
+    assert _async_error(sim, call, **options) is expected
+
+
+def test_async_pagination(sim):
+    async def body(client):
+        for index in range(7):
+            await client.place_order(
+                instrument="BTC", direction="long", leverage=10, quantity_unit=0,
+                quantity=1, position_model=1, position_type="execute"
+            )
+        return [order["id"] async for order in client.iter_order_history("BTC", page_size=3)]
+
+    ids = _run(sim, body)
+    assert len(ids) == 7 and len(set(ids)) == 7
+    assert sim.stats()["endpoints"]["/v1/perpum/orders/history"] == 3
+
+
+def test_sub_modules_share_one_session_and_connection(sim):
+    peers = set()
+    dispatch = sim._dispatch
+
+    def recording(handler, method):
+        peers.add(handler.client_address)
+        return dispatch(handler, method)
+
+    sim._dispatch = recording
+
+    async def body(client):
+        sessions = {id(module._get_session()) for module in (client, client._market, client._order, client._account, client._position)}
+        await client.get_ticker("BTC")
+        await client.get_user_assets()
+        await client.get_open_orders("BTC", "plan")
+        return sessions
+
+    sessions = _run(sim, body)
+    assert len(sessions) == 1
+    # 順序請求複用同一個 keep-alive 連接
+    assert len(peers) == 1
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from coinwapi.exceptions import InvalidParameterError, ServerError
+from coinwapi.future import ContractHTTPConfig
+from coinwapi.future.async_client import AsyncFutureClient
+from coinwapi.future.order import BATCH_ORDER_LIMIT, FutureOrder, _chunk, _combine_batches
+from coinwapi.simulator import ExchangeSimulator, SimulatorConfig
+
+
+def _order(index, direction="long"):
+    return {
+        "instrument": "BTC", "direction": direction, "leverage": 10, "quantityUnit": 0,
+        "quantity": 1, "positionModel": 1, "positionType": "plan", "openPrice": 1000 + index,
+        "thirdOrderId": f"t{index}",
+    }
+
+
+def test_chunk():
+    assert _chunk(list(range(45)), BATCH_ORDER_LIMIT) == [list(range(20)), list(range(20, 40)), list(range(40, 45))]
+    assert _chunk([], 20) == []
+    with pytest.raises(InvalidParameterError):
+        _chunk([1], 0)
+
+
+def test_combine_matches_by_key_position_and_whole_batch():
+    keys = [["a", "b"], ["c", "d"], ["e"], ["f", "g"]]
+    responses = [
+        # 按 key_field 對應（返回順序與請求不同）
+        {"code": 0, "data": [{"id": "b", "code": "ORDER_NOT_FOUND", "msg": "gone"}, {"id": "a", "code": 0}]},
+        # 沒有 key_field 時按位置對應
+        {"code": 0, "data": [{"value": 1}, {"value": 2, "success": False, "message": "bad"}]},
+        # 整個批次拋出異常
+        ServerError("HTTP 502"),
+        # 批次級錯誤響應
+        {"code": 9001, "msg": "system busy", "data": None},
+    ]
+    combined = _combine_batches(keys, responses, "id")
+    results = combined["data"]["results"]
+
+    assert [result["id"] for result in results] == ["a", "b", "c", "d", "e", "f", "g"]
+    assert [result["index"] for result in results] == list(range(7))
+    assert [result["success"] for result in results] == [True, False, True, False, False, False, False]
+    assert results[1]["error"] == "gone"
+    assert results[2]["result"] == {"value": 1}
+    assert results[3]["error"] == "bad"
+    assert "HTTP 502" in results[4]["error"]
+    assert results[5]["error"] == "system busy"
+    assert combined["code"] == -1
+    assert combined["data"]["succeeded"] == 2 and combined["data"]["failed"] == 5
+
+    assert _combine_batches([["a"]], [{"code": 0, "data": [{"id": "a", "code": 0}]}], "id")["code"] == 0
+
+
+@pytest.mark.parametrize("data", [[], [{"value": 1}], [{"value": 1}, {"value": 2}, {"value": 3}]])
+def test_unmatched_item_results_are_unknown_failures(data):
+    combined = _combine_batches([["a", "b"]], [{"code": 0, "data": data}], "id")
+    results = combined["data"]["results"]
+    assert [result["success"] for result in results] == [False, False]
+    assert all(result["result"] is None and "未知" in result["error"] for result in results)
+    assert combined["code"] == -1 and combined["data"]["failed"] == 2
+
+    # 批次級錯誤信息優先
+    combined = _combine_batches([["a", "b"]], [{"code": 9001, "msg": "system busy", "data": data}], "id")
+    assert [result["error"] for result in combined["data"]["results"]] == ["system busy"] * 2
+
+
+def test_missing_keyed_result_is_unknown_failure():
+    combined = _combine_batches([["a", "b", "c"]], [{"code": 0, "data": [{"id": "c", "code": 0}, {"id": "a", "code": 0}]}], "id")
+    results = combined["data"]["results"]
+    assert [result["success"] for result in results] == [True, False, True]
+    assert results[1]["result"] is None and "未知" in results[1]["error"]
+
+
+class _FlakyOrder(FutureOrder):
+    """第二個批次失敗"""
+
+    def __init__(self):
+        FutureOrder.__init__(self, "key", "secret", ContractHTTPConfig(rate_limit=False))
+        self.batches = []
+
+    def place_batch_orders(self, orders):
+        self.batches.append([order["thirdOrderId"] for order in orders])
+        if len(self.batches) == 2:
+            raise ServerError("HTTP 503")
+        return {"code": 0, "data": [{"code": 0, "thirdOrderId": order["thirdOrderId"], "value": order["thirdOrderId"]}
+                                    for order in reversed(orders)]}
+
+
+def test_failed_batch_marks_only_its_orders():
+    order_module = _FlakyOrder()
+    orders = [_order(index) for index in range(5)]
+    del orders[0]["thirdOrderId"]
+    combined = order_module.place_orders_batched(orders, chunk_size=2, max_workers=1)
+
+    results = combined["data"]["results"]
+    assert len(order_module.batches) == 3
+    assert results[0]["thirdOrderId"] == order_module.batches[0][0]  # 自動生成的 thirdOrderId
+    assert [result["success"] for result in results] == [True, True, False, False, True]
+    assert [result["result"]["value"] for result in results if result["success"]] == [results[0]["thirdOrderId"], "t1", "t4"]
+    assert combined["data"]["failed"] == 2
+
+
+def test_place_and_cancel_batched_against_simulator():
+    with ExchangeSimulator(SimulatorConfig(push_interval=3600, seed=5)) as sim:
+        client = sim.future_client()
+        orders = [_order(index, "up" if index == 23 else "long") for index in range(45)]
+        placed = client.place_orders_batched(orders)
+
+        assert sim.stats()["endpoints"]["/v1/perpum/batchOrders"] == 3
+        results = placed["data"]["results"]
+        assert [result["thirdOrderId"] for result in results] == [f"t{index}" for index in range(45)]
+        assert [index for index, result in enumerate(results) if not result["success"]] == [23]
+        assert placed["data"]["succeeded"] == 44
+
+        order_ids = [result["result"]["value"] for result in results if result["success"]]
+        cancelled = client.cancel_orders_batched(order_ids + ["404"], chunk_size=10)
+        outcome = {result["id"]: result["success"] for result in cancelled["data"]["results"]}
+        assert [result["id"] for result in cancelled["data"]["results"]] == order_ids + ["404"]
+        assert outcome.pop("404") is False
+        assert all(outcome.values())
+        assert cancelled["code"] == -1 and cancelled["data"]["failed"] == 1
+
+
+def test_async_batched_against_simulator():
+    with ExchangeSimulator(SimulatorConfig(push_interval=3600, seed=6)) as sim:
+        async def run():
+            config = ContractHTTPConfig(base_url=sim.base_url, rate_limit=False)
+            async with AsyncFutureClient(sim.config.api_key, sim.config.secret_key, config=config) as client:
+                return await client.place_orders_batched([_order(index) for index in range(25)], chunk_size=10)
+
+        placed = asyncio.run(run())
+        assert placed["code"] == 0
+        assert [result["thirdOrderId"] for result in placed["data"]["results"]] == [f"t{index}" for index in range(25)]
+        assert sim.stats()["endpoints"]["/v1/perpum/batchOrders"] == 3
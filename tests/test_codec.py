@@ -0,0 +1,91 @@
+import importlib
+import json
+import sys
+
+import pytest
+
+from coinwapi import codec
+
+
+@pytest.fixture
+def restore_backend():
+    previous = codec.backend
+    yield
+    codec.set_backend(previous)
+
+
+FUTURES_DEPTH = json.dumps({"biz": "futures", "type": "depth", "pairCode": "BTC", "data": {"asks": [], "bids": []}})
+FUTURES_TRADE = json.dumps({"biz": "futures", "type": "fills", "pairCode": "BTC", "data": [{"price": "1"}]})
+SPOT_PUSH = json.dumps({"channel": "push", "type": "depth", "data": json.dumps({"type": "ticker", "symbol": "BTC"})})
+LOGIN_REPLY = json.dumps({"channel": "login", "success": True})
+
+
+@pytest.mark.parametrize("raw,wanted,skip", [
+    (FUTURES_DEPTH, {"depth"}, False),
+    (FUTURES_TRADE, {"depth"}, True),
+    (FUTURES_TRADE, {"depth", "fills"}, False),
+    (FUTURES_DEPTH, set(), True),
+    # 沒有 type 字段的消息總是解碼
+    (LOGIN_REPLY, set(), False),
+    ('{"type" : "depth"}', {"depth"}, False),
+])
+def test_should_skip(raw, wanted, skip):
+    assert codec.should_skip(raw, wanted) is skip
+
+
+def test_nested_type_is_not_peeked():
+    # 嵌套 data 字符串中的引號已轉義，只匹配外層 type
+    assert codec.peek_types(SPOT_PUSH) == {"depth"}
+    assert codec.should_skip(SPOT_PUSH, {"ticker"})
+
+
+def test_peek_timestamp():
+    assert codec.peek_timestamp('{"type":"fills","data":{"ts":1700000000123}}') == 1700000000123
+    nested = json.dumps({"data": json.dumps({"time": "1700000000456"})})
+    assert codec.peek_timestamp(nested) == 1700000000456
+    assert codec.peek_timestamp('{"ts":17}') is None
+
+
+def test_decode_nested():
+    message = codec.loads(SPOT_PUSH)
+    assert codec.decode_nested(message) is message
+    assert message["data"] == {"type": "ticker", "symbol": "BTC"}
+
+    # 已解碼或非 JSON 的字段保持不變
+    assert codec.decode_nested(message)["data"] == {"type": "ticker", "symbol": "BTC"}
+    assert codec.decode_nested({"data": "ok"}) == {"data": "ok"}
+    assert codec.decode_nested({"result": "[1, 2]"}, key="result") == {"result": [1, 2]}
+    assert codec.decode_nested({}) == {}
+
+
+@pytest.mark.parametrize("name", codec.available_backends())
+def test_backends_decode_identically(restore_backend, name):
+    assert codec.set_backend(name) == name
+    assert codec.backend == name
+    for raw in (FUTURES_DEPTH, FUTURES_TRADE, SPOT_PUSH, LOGIN_REPLY):
+        assert codec.loads(raw) == json.loads(raw)
+        assert codec.loads(raw.encode("utf-8")) == json.loads(raw)
+
+
+def test_unavailable_backend_is_rejected(restore_backend, monkeypatch):
+    monkeypatch.setitem(codec._BACKENDS, "ujson", None)
+    with pytest.raises(ValueError):
+        codec.set_backend("ujson")
+    with pytest.raises(ValueError):
+        codec.set_backend("simdjson")
+    assert "json" in codec.available_backends()
+
+
+def test_falls_back_to_stdlib_without_optional_backends(monkeypatch):
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    monkeypatch.setitem(sys.modules, "ujson", None)
+    try:
+        importlib.reload(codec)
+        assert codec.available_backends() == ["json"]
+        assert codec.backend == "json"
+        assert codec.loads is json.loads
+        assert codec.decode_nested(codec.loads(SPOT_PUSH))["data"]["symbol"] == "BTC"
+    finally:
+        monkeypatch.undo()
+        importlib.reload(codec)
+    assert codec.backend == codec.available_backends()[0]
@@ -0,0 +1,94 @@
+import json
+import threading
+
+from coinwapi.conflation import Conflator
+
+
+def _frame(message_type, pair_code, price, **extra):
+    return json.dumps({"biz": "futures", "type": message_type, "pairCode": pair_code, "data": {"price": price}, **extra})
+
+
+class _CountingDecoder:
+    def __init__(self):
+        self.decoded = []
+
+    def __call__(self, raw):
+        self.decoded.append(raw)
+        return json.loads(raw)
+
+
+def test_keeps_only_latest_frame_per_type_and_pair():
+    decoder = _CountingDecoder()
+    conflator = Conflator(("ticker_swap", "mark_price"), decoder=decoder)
+
+    for price in range(5):
+        assert conflator.offer(_frame("ticker_swap", "BTC", price))
+    assert conflator.offer(_frame("ticker_swap", "eth", 100))
+    assert conflator.offer(_frame("mark_price", "BTC", 7))
+
+    # 被覆蓋的消息從未解碼
+    assert not decoder.decoded
+    updates = conflator.pop_updates()
+    assert {key: message["data"]["price"] for key, message in updates.items()} == {
+        ("ticker_swap", "BTC"): 4,
+        ("ticker_swap", "ETH"): 100,
+        ("mark_price", "BTC"): 7,
+    }
+    assert len(decoder.decoded) == 3
+    assert conflator.pop_updates() == {}
+    assert conflator.stats() == {"received": 7, "conflated": 4, "delivered": 3, "keys": 3}
+
+    # latest 不區分大小寫，未變化時使用緩存的解碼結果
+    assert conflator.latest("ticker_swap", "btc")["data"]["price"] == 4
+    assert conflator.latest("ticker_swap", "BTC") is updates[("ticker_swap", "BTC")]
+    assert len(decoder.decoded) == 3
+    assert conflator.latest("ticker_swap", "SOL") is None
+
+
+def test_latest_consumes_pending_update():
+    conflator = Conflator(("ticker_swap",), decoder=json.loads)
+    conflator.offer(_frame("ticker_swap", "BTC", 1))
+    conflator.offer(_frame("ticker_swap", "ETH", 2))
+    assert conflator.latest("ticker_swap", "BTC")["data"]["price"] == 1
+    assert list(conflator.pop_updates()) == [("ticker_swap", "ETH")]
+
+    # 沒有 pairCode 的消息以 None 為鍵
+    conflator.offer(json.dumps({"type": "ticker_swap", "data": {"price": 3}}))
+    assert conflator.latest("ticker_swap")["data"]["price"] == 3
+
+
+def test_channel_frames_pass_through():
+    conflator = Conflator(("ticker_swap",))
+    ack = json.dumps({"channel": "subscribe", "type": "ticker_swap", "pairCode": "BTC"})
+    assert not conflator.offer(ack)
+    assert conflator.pop_updates() == {}
+    assert conflator.stats()["received"] == 0
+
+
+def test_other_types_are_never_conflated():
+    conflator = Conflator(("ticker_swap",))
+    for price in range(3):
+        assert not conflator.offer(_frame("depth", "BTC", price))
+        assert not conflator.offer(_frame("fills", "BTC", price))
+    assert not conflator.offer(json.dumps({"event": "login", "success": True}))
+    assert conflator.pop_updates() == {}
+    assert conflator.stats() == {"received": 0, "conflated": 0, "delivered": 0, "keys": 0}
+
+
+def test_throttled_callback_delivers_latest():
+    conflator = Conflator(("mark_price",), decoder=json.loads)
+    received = []
+    delivered = threading.Event()
+
+    def on_update(message):
+        received.append(message["data"]["price"])
+        delivered.set()
+
+    for price in range(10):
+        conflator.offer(_frame("mark_price", "BTC", price))
+    conflator.start(on_update, interval=0.01)
+    try:
+        assert delivered.wait(2)
+    finally:
+        conflator.stop()
+    assert received == [9]
@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+
+from coinwapi.dispatcher import BLOCK, CONFLATE, DROP_OLDEST, MessageDispatcher
+
+
+@pytest.mark.parametrize("policy", [DROP_OLDEST, CONFLATE, BLOCK])
+def test_submit_before_start_is_rejected(policy):
+    dispatcher = MessageDispatcher(lambda message: None, maxsize=2, policy=policy)
+    with pytest.raises(RuntimeError):
+        dispatcher.submit("topic", 1)
+    assert dispatcher.depth == 0
+    assert dispatcher.stats()["submitted"] == 0
+
+
+def test_submit_after_stop_is_rejected():
+    dispatcher = MessageDispatcher(lambda message: None)
+    dispatcher.start()
+    dispatcher.submit("topic", 1)
+    dispatcher.stop()
+    with pytest.raises(RuntimeError):
+        dispatcher.submit("topic", 2)
+
+
+def test_block_policy_enforces_bound_and_preserves_order():
+    release = threading.Event()
+    handled = []
+
+    def handler(message):
+        release.wait()
+        handled.append(message)
+
+    dispatcher = MessageDispatcher(handler, maxsize=2, policy=BLOCK)
+    dispatcher.start()
+    try:
+        max_depth = []
+
+        def produce():
+            for index in range(10):
+                dispatcher.submit("topic", index)
+                max_depth.append(dispatcher.depth)
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        time.sleep(0.2)
+        # 工作線程卡在第一條消息，隊列滿後生產者阻塞
+        assert producer.is_alive()
+        assert dispatcher.depth == 2
+
+        release.set()
+        producer.join(2)
+        assert not producer.is_alive()
+    finally:
+        dispatcher.stop()
+    assert handled == list(range(10))
+    assert max(max_depth) <= 2
+    assert dispatcher.stats()["dropped"] == 0
+
+
+def test_block_policy_unblocks_with_error_when_stopped():
+    release = threading.Event()
+    dispatcher = MessageDispatcher(lambda message: release.wait(), maxsize=1, policy=BLOCK)
+    dispatcher.start()
+    errors = []
+
+    def produce():
+        try:
+            for index in range(5):
+                dispatcher.submit("topic", index)
+        except RuntimeError as e:
+            errors.append(e)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    time.sleep(0.1)
+    threading.Thread(target=dispatcher.stop, kwargs={"drain": False}).start()
+    producer.join(2)
+    release.set()
+    assert not producer.is_alive()
+    assert len(errors) == 1
+    assert dispatcher.depth <= 1
+
+
+def test_drop_oldest_and_conflate_stay_bounded():
+    gate = threading.Event()
+    dispatcher = MessageDispatcher(lambda message: gate.wait(), maxsize=3, policy=DROP_OLDEST)
+    dispatcher.start()
+    for index in range(20):
+        dispatcher.submit("topic", index)
+    assert dispatcher.depth <= 3
+    assert dispatcher.stats()["dropped"] >= 16
+    gate.set()
+    dispatcher.stop()
+
+    gate = threading.Event()
+    latest = []
+    dispatcher = MessageDispatcher(lambda message: (gate.wait(), latest.append(message)), maxsize=3, policy=CONFLATE)
+    dispatcher.start()
+    dispatcher.submit("first", 0)
+    time.sleep(0.05)
+    for index in range(10):
+        dispatcher.submit("ticker", index)
+    # 隊列未滿時不合併，滿了以後覆蓋同主題排隊中的最新一條
+    assert dispatcher.depth == 3
+    assert dispatcher.stats()["conflated"] == 7
+    gate.set()
+    dispatcher.stop()
+    assert latest == [0, 0, 1, 9]
+
+
+def test_conflate_never_merges_below_capacity():
+    gate = threading.Event()
+    handled = []
+    dispatcher = MessageDispatcher(lambda message: (gate.wait(), handled.append(message)), maxsize=100, policy=CONFLATE)
+    dispatcher.start()
+    dispatcher.submit(("order", None), "blocker")
+    time.sleep(0.05)
+    for index in range(5):
+        dispatcher.submit(("order", None), f"order-{index}")
+        dispatcher.submit(("fills", "BTC"), f"fill-{index}")
+    assert dispatcher.depth == 10
+    gate.set()
+    dispatcher.stop()
+    assert handled[1:] == [f"{kind}-{index}" for index in range(5) for kind in ("order", "fill")]
+    stats = dispatcher.stats()
+    assert stats["conflated"] == 0 and stats["dropped"] == 0 and stats["dispatched"] == 11
+
+
+def test_conflate_overflow_without_pending_topic_drops_oldest():
+    gate = threading.Event()
+    handled = []
+    dispatcher = MessageDispatcher(lambda message: (gate.wait(), handled.append(message)), maxsize=2, policy=CONFLATE)
+    dispatcher.start()
+    dispatcher.submit("blocker", 0)
+    time.sleep(0.05)
+    dispatcher.submit("a", 1)
+    dispatcher.submit("b", 2)
+    dispatcher.submit("c", 3)
+    dispatcher.submit("b", 4)
+    gate.set()
+    dispatcher.stop()
+    # c 擠掉最早的 a；b 的新消息覆蓋排隊中的 b 並保持其位置
+    assert handled == [0, 4, 3]
+    assert dispatcher.stats()["dropped"] == 1 and dispatcher.stats()["conflated"] == 1
@@ -0,0 +1,111 @@
+import math
+import threading
+import time
+
+import pytest
+
+from coinwapi.exceptions import CoinWAPIError
+from coinwapi.simulator import ExchangeSimulator, SimulatorConfig
+
+
+def _batch_requests(sim):
+    return sim.stats()["endpoints"].get("/v1/perpum/batchOrders", 0)
+
+
+def _raw_order(index, direction="long"):
+    return {
+        "instrument": "BTC", "direction": direction, "leverage": 10, "quantityUnit": 0,
+        "quantity": 1, "positionModel": 1, "positionType": "plan", "openPrice": 1000 + index,
+    }
+
+
+@pytest.fixture
+def sim():
+    with ExchangeSimulator(SimulatorConfig(push_interval=3600, seed=9)) as simulator:
+        yield simulator
+
+
+def test_threaded_buy_limits_coalesce_into_batches(sim):
+    client = sim.future_client()
+    count, max_batch = 23, 5
+    barrier = threading.Barrier(count)
+    futures = [None] * count
+
+    with client.create_order_gateway(window=0.5, max_batch=max_batch) as gateway:
+        def submit(index):
+            barrier.wait()
+            futures[index] = gateway.buy_limit("BTC", 1, 1000 + index, 10)
+
+        threads = [threading.Thread(target=submit, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert all(result["code"] == 0 and result["data"]["value"] for result in results)
+    assert len({result["data"]["value"] for result in results}) == count
+    assert _batch_requests(sim) == math.ceil(count / max_batch)
+    assert gateway.stats() == {"submitted": count, "requests": 5, "batches": 5}
+
+
+def test_full_batch_flushes_before_window(sim):
+    client = sim.future_client()
+    with client.create_order_gateway(window=10, max_batch=3) as gateway:
+        started = time.monotonic()
+        futures = [gateway.submit_order(_raw_order(index)) for index in range(3)]
+        for future in futures:
+            assert future.result(timeout=5)["code"] == 0
+        assert time.monotonic() - started < 5
+    assert _batch_requests(sim) == 1
+
+
+def test_partial_batch_flushes_after_window(sim):
+    client = sim.future_client()
+    window = 0.2
+    with client.create_order_gateway(window=window, max_batch=20) as gateway:
+        started = time.monotonic()
+        futures = [gateway.submit_order(_raw_order(index)) for index in range(2)]
+        for future in futures:
+            future.result(timeout=5)
+        assert time.monotonic() - started >= window * 0.9
+
+        # 窗口內只有一筆時使用單筆下單接口
+        single = gateway.buy_limit("BTC", 1, 999, 10).result(timeout=5)
+        assert single["code"] == 0
+    assert _batch_requests(sim) == 1
+    assert sim.stats()["endpoints"].get("/v1/perpum/order") == 1
+
+
+def test_item_errors_reach_only_their_callers(sim):
+    client = sim.future_client()
+    with client.create_order_gateway(window=0.2, max_batch=20) as gateway:
+        good = [gateway.submit_order(_raw_order(index)) for index in range(3)]
+        bad = gateway.submit_order(_raw_order(3, direction="up"))
+        with pytest.raises(CoinWAPIError):
+            bad.result(timeout=5)
+        assert all(future.result(timeout=5)["code"] == 0 for future in good)
+
+        order_ids = [future.result()["data"]["value"] for future in good]
+        cancels = [gateway.cancel_order(order_id) for order_id in order_ids + ["404"]]
+        assert all(future.result(timeout=5)["code"] == 0 for future in cancels[:3])
+        with pytest.raises(CoinWAPIError):
+            cancels[3].result(timeout=5)
+    assert _batch_requests(sim) == 2
+
+
+def test_submit_after_close_is_rejected_without_restarting(sim):
+    client = sim.future_client()
+    gateway = client.create_order_gateway(window=0.01)
+    assert gateway.buy_limit("BTC", 1, 1000, 10).result(timeout=5)["code"] == 0
+    gateway.close()
+
+    with pytest.raises(RuntimeError):
+        gateway.buy_limit("BTC", 1, 1000, 10)
+    with pytest.raises(RuntimeError):
+        gateway.cancel_order("1")
+    with pytest.raises(RuntimeError):
+        gateway.start()
+    assert gateway._thread is None
+    assert not [thread for thread in threading.enumerate() if thread.name == "coinw-gateway-flush" and thread.is_alive()]
+    assert gateway.stats()["submitted"] == 1
@@ -0,0 +1,114 @@
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+
+from coinwapi.exceptions import InvalidParameterError
+from coinwapi.instruments import FUTURE_INSTRUMENTS, InstrumentCache
+from coinwapi.simulator import ExchangeSimulator, SimulatorConfig
+
+
+def _wait(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class _VersionedFuture:
+    """每次加載返回遞增的 pricePrecision；gate 被清除時加載阻塞，fail 為 True 時加載失敗"""
+
+    def __init__(self):
+        self.calls = 0
+        self.gate = threading.Event()
+        self.gate.set()
+        self.fail = False
+
+    def get_instruments(self):
+        self.calls += 1
+        version = self.calls
+        assert self.gate.wait(5)
+        if self.fail:
+            raise ConnectionError("instruments unavailable")
+        return {"code": 0, "data": [{"name": "BTC", "base": "btc", "pricePrecision": version, "oneLotSize": 0.001}]}
+
+
+def test_lookups_index_simulator_metadata():
+    with ExchangeSimulator(SimulatorConfig(push_interval=3600, seed=12)) as sim:
+        cache = InstrumentCache(future=sim.future_client(), spot=sim.spot_client())
+        assert cache.age is None
+        assert cache.instrument("btc")["name"] == "BTC"
+        requests = sim.stats()["requests"]
+
+        # 合約名稱的各種寫法命中同一條記錄
+        assert cache.instrument("BTCUSDT") is cache.instrument("btc_usdt") is cache.instrument("BTC")
+        assert cache.face_value("BTC") == Decimal("0.001")
+        assert cache.tick_size("eth") == Decimal("0.01")
+        assert cache.instrument("DOGE") is None
+        with pytest.raises(InvalidParameterError):
+            cache.tick_size("DOGE")
+
+        tiers = cache.ladders("BTC")
+        assert [tier["ladder"] for tier in tiers] == sorted(tier["ladder"] for tier in tiers)
+        assert cache.leverage_tier("BTC", 0) is tiers[0]
+        assert cache.leverage_tier("BTC", tiers[0]["maxPiece"]) is tiers[0]
+        assert cache.leverage_tier("BTC", tiers[0]["maxPiece"] + 1) is tiers[1]
+        assert cache.leverage_tier("BTC", 10 ** 12) is tiers[-1]
+        assert cache.max_leverage("BTC") == tiers[0]["maxLeverage"]
+
+        # 現貨交易對與 pairCode 互查
+        assert cache.pair_code("btc-usdt") == "78"
+        assert cache.symbol_for_pair_code(79) == "ETH_USDT"
+        assert cache.spot_symbol("78") is cache.spot_symbol("BTC/USDT")
+        assert cache.spot_tick_size("78") == Decimal("0.1")
+        assert cache.spot_lot_size("BTC_USDT") == Decimal("0.0001")
+        assert cache.currency("btc") is cache.currency(cache.currency("BTC")["symbolId"])
+
+        # 有效期內的查詢不再請求接口
+        assert sim.stats()["requests"] == requests
+        assert cache.errors == {}
+
+
+def test_expired_data_refreshes_in_background():
+    source = _VersionedFuture()
+    cache = InstrumentCache(future=source, ttl=0.05, load_ladders=False)
+    assert cache.tick_size("BTC") == Decimal("0.1")
+    assert cache.tick_size("BTC") == Decimal("0.1")
+    assert source.calls == 1
+
+    time.sleep(0.1)
+    source.gate.clear()
+    # 過期後繼續返回舊數據，只啟動一次刷新
+    for _ in range(5):
+        assert cache.tick_size("BTC") == Decimal("0.1")
+    assert _wait(lambda: source.calls == 2)
+    assert cache.tick_size("BTC") == Decimal("0.1")
+    assert source.calls == 2
+
+    source.gate.set()
+    assert _wait(lambda: cache.tick_size("BTC") == Decimal("0.01"))
+    assert cache.age < 1
+
+
+def test_failed_refresh_keeps_previous_data():
+    source = _VersionedFuture()
+    cache = InstrumentCache(future=source, load_ladders=False)
+    assert cache.refresh() == {}
+
+    source.fail = True
+    errors = cache.refresh()
+    assert list(errors) == [FUTURE_INSTRUMENTS] and "unavailable" in errors[FUTURE_INSTRUMENTS]
+    assert cache.errors == errors
+    assert cache.tick_size("BTC") == Decimal("0.1")
+
+    source.fail = False
+    assert cache.refresh() == {}
+    assert cache.tick_size("BTC") == Decimal("0.001")
+
+
+def test_requires_a_source():
+    with pytest.raises(InvalidParameterError):
+        InstrumentCache()
@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+
+from coinwapi.kline_store import SPOT, KlineStore
+from coinwapi.simulator import ExchangeSimulator
+
+STEP = 60 * 1000
+
+
+def _bar(ts, close=1.0):
+    return ts, close, close, close, close, 1.0
+
+
+def _ts(columns):
+    return [int(value) for value in columns["ts"]]
+
+
+def test_append_load_and_reopen(tmp_path):
+    store = KlineStore(str(tmp_path))
+    assert store.append(SPOT, "BTC_USDT", 60, [_bar(0), _bar(STEP), _bar(2 * STEP)]) == 3
+    # 不晚於最後一根的K線被忽略
+    assert store.append(SPOT, "BTC_USDT", 60, [_bar(STEP), _bar(3 * STEP, 2.0)]) == 1
+
+    reopened = KlineStore(str(tmp_path))
+    assert reopened.last_ts(SPOT, "btc_usdt", 60) == 3 * STEP
+    columns = reopened.load(SPOT, "BTC_USDT", 60)
+    assert _ts(columns) == [0, STEP, 2 * STEP, 3 * STEP]
+    assert list(columns["close"]) == [1.0, 1.0, 1.0, 2.0]
+
+
+def test_partial_write_is_truncated(tmp_path):
+    store = KlineStore(str(tmp_path))
+    store.append(SPOT, "BTC_USDT", 60, [_bar(0), _bar(STEP)])
+    path = os.path.join(str(tmp_path), SPOT, "BTC_USDT", "60")
+    # 模擬寫入中斷：只有 ts 列多寫了一條記錄
+    with open(os.path.join(path, "ts"), "ab") as f:
+        f.write(b"\x00" * 8)
+
+    reopened = KlineStore(str(tmp_path))
+    assert reopened.last_ts(SPOT, "BTC_USDT", 60) == STEP
+    reopened.append(SPOT, "BTC_USDT", 60, [_bar(2 * STEP)])
+    assert _ts(reopened.load(SPOT, "BTC_USDT", 60)) == [0, STEP, 2 * STEP]
+
+
+def test_recorder_bootstraps_empty_store_and_tops_up_off_receive_thread(tmp_path):
+    store = KlineStore(str(tmp_path))
+    with ExchangeSimulator() as sim:
+        client = sim.spot_client()
+        top_up_threads = []
+
+        def top_up():
+            top_up_threads.append(threading.current_thread())
+            return store.top_up_spot(client, "BTC_USDT", 60)
+
+        recorder = store.recorder(SPOT, "BTC_USDT", 60, STEP, top_up=top_up)
+        minute = int(time.time()) // 60 * 60 * 1000
+        start = minute - 10 * STEP
+
+        # 存儲為空：從第一根已收盤的推送K線開始寫入，不調用需要 start 的補齊
+        recorder.on_candle(_bar(start))
+        recorder.on_candle(_bar(start, 2.0))
+        recorder.on_candle(_bar(start + STEP))
+        assert _ts(recorder.load()) == [start]
+        assert list(recorder.load()["close"]) == [2.0]
+        assert top_up_threads == []
+
+        # 連續的K線直接追加
+        recorder.on_candle(_bar(start + 3 * STEP))
+        assert _ts(recorder.load()) == [start, start + STEP]
+
+        # 推送中斷：start + 2 * STEP 缺失，在後台線程補齊
+        recorder.on_candle(_bar(start + 5 * STEP))
+        assert recorder.wait_top_up(5)
+        assert len(top_up_threads) == 1
+        assert top_up_threads[0] is not threading.current_thread()
+
+    stored = _ts(recorder.load())
+    assert stored[0] == start
+    assert stored[-1] >= minute - STEP
+    assert all(later - earlier == STEP for earlier, later in zip(stored, stored[1:]))
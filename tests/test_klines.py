@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from coinwapi.exceptions import CoinWAPIError, InvalidParameterError
+from coinwapi.klines import (
+    COLUMNS,
+    FUTURES_MAX_BARS,
+    fetch_spot_bars,
+    future_bars_to_fetch,
+    future_klines_to_columns,
+    load_spot_klines,
+    merge_bars,
+)
+from coinwapi.simulator import ExchangeSimulator, SimulatorConfig
+
+PERIOD = 60
+STEP = PERIOD * 1000
+ORIGIN = 1_700_000_000_000 // STEP * STEP
+
+
+class _FakeSpotMarket:
+    """每次最多返回 cap 根（窗口內最新的），最新的在前"""
+
+    def __init__(self, count, cap=1000, fail_on=None):
+        self.bars = {ORIGIN + index * STEP: index for index in range(count)}
+        self.cap = cap
+        self.fail_on = fail_on
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get_kline(self, symbol, period, start, end):
+        start, end = int(start), int(end)
+        with self.lock:
+            self.calls.append((start, end))
+        if self.fail_on is not None and start <= self.fail_on <= end:
+            return {"success": False, "error": "HTTP 500", "message": "boom"}
+        rows = sorted((ts for ts in self.bars if start <= ts <= end), reverse=True)[:self.cap]
+        return {"code": "200", "data": [self._row(ts) for ts in rows]}
+
+    def _row(self, ts):
+        value = self.bars[ts]
+        return {"date": ts, "open": value, "high": value + 2, "low": value - 1, "close": value + 1, "volume": 10 + value}
+
+
+def test_spot_backfill_splits_windows_and_returns_sorted_unique_columns():
+    market = _FakeSpotMarket(count=3500)
+    end = ORIGIN + 3499 * STEP
+    columns = load_spot_klines(market, "BTC_USDT", PERIOD, ORIGIN, end, window_bars=1500, max_workers=3)
+
+    assert set(columns) == set(COLUMNS)
+    assert list(columns["ts"]) == [ORIGIN + index * STEP for index in range(3500)]
+    assert list(columns["open"][:3]) == [0.0, 1.0, 2.0]
+    assert list(columns["high"][:2]) == [2.0, 3.0]
+    assert list(columns["low"][:2]) == [-1.0, 0.0]
+    assert list(columns["close"][-1:]) == [3500.0]
+    assert list(columns["volume"][-1:]) == [3509.0]
+
+    # 3 個窗口；每窗口 1500 根但接口上限 1000 根，需要向前補齊一次
+    window_starts = sorted({start for start, _ in market.calls})
+    assert window_starts == [ORIGIN, ORIGIN + 1500 * STEP, ORIGIN + 3000 * STEP]
+    assert len(market.calls) == 5
+    for start, finish in market.calls:
+        assert finish - start < 1500 * STEP
+
+
+def test_spot_backfill_respects_range_and_dedupes_overlaps():
+    market = _FakeSpotMarket(count=100)
+    start, end = ORIGIN + 10 * STEP, ORIGIN + 19 * STEP
+    bars = fetch_spot_bars(market, "BTC_USDT", PERIOD, start, end, window_bars=3, max_workers=1)
+    assert [bar[0] for bar in bars] == [ORIGIN + index * STEP for index in range(10, 20)]
+
+    merged = merge_bars([[(2, 1, 1, 1, 1, 1), (1, 0, 0, 0, 0, 0)], [(2, 9, 9, 9, 9, 9)]])
+    assert merged == [(1, 0, 0, 0, 0, 0), (2, 9, 9, 9, 9, 9)]
+
+
+def test_spot_backfill_errors():
+    market = _FakeSpotMarket(count=100, fail_on=ORIGIN + 50 * STEP)
+    with pytest.raises(CoinWAPIError):
+        fetch_spot_bars(market, "BTC_USDT", PERIOD, ORIGIN, ORIGIN + 99 * STEP, window_bars=20, max_workers=2)
+    with pytest.raises(InvalidParameterError):
+        fetch_spot_bars(market, "BTC_USDT", PERIOD, ORIGIN + STEP, ORIGIN)
+    with pytest.raises(InvalidParameterError):
+        fetch_spot_bars(market, "BTC_USDT", 0, ORIGIN, ORIGIN + STEP)
+
+
+def test_future_response_columns_swap_open_and_high():
+    response = {"code": 0, "data": [
+        ["3000", "12", "10", "9", "11", "5"],
+        ["1000", "14", "13", "12", "13.5", "1"],
+        ["2000", "15", "13.5", "13", "14", "2"],
+        ["3000", "12", "10", "9", "11.5", "6"],
+    ]}
+    columns = future_klines_to_columns(response)
+    assert list(columns["ts"]) == [1000, 2000, 3000]
+    assert list(columns["open"]) == [13.0, 13.5, 10.0]
+    assert list(columns["high"]) == [14.0, 15.0, 12.0]
+    assert list(columns["close"]) == [13.5, 14.0, 11.5]
+    assert list(columns["volume"]) == [1.0, 2.0, 6.0]
+
+    assert list(future_klines_to_columns(response, start=2000, end=2000)["ts"]) == [2000]
+    assert list(future_klines_to_columns({"code": 0, "data": None})["ts"]) == []
+
+
+def test_future_bars_to_fetch():
+    assert future_bars_to_fetch("0", None) == FUTURES_MAX_BARS
+    now = int(time.time() * 1000)
+    assert future_bars_to_fetch("3", now - 10 * 3600 * 1000) in (11, 12)
+    assert future_bars_to_fetch("0", now - 10 ** 10) == FUTURES_MAX_BARS
+    with pytest.raises(InvalidParameterError):
+        future_bars_to_fetch("x", None)
+
+
+def test_klines_history_against_simulator():
+    with ExchangeSimulator(SimulatorConfig(push_interval=3600, seed=3)) as sim:
+        client = sim.future_client()
+        start = (int(time.time()) // 60 - 30) * 60 * 1000
+        columns = client.get_klines_history("BTC", "0", start=start)
+        ts = list(columns["ts"])
+        assert ts == sorted(set(ts))
+        assert ts[0] == start and len(ts) in (31, 32)
+        assert all(low <= high for low, high in zip(columns["low"], columns["high"]))
@@ -0,0 +1,55 @@
+from coinwapi.instrumentation import default_instrumentation
+from coinwapi.metrics import MetricsRegistry
+from coinwapi.simulator import ExchangeSimulator, SimulatorConfig
+
+
+def _requests(registry):
+    return {name: endpoint["requests"] for name, endpoint in registry.snapshot()["endpoints"].items()}
+
+
+def test_each_client_registry_records_only_its_own_requests():
+    with ExchangeSimulator(SimulatorConfig(push_interval=3600, seed=7)) as sim:
+        client_a = sim.future_client()
+        client_b = sim.future_client()
+        spot = sim.spot_client()
+
+        registry_a = client_a.enable_metrics()
+        client_a.get_ticker("BTC")
+        client_a.get_ticker("ETH")
+        client_b.get_ticker("BTC")
+        spot.get_ticker()
+
+        assert _requests(registry_a) == {"GET /v1/perpumPublic/ticker": 2}
+        # 其他客戶端沒有因此開始計時
+        assert not default_instrumentation._listeners
+        assert client_b.instrumentation is default_instrumentation
+        # 子模組與客戶端共用收集點
+        assert client_a._market.instrumentation is client_a.instrumentation
+
+        connections = registry_a.snapshot()["connections"]["futures"]
+        assert connections["requests"] == 2
+        assert connections["connections"] == 1
+
+        registry_spot = spot.enable_metrics()
+        spot.get_ticker()
+        client_a.get_ticker("BTC")
+        assert _requests(registry_spot) == {"GET /api/v1/public?command=returnTicker": 1}
+        assert _requests(registry_a) == {"GET /v1/perpumPublic/ticker": 3}
+        managers = [spot._market._http_manager, spot._order._http_manager, spot._account._http_manager]
+        assert len({id(manager._instrumentation) for manager in managers}) == 1
+
+
+def test_shared_registry_aggregates_clients():
+    with ExchangeSimulator(SimulatorConfig(push_interval=3600, seed=8)) as sim:
+        client_a = sim.future_client()
+        client_b = sim.future_client()
+        registry = MetricsRegistry()
+        client_a.enable_metrics(registry)
+        client_b.enable_metrics(registry)
+        # 重複啟用不會重複計數
+        client_a.enable_metrics(registry)
+
+        client_a.get_ticker("BTC")
+        client_b.get_ticker("BTC")
+        assert _requests(registry) == {"GET /v1/perpumPublic/ticker": 2}
+        assert registry.snapshot()["connections"]["futures"]["requests"] == 2
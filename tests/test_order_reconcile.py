@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+
+from coinwapi.exceptions import NetworkError, OrderStatusUnknownError, RateLimitError, ServerError
+from coinwapi.future.async_client import AsyncFutureOrder
+from coinwapi.future.http_manager import ContractHTTPConfig
+from coinwapi.future.order import FutureOrder
+
+ORDER = {"instrument": "BTC", "positionType": "plan", "direction": "long", "thirdOrderId": "abc123"}
+
+
+def _config(**kwargs):
+    defaults = dict(rate_limit=False, backoff_factor=0, order_confirm_timeout=0.2, order_confirm_interval=0.01)
+    defaults.update(kwargs)
+    return ContractHTTPConfig(**defaults)
+
+
+class _Exchange:
+    """
+    記錄下單請求的假交易所：responses 依次為每次下單的結果（異常或響應），
+    訂單在第 visible_after 次查詢後才出現在當前訂單中（None 表示一直不可見）
+    """
+
+    def __init__(self, responses, visible_after=None):
+        self.responses = list(responses)
+        self.visible_after = visible_after
+        self.posts = []
+        self.lookups = 0
+
+    def submit(self, method, path, query, auth):
+        if method == "POST":
+            self.posts.append(dict(query))
+            response = self.responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        raise AssertionError(f"unexpected {method} {path}")
+
+    def open_orders(self):
+        self.lookups += 1
+        rows = []
+        if self.visible_after is not None and self.lookups >= self.visible_after:
+            rows = [{"id": 42, "thirdOrderId": ORDER["thirdOrderId"]}]
+        return {"code": 0, "data": {"rows": rows}}
+
+
+class FakeOrder(FutureOrder):
+    def __init__(self, exchange, **config):
+        super().__init__("key", "secret", _config(**config))
+        self.exchange = exchange
+
+    def _submit_request(self, method, path, query=None, auth=False):
+        return self.exchange.submit(method, path, query, auth)
+
+    def get_open_orders(self, instrument, position_type, page=None, page_size=None):
+        return self.exchange.open_orders()
+
+    def get_order_history(self, instrument=None, page=None, page_size=None, origin_type=None):
+        return {"code": 0, "data": {"rows": []}}
+
+
+class FakeAsyncOrder(AsyncFutureOrder):
+    def __init__(self, exchange, **config):
+        super().__init__("key", "secret", _config(**config))
+        self.exchange = exchange
+
+    async def _submit_request(self, method, path, query=None, auth=False):
+        return self.exchange.submit(method, path, query, auth)
+
+    async def get_open_orders(self, instrument, position_type, page=None, page_size=None):
+        return self.exchange.open_orders()
+
+    async def get_order_history(self, instrument=None, page=None, page_size=None, origin_type=None):
+        return {"code": 0, "data": {"rows": []}}
+
+
+@pytest.mark.parametrize("error", [NetworkError("timeout"), ServerError("502")])
+def test_ambiguous_error_confirms_late_visible_order_without_resubmitting(error):
+    exchange = _Exchange([error], visible_after=3)
+    result = FakeOrder(exchange)._place_order_request(dict(ORDER))
+    assert result == {"code": 0, "data": {"value": 42}, "msg": ""}
+    assert len(exchange.posts) == 1
+    assert exchange.lookups == 3
+
+
+def test_unconfirmed_order_is_surfaced_not_resubmitted():
+    error = ServerError("502")
+    exchange = _Exchange([error, {"code": 0, "data": {"value": 1}}])
+    with pytest.raises(OrderStatusUnknownError) as info:
+        FakeOrder(exchange)._place_order_request(dict(ORDER))
+    assert info.value.third_order_id == "abc123"
+    assert info.value.__cause__ is error
+    assert len(exchange.posts) == 1
+    # 一直輪詢到期限，而不是只查一次
+    assert exchange.lookups > 3
+
+
+def test_lookup_failures_do_not_trigger_resubmit():
+    class FailingLookup(FakeOrder):
+        def get_open_orders(self, *args, **kwargs):
+            self.exchange.lookups += 1
+            raise NetworkError("lookup failed")
+
+    exchange = _Exchange([NetworkError("timeout")])
+    with pytest.raises(OrderStatusUnknownError):
+        FailingLookup(exchange)._place_order_request(dict(ORDER))
+    assert len(exchange.posts) == 1
+
+
+def test_ambiguous_error_without_third_order_id_is_raised_as_is():
+    error = NetworkError("timeout")
+    exchange = _Exchange([error])
+    order = {key: value for key, value in ORDER.items() if key != "thirdOrderId"}
+    with pytest.raises(NetworkError) as info:
+        FakeOrder(exchange)._place_order_request(order)
+    assert info.value is error
+    assert exchange.lookups == 0
+
+
+def test_rate_limited_order_is_resubmitted():
+    exchange = _Exchange([RateLimitError("429"), RateLimitError("429"), {"code": 0, "data": {"value": 7}}])
+    result = FakeOrder(exchange, order_retries=2)._place_order_request(dict(ORDER))
+    assert result["data"]["value"] == 7
+    assert len(exchange.posts) == 3
+    assert exchange.lookups == 0
+
+    exchange = _Exchange([RateLimitError("429")] * 2)
+    with pytest.raises(RateLimitError):
+        FakeOrder(exchange, order_retries=1)._place_order_request(dict(ORDER))
+    assert len(exchange.posts) == 2
+
+
+def test_third_order_id_is_opt_in():
+    args = ("BTC", "long", 10, 0, 100, 1, "plan")
+    assert "thirdOrderId" not in FakeOrder(_Exchange([])).build_order_params(*args)
+    generated = FakeOrder(_Exchange([]), auto_third_order_id=True).build_order_params(*args)
+    assert len(generated["thirdOrderId"]) == 32
+    explicit = FakeOrder(_Exchange([])).build_order_params(*args, third_order_id="mine")
+    assert explicit["thirdOrderId"] == "mine"
+
+
+def test_async_order_reconcile_matches_sync():
+    exchange = _Exchange([NetworkError("timeout")], visible_after=2)
+    result = asyncio.run(FakeAsyncOrder(exchange)._place_order_request(dict(ORDER)))
+    assert result["data"]["value"] == 42
+    assert len(exchange.posts) == 1
+
+    exchange = _Exchange([ServerError("502")])
+    with pytest.raises(OrderStatusUnknownError):
+        asyncio.run(FakeAsyncOrder(exchange)._place_order_request(dict(ORDER)))
+    assert len(exchange.posts) == 1
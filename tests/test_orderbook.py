@@ -0,0 +1,88 @@
+import time
+from decimal import Decimal
+
+import pytest
+
+from coinwapi.future.ws_client import CoinWFutureWebSocketClient
+from coinwapi.orderbook import OrderBook
+from coinwapi.simulator import ExchangeSimulator, SimulatorConfig
+
+
+def test_levels_are_ordered_best_first_and_zero_removes():
+    book = OrderBook("BTC")
+    book.update_levels(bids=[("99", "1"), ("101", "2"), ("100", "3")], asks=[("103", "1"), ("102", "4")], sequence=7)
+    assert book.best_bid() == (101.0, 2.0)
+    assert book.best_ask() == (102.0, 4.0)
+    assert book.top(2)["bids"] == [(101.0, 2.0), (100.0, 3.0)]
+    assert book.top(None)["asks"] == [(102.0, 4.0), (103.0, 1.0)]
+    assert book.sequence == 7
+    assert book.spread() == 1.0
+    assert book.mid_price() == 101.5
+
+    book.update("bids", "101", "0")
+    book.update("ask", "102", "5")
+    assert book.best_bid() == (100.0, 3.0)
+    assert book.size_at("asks", "102") == 5.0
+    assert book.size_at("bids", "101") == 0
+    assert book.bid_depth == 2
+    assert book.top(0) == {"bids": [], "asks": [], "timestamp": None, "sequence": 7}
+
+    with pytest.raises(ValueError):
+        book.update("middle", "1", "1")
+
+
+def test_futures_depth_replaces_the_whole_book():
+    book = OrderBook("BTC", number_type=Decimal)
+    book.apply_futures_depth({
+        "asks": [{"p": "101.5", "m": "2"}, {"p": "101.0", "m": "1"}],
+        "bids": [{"p": "100.5", "m": "3"}, {"p": "100.0", "m": "0"}],
+    })
+    assert book.best_ask() == (Decimal("101.0"), Decimal("1"))
+    assert book.bid_depth == 1
+
+    # 每次推送都是完整的前100檔，不在推送中的檔位必須被移除
+    book.apply_futures_depth({"asks": [{"p": "102", "m": "1"}], "bids": []})
+    assert book.snapshot() == {"bids": [], "asks": [(Decimal("102"), Decimal("1"))], "timestamp": None, "sequence": None}
+
+    book.clear()
+    assert book.best_bid() is None and book.spread() is None and book.mid_price() is None
+
+
+def _wait(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_client_book_tracks_simulator_depth():
+    with ExchangeSimulator(SimulatorConfig(push_interval=3600, seed=2)) as sim:
+        server_book = sim.market.future_book("BTC")
+        client = CoinWFutureWebSocketClient(ws_url=sim.futures_ws_url, order_book=True)
+        assert client.connect()
+        try:
+            assert _wait(client.is_connected)
+            client.subscribe({"event": "sub", "params": {"biz": "futures", "pairCode": "btc", "type": "depth"}})
+
+            def matches_server():
+                book = client.get_order_book("btc")
+                if book is None:
+                    return False
+                with sim.market.lock:
+                    expected = {
+                        "bids": sorted(((float(server_book.price(i)), round(s, 4)) for i, s in server_book.bids.items()), reverse=True),
+                        "asks": sorted((float(server_book.price(i)), round(s, 4)) for i, s in server_book.asks.items()),
+                    }
+                snapshot = book.snapshot()
+                return snapshot["bids"] == expected["bids"] and snapshot["asks"] == expected["asks"]
+
+            # 訂閱時立即推送一次完整深度
+            assert _wait(matches_server)
+            for _ in range(3):
+                sim.tick()
+                assert _wait(matches_server)
+            assert client.get_order_book("ETH") is None
+        finally:
+            client.close()
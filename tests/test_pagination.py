@@ -0,0 +1,142 @@
+import asyncio
+import threading
+
+import pytest
+
+from coinwapi.exceptions import CoinWAPIError, InvalidParameterError
+from coinwapi.pagination import aiter_pages, cursor_parser, extract_rows, iter_pages, page_number_parser
+from coinwapi.simulator import ExchangeSimulator, SimulatorConfig
+
+
+def _rows(ids, base=1000):
+    return [{"id": row_id, "createdDate": base - row_id} for row_id in ids]
+
+
+class _PagedSource:
+    """頁碼分頁的假接口，記錄按時間倒序；pages 中可包含跨頁重複"""
+
+    def __init__(self, pages, total=None):
+        self.pages = pages
+        self.total = total
+        self.requested = []
+
+    def __call__(self, page):
+        self.requested.append(page)
+        rows = self.pages[page - 1] if page <= len(self.pages) else []
+        return {"code": 0, "data": {"rows": rows, "total": self.total}}
+
+
+def test_page_number_iteration_dedupes_across_pages():
+    # 翻頁期間插入新記錄導致第2頁重複返回第1頁末尾的記錄
+    source = _PagedSource([_rows([1, 2, 3]), _rows([3, 4, 5]), _rows([6])])
+    ids = [row["id"] for row in iter_pages(source, page_number_parser(3), 1)]
+    assert ids == [1, 2, 3, 4, 5, 6]
+    assert source.requested == [1, 2, 3]
+
+
+def test_total_and_max_pages_stop_paging():
+    source = _PagedSource([_rows([1, 2]), _rows([3, 4]), _rows([5, 6])], total=4)
+    assert [row["id"] for row in iter_pages(source, page_number_parser(2), 1)] == [1, 2, 3, 4]
+    assert source.requested == [1, 2]
+
+    source = _PagedSource([_rows([1, 2]), _rows([3, 4]), _rows([5, 6])])
+    assert len(list(iter_pages(source, page_number_parser(2), 1, max_pages=2, prefetch=False))) == 4
+    assert source.requested == [1, 2]
+
+
+def test_since_stops_paging_and_until_filters():
+    source = _PagedSource([_rows([1, 2, 3]), _rows([4, 5, 6]), _rows([7, 8, 9])])
+    rows = iter_pages(source, page_number_parser(3), 1, time_field="createdDate", since=1000 - 5, until=1000 - 2)
+    assert [row["id"] for row in rows] == [2, 3, 4, 5]
+    # 第2頁出現早於 since 的記錄後不再請求第3頁
+    assert source.requested == [1, 2]
+
+    with pytest.raises(InvalidParameterError):
+        list(iter_pages(source, page_number_parser(3), 1, since=1))
+
+
+def test_next_page_is_prefetched_while_caller_consumes():
+    release = threading.Event()
+    fetching = threading.Event()
+    pages = [_rows([1, 2]), _rows([3])]
+
+    def fetch(page):
+        if page == 2:
+            fetching.set()
+            release.wait(5)
+        return {"code": 0, "data": {"rows": pages[page - 1]}}
+
+    iterator = iter_pages(fetch, page_number_parser(2), 1)
+    assert next(iterator)["id"] == 1
+    # 調用方仍在處理第1頁時第2頁已在後台請求
+    assert fetching.wait(5)
+    release.set()
+    assert [row["id"] for row in iterator] == [2, 3]
+
+
+def test_early_close_cancels_prefetch():
+    source = _PagedSource([_rows([1, 2]), _rows([3, 4]), _rows([5, 6])])
+    iterator = iter_pages(source, page_number_parser(2), 1)
+    assert next(iterator)["id"] == 1
+    iterator.close()
+    assert source.requested in ([1], [1, 2])
+
+
+def test_cursor_parser_follows_after_then_last_id():
+    pages = {
+        None: {"data": {"list": [{"tradeId": "9"}, {"tradeId": "8"}], "after": "8"}},
+        "8": {"data": [{"tradeId": "7"}, {"tradeId": "6"}]},
+        "6": {"data": [{"tradeId": "5"}]},
+    }
+    requested = []
+
+    def fetch(cursor):
+        requested.append(cursor)
+        return pages[cursor]
+
+    rows = iter_pages(fetch, cursor_parser(2, "tradeId"), None, id_field="tradeId")
+    assert [row["tradeId"] for row in rows] == ["9", "8", "7", "6", "5"]
+    assert requested == [None, "8", "6"]
+
+
+def test_error_responses_raise():
+    with pytest.raises(CoinWAPIError):
+        extract_rows({"success": False, "message": "denied"})
+    with pytest.raises(CoinWAPIError):
+        extract_rows(None)
+    with pytest.raises(CoinWAPIError):
+        list(iter_pages(lambda page: {"success": False, "message": "x"}, page_number_parser(2), 1))
+
+
+def test_async_iteration_matches_sync():
+    source = _PagedSource([_rows([1, 2]), _rows([2, 3]), _rows([4])])
+
+    async def fetch(page):
+        await asyncio.sleep(0)
+        return source(page)
+
+    async def collect():
+        return [row["id"] async for row in aiter_pages(fetch, page_number_parser(2), 1)]
+
+    assert asyncio.run(collect()) == [1, 2, 3, 4]
+    assert source.requested == [1, 2, 3]
+
+
+def test_iter_order_history_against_simulator():
+    with ExchangeSimulator(SimulatorConfig(push_interval=3600, seed=4)) as sim:
+        client = sim.future_client()
+        for _ in range(12):
+            response = client.place_order(
+                instrument="BTC", direction="long", leverage=10, quantity_unit=0,
+                quantity=1, position_model=1, position_type="execute"
+            )
+            assert response["code"] == 0
+        sim.reset_stats()
+
+        orders = list(client.iter_order_history("BTC", page_size=5))
+        assert len(orders) == 12
+        assert len({order["id"] for order in orders}) == 12
+        created = [order["createdDate"] for order in orders]
+        assert created == sorted(created, reverse=True)
+        # 12 條記錄，每頁5條：total 命中後不再請求第4頁
+        assert sim.stats()["requests"] == 3
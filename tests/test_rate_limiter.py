@@ -0,0 +1,128 @@
+import pytest
+
+from coinwapi import rate_limiter
+from coinwapi.rate_limiter import FUTURES_RATE_LIMITS, SPOT_RATE_LIMITS, RateLimiter, RateLimitRule, TokenBucket
+from coinwapi.simulator import ExchangeSimulator
+from coinwapi.spot.http_manager import SpotHTTPManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", fake)
+    return fake
+
+
+def _greedy_schedule(rule, clock, duration, step=0.001):
+    """在 duration 秒內盡可能快地發送請求，返回放行時間"""
+    bucket = TokenBucket(rule.rate, rule.capacity)
+    sent = []
+    end = clock.now + duration
+    while clock.now < end:
+        if bucket.reserve(rule.weight) == 0:
+            sent.append(clock.now)
+        else:
+            clock.now += step
+    return sent
+
+
+@pytest.mark.parametrize("limit,seconds", [(1, 2), (2, 2), (5, 2), (10, 2), (5, 1), (10, 1)])
+def test_window_rule_never_exceeds_documented_limit(clock, limit, seconds):
+    rule = RateLimitRule.window("/x", limit, seconds)
+    sent = _greedy_schedule(rule, clock, seconds * 5)
+    for index, started in enumerate(sent):
+        in_window = [t for t in sent[index:] if t < started + seconds - 1e-9]
+        assert len(in_window) <= limit
+    # 仍然能達到文檔允許的平均速率
+    assert len(sent) >= limit * 5 * 0.95
+
+
+@pytest.mark.parametrize("path,limit,seconds", [
+    ("/v1/perpum/account/getUserAssets", 5, 2),
+    ("/v1/perpum/account/fees", 2, 2),
+    ("/v1/perpum/account/almightyGoldInfo", 1, 2),
+])
+def test_futures_defaults_cover_documented_endpoints(clock, path, limit, seconds):
+    limiter = RateLimiter(FUTURES_RATE_LIMITS, max_wait=0)
+    allowed = 0
+    for _ in range(limit * 3):
+        try:
+            limiter.acquire(path)
+            allowed += 1
+        except rate_limiter.RateLimitError:
+            pass
+    assert 1 <= allowed <= limit
+    # 其他接口使用獨立的桶
+    limiter.acquire("/v1/perpum/account/available")
+
+
+def _admitted_in_window(limiter, key, clock, seconds, step=0.001):
+    """在一個窗口內每 step 秒嘗試一次，返回放行的請求數"""
+    admitted = 0
+    end = clock.now + seconds - 1e-9
+    while clock.now < end:
+        try:
+            limiter.acquire(key)
+            admitted += 1
+        except rate_limiter.RateLimitError:
+            pass
+        clock.now += step
+    return admitted
+
+
+@pytest.mark.parametrize("rules,key,limit,seconds", [
+    (SPOT_RATE_LIMITS, "/api/v1/public?command=returnTicker", 80, 1),
+    (SPOT_RATE_LIMITS, "/api/v1/public?command=returnSymbol", 80, 1),
+    (SPOT_RATE_LIMITS, "/api/v1/public?command=returnCurrencies", 80, 1),
+    (SPOT_RATE_LIMITS, "/api/v1/public?command=returnOrderBook", 10, 1),
+    (SPOT_RATE_LIMITS, "/api/v1/private?command=returnOpenOrders", 3, 1),
+    (SPOT_RATE_LIMITS, "/api/v1/private?command=returnBalances", 3, 1),
+    (SPOT_RATE_LIMITS, "/api/v1/private?command=doTrade", 10, 2),
+    (SPOT_RATE_LIMITS, "/api/v1/private?command=cancelAllOrder", 5, 2),
+    (SPOT_RATE_LIMITS, "/api/v1/private?command=someOtherCommand", 30, 2),
+    (FUTURES_RATE_LIMITS, "/v1/perpumPublic/depth", 10, 2),
+    (FUTURES_RATE_LIMITS, "/v1/perpumPublic/ticker", 10, 2),
+    (FUTURES_RATE_LIMITS, "/v1/perpum/fundingRate", 8, 1),
+    (FUTURES_RATE_LIMITS, "/v1/perpum/positions", 5, 1),
+])
+def test_default_rules_admit_at_most_the_documented_count_per_window(clock, rules, key, limit, seconds):
+    limiter = RateLimiter(rules, max_wait=0)
+    admitted = _admitted_in_window(limiter, key, clock, seconds)
+    assert limit * 0.9 <= admitted <= limit
+    # 下一個窗口同樣不超過限制
+    assert _admitted_in_window(limiter, key, clock, seconds) <= limit
+
+
+def test_spot_commands_use_separate_buckets(clock):
+    limiter = RateLimiter(SPOT_RATE_LIMITS, max_wait=0)
+    limiter.acquire("/api/v1/private?command=doTrade")
+    limiter.acquire("/api/v1/private?command=cancelOrder")
+    with pytest.raises(rate_limiter.RateLimitError):
+        limiter.acquire("/api/v1/private?command=doTrade")
+
+
+def test_weight_larger_than_capacity_raises():
+    limiter = RateLimiter([RateLimitRule("/x", rate=1, capacity=2)])
+    with pytest.raises(ValueError):
+        limiter.acquire("/x", weight=3)
+    with pytest.raises(ValueError):
+        RateLimitRule("/x", rate=1, capacity=2, weight=3)
+
+
+def test_spot_rate_limit_returns_error_dict():
+    limiter = RateLimiter([RateLimitRule("/api/v1/public*", rate=0.01, capacity=1)], max_wait=0)
+    with ExchangeSimulator() as sim:
+        manager = SpotHTTPManager(base_url=sim.base_url, rate_limiter=limiter)
+        first = manager.spot_restful_public("/api/v1/public", {"command": "returnTicker"})
+        second = manager.spot_restful_public("/api/v1/public", {"command": "returnTicker"})
+    assert first.get("success") is not False
+    assert second == {"success": False, "error": "RateLimitError", "message": second["message"]}
+    assert sim.stats()["requests"] == 1
@@ -0,0 +1,124 @@
+import base64
+import hashlib
+import hmac
+import json
+
+import pytest
+
+from coinwapi.exceptions import InvalidCredentialsError
+from coinwapi.future import ContractHTTPConfig
+from coinwapi.future.http_manager import _ContractHTTPManager
+from coinwapi.signing import HMACSigner, MD5Signer
+from coinwapi.spot.http_manager import SpotHTTPManager
+
+API_KEY = "test-api-key"
+SECRET_KEY = "tEsT-秘密-key"
+TIMESTAMP = "1700000000123"
+
+
+def _baseline_hmac(secret_key, method, api_url, params, timestamp):
+    """原始 _ContractHTTPManager._generate_signature 的實現"""
+    if method.upper() == "GET":
+        query_params = "&".join(f"{key}={value}" for key, value in params.items() if value is not None)
+        if query_params:
+            encoded_params = f'{timestamp}{method}{api_url}?{query_params}'
+        else:
+            encoded_params = f'{timestamp}{method}{api_url}'
+    else:
+        json_body = json.dumps(params) if params else ""
+        encoded_params = f'{timestamp}{method}{api_url}{json_body}'
+    return base64.b64encode(
+        hmac.new(bytes(secret_key, 'utf-8'), msg=bytes(encoded_params, 'utf-8'), digestmod=hashlib.sha256).digest()
+    ).decode("US-ASCII")
+
+
+def _baseline_md5(api_key, secret_key, params):
+    """原始 SpotHTTPManager.generate_signature 的實現"""
+    if api_key:
+        params["api_key"] = api_key
+    sorted_params = sorted(params.items())
+    query_string = "&".join([f"{k}={v}" for k, v in sorted_params]) + "&"
+    sign_string = query_string + f"secret_key={secret_key}"
+    return hashlib.md5(sign_string.encode("utf-8")).hexdigest().upper()
+
+
+REQUESTS = [
+    ("GET", "/v1/perpum/orders/open", {"instrument": "BTC", "positionType": "plan"}),
+    ("GET", "/v1/perpum/orders/history", {"instrument": None, "page": 1, "pageSize": 100}),
+    ("GET", "/v1/perpum/account/fees", {}),
+    ("POST", "/v1/perpum/order", {"instrument": "BTC", "direction": "long", "leverage": 10, "quantity": 0.5,
+                                  "openPrice": None, "thirdOrderId": "中文-id"}),
+    ("POST", "/v1/perpum/batchOrders", {"orders": [{"instrument": "ETH", "quantity": "1"}, {"a": [1, 2.5, True]}]}),
+    ("DELETE", "/v1/perpum/batchOrders", {"sourceIds": ["1", "2", "3"]}),
+    ("PUT", "/v1/perpum/positions/type", {}),
+]
+
+
+@pytest.mark.parametrize("method,path,params", REQUESTS)
+def test_hmac_matches_baseline(method, path, params):
+    expected = _baseline_hmac(SECRET_KEY, method, path, dict(params), TIMESTAMP)
+    signer = HMACSigner(API_KEY, SECRET_KEY)
+
+    signed = signer.sign_request(method, path, params, TIMESTAMP)
+    assert signed.headers["sign"] == expected
+    assert signed.headers["api_key"] == API_KEY
+    assert signed.headers["timestamp"] == TIMESTAMP
+
+    # 簽名使用的請求體與原實現發送的請求體逐字節相同
+    if method == "GET":
+        assert signed.body is None and signed.params == params
+    else:
+        assert signed.body == (json.dumps(params) if params else "{}").encode("utf-8")
+        assert signed.headers["Content-type"] == "application/json"
+
+    manager = _ContractHTTPManager(API_KEY, SECRET_KEY, ContractHTTPConfig(rate_limit=False))
+    assert manager._generate_signature(method, path, params, TIMESTAMP) == expected
+
+
+def test_hmac_batch_shares_timestamp_and_rekeys():
+    signer = HMACSigner(API_KEY, SECRET_KEY)
+    signed = signer.sign_batch([(method, path, params) for method, path, params in REQUESTS], TIMESTAMP)
+    assert [request.headers["sign"] for request in signed] == [
+        _baseline_hmac(SECRET_KEY, method, path, dict(params), TIMESTAMP) for method, path, params in REQUESTS
+    ]
+
+    manager = _ContractHTTPManager(API_KEY, SECRET_KEY, ContractHTTPConfig(rate_limit=False))
+    first = manager.signer
+    assert manager.signer is first
+    manager.secret_key = "rotated"
+    assert manager.signer is not first
+    assert manager._generate_signature("GET", "/x", {"a": 1}, TIMESTAMP) == _baseline_hmac("rotated", "GET", "/x", {"a": 1}, TIMESTAMP)
+
+    with pytest.raises(InvalidCredentialsError):
+        HMACSigner(API_KEY, "")
+
+
+SPOT_PARAMS = [
+    {"command": "returnOpenOrders", "currencyPair": "BTC_USDT"},
+    {"command": "doTrade", "symbol": "BTC_USDT", "type": 0, "amount": 0.001, "rate": "65000.5", "out_trade_no": "單號"},
+    {"b": "2", "a": "1", "C": "3"},
+    {},
+]
+
+
+@pytest.mark.parametrize("params", SPOT_PARAMS)
+@pytest.mark.parametrize("api_key", [API_KEY, None])
+def test_md5_matches_baseline(params, api_key):
+    expected = _baseline_md5(api_key, SECRET_KEY, dict(params))
+    original = dict(params)
+
+    assert MD5Signer(api_key, SECRET_KEY).sign(params) == expected
+    assert params == original  # 不修改調用方的參數
+
+    signed = MD5Signer(api_key, SECRET_KEY).sign_params(params)
+    assert signed == {**params, "sign": expected}
+
+    manager = SpotHTTPManager(api_key=api_key, secret_key=SECRET_KEY, rate_limit=False)
+    assert manager.generate_signature(dict(params)) == expected
+
+
+def test_md5_requires_secret():
+    with pytest.raises(ValueError):
+        MD5Signer(API_KEY, "")
+    with pytest.raises(ValueError):
+        SpotHTTPManager(api_key=API_KEY).generate_signature({})
@@ -0,0 +1,197 @@
+import asyncio
+import math
+import threading
+import time
+
+import pytest
+
+from coinwapi.exceptions import CoinWAPIError, InvalidParameterError
+from coinwapi.future import ContractHTTPConfig
+from coinwapi.future.async_client import AsyncFutureClient
+from coinwapi.simulator import ExchangeSimulator, SimulatorConfig
+from coinwapi.snapshot import FIELD_COLUMNS, fetch_snapshot, fetch_snapshot_async
+
+INSTRUMENTS = ["BTC", "ETH", "SOL", "XRP", "ADA", "DOT", "LTC", "BNB"]
+
+
+def _row(table, name):
+    index = table["instrument"].index(name)
+    return {column: values[index] for column, values in table.items() if column not in ("instrument", "errors")}
+
+
+def _same(a, b):
+    return a.keys() == b.keys() and all(a[k] == b[k] or math.isnan(a[k]) and math.isnan(b[k]) for k in a)
+
+
+class _FakeMarket:
+    """每個請求耗時 delay 秒並記錄最大並行數；failures 中的 (方法, 品種) 拋出異常"""
+
+    def __init__(self, delay=0.05, failures=(), fail_tickers=False):
+        self.delay = delay
+        self.failures = set(failures)
+        self.fail_tickers = fail_tickers
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _respond(self, method, name):
+        if (method, name) in self.failures:
+            raise CoinWAPIError(f"{method} {name} failed")
+        if method == "get_tickers":
+            if self.fail_tickers:
+                raise CoinWAPIError("tickers failed")
+            return {"code": 0, "data": [{"name": n, "last_price": i + 1} for i, n in enumerate(INSTRUMENTS)]}
+        if method == "get_orderbook":
+            return {"code": 0, "data": {"bids": [{"p": 9, "m": 1}, {"p": 10, "m": 2}], "asks": [{"p": 11, "m": 3}]}}
+        if method == "get_last_funding_rate":
+            return {"code": 0, "data": {"value": 0.0001}}
+        return {"code": 0, "data": [{"price": 10, "quantity": 1, "createdDate": 2}, {"price": 9, "quantity": 5, "createdDate": 1}]}
+
+    def _call(self, method, name=None):
+        self._enter()
+        try:
+            time.sleep(self.delay)
+            return self._respond(method, name)
+        finally:
+            self._exit()
+
+    def get_tickers(self):
+        return self._call("get_tickers")
+
+    def get_orderbook(self, name):
+        return self._call("get_orderbook", name)
+
+    def get_last_funding_rate(self, name):
+        return self._call("get_last_funding_rate", name)
+
+    def get_trades(self, name):
+        return self._call("get_trades", name)
+
+
+class _FakeAsyncMarket(_FakeMarket):
+    async def _call(self, method, name=None):
+        self._enter()
+        try:
+            await asyncio.sleep(self.delay)
+            return self._respond(method, name)
+        finally:
+            self._exit()
+
+    async def get_tickers(self):
+        return await self._call("get_tickers")
+
+    async def get_orderbook(self, name):
+        return await self._call("get_orderbook", name)
+
+    async def get_last_funding_rate(self, name):
+        return await self._call("get_last_funding_rate", name)
+
+    async def get_trades(self, name):
+        return await self._call("get_trades", name)
+
+
+def test_snapshot_from_simulator_sync_and_async():
+    with ExchangeSimulator(SimulatorConfig(push_interval=3600, seed=13)) as sim:
+        for _ in range(5):
+            sim.tick()
+        names = ["btc", "ETH", "DOGE", "BTC"]
+        table = fetch_snapshot(sim.future_client(), names)
+
+        async def main():
+            config = ContractHTTPConfig(base_url=sim.base_url, rate_limit=False)
+            async with AsyncFutureClient(sim.config.api_key, sim.config.secret_key, config=config) as client:
+                return await fetch_snapshot_async(client, names)
+
+        async_table = asyncio.run(main())
+
+        with sim.market.lock:
+            book = sim.market.future_book("BTC")
+            best_bid, best_ask = float(book.best_bid), float(book.best_ask)
+
+    # 品種去重並統一大寫
+    assert table["instrument"] == async_table["instrument"] == ["BTC", "ETH", "DOGE"]
+    assert len(table["last_price"]) == 3
+    assert set(table) == {"instrument", "errors", *(c for columns in FIELD_COLUMNS.values() for c in columns)}
+
+    btc = _row(table, "BTC")
+    assert btc["bid"] == pytest.approx(best_bid) and btc["ask"] == pytest.approx(best_ask)
+    assert not any(math.isnan(value) for column, value in btc.items() if not column.startswith("trade"))
+    assert _same(btc, _row(async_table, "BTC"))
+    assert _same(_row(table, "ETH"), _row(async_table, "ETH"))
+
+    # 未知品種只影響自己的一行
+    assert table["errors"][:2] == async_table["errors"][:2] == [None, None]
+    assert set(table["errors"][2]) == set(async_table["errors"][2]) == set(FIELD_COLUMNS)
+    assert all(math.isnan(value) for value in _row(table, "DOGE").values())
+
+
+def test_requests_run_concurrently_within_the_limit():
+    market = _FakeMarket(delay=0.05)
+    started = time.monotonic()
+    table = fetch_snapshot(market, INSTRUMENTS, max_workers=4)
+    elapsed = time.monotonic() - started
+
+    assert market.calls == 1 + 3 * len(INSTRUMENTS)
+    assert market.max_in_flight == 4
+    # 串行需要 25 * 0.05 秒
+    assert elapsed < market.calls * market.delay / 2
+    assert list(table["bid"]) == [10.0] * len(INSTRUMENTS)
+    assert list(table["trade_quantity"]) == [1.0] * len(INSTRUMENTS)
+    assert list(table["last_price"]) == [float(i + 1) for i in range(len(INSTRUMENTS))]
+
+
+def test_async_requests_respect_max_concurrency():
+    market = _FakeAsyncMarket(delay=0.05)
+    started = time.monotonic()
+    table = asyncio.run(fetch_snapshot_async(market, INSTRUMENTS, max_concurrency=5))
+    elapsed = time.monotonic() - started
+
+    assert market.calls == 1 + 3 * len(INSTRUMENTS)
+    assert market.max_in_flight == 5
+    assert elapsed < market.calls * market.delay / 2
+    assert table["errors"] == [None] * len(INSTRUMENTS)
+
+
+@pytest.mark.parametrize("market_type", [_FakeMarket, _FakeAsyncMarket])
+def test_partial_failures_stay_in_their_rows(market_type):
+    market = market_type(delay=0, failures={("get_orderbook", "ETH"), ("get_trades", "SOL")})
+    names = ["BTC", "ETH", "SOL"]
+    if market_type is _FakeAsyncMarket:
+        table = asyncio.run(fetch_snapshot_async(market, names))
+    else:
+        table = fetch_snapshot(market, names)
+
+    assert table["errors"] == [None, {"depth": "get_orderbook ETH failed"}, {"trades": "get_trades SOL failed"}]
+    eth, sol = _row(table, "ETH"), _row(table, "SOL")
+    assert math.isnan(eth["bid"]) and math.isnan(eth["ask_size"])
+    assert eth["last_price"] == 2 and eth["trade_price"] == 10
+    assert math.isnan(sol["trade_time"]) and sol["bid"] == 10
+
+
+def test_ticker_failure_marks_every_row():
+    market = _FakeMarket(delay=0, fail_tickers=True)
+    table = fetch_snapshot(market, ["BTC", "ETH"], fields=["ticker", "funding_rate"])
+    assert set(table) == {"instrument", "errors", *FIELD_COLUMNS["ticker"], "funding_rate"}
+    assert table["errors"] == [{"ticker": "tickers failed"}] * 2
+    assert all(math.isnan(value) for value in table["last_price"])
+    assert list(table["funding_rate"]) == [0.0001, 0.0001]
+
+
+def test_invalid_arguments():
+    with pytest.raises(InvalidParameterError):
+        fetch_snapshot(_FakeMarket(), ["BTC"], fields=["ticker", "volume"])
+    with pytest.raises(InvalidParameterError):
+        fetch_snapshot(_FakeMarket(), ["BTC"], max_workers=0)
+    with pytest.raises(InvalidParameterError):
+        asyncio.run(fetch_snapshot_async(_FakeAsyncMarket(), ["BTC"], max_concurrency=0))
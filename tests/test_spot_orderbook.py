@@ -0,0 +1,133 @@
+import time
+
+from coinwapi.simulator import ExchangeSimulator, SimulatorConfig
+from coinwapi.spot.orderbook import SpotOrderBookBuilder
+from coinwapi.spot.ws_client import CoinWSpotWebSocketClient
+
+
+def _snapshot(seq, bids, asks):
+    return {"seq": seq, "time": 1, "bids": [[p, m] for p, m in bids], "asks": [[p, m] for p, m in asks]}
+
+
+def _delta(start, end, bids=(), asks=()):
+    return {"startSeq": start, "endSeq": end, "bids": [list(level) for level in bids], "asks": [list(level) for level in asks]}
+
+
+def test_deltas_before_snapshot_are_buffered_and_replayed():
+    requested = []
+    builder = SpotOrderBookBuilder("78", on_resync=requested.append)
+    assert not builder.on_delta(_delta(100, 101, bids=[("99", "1", 101)]))
+    assert not builder.on_delta(_delta(102, 102, asks=[("101", "3", 102)]))
+    assert requested == ["78"]
+
+    assert builder.on_snapshot(_snapshot(100, [("99", "5"), ("98", "1")], [("101", "1")]))
+    assert builder.book.sequence == 102
+    assert builder.book.size_at("bid", "99") == 1
+    assert builder.book.size_at("ask", "101") == 3
+
+
+def test_sequence_gap_triggers_resync_and_recovers():
+    requested = []
+    builder = SpotOrderBookBuilder("78", on_resync=requested.append)
+    builder.on_delta(_delta(11, 11, bids=[("99", "2", 11)]))
+    builder.on_snapshot(_snapshot(10, [("99", "1")], [("101", "1")]))
+    assert builder.is_synced and builder.book.sequence == 11
+
+    # 12 丟失
+    assert not builder.on_delta(_delta(13, 13, asks=[("102", "4", 13)]))
+    assert not builder.is_synced
+    assert builder.gaps == 1
+    assert requested == ["78", "78"]
+    # 等待快照期間的增量被緩存，不重複請求快照
+    assert not builder.on_delta(_delta(14, 14, bids=[("98", "7", 14)]))
+    assert requested == ["78", "78"]
+
+    # 新快照包含 13，回放 14
+    assert builder.on_snapshot(_snapshot(13, [("99", "2")], [("101", "1"), ("102", "4")]))
+    assert builder.is_synced
+    assert builder.book.sequence == 14
+    assert builder.book.size_at("bid", "98") == 7
+    assert builder.book.size_at("ask", "102") == 4
+
+
+def test_snapshots_are_ignored_while_synced():
+    builder = SpotOrderBookBuilder("78")
+    builder.on_snapshot(_snapshot(1, [("99", "1")], [("101", "1")]))
+    deeper = [(str(90 - index), "1", 2 + index) for index in range(30)]
+    builder.on_delta(_delta(2, 31, bids=deeper))
+    assert builder.book.bid_depth == 31
+
+    # 持續推送的20檔快照（序列號更新）不能截斷由增量維護的訂單簿
+    assert builder.on_snapshot(_snapshot(40, [("99", "1")], [("101", "1")]))
+    assert builder.book.bid_depth == 31
+    assert builder.book.sequence == 31
+
+
+def _wait(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_client_resyncs_on_gap_without_leaking_internal_snapshots():
+    with ExchangeSimulator(SimulatorConfig(push_interval=3600, seed=1)) as sim:
+        pair_code = sim.market.spot_ids["BTC_USDT"]
+        server_book = sim.market.spot_book("BTC_USDT")
+        received = []
+        drop_next_delta = []
+
+        client = CoinWSpotWebSocketClient(method=2, ws_url=sim.spot_ws_url, order_book=True, on_message=received.append)
+        deliver = client._on_websocket_message
+
+        def lossy(ws, raw):
+            if drop_next_delta and '"type":"depth"' in raw and "startSeq" in raw:
+                drop_next_delta.pop()
+                return
+            deliver(ws, raw)
+
+        client._on_websocket_message = lossy
+        assert client.connect()
+        try:
+            assert _wait(client.is_connected)
+            client.subscribe_method2("exchange", "depth", pair_code)
+
+            def in_sync():
+                book = client.get_order_book(pair_code)
+                return book is not None and book.sequence == server_book.sequence
+
+            def session_topics():
+                return {topic for session in sim._sessions if not session.closed for topic in session.topics}
+
+            def tick_until_synced():
+                for _ in range(20):
+                    sim.tick()
+                    if _wait(in_sync, 0.5):
+                        return True
+                return False
+
+            # 第一個增量觸發內部快照訂閱；同步後取消
+            assert tick_until_synced()
+            assert _wait(lambda: ("depth_snapshot", pair_code) not in session_topics())
+
+            # 丟棄一個增量，下一個增量暴露缺口
+            drop_next_delta.append(True)
+            sim.tick()
+            assert _wait(lambda: not drop_next_delta)
+            sim.tick()
+            assert _wait(lambda: client._order_books[pair_code].gaps == 1)
+            assert tick_until_synced()
+            assert _wait(lambda: ("depth_snapshot", pair_code) not in session_topics())
+
+            builder = client._order_books[pair_code]
+            assert builder.resyncs == 2
+            book = client.get_order_book(pair_code).snapshot()
+            with sim.market.lock:
+                expected_bids = {float(server_book.price(index)): size for index, size in server_book.bids.items()}
+            assert dict(book["bids"]) == expected_bids
+            assert not [message for message in received if message.get("type") == "depth_snapshot"]
+            assert any(message.get("type") == "depth" for message in received)
+        finally:
+            client.close()
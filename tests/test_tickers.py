@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+
+from coinwapi.exceptions import CoinWAPIError, InvalidParameterError
+from coinwapi.simulator import ExchangeSimulator, SimulatorConfig
+from coinwapi.spot.ws_client import CoinWSpotWebSocketClient
+from coinwapi.tickers import SPOT, TickerCache
+
+
+def _wait(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def sim():
+    with ExchangeSimulator(SimulatorConfig(push_interval=3600, seed=14)) as simulator:
+        yield simulator
+
+
+class _CountingMarket:
+    """記錄 get_tickers 調用次數；fail 為 True 時請求失敗"""
+
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+        self.fail = False
+        self.price = 100
+
+    def get_tickers(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise CoinWAPIError("tickers unavailable")
+        self.price += 1
+        return {"code": 0, "data": [{"name": "BTC", "last_price": self.price}, {"name": "ETH", "last_price": 1}]}
+
+
+def test_futures_lookups_share_one_batch_request(sim):
+    cache = TickerCache(sim.future_client(), max_age=60)
+    names = list(sim.market.futures)
+    assert all(cache.last_price(name.lower()) > 0 for name in names)
+    assert cache.get("DOGE") is None
+    assert sim.stats()["endpoints"]["/v1/perpumPublic/ticker"] == 1
+    assert cache.stats() == {"size": len(names), "hits": len(names) - 1, "refreshes": 1}
+
+    # 按需放寬或收緊單次查詢的數據年齡
+    cache.get("BTC", max_age=0)
+    assert sim.stats()["endpoints"]["/v1/perpumPublic/ticker"] == 2
+
+
+def test_spot_lookups_by_symbol_and_pair_code(sim):
+    cache = TickerCache(sim.spot_client(), market_type=SPOT, max_age=60)
+    by_pair_code = cache.get("78")
+    assert by_pair_code is not None
+    assert cache.get("btc-usdt") is by_pair_code is cache.get("BTC_USDT")
+    assert cache.last_price("79") == float(cache.get("ETH_USDT")["last"])
+    assert sim.stats()["endpoints"]["/api/v1/public?command=returnTicker"] == 1
+
+
+def test_stale_entries_trigger_a_single_refresh():
+    market = _CountingMarket(delay=0.05)
+    cache = TickerCache(market, max_age=0.1)
+    assert cache.last_price("BTC") == 101
+    assert cache.last_price("ETH") == 1
+    assert market.calls == 1
+    assert cache.age("BTC") < 0.1
+
+    time.sleep(0.15)
+    barrier = threading.Barrier(8)
+    prices = []
+
+    def lookup():
+        barrier.wait()
+        prices.append(cache.last_price("BTC"))
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 並發的過期查詢共用同一次刷新
+    assert market.calls == 2
+    assert prices == [102] * 8
+
+
+def test_failed_refresh_serves_stale_data():
+    market = _CountingMarket()
+    cache = TickerCache(market, max_age=0)
+    assert cache.last_price("BTC") == 101
+
+    market.fail = True
+    assert cache.last_price("BTC") == 101
+    # 從未收到過的品種沒有過期數據可用
+    with pytest.raises(CoinWAPIError):
+        cache.get("SOL")
+
+
+def test_cache_without_market():
+    cache = TickerCache()
+    assert cache.get("BTC") is None
+    cache.update("btc", {"last_price": "5"})
+    assert cache.last_price("BTC", max_age=0) == 5.0
+    with pytest.raises(InvalidParameterError):
+        cache.refresh()
+    with pytest.raises(InvalidParameterError):
+        TickerCache(market_type="options")
+
+
+def test_ticker_all_push_feeds_the_cache(sim):
+    cache = TickerCache(market_type=SPOT, max_age=60)
+    client = CoinWSpotWebSocketClient(method=2, ws_url=sim.spot_ws_url, ticker_cache=cache)
+    assert client.connect()
+    try:
+        assert _wait(client.is_connected)
+        client.subscribe_method2("exchange", "ticker_all")
+        # 訂閱生效後推送一次全市場 ticker
+        assert _wait(lambda: any(("ticker_all", None) in session.topics for session in sim._sessions))
+        sim.tick()
+        assert _wait(lambda: len(cache) == len(sim.market.spot_ids))
+    finally:
+        client.close()
+
+    with sim.market.lock:
+        expected = {symbol: float(book.last) for symbol, book in sim.market.spot.items()}
+    assert {symbol: cache.last_price(symbol) for symbol in expected} == expected
+    # tmId 作為 pairCode 別名
+    for symbol, pair_code in sim.market.spot_ids.items():
+        assert cache.get(pair_code) is cache.get(symbol)
+    # 推送填充的數據不觸發任何 REST 請求
+    assert sim.stats()["endpoints"].get("/api/v1/public?command=returnTicker") is None
+
+    # 訂閱確認等非列表 data 不更新緩存
+    assert cache.on_ticker_all({"channel": "subscribe", "data": {"result": True}}) == 0
+    assert cache.on_ticker_all({"type": "ticker_all", "data": '[{"leftCoinName": "DOGE", "rightCoinName": "USDT", '
+                                                              '"tmId": 9, "price": "0.1"}]'}) == 1
+    assert cache.last_price("9") == 0.1
@@ -0,0 +1,111 @@
+import random
+from decimal import Decimal, ROUND_HALF_UP, ROUND_UP
+
+import pytest
+
+from coinwapi.exceptions import InvalidParameterError
+from coinwapi.units import (
+    BASE, CONTRACTS, QUOTE, UnitConverter, base_step, convert_quantities, convert_quantity,
+    convert_units_locally, piece_convert_response,
+)
+
+FACE_VALUES = ["0.001", "0.01", "0.1", "1", "10"]
+
+
+@pytest.mark.parametrize("face_value,expected", [
+    ("0.001", "0.001"), (0.01, "0.01"), ("0.0010", "0.001"), (1, "1"), ("10", "1"), (Decimal("1E+2"), "1"),
+])
+def test_base_step(face_value, expected):
+    assert base_step(face_value) == Decimal(expected)
+
+
+@pytest.mark.parametrize("face_value", FACE_VALUES)
+def test_contract_round_trip_is_exact(face_value):
+    pieces = list(range(0, 2000, 7))
+    base = convert_quantities(pieces, CONTRACTS, BASE, face_value)
+    assert base == [Decimal(piece) * Decimal(face_value) for piece in pieces]
+    # 基礎貨幣數量是面值小數位的整數倍
+    assert all(value % base_step(face_value) == 0 for value in base)
+    assert convert_quantities(base, BASE, CONTRACTS, face_value) == pieces
+
+
+@pytest.mark.parametrize("face_value", FACE_VALUES)
+def test_round_down_never_exceeds_input(face_value):
+    rng = random.Random(face_value)
+    step = base_step(face_value)
+    prices = [Decimal(rng.randint(100, 10 ** 7)) / 100 for _ in range(200)]
+    amounts = [Decimal(rng.randint(1, 10 ** 9)) / 1000 for _ in range(200)]
+
+    pieces = convert_quantities(amounts, BASE, CONTRACTS, face_value)
+    back = convert_quantities(pieces, CONTRACTS, BASE, face_value)
+    for amount, value in zip(amounts, back):
+        # 向下取整：不超過原數量，差距不足一張
+        assert value <= amount
+        assert amount - value < Decimal(face_value)
+        assert value % step == 0
+
+    pieces = convert_quantities(amounts, QUOTE, CONTRACTS, face_value, prices)
+    notional = convert_quantities(pieces, CONTRACTS, QUOTE, face_value, prices)
+    for amount, value, price in zip(amounts, notional, prices):
+        assert value <= amount
+        assert amount - value < Decimal(face_value) * price
+
+
+def test_float_inputs_use_decimal_representation():
+    # 0.3 / 0.1 在二進制浮點下為 2.9999999999999996
+    assert convert_quantity(0.3, BASE, CONTRACTS, 0.1) == 3
+    assert convert_quantity(0.7, CONTRACTS, BASE, 1) == 0
+    assert convert_quantity(3, CONTRACTS, BASE, 0.1) == Decimal("0.3")
+
+
+def test_rounding_and_step():
+    assert convert_quantity("2.5", BASE, CONTRACTS, "1", rounding=ROUND_HALF_UP) == 3
+    assert convert_quantity("2.01", BASE, CONTRACTS, "1", rounding=ROUND_UP) == 3
+    assert convert_quantity("0.00159", CONTRACTS, BASE, "0.001") == Decimal("0.000")
+    assert convert_quantity(1, BASE, QUOTE, 1, price="65000.123") == Decimal("65000.123")
+    assert convert_quantity(7, BASE, CONTRACTS, "0.1", step=5) == 70
+    assert convert_quantity("123.456", QUOTE, BASE, "0.001", price=1000, step="0.0001") == Decimal("0.1234")
+
+
+def test_invalid_arguments():
+    with pytest.raises(InvalidParameterError):
+        convert_quantity(1, 3, BASE, 1)
+    with pytest.raises(InvalidParameterError):
+        convert_quantity(1, BASE, CONTRACTS, 0)
+    with pytest.raises(InvalidParameterError):
+        convert_quantity(1, QUOTE, CONTRACTS, 1)
+    with pytest.raises(InvalidParameterError):
+        convert_quantity(1, QUOTE, CONTRACTS, 1, price=0)
+    with pytest.raises(InvalidParameterError):
+        convert_quantities([1, 2], QUOTE, CONTRACTS, 1, price=[100])
+
+
+class _Instruments:
+    def face_value(self, name):
+        return {"BTC": Decimal("0.001"), "ETH": Decimal("0.01")}[name]
+
+
+class _Account:
+    """按面值在服務端換算，可選擇返回錯誤的結果"""
+
+    def __init__(self, skew=0):
+        self.skew = skew
+
+    def convert_units(self, convert_type, face_value, deal_piece=None, base_size=None):
+        local = convert_units_locally(convert_type, face_value, deal_piece, base_size)
+        if self.skew:
+            local["data"]["value"] += self.skew
+        return local
+
+
+def test_converter_matches_piece_convert():
+    converter = UnitConverter(_Instruments())
+    assert converter.to_base("BTC", 150, CONTRACTS) == Decimal("0.150")
+    assert converter.to_contracts("ETH", "1.239", BASE) == 123
+    assert converter.convert_many("BTC", [1000, 2000], QUOTE, CONTRACTS, price=[50000, 100000]) == [20, 20]
+
+    assert piece_convert_response(Decimal("0.150")) == {"code": 0, "data": {"value": 0.15}, "msg": ""}
+    assert converter.cross_check(_Account(), "BTC") == []
+    mismatches = converter.cross_check(_Account(skew=1), "ETH", deal_pieces=(5,))
+    assert [item["convert_type"] for item in mismatches] == [1, 2]
+    assert mismatches[0]["local"] == Decimal("0.05")
@@ -0,0 +1,94 @@
+import threading
+import time
+
+from coinwapi.future.ws_client import CoinWFutureWebSocketClient
+from coinwapi.simulator import ExchangeSimulator, SimulatorConfig
+
+
+def _wait(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class _Recorder:
+    def __init__(self):
+        self.messages = []
+        self._lock = threading.Lock()
+
+    def __call__(self, message):
+        with self._lock:
+            self.messages.append(message)
+
+    def pushes(self):
+        """行情推送（不含訂閱確認）的 (type, pairCode)"""
+        with self._lock:
+            return [(m["type"], m["pairCode"]) for m in self.messages if "channel" not in m]
+
+    def pair_codes(self):
+        with self._lock:
+            return {str(m.get("pairCode")).upper() for m in self.messages}
+
+
+def _sub(message_type, pair_code):
+    return {"event": "sub", "params": {"biz": "futures", "pairCode": pair_code, "type": message_type}}
+
+
+def test_each_subscription_callback_receives_only_its_pair():
+    with ExchangeSimulator(SimulatorConfig(push_interval=3600, seed=11)) as sim:
+        everything = _Recorder()
+        btc, eth, marks = _Recorder(), _Recorder(), _Recorder()
+        client = CoinWFutureWebSocketClient(ws_url=sim.futures_ws_url, on_message=everything)
+        assert client.connect()
+        try:
+            assert _wait(client.is_connected)
+            # 訂閱參數和推送中的 pairCode 大小寫不同時仍按同一合約路由
+            client.subscribe(_sub("ticker_swap", "btc"), callback=btc)
+            client.subscribe(_sub("ticker_swap", "ETH"), callback=eth)
+            # 類型級回調接收該類型所有合約的消息
+            client.add_handler("mark_price", marks)
+            client.subscribe(_sub("mark_price", "BTC"))
+            client.subscribe(_sub("mark_price", "sol"))
+            # 沒有回調的訂閱交給全局 on_message
+            client.subscribe(_sub("index_price", "XRP"))
+
+            def delivered():
+                return (len(btc.pushes()) >= 3 and len(eth.pushes()) >= 3
+                        and len(marks.pushes()) >= 6 and len(everything.pushes()) >= 3)
+
+            assert _wait(lambda: len(everything.messages) >= 1 and len(marks.messages) >= 2)
+            for _ in range(3):
+                sim.tick()
+            assert _wait(delivered)
+        finally:
+            client.close()
+
+    assert set(btc.pushes()) == {("ticker_swap", "BTC")}
+    assert set(eth.pushes()) == {("ticker_swap", "ETH")}
+    assert set(marks.pushes()) == {("mark_price", "BTC"), ("mark_price", "SOL")}
+    assert set(everything.pushes()) == {("index_price", "XRP")}
+    # 訂閱確認同樣按 (type, pairCode) 路由，回顯的小寫 pairCode 也命中
+    assert btc.pair_codes() == {"BTC"} and any(m.get("pairCode") == "btc" for m in btc.messages)
+    assert eth.pair_codes() == {"ETH"}
+
+
+def test_exact_route_wins_over_type_fallback_and_can_be_removed():
+    client = CoinWFutureWebSocketClient()
+    everything, any_pair, btc = _Recorder(), _Recorder(), _Recorder()
+    client._user_on_message = everything
+    client.add_handler("depth", any_pair)
+    client.add_handler("depth", btc, pair_code="Btc")
+
+    for pair_code in ("BTC", "btc", "ETH"):
+        client._route({"type": "depth", "pairCode": pair_code, "data": {}})
+    client._route({"type": "fills", "pairCode": "BTC", "data": []})
+    assert [m["pairCode"] for m in btc.messages] == ["BTC", "btc"]
+    assert [m["pairCode"] for m in any_pair.messages] == ["ETH"]
+    assert [m["type"] for m in everything.messages] == ["fills"]
+
+    client.remove_handler("depth", "BTC")
+    client._route({"type": "depth", "pairCode": "BTC", "data": {}})
+    assert [m["pairCode"] for m in any_pair.messages] == ["ETH", "BTC"]
@@ -0,0 +1,232 @@
+"""
+CoinW ticker 緩存
+
+以一次批量請求（期貨 get_tickers、現貨 get_ticker()）或現貨 ticker_all 推送填充全部品種的 ticker，
+單個品種的查詢在本地完成；數據超過 max_age 時才重新發起一次批量請求，
+N 個品種的 ticker 查詢因此只需要一次 REST 調用
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from . import codec
+from .exceptions import CoinWAPIError, InvalidParameterError
+from .snapshot import index_tickers
+
+logger = logging.getLogger(__name__)
+
+SPOT = "spot"
+FUTURES = "futures"
+
+# 不同來源的最新價字段：期貨 REST、現貨 REST、現貨 ticker_all 推送
+_LAST_PRICE_FIELDS = ("last_price", "last", "price")
+
+
+class TickerCache:
+    """
+    全市場 ticker 緩存
+
+    期貨按合約基礎貨幣（如 "BTC"）索引；現貨按交易對（如 "BTC_USDT"）索引，
+    也可以用 pairCode/tmId（如 "78"）查詢
+    """
+
+    def __init__(self, market=None, market_type: str = FUTURES, max_age: float = 5.0):
+        """
+        Args:
+            market: 用於批量刷新的 FutureMarket/FutureClient 或 SpotMarket/SpotClient，
+                為空時只能通過 update()/on_ticker_all() 填充
+            market_type: "futures" 或 "spot"
+            max_age: 數據有效期（秒），超過後查詢時重新批量獲取
+        """
+        if market_type not in (SPOT, FUTURES):
+            raise InvalidParameterError(f"無效的市場: {market_type}")
+
+        self._market = market
+        self.market_type = market_type
+        self.max_age = max_age
+
+        self._tickers: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._aliases: Dict[str, str] = {}
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+        # 統計
+        self._hits = 0
+        self._refreshes = 0
+
+    # ==================== 填充 ====================
+
+    def refresh(self) -> int:
+        """
+        通過一次批量 REST 請求刷新全部 ticker
+
+        Returns:
+            更新的品種數
+
+        Raises:
+            CoinWAPIError: 請求失敗（現貨接口返回錯誤時同樣拋出）
+        """
+        if self._market is None:
+            raise InvalidParameterError("沒有提供用於刷新的 market")
+
+        if self.market_type == FUTURES:
+            tickers = index_tickers(self._market.get_tickers())
+            aliases = {}
+        else:
+            response = self._market.get_ticker()
+            if not isinstance(response, dict) or response.get("success") is False:
+                message = response.get("message") if isinstance(response, dict) else response
+                raise CoinWAPIError(f"獲取現貨 ticker 失敗: {message}", response=response)
+            tickers = {
+                symbol.upper(): row for symbol, row in (response.get("data") or {}).items()
+                if isinstance(row, dict)
+            }
+            aliases = {str(row["id"]): symbol for symbol, row in tickers.items() if row.get("id") is not None}
+
+        self._store(tickers, aliases)
+        with self._lock:
+            self._refreshed_at = time.monotonic()
+            self._refreshes += 1
+        return len(tickers)
+
+    def update(self, key: str, ticker: Dict[str, Any]) -> None:
+        """
+        更新單個品種的 ticker（如來自 WebSocket 推送）
+
+        Args:
+            key: 期貨合約基礎貨幣或現貨交易對
+            ticker: ticker 數據
+        """
+        self._store({str(key).upper(): ticker}, {})
+
+    def on_ticker_all(self, message: Dict[str, Any]) -> int:
+        """
+        以現貨 ticker_all 推送更新緩存
+
+        Args:
+            message: 已解碼的推送消息（data 可以是未解碼的 JSON 字符串）
+
+        Returns:
+            更新的品種數
+        """
+        data = message.get("data")
+        if isinstance(data, str):
+            data = codec.loads(data)
+        if not isinstance(data, list):
+            return 0  # 訂閱確認
+
+        tickers = {}
+        aliases = {}
+        for row in data:
+            left, right = row.get("leftCoinName"), row.get("rightCoinName")
+            if not left or not right:
+                continue
+            symbol = f"{left}_{right}".upper()
+            tickers[symbol] = row
+            if row.get("tmId") is not None:
+                aliases[str(row["tmId"])] = symbol
+
+        self._store(tickers, aliases)
+        return len(tickers)
+
+    def _store(self, tickers: Dict[str, Dict[str, Any]], aliases: Dict[str, str]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for key, ticker in tickers.items():
+                self._tickers[key] = (ticker, now)
+            self._aliases.update(aliases)
+
+    # ==================== 查詢 ====================
+
+    def _resolve(self, key: str) -> str:
+        key = str(key).upper().replace("-", "_")
+        return self._aliases.get(key, key)
+
+    def _ensure_fresh(self, key: str, max_age: float) -> None:
+        """數據過期時發起一次批量刷新；並發的查詢共用同一次刷新"""
+        entry = self._tickers.get(key)
+        if entry is not None and time.monotonic() - entry[1] <= max_age:
+            self._hits += 1
+            return
+        if self._market is None:
+            return
+
+        with self._refresh_lock:
+            # 等待鎖期間其他線程可能已經刷新
+            refreshed_at = self._refreshed_at
+            if refreshed_at is not None and time.monotonic() - refreshed_at <= max_age:
+                return
+            try:
+                self.refresh()
+            except Exception as e:
+                if entry is None:
+                    raise
+                logger.warning(f"刷新 ticker 失敗，使用過期數據: {e}")
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        獲取單個品種的 ticker
+
+        Args:
+            key: 期貨合約基礎貨幣（如 "BTC"）、現貨交易對（如 "BTC_USDT"）或 pairCode（如 "78"）
+            max_age: 本次查詢允許的數據年齡（秒），預設為 self.max_age
+
+        Returns:
+            ticker 數據，沒有該品種時返回 None
+        """
+        self._ensure_fresh(self._resolve(key), self.max_age if max_age is None else max_age)
+        # 刷新後 pairCode 的映射可能才剛建立，需要重新解析
+        entry = self._tickers.get(self._resolve(key))
+        return entry[0] if entry is not None else None
+
+    def get_many(self, keys: Iterable[str], max_age: Optional[float] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        獲取多個品種的 ticker（最多觸發一次批量刷新）
+
+        Returns:
+            {查詢鍵: ticker 或 None}
+        """
+        return {key: self.get(key, max_age) for key in keys}
+
+    def last_price(self, key: str, max_age: Optional[float] = None) -> Optional[float]:
+        """
+        獲取最新價
+
+        Returns:
+            最新價，沒有該品種時返回 None
+        """
+        ticker = self.get(key, max_age)
+        if ticker is None:
+            return None
+        for field in _LAST_PRICE_FIELDS:
+            if ticker.get(field) is not None:
+                return float(ticker[field])
+        return None
+
+    def age(self, key: str) -> Optional[float]:
+        """品種 ticker 的數據年齡（秒），沒有數據時返回 None"""
+        entry = self._tickers.get(self._resolve(key))
+        return None if entry is None else time.monotonic() - entry[1]
+
+    def tickers(self) -> Dict[str, Dict[str, Any]]:
+        """當前緩存的全部 ticker（不觸發刷新）"""
+        with self._lock:
+            return {key: entry[0] for key, entry in self._tickers.items()}
+
+    def stats(self) -> Dict[str, int]:
+        """
+        緩存統計
+
+        Returns:
+            {'size': 品種數, 'hits': 直接命中次數, 'refreshes': 批量刷新次數}
+        """
+        return {'size': len(self._tickers), 'hits': self._hits, 'refreshes': self._refreshes}
+
+    def __len__(self) -> int:
+        return len(self._tickers)
+
+    def __repr__(self):
+        return f"TickerCache(market_type={self.market_type}, size={len(self._tickers)}, max_age={self.max_age})"
@@ -0,0 +1,305 @@
+"""
+CoinW 合約數量單位換算
+
+在本地按合約面值完成計價貨幣、合約張數和基礎貨幣之間的換算（對應下單接口的 quantity_unit 0/1/2），
+使用 Decimal 精確計算並按指定方式取整，無需調用 /v1/perpum/pieceConvert 接口；
+該接口只用於定期核對本地換算結果
+"""
+
+import logging
+from decimal import Decimal, ROUND_DOWN, localcontext
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from .exceptions import InvalidParameterError
+
+logger = logging.getLogger(__name__)
+
+# quantity_unit
+QUOTE = 0      # 計價貨幣，如 BTC-USDT 合約中的 USDT
+CONTRACTS = 1  # 合約張數
+BASE = 2       # 基礎貨幣，如 BTC-USDT 合約中的 BTC
+
+QUANTITY_UNITS = (QUOTE, CONTRACTS, BASE)
+
+# 合約張數的最小單位
+CONTRACT_STEP = Decimal(1)
+
+# 除法使用的精度，足以覆蓋交易所返回的所有數值
+_PRECISION = 34
+
+Number = Union[Decimal, float, int, str]
+
+
+def to_decimal(value: Number) -> Decimal:
+    """
+    轉換為 Decimal；float 按其十進制字符串表示轉換，避免二進制誤差
+    """
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value)) if isinstance(value, float) else Decimal(value)
+
+
+def base_step(face_value: Number) -> Decimal:
+    """
+    基礎貨幣數量的最小單位，與合約面值的小數位數相同
+
+    Args:
+        face_value: 合約面值，如 0.001
+
+    Returns:
+        如 Decimal("0.001")
+    """
+    exponent = to_decimal(face_value).normalize().as_tuple().exponent
+    return Decimal(1).scaleb(min(exponent, 0))
+
+
+def convert_quantities(
+    quantities: Iterable[Number],
+    from_unit: int,
+    to_unit: int,
+    face_value: Number,
+    price: Optional[Union[Number, Sequence[Number]]] = None,
+    rounding: str = ROUND_DOWN,
+    step: Optional[Number] = None
+) -> List[Decimal]:
+    """
+    批量換算數量單位
+
+    Args:
+        quantities: 數量序列
+        from_unit: 原單位 0（計價貨幣）、1（合約張數）或 2（基礎貨幣）
+        to_unit: 目標單位
+        face_value: 合約面值（每張合約對應的基礎貨幣數量）
+        price: 價格，涉及計價貨幣時必需；可為單個價格或與 quantities 等長的序列
+        rounding: decimal 取整方式，預設向零取整（不超過原數量）
+        step: 結果的最小單位，預設合約張數為 1、基礎貨幣為面值的小數位、計價貨幣不取整
+
+    Returns:
+        換算結果（Decimal）
+
+    Raises:
+        InvalidParameterError: 單位無效、面值不為正或缺少價格
+    """
+    if from_unit not in QUANTITY_UNITS or to_unit not in QUANTITY_UNITS:
+        raise InvalidParameterError("quantity_unit必須是 0, 1 或 2")
+
+    face = to_decimal(face_value)
+    if face <= 0:
+        raise InvalidParameterError(f"合約面值必須大於 0: {face_value}")
+
+    values = [to_decimal(quantity) for quantity in quantities]
+    needs_price = from_unit != to_unit and QUOTE in (from_unit, to_unit)
+    if needs_price and price is None:
+        raise InvalidParameterError("涉及計價貨幣（quantity_unit=0）的換算需要提供 price")
+
+    if price is None or isinstance(price, (Decimal, float, int, str)):
+        prices = None
+        scalar_price = to_decimal(price) if price is not None else None
+    else:
+        prices = [to_decimal(value) for value in price]
+        scalar_price = None
+        if len(prices) != len(values):
+            raise InvalidParameterError("price 序列長度必須與 quantities 相同")
+    if needs_price and (scalar_price is not None and scalar_price <= 0 or prices and min(prices) <= 0):
+        raise InvalidParameterError("price 必須大於 0")
+
+    if step is not None:
+        quantum = to_decimal(step)
+    elif to_unit == CONTRACTS:
+        quantum = CONTRACT_STEP
+    elif to_unit == BASE:
+        quantum = base_step(face)
+    else:
+        quantum = None
+
+    with localcontext() as context:
+        context.prec = _PRECISION
+
+        # 先統一換算為基礎貨幣，再換算為目標單位
+        if from_unit == CONTRACTS:
+            base = [value * face for value in values]
+        elif from_unit == QUOTE and to_unit != QUOTE:
+            base = (
+                [value / scalar_price for value in values] if prices is None
+                else [value / p for value, p in zip(values, prices)]
+            )
+        else:
+            base = values
+
+        if to_unit == CONTRACTS:
+            results = base if from_unit == CONTRACTS else [value / face for value in base]
+        elif to_unit == QUOTE and from_unit != QUOTE:
+            results = (
+                [value * scalar_price for value in base] if prices is None
+                else [value * p for value, p in zip(base, prices)]
+            )
+        else:
+            results = base
+
+        if quantum is None:
+            return [value.normalize() for value in results]
+        return [(value / quantum).to_integral_value(rounding) * quantum for value in results]
+
+
+def convert_quantity(
+    quantity: Number,
+    from_unit: int,
+    to_unit: int,
+    face_value: Number,
+    price: Optional[Number] = None,
+    rounding: str = ROUND_DOWN,
+    step: Optional[Number] = None
+) -> Decimal:
+    """
+    換算單個數量，參數同 convert_quantities
+    """
+    return convert_quantities([quantity], from_unit, to_unit, face_value, price, rounding, step)[0]
+
+
+def piece_convert_response(value: Decimal) -> Dict[str, Any]:
+    """
+    構建與 /v1/perpum/pieceConvert 接口相同結構的響應
+
+    Returns:
+        {'code': 0, 'data': {'value': 數值}, 'msg': ''}
+    """
+    return {'code': 0, 'data': {'value': float(value)}, 'msg': ''}
+
+
+def convert_units_locally(
+    convert_type: int,
+    face_value: Number,
+    deal_piece: Optional[Number] = None,
+    base_size: Optional[Number] = None
+) -> Dict[str, Any]:
+    """
+    在本地完成 FutureAccount.convert_units 的換算，參數及返回結構與該接口相同
+
+    Args:
+        convert_type: 1：合約張數轉換為幣，2：幣轉換為合約張數
+        face_value: 每手最小價值
+        deal_piece: 合約數量（convert_type=1時必需）
+        base_size: 幣的數量（convert_type=2時必需）
+
+    Returns:
+        {'code': 0, 'data': {'value': 合約或幣的值}, 'msg': ''}
+    """
+    if convert_type == 1:
+        if deal_piece is None:
+            raise InvalidParameterError("convert_type=1時，deal_piece是必需的")
+        value = convert_quantity(deal_piece, CONTRACTS, BASE, face_value)
+    elif convert_type == 2:
+        if base_size is None:
+            raise InvalidParameterError("convert_type=2時，base_size是必需的")
+        value = convert_quantity(base_size, BASE, CONTRACTS, face_value)
+    else:
+        raise InvalidParameterError("convert_type必須是 1（張數轉幣）或 2（幣轉張數）")
+    return piece_convert_response(value)
+
+
+class UnitConverter:
+    """
+    基於交易品種元數據緩存的數量單位換算器
+
+    合約面值從 InstrumentCache 讀取（O(1) 字典查詢），換算完全在本地進行
+    """
+
+    def __init__(self, instruments, rounding: str = ROUND_DOWN):
+        """
+        Args:
+            instruments: InstrumentCache
+            rounding: decimal 取整方式
+        """
+        self._instruments = instruments
+        self.rounding = rounding
+
+    def face_value(self, instrument: str) -> Decimal:
+        """合約面值"""
+        return self._instruments.face_value(instrument)
+
+    def convert(
+        self,
+        instrument: str,
+        quantity: Number,
+        from_unit: int,
+        to_unit: int,
+        price: Optional[Number] = None
+    ) -> Decimal:
+        """
+        換算單個數量
+
+        Args:
+            instrument: 合約基礎貨幣，如 "BTC"
+            quantity: 數量
+            from_unit: 原單位 0/1/2
+            to_unit: 目標單位 0/1/2
+            price: 價格（涉及計價貨幣時必需）
+
+        Returns:
+            換算結果
+        """
+        return convert_quantity(quantity, from_unit, to_unit, self.face_value(instrument), price, self.rounding)
+
+    def convert_many(
+        self,
+        instrument: str,
+        quantities: Iterable[Number],
+        from_unit: int,
+        to_unit: int,
+        price: Optional[Union[Number, Sequence[Number]]] = None
+    ) -> List[Decimal]:
+        """
+        批量換算數量，參數同 convert；price 可為與 quantities 等長的序列
+        """
+        return convert_quantities(quantities, from_unit, to_unit, self.face_value(instrument), price, self.rounding)
+
+    def to_contracts(self, instrument: str, quantity: Number, unit: int, price: Optional[Number] = None) -> Decimal:
+        """換算為合約張數"""
+        return self.convert(instrument, quantity, unit, CONTRACTS, price)
+
+    def to_base(self, instrument: str, quantity: Number, unit: int, price: Optional[Number] = None) -> Decimal:
+        """換算為基礎貨幣數量"""
+        return self.convert(instrument, quantity, unit, BASE, price)
+
+    def cross_check(
+        self,
+        account,
+        instrument: str,
+        deal_pieces: Sequence[Number] = (1, 10, 100)
+    ) -> List[Dict[str, Any]]:
+        """
+        通過 REST 接口核對本地換算結果
+
+        Args:
+            account: FutureAccount 或 FutureClient（調用其 convert_units 接口）
+            instrument: 合約基礎貨幣
+            deal_pieces: 用於核對的合約張數
+
+        Returns:
+            不一致的結果列表，每項為 {'convert_type', 'input', 'local', 'remote'}；一致時為空列表
+        """
+        face_value = self.face_value(instrument)
+        mismatches = []
+
+        for pieces in deal_pieces:
+            local_base = convert_quantity(pieces, CONTRACTS, BASE, face_value)
+            local_pieces = convert_quantity(local_base, BASE, CONTRACTS, face_value)
+            checks = (
+                (1, pieces, local_base, {'deal_piece': float(to_decimal(pieces))}),
+                (2, local_base, local_pieces, {'base_size': float(local_base)}),
+            )
+            for convert_type, value, local, kwargs in checks:
+                response = account.convert_units(convert_type, float(face_value), **kwargs)
+                remote = (response.get('data') or {}).get('value')
+                remote = to_decimal(remote) if remote is not None else None
+                if remote != local:
+                    mismatches.append({
+                        'convert_type': convert_type,
+                        'input': value,
+                        'local': local,
+                        'remote': remote,
+                    })
+
+        if mismatches:
+            logger.warning(f"本地單位換算與接口不一致 {instrument}: {mismatches}")
+        return mismatches
@@ -0,0 +1,283 @@
+"""
+CoinW WebSocket 指標
+
+按主題（type:pairCode）統計消息速率、字節數、解碼和回調耗時，以及交易所時間戳到本地接收的延遲；
+同時記錄 ping 往返時間和連接/斷線歷史。用於在行情流停滯或落後時告警
+"""
+
+import time
+import threading
+from collections import deque
+from time import perf_counter
+from typing import Any, Deque, Dict, List, Optional
+
+
+def topic_of(message: Dict[str, Any]) -> str:
+    """
+    消息所屬的主題
+
+    Returns:
+        "type:pairCode"、"type" 或現貨方法1的 channel（如 "spot/level2_20:BTC-USDT"）
+    """
+    message_type = message.get("type")
+    if message_type is None:
+        return str(message.get("channel") or message.get("subject") or "unknown")
+    pair_code = message.get("pairCode")
+    return f"{message_type}:{str(pair_code).upper()}" if pair_code else str(message_type)
+
+
+class TopicStats:
+    """單個主題的統計"""
+
+    __slots__ = (
+        "messages", "bytes", "decode_time", "callbacks", "callback_time", "last_received",
+        "lag_last", "lag_max", "lag_sum", "lag_count", "rate", "_window_start", "_window_count"
+    )
+
+    def __init__(self, now: float):
+        self.messages = 0
+        self.bytes = 0
+        self.decode_time = 0.0
+        self.callbacks = 0
+        self.callback_time = 0.0
+        self.last_received = 0.0
+        self.lag_last: Optional[float] = None
+        self.lag_max = 0.0
+        self.lag_sum = 0.0
+        self.lag_count = 0
+        self.rate = 0.0
+        self._window_start = now
+        self._window_count = 0
+
+    def _roll(self, now: float, window: float) -> None:
+        """窗口結束時更新每秒消息數"""
+        elapsed = now - self._window_start
+        if elapsed >= window:
+            # 超過兩個窗口沒有消息時速率歸零
+            self.rate = self._window_count / elapsed if elapsed < 2 * window else 0.0
+            self._window_start = now
+            self._window_count = 0
+
+    def as_dict(self, now: float, window: float) -> Dict[str, Any]:
+        self._roll(now, window)
+        rate = self.rate
+        elapsed = now - self._window_start
+        if not rate and self._window_count and elapsed > 0:
+            # 還沒有完整的窗口，使用當前窗口的速率
+            rate = self._window_count / max(elapsed, window / 10)
+        return {
+            "messages": self.messages,
+            "bytes": self.bytes,
+            "rate": rate,
+            "age": now - self.last_received if self.messages else None,
+            "decode_time": self.decode_time,
+            "decode_avg": self.decode_time / self.messages if self.messages else None,
+            "callbacks": self.callbacks,
+            "callback_time": self.callback_time,
+            "callback_avg": self.callback_time / self.callbacks if self.callbacks else None,
+            "lag": self.lag_last,
+            "lag_max": self.lag_max if self.lag_count else None,
+            "lag_avg": self.lag_sum / self.lag_count if self.lag_count else None,
+        }
+
+
+class WebSocketMetrics:
+    """
+    WebSocket 客戶端指標
+
+    接收線程調用 on_message，回調線程調用 on_callback；讀取接口可在任意線程調用。
+    延遲 = 本地接收時間 - 消息中的交易所時間戳，包含兩端時鐘偏差；
+    私有推送（訂單、持倉）的時間戳通常是創建時間，其延遲不代表推送延遲
+    """
+
+    def __init__(self, rate_window: float = 1.0, history: int = 100):
+        """
+        Args:
+            rate_window: 計算每秒消息數的窗口（秒）
+            history: 保留的 ping 往返時間和連接事件條數
+        """
+        self.rate_window = rate_window
+        self._topics: Dict[str, TopicStats] = {}
+        self._lock = threading.Lock()
+        self._created = time.time()
+
+        # 未解碼即被丟棄或合併的消息
+        self.raw_messages = 0
+        self.raw_bytes = 0
+
+        # 心跳
+        self._ping_rtts: Deque[float] = deque(maxlen=history)
+
+        # 連接歷史
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self.connects = 0
+        self.disconnects = 0
+        self._connected_at: Optional[float] = None
+
+    # ==================== 記錄 ====================
+
+    def on_raw(self, size: int) -> None:
+        """記錄未解碼的消息（跳過或合併）"""
+        with self._lock:
+            self.raw_messages += 1
+            self.raw_bytes += size
+
+    def on_message(self, topic: str, size: int, decode_seconds: float, exchange_ms: Optional[int] = None) -> None:
+        """
+        記錄一條已解碼的消息
+
+        Args:
+            topic: 主題
+            size: 原始消息長度
+            decode_seconds: 解碼耗時
+            exchange_ms: 消息中的交易所毫秒時間戳
+        """
+        now = time.time()
+        with self._lock:
+            stats = self._topics.get(topic)
+            if stats is None:
+                stats = self._topics[topic] = TopicStats(now)
+            stats._roll(now, self.rate_window)
+            stats.messages += 1
+            stats._window_count += 1
+            stats.bytes += size
+            stats.decode_time += decode_seconds
+            stats.last_received = now
+            if exchange_ms is not None:
+                lag = now - exchange_ms / 1000
+                stats.lag_last = lag
+                stats.lag_sum += lag
+                stats.lag_count += 1
+                if lag > stats.lag_max:
+                    stats.lag_max = lag
+
+    def on_callback(self, topic: str, seconds: float) -> None:
+        """記錄一次回調耗時"""
+        with self._lock:
+            stats = self._topics.get(topic)
+            if stats is None:
+                stats = self._topics[topic] = TopicStats(time.time())
+            stats.callbacks += 1
+            stats.callback_time += seconds
+
+    def timed_callback(self, handler, message: Dict[str, Any]) -> None:
+        """調用回調並記錄耗時"""
+        started = perf_counter()
+        try:
+            handler(message)
+        finally:
+            self.on_callback(topic_of(message), perf_counter() - started)
+
+    def on_pong(self, ws) -> None:
+        """
+        以 websocket-client 的 last_ping_tm / last_pong_tm 記錄 ping 往返時間
+
+        Args:
+            ws: websocket.WebSocketApp
+        """
+        ping, pong = getattr(ws, "last_ping_tm", 0), getattr(ws, "last_pong_tm", 0)
+        if ping and pong >= ping:
+            with self._lock:
+                self._ping_rtts.append(pong - ping)
+
+    def on_open(self) -> None:
+        """記錄連接建立"""
+        now = time.time()
+        with self._lock:
+            self.connects += 1
+            self._connected_at = now
+            self._events.append({"time": now, "event": "open"})
+
+    def on_close(self, code: Any = None, reason: Any = None) -> None:
+        """記錄連接關閉"""
+        now = time.time()
+        with self._lock:
+            self.disconnects += 1
+            duration = now - self._connected_at if self._connected_at is not None else None
+            self._connected_at = None
+            self._events.append({"time": now, "event": "close", "code": code, "reason": reason, "duration": duration})
+
+    # ==================== 讀取 ====================
+
+    def topics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        各主題統計
+
+        Returns:
+            {主題: {'messages', 'bytes', 'rate', 'age', 'decode_avg', 'callback_avg', 'lag', 'lag_max', ...}}
+        """
+        now = time.time()
+        with self._lock:
+            return {topic: stats.as_dict(now, self.rate_window) for topic, stats in self._topics.items()}
+
+    def stale_topics(self, max_age: float) -> List[str]:
+        """
+        超過 max_age 秒沒有收到消息的主題
+
+        Args:
+            max_age: 允許的最長靜默時間（秒）
+        """
+        now = time.time()
+        with self._lock:
+            return [topic for topic, stats in self._topics.items() if now - stats.last_received > max_age]
+
+    def lagging_topics(self, max_lag: float) -> List[str]:
+        """
+        最近一條消息的延遲超過 max_lag 秒的主題
+
+        Args:
+            max_lag: 允許的最大延遲（秒）
+        """
+        with self._lock:
+            return [
+                topic for topic, stats in self._topics.items()
+                if stats.lag_last is not None and stats.lag_last > max_lag
+            ]
+
+    def ping(self) -> Dict[str, Any]:
+        """
+        ping 往返時間（秒）
+
+        Returns:
+            {'last', 'avg', 'max', 'count'}；尚未收到 pong 時數值為 None
+        """
+        with self._lock:
+            rtts = list(self._ping_rtts)
+        if not rtts:
+            return {"last": None, "avg": None, "max": None, "count": 0}
+        return {"last": rtts[-1], "avg": sum(rtts) / len(rtts), "max": max(rtts), "count": len(rtts)}
+
+    def connection_history(self) -> List[Dict[str, Any]]:
+        """連接建立/關閉事件（時間為 Unix 秒）"""
+        with self._lock:
+            return list(self._events)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        全部指標
+
+        Returns:
+            {'topics', 'ping', 'connects', 'disconnects', 'connected_for', 'history', 'raw_messages', 'raw_bytes'}
+        """
+        topics = self.topics()
+        with self._lock:
+            connected_for = time.time() - self._connected_at if self._connected_at is not None else None
+            summary = {
+                "connects": self.connects,
+                "disconnects": self.disconnects,
+                "connected_for": connected_for,
+                "raw_messages": self.raw_messages,
+                "raw_bytes": self.raw_bytes,
+            }
+        return {"topics": topics, "ping": self.ping(), "history": self.connection_history(), **summary}
+
+    def reset(self) -> None:
+        """清空主題統計和心跳記錄（保留連接歷史）"""
+        with self._lock:
+            self._topics.clear()
+            self._ping_rtts.clear()
+            self.raw_messages = 0
+            self.raw_bytes = 0
+
+    def __repr__(self):
+        return f"WebSocketMetrics(topics={len(self._topics)}, connects={self.connects})"